@@ -0,0 +1 @@
+"""Benchmarks for simplise-api-client package."""
@@ -0,0 +1,27 @@
+"""ベンチマークスイートのフィクスチャ。
+
+``pytest benchmarks`` で実行します（pytest-benchmark が必要です）。結果は
+``--benchmark-autosave`` で ``.benchmarks/`` に保存し、``--benchmark-compare`` で
+前回の結果と比較できます。
+"""
+
+import asyncio
+from collections.abc import Iterator
+
+import pytest
+
+from simplise_api_client.testing import StandInServer
+
+
+@pytest.fixture(scope="session")
+def stand_in_url() -> Iterator[str]:
+    """セッション中に共有する代替サーバーのベースURLを返す。"""
+    with StandInServer() as server:
+        yield server.url
+
+
+@pytest.fixture
+def runner() -> Iterator[asyncio.Runner]:
+    """非同期クライアントのベンチマークで各ラウンドを実行するイベントループを返す。"""
+    with asyncio.Runner() as runner:
+        yield runner
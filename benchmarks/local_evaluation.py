@@ -0,0 +1,56 @@
+"""ローカル評価のマルチプロセスでのスケーリングのベンチマーク。
+
+小数演算の多いルールを大量の行に対して ``evaluate_many`` で評価し、
+プロセス数ごとのスループットと1プロセスに対する速度向上率を表示します。
+
+Usage:
+    PYTHONPATH=src python benchmarks/local_evaluation.py [ROWS]
+"""
+
+import os
+import sys
+import time
+
+from simplise_api_client import Action, evaluate_many
+
+ROWS = 200_000
+
+RULE = Action.Decimal.add(
+    Action.Decimal.mul(Action.Data.input("price"), Action.Data.input("quantity"), "1.08"),
+    Action.Decimal.div(Action.Data.input("fee"), "3"),
+    Action.Decimal.sub(Action.Data.input("price"), "0.01"),
+)
+
+
+def _rows(count: int) -> list[dict[str, str]]:
+    """評価する入力行を作成する。"""
+    return [{"price": f"{i % 1000}.25", "quantity": str(i % 17 + 1), "fee": f"{i % 7}.5"} for i in range(count)]
+
+
+def _measure(rows: list[dict[str, str]], processes: int) -> float:
+    """指定したプロセス数で全行を評価し、経過秒数を返す。"""
+    start = time.perf_counter()
+    for result in evaluate_many(RULE, rows, processes=processes):
+        if isinstance(result, Exception):
+            raise result
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    """プロセス数ごとのスループットを表示する。"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    rows = _rows(count)
+    cpus = os.cpu_count() or 1
+    print(f"rows={count} cpus={cpus}")  # noqa: T201
+
+    baseline = None
+    for processes in sorted({1, 2, 4, cpus}):
+        elapsed = _measure(rows, processes)
+        baseline = baseline or elapsed
+        print(  # noqa: T201
+            f"processes={processes:>3}  {count / elapsed:>10,.0f} rows/s  speedup x{baseline / elapsed:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""ミドルウェアチェーンのオーバーヘッドのベンチマーク。
+
+送信部分を固定のレスポンスに置き換えた同期クライアントの ``action_logic.post`` について、
+ミドルウェアなし、何もしないミドルウェア1個、5個の場合の1リクエストあたりの時間を比較します。
+
+Usage:
+    PYTHONPATH=src python benchmarks/middleware_overhead.py
+"""
+
+import timeit
+from unittest.mock import patch
+
+import requests
+
+from simplise_api_client import Middleware, SimpliseClient
+from simplise_api_client.middleware import MiddlewareChain
+
+NUMBER = 5000
+RULE = {"num.add": [{"var": "a"}, "1"]}
+INPUT = {"a": "1"}
+
+
+def _response() -> requests.Response:
+    """固定のレスポンスを作成する。"""
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b"2"  # noqa: SLF001
+    return response
+
+
+def main() -> None:
+    """ミドルウェアの数ごとの1リクエストあたりの時間とフック呼び出しの時間を表示する。"""
+    response = _response()
+    baseline = None
+    with patch("requests.post", return_value=response):
+        for count in (0, 1, 5):
+            client = SimpliseClient(api_key="benchmark", middleware=[Middleware() for _ in range(count)])
+            post = client.action_logic.post
+            seconds = min(timeit.repeat(lambda post=post: post(RULE, INPUT), number=NUMBER, repeat=7))
+            per_call = seconds / NUMBER * 1e6
+            baseline = baseline or per_call
+            print(f"post  middleware={count}  {per_call:7.2f} us/request  ({per_call - baseline:+.2f} us)")  # noqa: T201
+
+    # [AI GENERATED] クライアント側の処理を除いたフックの呼び出しのみの時間
+    request = SimpliseClient(api_key="benchmark").action_logic._core.prepare(RULE, INPUT)  # noqa: SLF001
+    for count in (0, 1, 5):
+        chain = MiddlewareChain([Middleware() for _ in range(count)])
+        seconds = min(timeit.repeat(lambda chain=chain: chain and chain.before_request(request), number=100_000))
+        print(f"chain middleware={count}  {seconds / 100_000 * 1e9:7.1f} ns/hook")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""multipart/form-dataエンコードのベンチマーク。
+
+action-logicリクエストのボディ構築について、requests/httpxの ``files=`` による
+エンコードと ``MultipartEncoder`` を1KBと10MBの入力で比較します。
+
+Usage:
+    PYTHONPATH=src python benchmarks/multipart_encoding.py
+"""
+
+import json
+import timeit
+import tracemalloc
+from collections.abc import Callable
+
+import httpx
+import requests
+
+from simplise_api_client.multipart import MultipartEncoder
+
+RULE = {"num.add": [{"var": "items"}, "1"]}
+SIZES = {"1KB": 1024, "10MB": 10 * 1024 * 1024}
+
+
+def _make_input(size: int) -> str:
+    """指定サイズ程度のJSON入力を作成する。"""
+    item = "x" * 62
+    return json.dumps({"items": [item] * (size // (len(item) + 3))})
+
+
+def _requests_files(action: str, input_json: str) -> int:
+    """requestsのfiles=と同じ方法でボディを構築する。"""
+    prepared = requests.Request(
+        "POST",
+        "http://localhost/action-logic",
+        files={"action": (None, action, "application/json"), "input": (None, input_json, "application/json")},
+    ).prepare()
+    return len(prepared.body)
+
+
+def _httpx_files(action: str, input_json: str) -> int:
+    """httpxのfiles=と同じ方法でボディを構築する。"""
+    request = httpx.Request(
+        "POST",
+        "http://localhost/action-logic",
+        files={"action": (None, action, "application/json"), "input": (None, input_json, "application/json")},
+    )
+    return sum(len(chunk) for chunk in request.stream)
+
+
+def _encoder(encoder: MultipartEncoder) -> Callable[[str, str], int]:
+    """MultipartEncoderでボディを構築し、送信時と同じようにセグメントを走査する関数を返す。"""
+
+    def encode(action: str, input_json: str) -> int:
+        body = encoder.encode(action.encode(), input_json.encode())
+        return sum(len(chunk) for chunk in body)
+
+    return encode
+
+
+def _measure(func: Callable[[str, str], int], action: str, input_json: str) -> tuple[float, int]:
+    """1回あたりの実行時間（秒）と確保されたメモリのピーク（バイト）を返す。"""
+    timer = timeit.Timer(lambda: func(action, input_json))
+    loops, _ = timer.autorange()
+    best = min(timer.repeat(repeat=5, number=loops)) / loops
+
+    tracemalloc.start()
+    func(action, input_json)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    """ベンチマークを実行して結果を表示する。"""
+    action = json.dumps(RULE)
+    candidates = {
+        "requests files=": _requests_files,
+        "httpx files=": _httpx_files,
+        "MultipartEncoder": _encoder(MultipartEncoder()),
+    }
+    print(f"{'input':>6} {'encoder':<18} {'time':>12} {'peak memory':>14}")  # noqa: T201
+    for label, size in SIZES.items():
+        input_json = _make_input(size)
+        for name, func in candidates.items():
+            seconds, peak = _measure(func, action, input_json)
+            print(f"{label:>6} {name:<18} {seconds * 1e6:>9.1f} us {peak / 1024:>11.1f} KB")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""クライアント側の処理のベンチマーク。
+
+ネットワークを使わずに、``Operation`` の構築と ``to_dict``、リクエストの検証、
+action-logic リクエストのシリアライズ（multipart エンコード）とレスポンスの検証の時間を計測します。
+"""
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from simplise_api_client import Action, SimpliseClient
+from simplise_api_client.actions import Operation
+from simplise_api_client.core import ActionLogicCore, OperationCore
+
+# [AI GENERATED] 入れ子の深さが異なる代表的なルール
+DEPTHS = (1, 8, 64)
+INPUT = {"value": "5", "rate": "1.08"} | {f"item{i}": str(i) for i in range(100)}
+
+
+def _operation(depth: int) -> Operation:
+    """指定した深さまで decimal.add を入れ子にした Operation を構築する。"""
+    operation = Action.Decimal.add(Action.Data.input("value"), 1)
+    for i in range(depth - 1):
+        operation = Action.Decimal.add(operation, i)
+    return operation
+
+
+@pytest.fixture(scope="module")
+def client() -> SimpliseClient:
+    """リクエストを送信しないクライアントを返す。"""
+    return SimpliseClient(api_key="benchmark", base_url="http://127.0.0.1")
+
+
+@pytest.mark.benchmark(group="builder")
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_operation_construction(benchmark: BenchmarkFixture, depth: int) -> None:
+    """Operation の構築。"""
+    benchmark(_operation, depth)
+
+
+@pytest.mark.benchmark(group="builder")
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_operation_to_dict(benchmark: BenchmarkFixture, depth: int) -> None:
+    """Operation の ``to_dict`` による JsonLogic ルールへの変換。"""
+    operation = _operation(depth)
+    benchmark(operation.to_dict)
+
+
+@pytest.mark.benchmark(group="validation")
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_prepare_execute(benchmark: BenchmarkFixture, client: SimpliseClient, depth: int) -> None:
+    """``execute`` の前処理（ルールへの変換と入力データの検証）。"""
+    core = OperationCore(client)
+    operation = _operation(depth)
+    benchmark(core.prepare_execute, operation, INPUT)
+
+
+@pytest.mark.benchmark(group="serialization")
+@pytest.mark.parametrize("depth", DEPTHS)
+def test_prepare_action_logic(benchmark: BenchmarkFixture, client: SimpliseClient, depth: int) -> None:
+    """action-logic リクエストの検証と multipart ボディの構築。"""
+    core = ActionLogicCore(client)
+    rule = _operation(depth).to_dict()
+    benchmark(core.prepare, rule, INPUT)
+
+
+@pytest.mark.benchmark(group="serialization")
+def test_parse_response(benchmark: BenchmarkFixture, client: SimpliseClient) -> None:
+    """action-logic のレスポンスの検証。"""
+    core = ActionLogicCore(client)
+    benchmark(core.parse_response, "12345.6789")
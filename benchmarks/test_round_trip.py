@@ -0,0 +1,150 @@
+"""代替サーバーに対するリクエストのベンチマーク。
+
+同じプロセス内の代替サーバー（``simplise_api_client.testing.StandInServer``）に対して、同期クライアント、
+``AsyncSimpliseClient``、``simplise_client.HttpClient`` の1リクエストあたりのレイテンシと、
+並行数ごとのスループットを計測します。スループットは ``extra_info`` の
+``requests_per_second`` に記録されます。
+"""
+
+import asyncio
+import json
+from collections.abc import Awaitable, Callable, Iterator
+from urllib.parse import quote
+
+import pytest
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from simplise_api_client import Action, AsyncSimpliseClient, SimpliseClient
+from simplise_client import HttpClient
+
+RULE = {"decimal.add": [{"input": ["value"]}, "10"]}
+INPUT = {"value": "5"}
+# [AI GENERATED] HttpClient の post は入力データなしの JSON でルールを送信する
+CONSTANT_RULE = {"decimal.add": ["5", "10"]}
+# [AI GENERATED] スループットの計測で1ラウンドに送信するリクエスト数と並行数
+REQUESTS_PER_ROUND = 32
+CONCURRENCY = (1, 4, 16)
+ROUNDS = 3
+
+
+def _record_throughput(benchmark: BenchmarkFixture) -> None:
+    """1ラウンドあたりの平均時間からスループットを求めて結果に記録する。"""
+    if benchmark.stats is not None:
+        benchmark.extra_info["requests_per_second"] = REQUESTS_PER_ROUND / benchmark.stats.stats.mean
+
+
+async def _gather_limited(call: Callable[[], Awaitable[object]], concurrency: int) -> None:
+    """``REQUESTS_PER_ROUND`` 回の呼び出しを最大 ``concurrency`` 個ずつ並行して実行する。"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited() -> None:
+        async with semaphore:
+            await call()
+
+    await asyncio.gather(*(limited() for _ in range(REQUESTS_PER_ROUND)))
+
+
+@pytest.fixture
+def sync_client(stand_in_url: str) -> SimpliseClient:
+    """代替サーバーに接続する同期クライアントを返す。"""
+    return SimpliseClient(api_key="benchmark", base_url=stand_in_url)
+
+
+@pytest.fixture
+def async_client(stand_in_url: str, runner: asyncio.Runner) -> Iterator[AsyncSimpliseClient]:
+    """代替サーバーに接続する非同期クライアントを返す。"""
+    client = AsyncSimpliseClient(api_key="benchmark", base_url=stand_in_url)
+    yield client
+    runner.run(client.aclose())
+
+
+@pytest.fixture
+def http_client(stand_in_url: str, runner: asyncio.Runner) -> Iterator[HttpClient]:
+    """代替サーバーに接続する HttpClient を返す。"""
+    client = HttpClient({"api_key": "benchmark", "base_url": stand_in_url, "timeout": 5, "retry_config": None})
+    yield client
+    runner.run(client.aclose())
+
+
+@pytest.mark.benchmark(group="latency")
+def test_sync_execute(benchmark: BenchmarkFixture, sync_client: SimpliseClient) -> None:
+    """同期クライアントの ``execute``。"""
+    operation = Action.Decimal.add(Action.Data.input("value"), 10)
+    assert benchmark(sync_client.action.execute, operation, INPUT) == "15"
+
+
+@pytest.mark.benchmark(group="latency")
+def test_sync_execute_logic(benchmark: BenchmarkFixture, sync_client: SimpliseClient) -> None:
+    """同期クライアントの ``execute_logic``。"""
+    assert benchmark(sync_client.action.execute_logic, RULE, INPUT) == "15"
+
+
+@pytest.mark.benchmark(group="latency")
+def test_async_execute_logic(
+    benchmark: BenchmarkFixture, async_client: AsyncSimpliseClient, runner: asyncio.Runner
+) -> None:
+    """``AsyncSimpliseClient`` の ``execute_logic``。"""
+    assert benchmark(lambda: runner.run(async_client.action.execute_logic(RULE, INPUT))) == "15"
+
+
+@pytest.mark.benchmark(group="latency")
+def test_http_client_action_logic(benchmark: BenchmarkFixture, http_client: HttpClient, runner: asyncio.Runner) -> None:
+    """``HttpClient`` の ``/action-logic`` への POST。"""
+    response = benchmark(lambda: runner.run(http_client.post("/action-logic", CONSTANT_RULE)))
+    assert response["data"] == 15  # noqa: PLR2004
+
+
+@pytest.mark.benchmark(group="latency")
+def test_http_client_logic(benchmark: BenchmarkFixture, http_client: HttpClient, runner: asyncio.Runner) -> None:
+    """``HttpClient`` の ``/logic`` への GET。"""
+    endpoint = "/logic?" + quote(json.dumps({"num.add": ["1", "2"]}))
+    assert benchmark(lambda: runner.run(http_client.get(endpoint)))["data"] == 3  # noqa: PLR2004
+
+
+@pytest.mark.benchmark(group="latency")
+def test_http_client_action(benchmark: BenchmarkFixture, http_client: HttpClient, runner: asyncio.Runner) -> None:
+    """``HttpClient`` の ``/action`` への POST。"""
+    endpoint = "/action?" + quote(json.dumps(RULE))
+    assert benchmark(lambda: runner.run(http_client.post(endpoint, INPUT)))["data"] == 15  # noqa: PLR2004
+
+
+@pytest.mark.benchmark(group="throughput-sync")
+@pytest.mark.parametrize("concurrency", CONCURRENCY)
+def test_sync_execute_many(benchmark: BenchmarkFixture, sync_client: SimpliseClient, concurrency: int) -> None:
+    """同期クライアントの ``execute_many`` のスループット。"""
+    operation = Action.Decimal.add(Action.Data.input("value"), 10)
+    pairs = [(operation, INPUT)] * REQUESTS_PER_ROUND
+
+    def run() -> list[str | Exception]:
+        return list(sync_client.action.execute_many(pairs, workers=concurrency))
+
+    assert benchmark.pedantic(run, rounds=ROUNDS, warmup_rounds=1) == ["15"] * REQUESTS_PER_ROUND
+    _record_throughput(benchmark)
+
+
+@pytest.mark.benchmark(group="throughput-async")
+@pytest.mark.parametrize("concurrency", CONCURRENCY)
+def test_async_execute_logic_concurrently(
+    benchmark: BenchmarkFixture, async_client: AsyncSimpliseClient, runner: asyncio.Runner, concurrency: int
+) -> None:
+    """``AsyncSimpliseClient`` の並行実行のスループット。"""
+
+    def run() -> None:
+        runner.run(_gather_limited(lambda: async_client.action.execute_logic(RULE, INPUT), concurrency))
+
+    benchmark.pedantic(run, rounds=ROUNDS, warmup_rounds=1)
+    _record_throughput(benchmark)
+
+
+@pytest.mark.benchmark(group="throughput-http-client")
+@pytest.mark.parametrize("concurrency", CONCURRENCY)
+def test_http_client_concurrently(
+    benchmark: BenchmarkFixture, http_client: HttpClient, runner: asyncio.Runner, concurrency: int
+) -> None:
+    """``HttpClient`` の並行実行のスループット。"""
+
+    def run() -> None:
+        runner.run(_gather_limited(lambda: http_client.post("/action-logic", CONSTANT_RULE), concurrency))
+
+    benchmark.pedantic(run, rounds=ROUNDS, warmup_rounds=1)
+    _record_throughput(benchmark)
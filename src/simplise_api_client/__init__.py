@@ -1,36 +1,98 @@
 """# Simplise API Client
 
 This module provides a client for interacting with the Simplise API.
+
+Attributes are loaded lazily on first access so that importing the package
+does not pull in ``requests``, ``pydantic`` or the action modules.
 """
+# 初回アクセス時に属性を読み込むことで、パッケージのインポート時間を短縮する。
+
+from typing import TYPE_CHECKING
+
+from simplise_api_client.lazy import lazy_module
 
-from simplise_api_client.actions import (
-    Action,
-    action_and,
-    action_bool,
-    action_input,
-    action_num_add,
-    action_num_between,
-    action_num_div,
-    action_num_gt,
-    action_num_gte,
-    action_num_lt,
-    action_num_lte,
-    action_num_max,
-    action_num_min,
-    action_num_mod,
-    action_num_mul,
-    action_num_sub,
-    action_obj,
-)
-from simplise_api_client.base import SimpliseClient
-from simplise_api_client.models import (
-    ActionExecuteRequest,
-    ActionExecuteResponse,
-    ActionLogicRequest,
-    ActionLogicResponse,
-    JsonLogicExecuteRequest,
-    JsonLogicExecuteResponse,
-)
+if TYPE_CHECKING:
+    from simplise_api_client.actions import (
+        Action,
+        action_and,
+        action_bool,
+        action_input,
+        action_num_add,
+        action_num_between,
+        action_num_div,
+        action_num_gt,
+        action_num_gte,
+        action_num_lt,
+        action_num_lte,
+        action_num_max,
+        action_num_min,
+        action_num_mod,
+        action_num_mul,
+        action_num_sub,
+        action_obj,
+    )
+    from simplise_api_client.async_client import AsyncSimpliseClient
+    from simplise_api_client.base import SimpliseClient
+    from simplise_api_client.cache import CachedError, MemoryCache, RedisCache, ResultCache, SQLiteCache, TieredCache
+    from simplise_api_client.evaluator import EvaluationError, evaluate, evaluate_many
+    from simplise_api_client.metrics import MetricsRegistry, Timings, collect_timings
+    from simplise_api_client.middleware import Middleware, ResponseInfo
+    from simplise_api_client.models import (
+        ActionExecuteRequest,
+        ActionExecuteResponse,
+        ActionLogicRequest,
+        ActionLogicResponse,
+        JsonLogicExecuteRequest,
+        JsonLogicExecuteResponse,
+    )
+    from simplise_api_client.optimizer import OptimizationReport, optimize_rule
+    from simplise_api_client.tracing import Tracer
+
+# 公開名とその定義元モジュールの対応表
+_LAZY_IMPORTS: dict[str, str] = {
+    "Action": "simplise_api_client.actions",
+    "ActionExecuteRequest": "simplise_api_client.models",
+    "ActionExecuteResponse": "simplise_api_client.models",
+    "ActionLogicRequest": "simplise_api_client.models",
+    "ActionLogicResponse": "simplise_api_client.models",
+    "AsyncSimpliseClient": "simplise_api_client.async_client",
+    "CachedError": "simplise_api_client.cache",
+    "EvaluationError": "simplise_api_client.evaluator",
+    "JsonLogicExecuteRequest": "simplise_api_client.models",
+    "JsonLogicExecuteResponse": "simplise_api_client.models",
+    "MemoryCache": "simplise_api_client.cache",
+    "MetricsRegistry": "simplise_api_client.metrics",
+    "Middleware": "simplise_api_client.middleware",
+    "OptimizationReport": "simplise_api_client.optimizer",
+    "RedisCache": "simplise_api_client.cache",
+    "ResponseInfo": "simplise_api_client.middleware",
+    "ResultCache": "simplise_api_client.cache",
+    "SQLiteCache": "simplise_api_client.cache",
+    "SimpliseClient": "simplise_api_client.base",
+    "TieredCache": "simplise_api_client.cache",
+    "Timings": "simplise_api_client.metrics",
+    "Tracer": "simplise_api_client.tracing",
+    "action_and": "simplise_api_client.actions",
+    "action_bool": "simplise_api_client.actions",
+    "action_input": "simplise_api_client.actions",
+    "action_num_add": "simplise_api_client.actions",
+    "action_num_between": "simplise_api_client.actions",
+    "action_num_div": "simplise_api_client.actions",
+    "action_num_gt": "simplise_api_client.actions",
+    "action_num_gte": "simplise_api_client.actions",
+    "action_num_lt": "simplise_api_client.actions",
+    "action_num_lte": "simplise_api_client.actions",
+    "action_num_max": "simplise_api_client.actions",
+    "action_num_min": "simplise_api_client.actions",
+    "action_num_mod": "simplise_api_client.actions",
+    "action_num_mul": "simplise_api_client.actions",
+    "action_num_sub": "simplise_api_client.actions",
+    "action_obj": "simplise_api_client.actions",
+    "collect_timings": "simplise_api_client.metrics",
+    "evaluate": "simplise_api_client.evaluator",
+    "evaluate_many": "simplise_api_client.evaluator",
+    "optimize_rule": "simplise_api_client.optimizer",
+}
 
 __all__ = [
     "Action",
@@ -38,9 +100,23 @@ __all__ = [
     "ActionExecuteResponse",
     "ActionLogicRequest",
     "ActionLogicResponse",
+    "AsyncSimpliseClient",
+    "CachedError",
+    "EvaluationError",
     "JsonLogicExecuteRequest",
     "JsonLogicExecuteResponse",
+    "MemoryCache",
+    "MetricsRegistry",
+    "Middleware",
+    "OptimizationReport",
+    "RedisCache",
+    "ResponseInfo",
+    "ResultCache",
+    "SQLiteCache",
     "SimpliseClient",
+    "TieredCache",
+    "Timings",
+    "Tracer",
     "action_and",
     "action_bool",
     "action_input",
@@ -57,4 +133,11 @@ __all__ = [
     "action_num_mul",
     "action_num_sub",
     "action_obj",
+    "collect_timings",
+    "evaluate",
+    "evaluate_many",
+    "optimize_rule",
 ]
+
+
+__getattr__, __dir__ = lazy_module(__name__, _LAZY_IMPORTS)
@@ -3,26 +3,54 @@
 This module provides operation builders for the Simplise API.
 """
 # 操作ビルダーを提供するSimplise APIクライアントのアクション操作モジュール。
+# 各操作モジュールは初回アクセス時に読み込む。
 
-from simplise_api_client.actions.data import (
-    action_bool,
-    action_input,
-    action_num_add,
-    action_num_between,
-    action_num_div,
-    action_num_gt,
-    action_num_gte,
-    action_num_lt,
-    action_num_lte,
-    action_num_max,
-    action_num_min,
-    action_num_mod,
-    action_num_mul,
-    action_num_sub,
-    action_obj,
-)
-from simplise_api_client.actions.logic import action_and
-from simplise_api_client.actions.utils import Action, Operation
+from typing import TYPE_CHECKING
+
+from simplise_api_client.lazy import lazy_module
+
+if TYPE_CHECKING:
+    from simplise_api_client.actions.data import (
+        action_bool,
+        action_input,
+        action_num_add,
+        action_num_between,
+        action_num_div,
+        action_num_gt,
+        action_num_gte,
+        action_num_lt,
+        action_num_lte,
+        action_num_max,
+        action_num_min,
+        action_num_mod,
+        action_num_mul,
+        action_num_sub,
+        action_obj,
+    )
+    from simplise_api_client.actions.logic import action_and
+    from simplise_api_client.actions.utils import Action, Operation
+
+# 公開名とその定義元モジュールの対応表
+_LAZY_IMPORTS: dict[str, str] = {
+    "Action": "simplise_api_client.actions.utils",
+    "Operation": "simplise_api_client.actions.operation",
+    "action_and": "simplise_api_client.actions.logic.add",
+    "action_bool": "simplise_api_client.actions.data.bool",
+    "action_input": "simplise_api_client.actions.data.input",
+    "action_num_add": "simplise_api_client.actions.data.num",
+    "action_num_between": "simplise_api_client.actions.data.num",
+    "action_num_div": "simplise_api_client.actions.data.num",
+    "action_num_gt": "simplise_api_client.actions.data.num",
+    "action_num_gte": "simplise_api_client.actions.data.num",
+    "action_num_lt": "simplise_api_client.actions.data.num",
+    "action_num_lte": "simplise_api_client.actions.data.num",
+    "action_num_max": "simplise_api_client.actions.data.num",
+    "action_num_min": "simplise_api_client.actions.data.num",
+    "action_num_mod": "simplise_api_client.actions.data.num",
+    "action_num_mul": "simplise_api_client.actions.data.num",
+    "action_num_sub": "simplise_api_client.actions.data.num",
+    "action_obj": "simplise_api_client.actions.data.input",
+}
 
 __all__ = [
     "Action",
@@ -44,3 +72,6 @@ __all__ = [
     "action_num_sub",
     "action_obj",
 ]
+
+
+__getattr__, __dir__ = lazy_module(__name__, _LAZY_IMPORTS)
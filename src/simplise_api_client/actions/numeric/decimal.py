@@ -1,6 +1,6 @@
 import warnings
 
-from simplise_api_client.actions import Operation
+from simplise_api_client.actions.operation import Operation
 from simplise_api_client.type import OperationArg
 
 
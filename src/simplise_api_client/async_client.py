@@ -0,0 +1,336 @@
+"""# Simplise API Async Client
+
+This module provides an asynchronous client for interacting with the Simplise API.
+
+``AsyncSimpliseClient`` has the same ``action``/``action_logic`` surface as
+``SimpliseClient`` and builds its requests with the same core, but sends them
+with httpx so that it does not block the event loop.
+
+The httpx dependency is optional: install it with ``pip install simplise-api-client[async]``.
+"""
+# Operationビルダーをイベントループをブロックせずに使用するための非同期クライアント。
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Callable, Iterable
+from types import TracebackType
+from typing import Any, Self
+
+try:
+    import httpx
+except ImportError as e:  # pragma: no cover
+    msg = "AsyncSimpliseClient requires httpx. Install it with `pip install simplise-api-client[async]`."
+    raise ImportError(msg) from e
+
+from simplise_api_client.actions import Operation
+from simplise_api_client.cache import ResultCache, afetch, cache_key
+from simplise_api_client.core import (
+    DEFAULT_BASE_URL,
+    DEFAULT_TIMEOUT,
+    ActionLogicCore,
+    ActionLogicExchange,
+    OperationCore,
+    PreparedRequest,
+)
+from simplise_api_client.metrics import MetricsRegistry, aiter_counted
+from simplise_api_client.middleware import Middleware, MiddlewareChain
+from simplise_api_client.multipart import InputSource
+from simplise_api_client.references import RuleRegistry
+from simplise_api_client.streaming import StreamFormat, aiter_decoded
+from simplise_api_client.tracing import (
+    SPAN_EXECUTE,
+    SPAN_EXECUTE_LOGIC,
+    SPAN_SERIALIZE,
+    SPAN_VALIDATE,
+    Span,
+    Tracer,
+    Tracing,
+    rule_hash,
+)
+from simplise_api_client.type import JsonLogicRule
+
+logger = logging.getLogger(__name__)
+
+# ストリーミング時にコネクションから読み込むチャンクサイズ（バイト）
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class AsyncActionLogicAPI:
+    """Asynchronous API client for action-logic endpoint."""
+
+    def __init__(self, client: "AsyncSimpliseClient") -> None:
+        """Initialize AsyncActionLogicAPI with a reference to the client."""
+        self.client = client
+        self._core = ActionLogicCore(client)
+
+    async def post(self, rule: JsonLogicRule, input_data: dict[str, Any] | InputSource | None = None) -> str:
+        """Execute JsonLogic rule via action-logic POST endpoint.
+
+        Args:
+            rule (JsonLogicRule): The JsonLogic rule to execute
+            input_data (dict | InputSource, optional): Input data to be sent as form data
+
+        Returns:
+            str: The result from the API
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails
+            ValidationError: If the request data validation fails
+        """
+        request = self._prepare(rule, input_data)
+        with self.client.metrics.measure(request.url, bytes_sent=request.content_length) as observation:
+            response = await self._exchange(self._core.exchange(request, observation))
+        response.raise_for_status()
+        return self._core.parse_response(response.text)
+
+    async def post_stream(
+        self,
+        rule: JsonLogicRule,
+        input_data: dict[str, Any] | InputSource | None = None,
+        stream_format: StreamFormat = "bytes",
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> AsyncIterator[Any]:
+        """Execute JsonLogic rule and stream the response body.
+
+        Args:
+            rule (JsonLogicRule): The JsonLogic rule to execute
+            input_data (dict | InputSource, optional): Input data to be sent as form data
+            stream_format (StreamFormat): How to decode the response body
+            chunk_size (int): Size of the chunks read from the connection in bytes
+
+        Yields:
+            Any: Raw chunks for ``bytes``, decoded JSON values otherwise
+
+        Raises:
+            httpx.HTTPStatusError: If the API request fails
+            ValidationError: If the request data validation fails
+        """
+        request = self._prepare(rule, input_data)
+        # [AI GENERATED] ストリーミングではボディを読み終えるまでをレイテンシとして記録する
+        with self.client.metrics.measure(request.url, bytes_sent=request.content_length) as observation:
+            exchange = self._core.exchange(request, observation)
+            response = await self._exchange(exchange, stream=True)
+            try:
+                response.raise_for_status()
+                chunks = aiter_counted(response.aiter_bytes(chunk_size), observation)
+                async for item in aiter_decoded(chunks, stream_format):
+                    yield item
+            except httpx.TransportError as e:
+                exchange.failed(e)
+                raise
+            finally:
+                await response.aclose()
+
+    def _prepare(self, rule: JsonLogicRule, input_data: dict[str, Any] | InputSource | None) -> PreparedRequest:
+        """Build the request and pass it through the middleware."""
+        with self.client.tracing.span(SPAN_SERIALIZE):
+            request = self._core.prepare(rule, input_data, asynchronous=True)
+        return self._core.before_request(request)
+
+    async def _exchange(self, exchange: ActionLogicExchange, *, stream: bool = False) -> httpx.Response:
+        """Send the requests of an exchange, returning the final response.
+
+        A streamed response is returned before its body is read and must be closed by the caller.
+        """
+        http = self.client.http
+        while True:
+            with exchange.attempt() as sent:
+                response = await http.send(
+                    http.build_request(
+                        sent.method, sent.url, content=sent.body, headers=sent.headers, timeout=sent.timeout
+                    ),
+                    stream=stream,
+                )
+                exchange.received(response.status_code, response.headers, None if stream else response.content)
+            if exchange.next_step(response.status_code, response.headers) is None:
+                return response
+            await response.aclose()
+
+
+class AsyncActionOperation:
+    def __init__(self, client: "AsyncSimpliseClient") -> None:
+        """Initialize AsyncActionOperation with a reference to the client."""
+        self.client = client
+        self._core = OperationCore(client)
+
+    async def execute(self, operation: Operation, data: dict[str, str] | None = None) -> str:
+        """Execute library model operation.
+
+        Args:
+            operation (Operation): The operation object to execute
+            data (dict[str, str] | None): The input data for the operation
+
+        Returns:
+            str: The result of the operation execution
+
+        Raises:
+            ValidationError: If the request data validation fails
+            RuntimeError: If the request fails
+        """
+        tracing = self.client.tracing
+        with tracing.span(SPAN_EXECUTE) as span:
+            with tracing.span(SPAN_VALIDATE):
+                rule, input_data = self._core.prepare_execute(operation, data)
+            if span is not None:
+                span.set_attribute("simplise.rule_hash", rule_hash(rule))
+            return await self._execute(rule, input_data, self._core.parse_execute, span)
+
+    async def execute_logic(self, rule: JsonLogicRule, data: dict[str, Any] | InputSource | None = None) -> str:
+        """Execute JsonLogic rule.
+
+        Args:
+            rule (JsonLogicRule): The JsonLogic rule to execute
+            data (dict | InputSource, optional): Input data for the rule, or an input source
+                streamed to the API as in SimpliseClient.action.execute_logic
+
+        Returns:
+            str: The result of the rule execution
+
+        Raises:
+            ValidationError: If the request data validation fails
+            RuntimeError: If the request fails
+        """
+        tracing = self.client.tracing
+        with tracing.span(SPAN_EXECUTE_LOGIC) as span:
+            with tracing.span(SPAN_VALIDATE):
+                rule, input_data = self._core.prepare_execute_logic(rule, data)
+            if span is not None:
+                span.set_attribute("simplise.rule_hash", rule_hash(rule))
+            return await self._execute(rule, input_data, self._core.parse_execute_logic, span)
+
+    async def execute_logic_stream(
+        self,
+        rule: JsonLogicRule,
+        data: dict[str, Any] | InputSource | None = None,
+        stream_format: StreamFormat = "bytes",
+    ) -> AsyncIterator[Any]:
+        """Execute JsonLogic rule and stream the result.
+
+        Args:
+            rule (JsonLogicRule): The JsonLogic rule to execute
+            data (dict | InputSource, optional): Input data for the rule
+            stream_format (StreamFormat): ``bytes`` for raw chunks, ``ndjson`` for one JSON value per line,
+                or ``json`` for the items of a JSON array, also under the ``result`` key of the response
+
+        Yields:
+            Any: Raw chunks for ``bytes``, decoded JSON values otherwise
+
+        Raises:
+            ValidationError: If the request data validation fails
+            RuntimeError: If the request fails
+        """
+        rule, input_data = self._core.prepare_execute_logic(rule, data, "execute_logic_stream")
+        try:
+            async for item in self.client.action_logic.post_stream(rule, input_data, stream_format):
+                yield item
+        except (httpx.HTTPError, ValueError) as e:
+            err_msg = f"Error streaming request: {e}"
+            raise RuntimeError(err_msg) from e
+
+    async def _execute(
+        self,
+        rule: JsonLogicRule,
+        input_data: dict[str, Any] | InputSource | None,
+        parse: Callable[[str], str],
+        span: Span | None,
+    ) -> str:
+        """Return the cached result of a prepared rule, or send it and cache its validated result.
+
+        The cache is accessed in a worker thread, so that a disk-backed cache does not block the event loop.
+        """
+
+        async def compute() -> str:
+            return parse(await self._send_request(rule, input_data))
+
+        cache = self.client.result_cache
+        key = cache_key(cache, rule, input_data)
+        if cache is None or key is None:
+            return await compute()
+        result, hit = await afetch(cache, key, compute)
+        if span is not None:
+            span.set_attribute("simplise.cache_hit", hit)
+        return result
+
+    async def _send_request(self, rule: JsonLogicRule, data: dict[str, Any] | InputSource | None = None) -> str:
+        """Send request to Simplise API."""
+        try:
+            result = await self.client.action_logic.post(rule, data)
+        except Exception as e:
+            err_msg = f"Error sending request: {e}"
+            raise RuntimeError(err_msg) from e
+        return result
+
+
+class AsyncSimpliseClient:
+    """An asynchronous client for interacting with the Simplise API.
+
+    The connections are kept open between requests. Close the client with
+    ``aclose()`` or use it as an async context manager.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        api_key: str,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: float = DEFAULT_TIMEOUT,
+        *,
+        optimize_rules: bool = False,
+        rule_references: bool = False,
+        result_cache: ResultCache | None = None,
+        middleware: Iterable[Middleware] = (),
+        tracer: Tracer | None = None,
+    ) -> None:
+        """Initializes the AsyncSimpliseClient with the provided API key.
+
+        Args:
+            api_key (str): The API key for authenticating with the Simplise API.
+            base_url (str): The base URL for the Simplise API.
+            timeout (float): The timeout for API requests in seconds.
+            optimize_rules (bool): Whether to optimize rules locally before sending them.
+            rule_references (bool): Whether to send rules the server has already stored by their hash.
+            result_cache (ResultCache | None): A cache of the results of deterministic rules, such as ``SQLiteCache``.
+            middleware (Iterable[Middleware]): Request lifecycle hooks, outermost first.
+            tracer (Tracer | None): An OpenTelemetry-compatible tracer to record spans with.
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.optimize_rules = optimize_rules
+        self.rule_registry = RuleRegistry() if rule_references else None
+        self.result_cache = result_cache
+        self.action = AsyncActionOperation(self)
+        self.action_logic = AsyncActionLogicAPI(self)
+        self.metrics = MetricsRegistry()
+        self.middleware = MiddlewareChain(middleware)
+        self.tracing = Tracing(tracer)
+        self._http: httpx.AsyncClient | None = None
+        self._http_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """The underlying httpx client, created on first use in each event loop."""
+        # [AI GENERATED] コネクションは開いたイベントループに属するため、別のループでは新しいクライアントを作成する
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.is_closed or self._http_loop is not loop:
+            self._http = httpx.AsyncClient(timeout=self.timeout)
+            self._http_loop = loop
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close the underlying connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    async def __aenter__(self) -> Self:
+        """Return the client for use in an ``async with`` block."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the client when leaving the ``async with`` block."""
+        await self.aclose()
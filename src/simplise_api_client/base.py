@@ -3,31 +3,56 @@
 This module provides a client for interacting with the Simplise API.
 """
 
-import json
 import logging
+import threading
+from collections.abc import Callable, Iterable, Iterator, Sized
+from contextlib import closing, contextmanager
+from datetime import timedelta
 from typing import Any, cast
 
 import requests
-from pydantic import ValidationError
+from requests.adapters import HTTPAdapter
 
 from simplise_api_client.actions import Operation
-from simplise_api_client.models import (
-    ActionExecuteRequest,
-    ActionExecuteResponse,
-    ActionLogicRequest,
-    ActionLogicResponse,
-    JsonLogicExecuteRequest,
-    JsonLogicExecuteResponse,
+from simplise_api_client.cache import ResultCache, cache_key, fetch
+from simplise_api_client.core import (
+    DEFAULT_BASE_URL,
+    DEFAULT_TIMEOUT,
+    ActionLogicCore,
+    ActionLogicExchange,
+    OperationCore,
+    PreparedRequest,
+    stringify_rule_values,
 )
-from simplise_api_client.type import (
-    JsonLogicRule,
-    JsonLogicRuleSafetyStr,
-    JsonLogicValue,
-    JsonLogicValueSafetyStr,
+from simplise_api_client.metrics import (
+    MetricsRegistry,
+    Timings,
+    current_timings,
+    iter_counted,
+    timed,
 )
+from simplise_api_client.middleware import Middleware, MiddlewareChain
+from simplise_api_client.multipart import InputSource
+from simplise_api_client.parallel import DEFAULT_WORKERS, map_ordered
+from simplise_api_client.references import RuleRegistry
+from simplise_api_client.streaming import StreamFormat, iter_decoded
+from simplise_api_client.tracing import (
+    SPAN_EXECUTE,
+    SPAN_EXECUTE_LOGIC,
+    SPAN_SERIALIZE,
+    SPAN_VALIDATE,
+    Span,
+    Tracer,
+    Tracing,
+    rule_hash,
+)
+from simplise_api_client.type import JsonLogicRule, JsonLogicRuleSafetyStr
 
 logger = logging.getLogger(__name__)
 
+# ストリーミング時にコネクションから読み込むチャンクサイズ（バイト）
+STREAM_CHUNK_SIZE = 64 * 1024
+
 
 class ActionLogicAPI:
     """API client for action-logic endpoint."""
@@ -35,13 +60,16 @@ class ActionLogicAPI:
     def __init__(self, client: "SimpliseClient") -> None:
         """Initialize ActionLogicAPI with a reference to the client."""
         self.client = client
+        self._core = ActionLogicCore(client)
 
-    def post(self, rule: JsonLogicRule, input_data: dict[str, Any] | None = None) -> str:
+    def post(self, rule: JsonLogicRule, input_data: dict[str, Any] | InputSource | None = None) -> str:
         """Execute JsonLogic rule via action-logic POST endpoint.
 
         Args:
             rule (JsonLogicRule): The JsonLogic rule to execute
-            input_data (dict, optional): Input data to be sent as form data
+            input_data (dict | InputSource, optional): Input data to be sent as form data.
+                A file path, buffer or byte iterator holding the encoded JSON input is streamed
+                into the request as is, without being loaded or stringified.
 
         Returns:
             str: The result from the API
@@ -50,60 +78,89 @@ class ActionLogicAPI:
             requests.HTTPError: If the API request fails
             ValidationError: If the request data validation fails
         """
-        # [AI GENERATED] リクエストデータをPydanticモデルで検証
-        try:
-            request_model = ActionLogicRequest(rule=rule, input_data=input_data)
-        except ValidationError:
-            logger.exception("Request validation failed")
-            raise
-
-        url = f"{self.client.base_url}/action-logic"
-        headers = {"Authorization": f"Bearer {self.client.api_key}"}
+        request = self._prepare(rule, input_data)
+        with self.client.metrics.measure(request.url, bytes_sent=request.content_length) as observation:
+            response = self._exchange(self._core.exchange(request, observation))
+        response.raise_for_status()
+        with timed("decode"):
+            return self._core.parse_response(response.text)
 
-        safety_rule = self._stringify_rule_values(request_model.rule)
+    def post_stream(
+        self,
+        rule: JsonLogicRule,
+        input_data: dict[str, Any] | InputSource | None = None,
+        stream_format: StreamFormat = "bytes",
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[Any]:
+        """Execute JsonLogic rule and stream the response body.
 
-        # Prepare multipart form data
-        files = {"action": (None, json.dumps(safety_rule), "application/json")}
+        The response is read incrementally, so memory usage does not depend on the size of the result.
 
-        if request_model.input_data:
-            safety_data = self._stringify_rule_values(request_model.input_data)
-            files["input"] = (None, json.dumps(safety_data), "application/json")
+        Args:
+            rule (JsonLogicRule): The JsonLogic rule to execute
+            input_data (dict | InputSource, optional): Input data to be sent as form data
+            stream_format (StreamFormat): How to decode the response body
+            chunk_size (int): Size of the chunks read from the connection in bytes
 
-        response = requests.post(url, files=files, headers=headers, timeout=self.client.timeout)
-        response.raise_for_status()
+        Yields:
+            Any: Raw chunks for ``bytes``, decoded JSON values otherwise
 
-        # [AI GENERATED] レスポンスデータをPydanticモデルで検証
-        try:
-            response_model = ActionLogicResponse(result=response.text)
-        except ValidationError:
-            logger.exception("Response validation failed")
-            raise
-        else:
-            return response_model.result
+        Raises:
+            requests.HTTPError: If the API request fails
+            ValidationError: If the request data validation fails
+        """
+        request = self._prepare(rule, input_data)
+        with (
+            # ストリーミングではボディを読み終えるまでをレイテンシとして記録する
+            self.client.metrics.measure(request.url, bytes_sent=request.content_length) as observation,
+            self._exchange(self._core.exchange(request, observation), stream=True) as response,
+        ):
+            response.raise_for_status()
+            chunks = iter_counted(response.iter_content(chunk_size=chunk_size), observation)
+            yield from iter_decoded(chunks, stream_format)
+
+    def _prepare(self, rule: JsonLogicRule, input_data: dict[str, Any] | InputSource | None) -> PreparedRequest:
+        """Build the request and pass it through the middleware."""
+        with timed("prepare"), self.client.tracing.span(SPAN_SERIALIZE):
+            request = self._core.prepare(rule, input_data)
+        return self._core.before_request(request)
+
+    def _exchange(self, exchange: ActionLogicExchange, *, stream: bool = False) -> requests.Response:
+        """Send the requests of an exchange, returning the final response."""
+        while True:
+            with exchange.attempt() as sent:
+                response = self.client._post(  # noqa: SLF001
+                    sent.url, data=sent.body, headers=sent.headers, timeout=sent.timeout, stream=stream
+                )
+                exchange.received(response.status_code, response.headers, None if stream else response.content)
+                timings = current_timings()
+                if timings is not None:
+                    _add_transfer_timings(timings, response, exchange.observation.elapsed, stream=stream)
+            if exchange.next_step(response.status_code, response.headers) is None:
+                return response
+            response.close()
 
     def _stringify_rule_values(self, rule: JsonLogicRule) -> JsonLogicRuleSafetyStr:
         """Convert all values in the rule to strings."""
+        return stringify_rule_values(rule)
 
-        def stringify_value(
-            value: JsonLogicValue,
-        ) -> JsonLogicValueSafetyStr:
-            if isinstance(value, (int, float, bool)):
-                return str(value)
-            if isinstance(value, list):
-                return [stringify_value(v) for v in value]
-            if isinstance(value, dict):
-                return {k: stringify_value(v) for k, v in value.items()}
-            return value  # str型の場合はそのまま返す
-
-        if isinstance(rule, dict):
-            return {k: stringify_value(v) for k, v in rule.items()}
-        return rule
+
+def _add_transfer_timings(timings: Timings, response: requests.Response, elapsed: float, *, stream: bool) -> None:
+    """Add the time to the response headers and to the end of the body to the timings being collected."""
+    # requests の elapsed はリクエスト送信からレスポンスヘッダーの解析完了までの時間
+    if not isinstance(response.elapsed, timedelta):
+        return
+    ttfb = response.elapsed.total_seconds()
+    timings.add("ttfb", ttfb)
+    if not stream:
+        timings.add("download", max(elapsed - ttfb, 0.0))
 
 
 class ActionOperation:
     def __init__(self, client: "SimpliseClient") -> None:
         """Initialize Action with a reference to the client."""
         self.client = client
+        self._core = OperationCore(client)
 
     def execute(self, operation: Operation, data: dict[str, str] | None = None) -> str:
         """Execute library model operation.
@@ -118,31 +175,68 @@ class ActionOperation:
         Raises:
             ValidationError: If the request data validation fails
         """
-        # [AI GENERATED] リクエストデータをPydanticモデルで検証
-        try:
-            request_model = ActionExecuteRequest(operation_data=operation.to_dict(), input_data=data)
-        except ValidationError:
-            logger.exception("Request validation failed for execute")
-            raise
+        tracing = self.client.tracing
+        with tracing.span(SPAN_EXECUTE) as span:
+            with timed("prepare"), tracing.span(SPAN_VALIDATE):
+                rule, input_data = self._core.prepare_execute(operation, data)
+            if span is not None:
+                span.set_attribute("simplise.rule_hash", rule_hash(rule))
+            return self._execute(rule, input_data, self._core.parse_execute, span)
+
+    def execute_many(
+        self,
+        pairs: Iterable[tuple[Operation, dict[str, str] | None]],
+        workers: int = DEFAULT_WORKERS,
+        *,
+        progress: Callable[[int, int | None], object] | None = None,
+        max_pending: int | None = None,
+    ) -> Iterator[str | Exception]:
+        """Execute library model operations in parallel on a thread pool.
+
+        The worker threads share one connection pool. Results are yielded in input
+        order as they become available; an exception raised for an operation is
+        yielded in place of its result. The input is read lazily, at most
+        ``max_pending`` operations ahead of the caller, so a generator of
+        operations is processed with bounded memory.
 
-        # Convert operations to JSON Logic format
-        result = self._send_request(request_model.operation_data, request_model.input_data)
-
-        # [AI GENERATED] レスポンスデータをPydanticモデルで検証
-        try:
-            response_model = ActionExecuteResponse(result=result)
-        except ValidationError:
-            logger.exception("Response validation failed for execute")
-            raise
-        else:
-            return response_model.result
-
-    def execute_logic(self, rule: JsonLogicRule, data: dict[str, Any] | None = None) -> str:
+        Args:
+            pairs (Iterable[tuple[Operation, dict[str, str] | None]]): Operations and their input data
+            workers (int): Number of worker threads
+            progress (Callable[[int, int | None], object] | None): Called in the calling thread after
+                each result with the number of completed operations and the total (None for inputs
+                without a length)
+            max_pending (int | None): Maximum number of operations in flight. Defaults to twice the workers
+
+        Yields:
+            str | Exception: The result, or the exception raised, for each operation
+        """
+        total = len(pairs) if isinstance(pairs, Sized) else None
+        with (
+            self.client._thread_sessions(workers) as initializer,  # noqa: SLF001
+            # 途中で反復を止められた場合も、セッションを閉じる前にワーカーを停止する
+            closing(
+                map_ordered(
+                    lambda pair: self.execute(*pair),
+                    pairs,
+                    workers=workers,
+                    max_pending=max_pending,
+                    initializer=initializer,
+                )
+            ) as results,
+        ):
+            for completed, result in enumerate(results, start=1):
+                if progress is not None:
+                    progress(completed, total)
+                yield result
+
+    def execute_logic(self, rule: JsonLogicRule, data: dict[str, Any] | InputSource | None = None) -> str:
         """Execute JsonLogic rule.
 
         Args:
             rule (JsonLogicRule): The JsonLogic rule to execute
-            data (dict, optional): Input data for the rule
+            data (dict | InputSource, optional): Input data for the rule. Large inputs can be passed
+                as a file path, memory-mapped file, bytes-like buffer or byte iterator holding the
+                encoded JSON input; they are streamed to the API without being loaded into memory.
 
         Returns:
             str: The result of the rule execution
@@ -150,24 +244,45 @@ class ActionOperation:
         Raises:
             ValidationError: If the request data validation fails
         """
-        # [AI GENERATED] リクエストデータをPydanticモデルで検証
-        try:
-            request_model = JsonLogicExecuteRequest(rule=rule, data=data)
-        except ValidationError:
-            logger.exception("Request validation failed for execute_logic")
-            raise
-
         # rule = self._replace_action_input(rule, data)
-        result = self._send_request(request_model.rule, request_model.data)
+        tracing = self.client.tracing
+        with tracing.span(SPAN_EXECUTE_LOGIC) as span:
+            with timed("prepare"), tracing.span(SPAN_VALIDATE):
+                rule, input_data = self._core.prepare_execute_logic(rule, data)
+            if span is not None:
+                span.set_attribute("simplise.rule_hash", rule_hash(rule))
+            return self._execute(rule, input_data, self._core.parse_execute_logic, span)
+
+    def execute_logic_stream(
+        self,
+        rule: JsonLogicRule,
+        data: dict[str, Any] | InputSource | None = None,
+        stream_format: StreamFormat = "bytes",
+    ) -> Iterator[Any]:
+        """Execute JsonLogic rule and stream the result.
+
+        Use this instead of execute_logic for large results: the result is yielded
+        incrementally while it is downloaded instead of being buffered as a whole.
 
-        # [AI GENERATED] レスポンスデータをPydanticモデルで検証
+        Args:
+            rule (JsonLogicRule): The JsonLogic rule to execute
+            data (dict | InputSource, optional): Input data for the rule
+            stream_format (StreamFormat): ``bytes`` for raw chunks, ``ndjson`` for one JSON value per line,
+                or ``json`` for the items of a JSON array, also under the ``result`` key of the response
+
+        Yields:
+            Any: Raw chunks for ``bytes``, decoded JSON values otherwise
+
+        Raises:
+            ValidationError: If the request data validation fails
+            RuntimeError: If the request fails
+        """
+        rule, input_data = self._core.prepare_execute_logic(rule, data, "execute_logic_stream")
         try:
-            response_model = JsonLogicExecuteResponse(result=result)
-        except ValidationError:
-            logger.exception("Response validation failed for execute_logic")
-            raise
-        else:
-            return response_model.result
+            yield from self.client.action_logic.post_stream(rule, input_data, stream_format)
+        except (requests.RequestException, ValueError) as e:
+            err_msg = f"Error streaming request: {e}"
+            raise RuntimeError(err_msg) from e
 
     # ruleの中に"{"action_input": "[<input_key>]"}" がある場合は、
     # dataの中の{"<input_key>": "<input_value>"}から値を取得して
@@ -199,7 +314,30 @@ class ActionOperation:
                 rule[key] = processed_items
         return rule
 
-    def _send_request(self, rule: JsonLogicRule, data: dict[str, Any] | None = None) -> str:
+    def _execute(
+        self,
+        rule: JsonLogicRule,
+        input_data: dict[str, Any] | InputSource | None,
+        parse: Callable[[str], str],
+        span: Span | None,
+    ) -> str:
+        """Return the cached result of a prepared rule, or send it and cache its validated result."""
+
+        def compute() -> str:
+            response = self._send_request(rule, input_data)
+            with timed("decode"):
+                return parse(response)
+
+        cache = self.client.result_cache
+        key = cache_key(cache, rule, input_data)
+        if cache is None or key is None:
+            return compute()
+        result, hit = fetch(cache, key, compute)
+        if span is not None:
+            span.set_attribute("simplise.cache_hit", hit)
+        return result
+
+    def _send_request(self, rule: JsonLogicRule, data: dict[str, Any] | InputSource | None = None) -> str:
         """Send request to Simplise API."""
         # Use the new ActionLogicAPI for actual requests
         try:
@@ -218,16 +356,73 @@ class SimpliseClient:
     authentication, making requests, and handling responses.
     """
 
-    def __init__(self, api_key: str, base_url: str = "https://api.usebootstrap.org", timeout: float = 30.0) -> None:
+    def __init__(  # noqa: PLR0913
+        self,
+        api_key: str,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: float = DEFAULT_TIMEOUT,
+        *,
+        optimize_rules: bool = False,
+        rule_references: bool = False,
+        result_cache: ResultCache | None = None,
+        middleware: Iterable[Middleware] = (),
+        tracer: Tracer | None = None,
+    ) -> None:
         """Initializes the SimpliseClient with the provided API key.
 
         Args:
             api_key (str): The API key for authenticating with the Simplise API.
             base_url (str): The base URL for the Simplise API.
             timeout (float): The timeout for API requests in seconds.
+            optimize_rules (bool): Whether to optimize rules locally before sending them.
+            rule_references (bool): Whether to send rules the server has already stored by their hash.
+            result_cache (ResultCache | None): A cache of the results of deterministic rules, such as ``SQLiteCache``.
+            middleware (Iterable[Middleware]): Request lifecycle hooks, outermost first.
+            tracer (Tracer | None): An OpenTelemetry-compatible tracer to record spans with.
         """
         self.api_key = api_key
         self.base_url = base_url
         self.timeout = timeout
+        self.optimize_rules = optimize_rules
+        self.rule_registry = RuleRegistry() if rule_references else None
+        self.result_cache = result_cache
         self.action = ActionOperation(self)
         self.action_logic = ActionLogicAPI(self)
+        self.metrics = MetricsRegistry()
+        self.middleware = MiddlewareChain(middleware)
+        self.tracing = Tracing(tracer)
+        # スレッドごとのセッション（execute_many のワーカースレッドでのみ設定される）
+        self._local = threading.local()
+
+    def _post(self, url: str, **kwargs: Any) -> requests.Response:  # noqa: ANN401
+        """Send a POST request, using the session of the current thread if one is set."""
+        session: requests.Session | None = getattr(self._local, "session", None)
+        if session is None:
+            return requests.post(url, **kwargs)  # noqa: S113
+        return session.post(url, **kwargs)
+
+    @contextmanager
+    def _thread_sessions(self, pool_size: int) -> Iterator[Callable[[], None]]:
+        """Yield a thread initializer that gives each worker thread a session on a shared connection pool.
+
+        ``requests.Session`` is not thread-safe, but its ``HTTPAdapter`` connection pool is:
+        each thread gets its own session and all of them share one adapter.
+        """
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        sessions: list[requests.Session] = []
+        lock = threading.Lock()
+
+        def initializer() -> None:
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            self._local.session = session
+            with lock:
+                sessions.append(session)
+
+        try:
+            yield initializer
+        finally:
+            for session in sessions:
+                session.close()
+            adapter.close()
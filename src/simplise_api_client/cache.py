@@ -0,0 +1,739 @@
+"""# Cache
+
+This module provides caches of rule results shared across processes and hosts.
+
+Results are keyed by the SHA-256 of the canonical JSON of the stringified rule and input
+data, so the same rule and input give the same key in every process regardless of the key
+order of their dictionaries. Only rules made of operators whose results depend on nothing
+but the rule and its input (the operators of the local evaluator) are cached; rules with
+other operators, and inputs streamed from an input source, are always sent to the API.
+
+``SQLiteCache`` stores the results in an SQLite database in WAL mode, so that several
+processes on one host can read and write the same file concurrently. Entries expire after
+an optional TTL, and the least recently used entries are evicted once the cache holds more
+than ``max_entries`` results::
+
+    cache = SQLiteCache("~/.cache/simplise/results.db", max_entries=100_000, ttl=86_400)
+    client = SimpliseClient(api_key="...", result_cache=cache)
+
+``TieredCache`` puts an in-process ``MemoryCache`` in front of a shared backend, such as
+``RedisCache`` over a Redis client, so that a fleet of hosts shares its results while hot
+results are served from memory. It also caches deterministic errors (``400`` and ``422``
+responses) for ``error_ttl`` seconds, coalesces concurrent misses of the same key into one
+request, and serves results up to ``stale_ttl`` seconds past their TTL while refreshing
+them in the background::
+
+    cache = TieredCache(RedisCache(redis.Redis()), ttl=300, stale_ttl=60)
+    client = SimpliseClient(api_key="...", result_cache=cache)
+"""
+# ルールの実行結果をプロセス間・ホスト間で共有し、再起動後も再利用するためのキャッシュ。
+
+import asyncio
+import functools
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterator, Mapping
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Protocol, cast
+
+from simplise_api_client.core import stringify_rule_values
+from simplise_api_client.evaluator import SUPPORTED_OPERATORS
+from simplise_api_client.multipart import is_input_source
+from simplise_api_client.type import JsonLogicRule
+
+# 既定で保持する結果の最大数
+DEFAULT_MAX_ENTRIES = 100_000
+
+# 期限切れと上限超過の結果を削除する間隔（書き込み回数）
+EVICTION_INTERVAL = 64
+
+# ほかのプロセスの書き込みが終わるのを待つ最大時間（秒）
+BUSY_TIMEOUT = 30.0
+
+# SQLiteCacheが結果の最終使用時刻を更新する最小間隔（秒）
+ACCESS_RESOLUTION = 60.0
+
+# 既定でプロセス内に保持する結果の最大数
+DEFAULT_LOCAL_ENTRIES = 1024
+
+# 決定的なエラーを保持する既定の時間（秒）
+DEFAULT_ERROR_TTL = 60.0
+
+# 同じルールと入力で何度送信しても同じ結果になるエラーのステータス
+DETERMINISTIC_ERROR_STATUSES = frozenset({400, 422})
+
+# Redisのキーの既定の接頭辞
+DEFAULT_REDIS_PREFIX = "simplise:result:"
+
+_SCHEMA = (
+    (
+        "CREATE TABLE IF NOT EXISTS results "
+        "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL, accessed REAL NOT NULL)"
+    ),
+    "CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)",
+)
+
+
+class ResultCache(Protocol):
+    """A cache of rule results, keyed by ``result_key``."""
+
+    def get(self, key: str) -> str | None:
+        """Return the cached result, or None if there is none."""
+        ...
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        """Store a result, expiring after ``ttl`` seconds or the default TTL of the cache when None."""
+        ...
+
+
+class RedisClient(Protocol):
+    """The subset of a Redis client, such as ``redis.Redis``, used by ``RedisCache``."""
+
+    def get(self, name: str) -> bytes | str | None:
+        """Return the value of a key, or None if it does not exist."""
+        ...
+
+    def set(self, name: str, value: str, *, px: int | None = None) -> object:
+        """Set the value of a key, expiring after ``px`` milliseconds if given."""
+        ...
+
+
+def result_key(rule: JsonLogicRule, data: Mapping[str, Any] | None = None) -> str:
+    """Return the cache key of a rule and its input data.
+
+    Args:
+        rule (JsonLogicRule): The rule, as sent to the API.
+        data (Mapping[str, Any] | None): The input data.
+
+    Returns:
+        str: The hex SHA-256 of the canonical JSON of the stringified rule and input data.
+    """
+    canonical = json.dumps(
+        [stringify_rule_values(rule), stringify_rule_values(dict(data or {}))],
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def cache_key(cache: ResultCache | None, rule: JsonLogicRule, data: object) -> str | None:
+    """Return the key to cache the result of a prepared rule with, or None if it is not cached.
+
+    Args:
+        cache (ResultCache | None): The result cache of the client.
+        rule (JsonLogicRule): The rule to send.
+        data (object): The input data to send.
+
+    Returns:
+        str | None: The key, or None if there is no cache, the input is streamed from an
+            input source or the rule is not deterministic.
+    """
+    if cache is None or is_input_source(data) or not deterministic(rule):
+        return None
+    return result_key(rule, cast("Mapping[str, Any] | None", data))
+
+
+def deterministic(rule: object) -> bool:
+    """Return whether the result of a rule depends only on the rule and its input.
+
+    Args:
+        rule (object): The rule or a value inside it.
+
+    Returns:
+        bool: True if every operator of the rule can be evaluated locally.
+    """
+    return all(operator in SUPPORTED_OPERATORS for operator in _operators(rule))
+
+
+def deterministic_error(error: BaseException) -> bool:
+    """Return whether an error would be raised again for the same rule and input.
+
+    Args:
+        error (BaseException): The error raised by a request, possibly wrapping the HTTP error.
+
+    Returns:
+        bool: True if the error or one of its causes is an HTTP error with a status in
+            ``DETERMINISTIC_ERROR_STATUSES``.
+    """
+    seen: set[int] = set()
+    current: BaseException | None = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        response = getattr(current, "response", None)
+        if getattr(response, "status_code", None) in DETERMINISTIC_ERROR_STATUSES:
+            return True
+        current = current.__cause__ or current.__context__
+    return False
+
+
+def fetch(cache: ResultCache, key: str, compute: Callable[[], str]) -> tuple[str, bool]:
+    """Return the cached result of a key, or compute and cache it.
+
+    A ``TieredCache`` also coalesces misses, caches deterministic errors and revalidates
+    stale results; other caches are simply read and written.
+
+    Args:
+        cache (ResultCache): The result cache of the client.
+        key (str): The key from ``cache_key``.
+        compute (Callable[[], str]): Sends the rule and returns its validated result.
+
+    Returns:
+        tuple[str, bool]: The result, and whether it was served without calling ``compute``.
+    """
+    if isinstance(cache, TieredCache):
+        return cache.lookup(key, compute)
+    result = cache.get(key)
+    if result is not None:
+        return result, True
+    result = compute()
+    cache.set(key, result)
+    return result, False
+
+
+async def afetch(cache: ResultCache, key: str, compute: Callable[[], Awaitable[str]]) -> tuple[str, bool]:
+    """Return the cached result of a key, or compute and cache it, without blocking the event loop.
+
+    Other caches than ``TieredCache`` are accessed in a worker thread, so that a disk-backed
+    or remote cache does not block the event loop.
+
+    Args:
+        cache (ResultCache): The result cache of the client.
+        key (str): The key from ``cache_key``.
+        compute (Callable[[], Awaitable[str]]): Sends the rule and returns its validated result.
+
+    Returns:
+        tuple[str, bool]: The result, and whether it was served without calling ``compute``.
+    """
+    if isinstance(cache, TieredCache):
+        return await cache.alookup(key, compute)
+    result = await asyncio.to_thread(cache.get, key)
+    if result is not None:
+        return result, True
+    result = await compute()
+    await asyncio.to_thread(cache.set, key, result)
+    return result, False
+
+
+def _operators(value: object) -> Iterator[str]:
+    """Yield the operators used in a rule."""
+    if isinstance(value, dict):
+        for operator, args in value.items():
+            yield operator
+            yield from _operators(args)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _operators(item)
+
+
+class SQLiteCache:
+    """A result cache in an SQLite database, safe for concurrent use by threads and processes.
+
+    Each thread uses its own connection. Writes of other processes are waited for up to
+    ``BUSY_TIMEOUT`` seconds. Expired and excess entries are removed every
+    ``EVICTION_INTERVAL`` writes, so the cache may briefly hold slightly more than
+    ``max_entries`` results. A hit records the time of use only if the recorded one is
+    older than ``access_resolution`` seconds, so repeated hits on a result do not each
+    write to the database; the least recently used order is kept to that resolution.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl: float | None = None,
+        access_resolution: float = ACCESS_RESOLUTION,
+    ) -> None:
+        """Open the cache, creating the database file if needed.
+
+        Args:
+            path (str | os.PathLike[str]): The database file. ``~`` is expanded.
+            max_entries (int): Maximum number of results to keep.
+            ttl (float | None): Seconds after which a result expires. Results never expire when None.
+            access_resolution (float): Minimum seconds between two updates of the time a result was used.
+        """
+        self.path = Path(path).expanduser()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.access_resolution = access_resolution
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._writes = itertools.count(1)
+        # [AI GENERATED] スキーマは最初の接続で作成する
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached result, marking it as recently used.
+
+        Args:
+            key (str): The key from ``result_key``.
+
+        Returns:
+            str | None: The result, or None if it is not cached or has expired.
+        """
+        connection = self._connection()
+        now = time.time()
+        row = connection.execute("SELECT value, expires, accessed FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] <= now):
+            return None
+        # [AI GENERATED] 読み込みのたびに書き込まないよう、最終使用時刻は一定間隔でのみ更新する
+        if now - row[2] >= self.access_resolution:
+            connection.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        """Store a result, replacing any previous one.
+
+        Args:
+            key (str): The key from ``result_key``.
+            value (str): The result.
+            ttl (float | None): Seconds after which the result expires. Defaults to the TTL of the cache.
+        """
+        connection = self._connection()
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else now + ttl
+        connection.execute(
+            "INSERT OR REPLACE INTO results (key, value, expires, accessed) VALUES (?, ?, ?, ?)",
+            (key, value, expires, now),
+        )
+        if next(self._writes) % EVICTION_INTERVAL == 0:
+            self.evict()
+
+    def evict(self) -> None:
+        """Remove the expired results and the least recently used results beyond ``max_entries``."""
+        connection = self._connection()
+        connection.execute("DELETE FROM results WHERE expires <= ?", (time.time(),))
+        connection.execute(
+            "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def clear(self) -> None:
+        """Remove every result."""
+        self._connection().execute("DELETE FROM results")
+
+    def __len__(self) -> int:
+        """Return the number of stored results, including expired ones not yet evicted."""
+        return self._connection().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the connections of every thread."""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the connection of the current thread, opening it on first use."""
+        connection: sqlite3.Connection | None = getattr(self._local, "connection", None)
+        if connection is not None:
+            return connection
+        # [AI GENERATED] 自動コミットで開き、書き込みはWALで読み込みをブロックしない
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            connection.execute(statement)
+        self._local.connection = connection
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+
+class MemoryCache:
+    """A thread-safe in-process result cache that evicts the least recently used results."""
+
+    def __init__(self, max_entries: int = DEFAULT_LOCAL_ENTRIES, *, ttl: float | None = None) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of results to keep.
+            ttl (float | None): Seconds after which a result expires. Results never expire when None.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[str, float | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        """Return the cached result, marking it as recently used.
+
+        Args:
+            key (str): The key from ``result_key``.
+
+        Returns:
+            str | None: The result, or None if it is not cached or has expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        """Store a result, evicting the least recently used result if the cache is full.
+
+        Args:
+            key (str): The key from ``result_key``.
+            value (str): The result.
+            ttl (float | None): Seconds after which the result expires. Defaults to the TTL of the cache.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Remove every result."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Return the number of stored results, including expired ones not yet evicted."""
+        return len(self._entries)
+
+
+class RedisCache:
+    """A result cache in Redis, shared by every host that uses the same server.
+
+    Any client with the ``get`` and ``set`` methods of ``redis.Redis`` can be used, including
+    ``simplise_api_client.testing.StandInRedis``. Expiry is left to Redis.
+    """
+
+    def __init__(self, client: RedisClient, *, prefix: str = DEFAULT_REDIS_PREFIX, ttl: float | None = None) -> None:
+        """Initialize the cache.
+
+        Args:
+            client (RedisClient): The Redis client.
+            prefix (str): The prefix of the Redis keys.
+            ttl (float | None): Seconds after which a result expires. Results never expire when None.
+        """
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key: str) -> str | None:
+        """Return the cached result.
+
+        Args:
+            key (str): The key from ``result_key``.
+
+        Returns:
+            str | None: The result, or None if it is not cached or has expired.
+        """
+        value = self.client.get(self.prefix + key)
+        if isinstance(value, bytes):
+            return value.decode()
+        return value
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        """Store a result, replacing any previous one.
+
+        Args:
+            key (str): The key from ``result_key``.
+            value (str): The result.
+            ttl (float | None): Seconds after which the result expires. Defaults to the TTL of the cache.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        # [AI GENERATED] Redisは0ミリ秒の有効期限を受け付けないため、最短でも1ミリ秒にする
+        px = None if ttl is None else max(1, round(ttl * 1000))
+        self.client.set(self.prefix + key, value, px=px)
+
+
+class CachedError(RuntimeError):
+    """A deterministic error of a rule, raised from the cache instead of calling the API again."""
+
+
+@dataclass(frozen=True)
+class _Entry:
+    """A result or deterministic error stored by ``TieredCache``.
+
+    Times are wall-clock timestamps, so that hosts sharing a backend agree on them.
+    """
+
+    value: str | None = None
+    error: str | None = None
+    fresh_until: float | None = None
+    stale_until: float | None = None
+
+    @classmethod
+    def decode(cls, raw: str | None) -> "_Entry | None":
+        """Return the entry stored as ``raw``, or None if there is none or it is not an entry."""
+        if raw is None:
+            return None
+        try:
+            data = json.loads(raw)
+            return cls(data.get("v"), data.get("e"), data.get("f"), data.get("s"))
+        except (ValueError, AttributeError):
+            return None
+
+    def encode(self) -> str:
+        """Return the entry as stored in the caches."""
+        data = {"v": self.value} if self.error is None else {"e": self.error}
+        return json.dumps({**data, "f": self.fresh_until, "s": self.stale_until}, separators=(",", ":"))
+
+    def stale(self) -> bool:
+        """Return whether the entry has outlived its TTL and should be refreshed."""
+        return self.fresh_until is not None and self.fresh_until <= time.time()
+
+    def remaining(self) -> float | None:
+        """Return the seconds the entry may still be served for, or None if it never expires."""
+        return None if self.stale_until is None else max(0.0, self.stale_until - time.time())
+
+    def result(self) -> str:
+        """Return the cached result, or raise the cached error."""
+        if self.error is not None:
+            raise CachedError(self.error)
+        return cast("str", self.value)
+
+
+class TieredCache:
+    """An in-process LRU in front of an optional shared result cache.
+
+    Results are looked up in the local cache first and then in the shared cache, whose hits
+    are copied to the local cache. Results are written to both.
+
+    Concurrent misses of the same key, from threads or from the tasks of one event loop,
+    wait for a single computation. Results that have outlived ``ttl`` are still served for
+    ``stale_ttl`` seconds while one background refresh replaces them. Errors for which
+    ``deterministic_error`` holds are cached for ``error_ttl`` seconds and raised again as
+    ``CachedError``.
+    """
+
+    def __init__(
+        self,
+        shared: ResultCache | None = None,
+        *,
+        local: MemoryCache | None = None,
+        ttl: float | None = None,
+        stale_ttl: float = 0.0,
+        error_ttl: float = DEFAULT_ERROR_TTL,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            shared (ResultCache | None): The cache shared with other processes and hosts, such as
+                ``RedisCache`` or ``SQLiteCache``. Only the local cache is used when None.
+            local (MemoryCache | None): The in-process cache. A ``MemoryCache`` with the default size when None.
+            ttl (float | None): Seconds after which a result is stale. Results never become stale when None.
+            stale_ttl (float): Seconds past ``ttl`` during which a stale result is served while it is refreshed.
+            error_ttl (float): Seconds for which deterministic errors are cached. Errors are not cached when 0.
+        """
+        self.shared = shared
+        self.local = MemoryCache() if local is None else local
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.error_ttl = error_ttl
+        self._lock = threading.Lock()
+        self._inflight: dict[str, Future[str]] = {}
+        self._tasks: dict[str, asyncio.Task[str]] = {}
+
+    def get(self, key: str) -> str | None:
+        """Return the cached result if it is fresh.
+
+        Args:
+            key (str): The key from ``result_key``.
+
+        Returns:
+            str | None: The result, or None if it is not cached, is stale or is an error.
+        """
+        entry = self._read(key)
+        if entry is None or entry.error is not None or entry.stale():
+            return None
+        return entry.value
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        """Store a result in both caches.
+
+        Args:
+            key (str): The key from ``result_key``.
+            value (str): The result.
+            ttl (float | None): Seconds after which the result is stale. Defaults to the TTL of the cache.
+        """
+        self._write(key, self._value(value, self.ttl if ttl is None else ttl))
+
+    def fetch(self, key: str, compute: Callable[[], str]) -> str:
+        """Return the cached result of a key, or compute and cache it.
+
+        Args:
+            key (str): The key from ``result_key``.
+            compute (Callable[[], str]): Returns the result. Called once for concurrent misses.
+
+        Returns:
+            str: The result.
+
+        Raises:
+            CachedError: If a deterministic error is cached for the key.
+        """
+        return self.lookup(key, compute)[0]
+
+    async def afetch(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """Return the cached result of a key, or compute and cache it, without blocking the event loop.
+
+        Args:
+            key (str): The key from ``result_key``.
+            compute (Callable[[], Awaitable[str]]): Returns the result. Awaited once for concurrent misses.
+
+        Returns:
+            str: The result.
+
+        Raises:
+            CachedError: If a deterministic error is cached for the key.
+        """
+        return (await self.alookup(key, compute))[0]
+
+    def lookup(self, key: str, compute: Callable[[], str]) -> tuple[str, bool]:
+        """Like ``fetch``, but also return whether the result was served without calling ``compute``."""
+        entry = self._read(key)
+        if entry is not None:
+            if entry.stale():
+                future, leader = self._join(key)
+                if leader:
+                    threading.Thread(target=self._run, args=(key, compute, future), daemon=True).start()
+            return entry.result(), True
+        future, leader = self._join(key)
+        if leader:
+            self._run(key, compute, future)
+        return future.result(), not leader
+
+    async def alookup(self, key: str, compute: Callable[[], Awaitable[str]]) -> tuple[str, bool]:
+        """Like ``afetch``, but also return whether the result was served without calling ``compute``.
+
+        The shared cache is accessed in a worker thread. The computation runs in its own task,
+        so that cancelling one of the waiting callers does not cancel it for the others.
+        """
+        entry = self._local_entry(key)
+        if entry is None and self.shared is not None:
+            entry = self._backfill(key, await asyncio.to_thread(self.shared.get, key))
+        if entry is not None:
+            if entry.stale():
+                self._task(key, compute)
+            return entry.result(), True
+        task, leader = self._task(key, compute)
+        return await asyncio.shield(task), not leader
+
+    def _local_entry(self, key: str) -> _Entry | None:
+        """Return the entry of a key in the local cache."""
+        return _Entry.decode(self.local.get(key))
+
+    def _read(self, key: str) -> _Entry | None:
+        """Return the entry of a key from the local cache, or from the shared cache."""
+        entry = self._local_entry(key)
+        if entry is None and self.shared is not None:
+            entry = self._backfill(key, self.shared.get(key))
+        return entry
+
+    def _backfill(self, key: str, raw: str | None) -> _Entry | None:
+        """Copy an entry of the shared cache to the local cache and return it."""
+        entry = _Entry.decode(raw)
+        if raw is not None and entry is not None:
+            self.local.set(key, raw, entry.remaining())
+        return entry
+
+    def _write(self, key: str, entry: _Entry) -> None:
+        """Store an entry in both caches."""
+        raw = entry.encode()
+        ttl = entry.remaining()
+        self.local.set(key, raw, ttl)
+        if self.shared is not None:
+            self.shared.set(key, raw, ttl)
+
+    def _value(self, value: str, ttl: float | None) -> _Entry:
+        """Return the entry of a result that is fresh for ``ttl`` seconds."""
+        if ttl is None:
+            return _Entry(value=value)
+        now = time.time()
+        return _Entry(value=value, fresh_until=now + ttl, stale_until=now + ttl + self.stale_ttl)
+
+    def _error(self, error: Exception) -> _Entry | None:
+        """Return the entry of an error, or None if it is not cached."""
+        if self.error_ttl <= 0 or not deterministic_error(error):
+            return None
+        expires = time.time() + self.error_ttl
+        return _Entry(error=str(error), fresh_until=expires, stale_until=expires)
+
+    def _join(self, key: str) -> tuple[Future[str], bool]:
+        """Return the computation in flight for a key, and whether the caller must run it."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _run(self, key: str, compute: Callable[[], str], future: Future[str]) -> None:
+        """Compute and cache the result of a key, and settle the computation in flight."""
+        try:
+            value = compute()
+        except Exception as e:
+            entry = self._error(e)
+            if entry is not None:
+                self._write(key, entry)
+            future.set_exception(e)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self._write(key, self._value(value, self.ttl))
+            future.set_result(value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _task(self, key: str, compute: Callable[[], Awaitable[str]]) -> tuple["asyncio.Task[str]", bool]:
+        """Return the task computing a key in the running event loop, and whether it was just started."""
+        loop = asyncio.get_running_loop()
+        task = self._tasks.get(key)
+        if task is not None and task.get_loop() is loop:
+            return task, False
+        task = loop.create_task(self._arun(key, compute))
+        self._tasks[key] = task
+        task.add_done_callback(functools.partial(self._settled, key))
+        return task, True
+
+    async def _arun(self, key: str, compute: Callable[[], Awaitable[str]]) -> str:
+        """Compute and cache the result of a key, writing to the shared cache in a worker thread."""
+        try:
+            value = await compute()
+        except Exception as e:
+            entry = self._error(e)
+            if entry is not None:
+                await self._awrite(key, entry)
+            raise
+        await self._awrite(key, self._value(value, self.ttl))
+        return value
+
+    async def _awrite(self, key: str, entry: _Entry) -> None:
+        """Store an entry in both caches without blocking the event loop."""
+        if self.shared is None:
+            self._write(key, entry)
+        else:
+            await asyncio.to_thread(self._write, key, entry)
+
+    def _settled(self, key: str, task: "asyncio.Task[str]") -> None:
+        """Forget a finished task, retrieving its error so that an unawaited refresh is not reported."""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            task.exception()
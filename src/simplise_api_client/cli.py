@@ -0,0 +1,327 @@
+"""# Simplise Run
+
+This module provides the ``simplise-run`` command, which executes a rule for every row
+of a JSONL or CSV file and writes the results as JSONL.
+
+- The rule is a JSON file, or a ``module:attribute`` path to an ``Operation`` or a rule dict.
+- Rows are read lazily and at most ``--concurrency`` requests are in flight at a time.
+- Results are written in input order, one line per row, and flushed as they complete, so the
+  output file doubles as the checkpoint: ``--resume`` skips the rows already written.
+- A throughput and latency summary is printed to stderr at the end.
+
+Usage:
+    simplise-run rule.json rows.jsonl -o results.jsonl --concurrency 32 --resume
+"""
+# 大量の入力に対してルールを一括実行するコマンドラインツール。
+
+import argparse
+import asyncio
+import csv
+import importlib
+import json
+import math
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Literal, TextIO
+
+from simplise_api_client.actions.operation import Operation
+from simplise_api_client.core import DEFAULT_BASE_URL, DEFAULT_TIMEOUT
+from simplise_api_client.type import JsonLogicRule
+
+if TYPE_CHECKING:
+    from simplise_api_client.async_client import AsyncSimpliseClient
+
+type InputFormat = Literal["jsonl", "csv"]
+
+# 入力行のデータ、または読み込めなかった行のエラー
+type Row = dict[str, Any] | ValueError
+
+# 同時に実行するリクエスト数の既定値
+DEFAULT_CONCURRENCY = 16
+
+# 一部の行が失敗した場合の終了コード
+EXIT_ROW_ERRORS = 1
+
+
+@dataclass
+class RowResult:
+    """The outcome of one row."""
+
+    row: int
+    result: Any
+    error: str | None
+    latency: float
+
+    def to_json(self) -> str:
+        """Serialize the outcome as a JSONL line."""
+        outcome = (
+            {"row": self.row, "result": self.result} if self.error is None else {"row": self.row, "error": self.error}
+        )
+        return json.dumps(outcome, ensure_ascii=False)
+
+
+@dataclass
+class RunSummary:
+    """Throughput and latency of a run."""
+
+    skipped: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+
+    @property
+    def completed(self) -> int:
+        """Number of rows executed in this run."""
+        return len(self.latencies)
+
+    def add(self, result: RowResult) -> None:
+        """Record the outcome of a row."""
+        self.latencies.append(result.latency)
+        if result.error is not None:
+            self.failed += 1
+
+    def format(self) -> str:
+        """Format the summary for humans."""
+        throughput = self.completed / self.elapsed if self.elapsed else 0.0
+        lines = [
+            f"rows: {self.completed} ({self.failed} failed, {self.skipped} skipped by resume)",
+            f"elapsed: {self.elapsed:.2f}s, throughput: {throughput:.1f} rows/s",
+        ]
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            percentiles = ", ".join(f"p{p}={_percentile(ordered, p) * 1000:.1f}ms" for p in (50, 95, 99))
+            lines.append(f"latency: {percentiles}, max={ordered[-1] * 1000:.1f}ms")
+        return "\n".join(lines)
+
+
+def _percentile(ordered: list[float], percent: int) -> float:
+    """Return the nearest-rank percentile of sorted values."""
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def load_rule(spec: str) -> JsonLogicRule:
+    """Load a rule from a JSON file or a ``module:attribute`` path.
+
+    Args:
+        spec (str): Path to a JSON file, or ``package.module:NAME`` of an ``Operation`` or a rule dict.
+
+    Returns:
+        JsonLogicRule: The rule.
+
+    Raises:
+        ValueError: If the attribute is neither an ``Operation`` nor a dict.
+    """
+    path = Path(spec)
+    if path.is_file() or ":" not in spec:
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    module_name, _, attribute = spec.partition(":")
+    value = getattr(importlib.import_module(module_name), attribute)
+    if isinstance(value, Operation):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return value
+    msg = f"{spec} is neither an Operation nor a rule dict: {type(value).__name__}"
+    raise ValueError(msg)
+
+
+def read_rows(stream: IO[str], input_format: InputFormat) -> Iterator[Row]:
+    """Read the input rows lazily.
+
+    Blank lines of JSONL files are ignored. A line that is not a JSON object is yielded as
+    the ``ValueError`` describing it, so that it is reported as a failed row. CSV files must
+    have a header row.
+
+    Args:
+        stream (IO[str]): The input file.
+        input_format (InputFormat): ``jsonl`` or ``csv``.
+
+    Yields:
+        Row: The input data of each row, or the error of a malformed row.
+    """
+    if input_format == "csv":
+        yield from csv.DictReader(stream)
+        return
+
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield e
+        else:
+            yield data if isinstance(data, dict) else ValueError(f"Expected a JSON object, got {type(data).__name__}")
+
+
+def count_checkpoint(path: Path) -> int:
+    """Count the rows already written to an output file and drop a partially written last line.
+
+    Args:
+        path (Path): The output file of a previous run.
+
+    Returns:
+        int: Number of complete result lines.
+    """
+    if not path.exists():
+        return 0
+
+    with path.open("rb+") as output:
+        data = output.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            # クラッシュ時に途中まで書き込まれた最終行を切り詰める
+            output.truncate(complete)
+    return data.count(b"\n", 0, complete)
+
+
+async def execute_rows(
+    client: "AsyncSimpliseClient",
+    rule: JsonLogicRule,
+    rows: Iterator[Row],
+    output: TextIO,
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    first_row: int = 0,
+) -> RunSummary:
+    """Execute the rule for every row with bounded concurrency and write the results in input order.
+
+    Args:
+        client (AsyncSimpliseClient): The client to send the requests with.
+        rule (JsonLogicRule): The rule to execute.
+        rows (Iterator[Row]): The input rows, consumed only as results are written. A malformed
+            row is written as failed without sending a request.
+        output (TextIO): Where to write the JSONL results.
+        concurrency (int): Maximum number of requests in flight.
+        first_row (int): Row number of the first row, used when resuming.
+
+    Returns:
+        RunSummary: The summary of the run.
+    """
+    summary = RunSummary(skipped=first_row)
+    pending: deque[asyncio.Task[RowResult]] = deque()
+    numbered = enumerate(rows, start=first_row)
+    start = time.perf_counter()
+    try:
+        while True:
+            # 実行中のリクエストが上限に達するまでだけ入力を読み進める
+            while len(pending) < concurrency and (item := next(numbered, None)) is not None:
+                pending.append(asyncio.create_task(_execute_row(client, rule, *item)))
+            if not pending:
+                break
+
+            result = await pending.popleft()
+            output.write(result.to_json() + "\n")
+            output.flush()
+            summary.add(result)
+    finally:
+        for task in pending:
+            task.cancel()
+    summary.elapsed = time.perf_counter() - start
+    return summary
+
+
+async def _execute_row(client: "AsyncSimpliseClient", rule: JsonLogicRule, row: int, data: Row) -> RowResult:
+    """Execute the rule for one row and measure its latency."""
+    if isinstance(data, ValueError):
+        return RowResult(row, None, f"Invalid row: {data}", 0.0)
+    start = time.perf_counter()
+    try:
+        result = await client.action.execute_logic(rule, data)
+    except Exception as e:
+        return RowResult(row, None, str(e), time.perf_counter() - start)
+    return RowResult(row, result, None, time.perf_counter() - start)
+
+
+def _input_format(path: Path, requested: str) -> InputFormat:
+    """Resolve the input format from the option or the file extension."""
+    if requested != "auto":
+        return "csv" if requested == "csv" else "jsonl"
+    return "csv" if path.suffix.lower() == ".csv" else "jsonl"
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser of ``simplise-run``."""
+    parser = argparse.ArgumentParser(
+        prog="simplise-run", description="Execute a rule for every row of a JSONL or CSV file."
+    )
+    parser.add_argument("rule", help="JSON file of the rule, or module:attribute of an Operation")
+    parser.add_argument("input", type=Path, help="JSONL or CSV file of input rows")
+    parser.add_argument("-o", "--output", type=Path, help="JSONL file to write the results to (default: stdout)")
+    parser.add_argument("--format", choices=["auto", "jsonl", "csv"], default="auto", help="input file format")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="requests in flight")
+    parser.add_argument("--resume", action="store_true", help="skip the rows already written to the output file")
+    parser.add_argument("--api-key", default=os.getenv("SIMPLISE_API_KEY"), help="default: $SIMPLISE_API_KEY")
+    parser.add_argument(
+        "--base-url", default=os.getenv("SIMPLISE_API_URL", DEFAULT_BASE_URL), help="default: $SIMPLISE_API_URL"
+    )
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="request timeout in seconds")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run ``simplise-run``.
+
+    Args:
+        argv (list[str] | None): The command line arguments. Defaults to ``sys.argv[1:]``.
+
+    Returns:
+        int: The exit code, 1 if any row failed.
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("--api-key or SIMPLISE_API_KEY is required")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.resume and args.output is None:
+        parser.error("--resume requires --output")
+
+    # httpx は任意の依存関係のため、未インストールの場合は使い方のエラーとして案内する
+    try:
+        from simplise_api_client import async_client  # noqa: PLC0415
+    except ImportError:
+        parser.error("simplise-run requires httpx. Install it with `pip install simplise-api-client[async]`.")
+
+    rule = load_rule(args.rule)
+    first_row = count_checkpoint(args.output) if args.resume else 0
+    client = async_client.AsyncSimpliseClient(api_key=args.api_key, base_url=args.base_url, timeout=args.timeout)
+
+    with (
+        args.input.open(encoding="utf-8", newline="") as input_file,
+        args.output.open("a" if args.resume else "w", encoding="utf-8")
+        if args.output
+        else nullcontext(sys.stdout) as output,
+    ):
+        rows = read_rows(input_file, _input_format(args.input, args.format))
+        # 再開時は書き込み済みの行を読み飛ばす
+        for _ in range(first_row):
+            next(rows, None)
+        summary = asyncio.run(_run(client, rule, rows, output, args.concurrency, first_row))
+
+    print(summary.format(), file=sys.stderr)  # noqa: T201
+    return EXIT_ROW_ERRORS if summary.failed else 0
+
+
+async def _run(
+    client: "AsyncSimpliseClient",
+    rule: JsonLogicRule,
+    rows: Iterator[dict[str, Any]],
+    output: TextIO,
+    concurrency: int,
+    first_row: int,
+) -> RunSummary:
+    """Execute the rows and close the client."""
+    async with client:
+        return await execute_rows(client, rule, rows, output, concurrency=concurrency, first_row=first_row)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,514 @@
+"""# Core
+
+This module provides the sans-IO core shared by the synchronous and asynchronous clients.
+
+The core validates, optimizes and encodes requests and validates responses, but performs
+no I/O itself: a transport only sends the ``PreparedRequest`` and passes the response
+text back. ``SimpliseClient`` (requests) and ``AsyncSimpliseClient`` (httpx) therefore
+build exactly the same requests and apply the same validation.
+"""
+# 同期クライアントと非同期クライアントで共通のリクエスト構築・レスポンス検証処理（I/Oを含まない）。
+
+import json
+import logging
+from collections.abc import AsyncIterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, Protocol
+
+from pydantic import ValidationError
+
+from simplise_api_client.actions.operation import Operation
+from simplise_api_client.metrics import MetricsRegistry, Observation
+from simplise_api_client.middleware import MiddlewareChain, ResponseInfo
+from simplise_api_client.models import (
+    ActionExecuteRequest,
+    ActionExecuteResponse,
+    ActionLogicRequest,
+    ActionLogicResponse,
+    JsonLogicExecuteRequest,
+    JsonLogicExecuteResponse,
+)
+from simplise_api_client.multipart import (
+    AsyncMultipartBody,
+    EncodedBody,
+    InputSource,
+    MultipartBody,
+    MultipartEncoder,
+    is_input_source,
+    replayable,
+)
+from simplise_api_client.optimizer import optimize_rule
+from simplise_api_client.references import (
+    HTTP_PRECONDITION_FAILED,
+    RULE_HASH_HEADER,
+    RuleRegistry,
+    reference,
+    rule_digest,
+)
+from simplise_api_client.tracing import SPAN_HTTP, Span, Tracing, traced_request
+from simplise_api_client.type import (
+    JsonLogicRule,
+    JsonLogicRuleSafetyStr,
+    JsonLogicValue,
+    JsonLogicValueSafetyStr,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.usebootstrap.org"
+DEFAULT_TIMEOUT = 30.0
+
+type RequestBody = EncodedBody | MultipartBody | str | bytes | AsyncIterable[bytes | memoryview] | None
+
+
+class ClientSettings(Protocol):
+    """Client attributes read by the core when a request is prepared and exchanged."""
+
+    api_key: str
+    base_url: str
+    timeout: float
+    optimize_rules: bool
+    rule_registry: RuleRegistry | None
+    metrics: MetricsRegistry
+    middleware: MiddlewareChain
+    tracing: Tracing
+
+
+@dataclass(frozen=True)
+class PreparedRequest:
+    """HTTP request prepared by the core, ready to be sent by a transport.
+
+    トランスポートに依存しない、送信準備済みのHTTPリクエスト。
+    ``fallback`` はルールをハッシュで参照するリクエストで、サーバーがルールを保持していない場合に
+    代わりに送信するルール全体のリクエスト。
+    """
+
+    method: str
+    url: str
+    headers: dict[str, str]
+    body: RequestBody
+    timeout: float | None
+    fallback: "PreparedRequest | None" = None
+
+    @property
+    def content_length(self) -> int:
+        """Size of the body in bytes, 0 if it is streamed without a known length."""
+        return int(self.headers.get("Content-Length", 0))
+
+
+def stringify_rule_values(rule: JsonLogicRule) -> JsonLogicRuleSafetyStr:
+    """Convert all values in the rule to strings.
+
+    Args:
+        rule (JsonLogicRule): The rule or input data to convert.
+
+    Returns:
+        JsonLogicRuleSafetyStr: The rule with numbers and booleans converted to strings.
+    """
+
+    def stringify_value(
+        value: JsonLogicValue,
+    ) -> JsonLogicValueSafetyStr:
+        if isinstance(value, (int, float, bool)):
+            return str(value)
+        if isinstance(value, list):
+            return [stringify_value(v) for v in value]
+        if isinstance(value, dict):
+            return {k: stringify_value(v) for k, v in value.items()}
+        return value  # str型の場合はそのまま返す
+
+    if isinstance(rule, dict):
+        return {k: stringify_value(v) for k, v in rule.items()}
+    return rule
+
+
+class ActionLogicCore:
+    """Builds action-logic requests and validates their responses.
+
+    action-logicエンドポイントのリクエスト構築とレスポンス検証を行うクラス。
+    """
+
+    def __init__(self, settings: ClientSettings) -> None:
+        """Initialize the core with the client whose settings are used for every request."""
+        self.settings = settings
+        self.encoder = MultipartEncoder()
+
+    def prepare(
+        self,
+        rule: JsonLogicRule,
+        input_data: dict[str, Any] | InputSource | None = None,
+        *,
+        asynchronous: bool = False,
+    ) -> PreparedRequest:
+        """Validate and encode an action-logic request.
+
+        Structured input data is stringified, serialized once and encoded without further
+        copies. An input source is streamed into the ``input`` part as is. When the client
+        sends rules by reference and the server has acknowledged the rule, only its hash is
+        sent and the full request is attached as the ``fallback``.
+
+        Args:
+            rule (JsonLogicRule): The JsonLogic rule to execute
+            input_data (dict | InputSource, optional): Input data to be sent as form data
+            asynchronous (bool): Whether the body is sent by an asynchronous transport
+
+        Returns:
+            PreparedRequest: The request to send
+
+        Raises:
+            ValidationError: If the request data validation fails
+        """
+        # [AI GENERATED] リクエストデータをPydanticモデルで検証（入力ソースはルールのみ検証）
+        source = input_data if is_input_source(input_data) else None
+        try:
+            request_model = ActionLogicRequest(rule=rule, input_data=None if source is not None else input_data)
+        except ValidationError:
+            logger.exception("Request validation failed")
+            raise
+
+        action = json.dumps(stringify_rule_values(request_model.rule)).encode()
+        input_bytes = None
+        if source is None and request_model.input_data:
+            input_bytes = json.dumps(stringify_rule_values(request_model.input_data)).encode()
+        registry = self.settings.rule_registry
+        if registry is None:
+            return self._request(action, source, input_bytes, {}, asynchronous=asynchronous)
+
+        # [AI GENERATED] 承認済みのルールはハッシュで参照し、未知と言われた場合に備えてルール全体も用意する
+        digest = rule_digest(action)
+        headers = {RULE_HASH_HEADER: digest}
+        full = self._request(action, source, input_bytes, headers, asynchronous=asynchronous)
+        # 一度しか読めない入力ソースは再送できないため、常にルール全体を送る
+        if digest not in registry or (source is not None and not replayable(source)):
+            return full
+        by_reference = self._request(reference(digest), source, input_bytes, headers, asynchronous=asynchronous)
+        return replace(by_reference, fallback=full)
+
+    def before_request(self, request: PreparedRequest) -> PreparedRequest:
+        """Pass a request through the middleware of the client."""
+        middleware = self.settings.middleware
+        return middleware.before_request(request) if middleware else request
+
+    def exchange(self, request: PreparedRequest, observation: Observation) -> "ActionLogicExchange":
+        """Start the exchange that sends a prepared request.
+
+        Args:
+            request (PreparedRequest): The request to send, already passed through the middleware
+            observation (Observation): The observation recording the exchange
+
+        Returns:
+            ActionLogicExchange: The exchange driving the requests to send
+        """
+        return ActionLogicExchange(self, request, observation)
+
+    def resolve(self, request: PreparedRequest, status: int) -> PreparedRequest | None:
+        """Return the request to resend if the server does not know the referenced rule.
+
+        Args:
+            request (PreparedRequest): The request sent
+            status (int): The status of its response
+
+        Returns:
+            PreparedRequest | None: The request with the full rule, or None if no resend is needed
+        """
+        registry = self.settings.rule_registry
+        if request.fallback is None or registry is None or status != HTTP_PRECONDITION_FAILED:
+            return None
+        logger.info("Rule reference unknown to the server, resending the full rule")
+        registry.forget(request.headers[RULE_HASH_HEADER])
+        return request.fallback
+
+    def acknowledge(self, request: PreparedRequest, headers: Mapping[str, str]) -> None:
+        """Record the rule of a request as stored if the server echoed its hash.
+
+        Args:
+            request (PreparedRequest): The request sent
+            headers (Mapping[str, str]): The response headers
+        """
+        registry = self.settings.rule_registry
+        digest = request.headers.get(RULE_HASH_HEADER)
+        if registry is not None and digest is not None and headers.get(RULE_HASH_HEADER) == digest:
+            registry.acknowledge(digest)
+
+    def _request(
+        self,
+        action: bytes,
+        source: InputSource | None,
+        input_bytes: bytes | None,
+        headers: dict[str, str],
+        *,
+        asynchronous: bool,
+    ) -> PreparedRequest:
+        """Encode the multipart body of an action-logic request.
+
+        Args:
+            action (bytes): The content of the ``action`` part
+            source (InputSource | None): The input source streamed into the ``input`` part
+            input_bytes (bytes | None): The encoded input data, used if there is no input source
+            headers (dict[str, str]): Additional request headers
+            asynchronous (bool): Whether the body is sent by an asynchronous transport
+
+        Returns:
+            PreparedRequest: The request to send
+        """
+        body: RequestBody
+        if source is not None:
+            # サイズが分かる入力はContent-Length付きで、それ以外はチャンク転送で送信される
+            body_class = AsyncMultipartBody if asynchronous else MultipartBody
+            stream = body_class(action, source, boundary=self.encoder.boundary)
+            body, content_headers = stream, stream.headers
+        else:
+            encoded = self.encoder.encode(action, input_bytes)
+            body = encoded.for_async() if asynchronous else encoded
+            content_headers = encoded.headers
+
+        return PreparedRequest(
+            method="POST",
+            url=f"{self.settings.base_url}/action-logic",
+            headers={"Authorization": f"Bearer {self.settings.api_key}", **headers, **content_headers},
+            body=body,
+            timeout=self.settings.timeout,
+        )
+
+    def parse_response(self, text: str) -> str:
+        """Validate the response body of an action-logic request.
+
+        Args:
+            text (str): The response body
+
+        Returns:
+            str: The result from the API
+
+        Raises:
+            ValidationError: If the response data validation fails
+        """
+        # [AI GENERATED] レスポンスデータをPydanticモデルで検証
+        try:
+            response_model = ActionLogicResponse(result=text)
+        except ValidationError:
+            logger.exception("Response validation failed")
+            raise
+        else:
+            return response_model.result
+
+
+@dataclass(frozen=True)
+class Resend:
+    """Next step of an exchange: send another request instead of returning the response.
+
+    Attributes:
+        request (PreparedRequest): The request to send, already passed through the middleware.
+        attempt (int): The number of requests of the exchange sent before this one.
+    """
+
+    request: PreparedRequest
+    attempt: int
+
+
+class ActionLogicExchange:
+    """Sans-IO state of sending one action-logic request.
+
+    The exchange decides what follows each response and records the requests in the
+    metrics, tracing and middleware of the client; a transport only sends the requests::
+
+        while True:
+            with exchange.attempt() as request:
+                response = send(request)
+                exchange.received(response.status_code, response.headers, response.content)
+            if exchange.next_step(response.status_code, response.headers) is None:
+                return response
+            close(response)
+
+    1回のaction-logicリクエストの送信状態。送信後の判断と記録はここで行い、クライアントはI/Oのみを行う。
+    """
+
+    def __init__(self, core: ActionLogicCore, request: PreparedRequest, observation: Observation) -> None:
+        """Initialize the exchange of a request prepared by the core."""
+        self._core = core
+        self.request = request
+        self.observation = observation
+        self.attempts = 0
+        self._sent = request
+        self._span: Span | None = None
+        self._received = False
+
+    @contextmanager
+    def attempt(self) -> Iterator[PreparedRequest]:
+        """Trace the sending of the current request.
+
+        The middleware is notified of an exception raised before the response is received.
+
+        Yields:
+            PreparedRequest: The request to send, carrying the trace context
+        """
+        self.attempts += 1
+        with self._core.settings.tracing.span(SPAN_HTTP) as span:
+            self._span = span
+            self._sent = traced_request(self.request, span)
+            self._received = False
+            try:
+                yield self._sent
+            except Exception as e:
+                if not self._received:
+                    self.failed(e)
+                raise
+
+    def received(self, status: int, headers: Mapping[str, str], content: bytes | None) -> None:
+        """Record the response to the current request.
+
+        Args:
+            status (int): The status of the response
+            headers (Mapping[str, str]): The response headers
+            content (bytes | None): The response body, or None if it is streamed
+        """
+        self._received = True
+        observation = self.observation
+        observation.status = status
+        if isinstance(content, bytes):
+            observation.bytes_received = len(content)
+        if self._span is not None:
+            self._span.set_attribute("http.response.status_code", status)
+            if content is not None:
+                self._span.set_attribute("http.response.body.size", observation.bytes_received)
+        middleware = self._core.settings.middleware
+        if middleware:
+            middleware.after_response(self._sent, ResponseInfo(status, headers, observation.elapsed, content))
+
+    def failed(self, error: Exception) -> None:
+        """Notify the middleware of a request that failed without a complete response."""
+        middleware = self._core.settings.middleware
+        if middleware:
+            middleware.on_error(self._sent, error)
+
+    def next_step(self, status: int, headers: Mapping[str, str]) -> Resend | None:
+        """Decide what follows the response to the current request.
+
+        The full rule is resent if the server does not know the referenced rule; otherwise
+        the rule is recorded as stored if the server acknowledged it.
+
+        Args:
+            status (int): The status of the response
+            headers (Mapping[str, str]): The response headers
+
+        Returns:
+            Resend | None: The request to send next, or None if the response is final
+        """
+        fallback = self._core.resolve(self.request, status)
+        if fallback is None:
+            self._core.acknowledge(self.request, headers)
+            return None
+
+        settings = self._core.settings
+        settings.metrics.increment_retries(self.request.url)
+        if settings.middleware:
+            # 失敗した試行の番号（0から）を通知する
+            settings.middleware.on_retry(self.request, self.attempts - 1)
+        self.request = self._core.before_request(fallback)
+        return Resend(self.request, self.attempts)
+
+
+class OperationCore:
+    """Validates and optimizes operations before they are sent, and validates their results.
+
+    ライブラリモデルの実行前の検証・最適化と、実行結果の検証を行うクラス。
+    """
+
+    def __init__(self, settings: ClientSettings) -> None:
+        """Initialize the core with the client whose settings are used for every request."""
+        self.settings = settings
+
+    def prepare_execute(
+        self, operation: Operation, data: dict[str, str] | None = None
+    ) -> tuple[JsonLogicRule, dict[str, str] | None]:
+        """Validate an operation and convert it to the rule to send.
+
+        Args:
+            operation (Operation): The operation object to execute
+            data (dict[str, str] | None): The input data for the operation
+
+        Returns:
+            tuple[JsonLogicRule, dict[str, str] | None]: The rule and input data to send
+
+        Raises:
+            ValidationError: If the request data validation fails
+        """
+        # [AI GENERATED] リクエストデータをPydanticモデルで検証
+        try:
+            request_model = ActionExecuteRequest(operation_data=operation.to_dict(), input_data=data)
+        except ValidationError:
+            logger.exception("Request validation failed for execute")
+            raise
+
+        # Convert operations to JSON Logic format
+        return self.optimize(request_model.operation_data), request_model.input_data
+
+    def parse_execute(self, result: str) -> str:
+        """Validate the result of an operation.
+
+        Raises:
+            ValidationError: If the response data validation fails
+        """
+        # [AI GENERATED] レスポンスデータをPydanticモデルで検証
+        try:
+            response_model = ActionExecuteResponse(result=result)
+        except ValidationError:
+            logger.exception("Response validation failed for execute")
+            raise
+        else:
+            return response_model.result
+
+    def prepare_execute_logic(
+        self, rule: JsonLogicRule, data: dict[str, Any] | InputSource | None = None, method: str = "execute_logic"
+    ) -> tuple[JsonLogicRule, dict[str, Any] | InputSource | None]:
+        """Validate a JsonLogic rule and its input data.
+
+        Args:
+            rule (JsonLogicRule): The JsonLogic rule to execute
+            data (dict | InputSource, optional): Input data for the rule
+            method (str): Name of the calling method, used in log messages
+
+        Returns:
+            tuple[JsonLogicRule, dict | InputSource | None]: The rule and input data to send
+
+        Raises:
+            ValidationError: If the request data validation fails
+        """
+        # [AI GENERATED] リクエストデータをPydanticモデルで検証（入力ソースはルールのみ検証）
+        source = data if is_input_source(data) else None
+        try:
+            request_model = JsonLogicExecuteRequest(rule=rule, data=None if source is not None else data)
+        except ValidationError:
+            logger.exception(f"Request validation failed for {method}")
+            raise
+
+        return self.optimize(request_model.rule), source if source is not None else request_model.data
+
+    def parse_execute_logic(self, result: str) -> str:
+        """Validate the result of a JsonLogic rule.
+
+        Raises:
+            ValidationError: If the response data validation fails
+        """
+        # [AI GENERATED] レスポンスデータをPydanticモデルで検証
+        try:
+            response_model = JsonLogicExecuteResponse(result=result)
+        except ValidationError:
+            logger.exception("Response validation failed for execute_logic")
+            raise
+        else:
+            return response_model.result
+
+    def optimize(self, rule: JsonLogicRule) -> JsonLogicRule:
+        """Optimize the rule if rule optimization is enabled on the client."""
+        if not self.settings.optimize_rules:
+            return rule
+
+        optimized, report = optimize_rule(rule)
+        if report.changed:
+            logger.info(
+                f"Rule optimized: folded={report.folded}, flattened={report.flattened}, "
+                f"short_circuited={report.short_circuited}, deduplicated={report.deduplicated}, "
+                f"size={report.size_before}->{report.size_after} bytes"
+            )
+        return optimized
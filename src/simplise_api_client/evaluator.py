@@ -0,0 +1,396 @@
+"""# Evaluator
+
+This module evaluates JsonLogic rules locally, without calling the Simplise API.
+
+Only operators whose semantics are documented by the action modules are supported:
+
+- ``input``: a value of the input data
+- ``bool``: conversion to a boolean following the ``bool`` action rules
+- ``and``: true if all conditions are truthy
+- ``num`` and ``num.*``: JavaScript Number arithmetic and comparisons
+- ``decimal.add``/``sub``/``mul``/``div``: decimal arithmetic with 20 significant digits
+
+Rules and input data are stringified exactly as the clients do before sending them, and
+results are formatted as the API returns them. Any other operator raises
+``EvaluationError`` instead of silently producing a different result than the API.
+
+``evaluate_many`` spreads CPU-bound workloads over a process pool: the rule is sent and
+compiled once per worker process, and the rows are sent in pickled batches.
+"""
+# ルールをローカルで評価し、CPU負荷の高い大量評価をマルチプロセスで実行するためのモジュール。
+
+import decimal
+import json
+import math
+import os
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import batched
+from typing import Any
+
+from simplise_api_client.actions.operation import Operation
+from simplise_api_client.core import stringify_rule_values
+from simplise_api_client.literals import (
+    DECIMAL_CONTEXT,
+    NUMERIC_LITERAL,
+    format_decimal,
+    is_truthy,
+    parse_decimal,
+)
+from simplise_api_client.parallel import map_ordered
+from simplise_api_client.type import JsonLogicRule
+
+type Evaluator = Callable[[Mapping[str, Any]], Any]
+
+# ワーカープロセスへ一度に送る行数
+EVALUATION_BATCH_SIZE = 1000
+
+
+class EvaluationError(ValueError):
+    """Raised when a rule cannot be evaluated locally."""
+
+
+def format_result(value: object) -> str:
+    """Format an evaluated value as the API returns it.
+
+    Strings and numbers are returned as they are printed by the API, everything else as JSON.
+
+    Args:
+        value (object): The evaluated value.
+
+    Returns:
+        str: The formatted result.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float):
+        return format_number(value)
+    if isinstance(value, decimal.Decimal):
+        return format_decimal(value)
+    return json.dumps(_to_json(value), separators=(",", ":"))
+
+
+def compile_rule(rule: JsonLogicRule | Operation) -> Evaluator:
+    """Compile a rule into a function of the input data.
+
+    The rule is stringified as the clients do before sending it and then translated
+    into nested closures once, so repeated evaluations do not walk the rule again.
+
+    Args:
+        rule (JsonLogicRule | Operation): The rule to compile.
+
+    Returns:
+        Evaluator: A function that evaluates the rule for the given input data.
+
+    Raises:
+        EvaluationError: If the rule uses an operator that cannot be evaluated locally.
+    """
+    if isinstance(rule, Operation):
+        rule = rule.to_dict()
+    return _compile(stringify_rule_values(rule))
+
+
+def evaluate(rule: JsonLogicRule | Operation, data: Mapping[str, Any] | None = None) -> str:
+    """Evaluate a rule locally.
+
+    Args:
+        rule (JsonLogicRule | Operation): The rule to evaluate.
+        data (Mapping[str, Any] | None): The input data.
+
+    Returns:
+        str: The result, formatted as the API returns it.
+
+    Raises:
+        EvaluationError: If the rule cannot be evaluated locally.
+    """
+    return _run(compile_rule(rule), data)
+
+
+def evaluate_many(
+    rule: JsonLogicRule | Operation,
+    rows: Iterable[Mapping[str, Any] | None],
+    processes: int | None = None,
+    *,
+    batch_size: int = EVALUATION_BATCH_SIZE,
+    max_pending: int | None = None,
+) -> Iterator[str | Exception]:
+    """Evaluate a rule for many input rows on a process pool.
+
+    The rule is compiled in the calling process first, so an unsupported operator is
+    reported immediately, and then sent and compiled once in each worker process.
+    Rows are read lazily and sent to the workers in pickled batches; results are
+    yielded in input order. An exception raised for a row is yielded in place of its
+    result.
+
+    Args:
+        rule (JsonLogicRule | Operation): The rule to evaluate.
+        rows (Iterable[Mapping[str, Any] | None]): The input data of each evaluation.
+        processes (int | None): Number of worker processes. Defaults to the number of CPUs.
+        batch_size (int): Number of rows sent to a worker at a time.
+        max_pending (int | None): Maximum number of batches in flight. Defaults to twice the processes.
+
+    Returns:
+        Iterator[str | Exception]: The result, or the exception raised, for each row.
+
+    Raises:
+        EvaluationError: If the rule uses an operator that cannot be evaluated locally.
+    """
+    if isinstance(rule, Operation):
+        rule = rule.to_dict()
+    compile_rule(rule)
+    return _evaluate_batches(rule, rows, processes or os.cpu_count() or 1, batch_size, max_pending)
+
+
+def _evaluate_batches(
+    rule: JsonLogicRule,
+    rows: Iterable[Mapping[str, Any] | None],
+    processes: int,
+    batch_size: int,
+    max_pending: int | None,
+) -> Iterator[str | Exception]:
+    """Evaluate the rows in batches on a process pool and yield the results of each row."""
+    batches = map_ordered(
+        _evaluate_batch,
+        batched(rows, batch_size),
+        workers=processes,
+        max_pending=max_pending,
+        executor_class=ProcessPoolExecutor,
+        initializer=_init_worker,
+        initargs=(rule,),
+    )
+    for batch in batches:
+        # ワーカープロセスの異常終了などバッチ全体の失敗は呼び出し元に送出する
+        if isinstance(batch, Exception):
+            raise batch
+        yield from batch
+
+
+# ワーカープロセスでコンパイル済みのルール
+_worker_evaluator: Evaluator | None = None
+
+
+def _init_worker(rule: JsonLogicRule) -> None:
+    """Compile the rule once in a worker process."""
+    global _worker_evaluator  # noqa: PLW0603
+    _worker_evaluator = compile_rule(rule)
+
+
+def _evaluate_batch(rows: tuple[Mapping[str, Any] | None, ...]) -> list[str | Exception]:
+    """Evaluate a batch of rows with the rule compiled in this worker process."""
+    if _worker_evaluator is None:
+        msg = "Worker process was not initialized with a rule"
+        raise RuntimeError(msg)
+
+    results: list[str | Exception] = []
+    for row in rows:
+        try:
+            results.append(_run(_worker_evaluator, row))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _run(evaluator: Evaluator, data: Mapping[str, Any] | None) -> str:
+    """Evaluate a compiled rule for stringified input data and format the result."""
+    return format_result(evaluator(stringify_rule_values(dict(data)) if data else {}))
+
+
+def _compile(node: object) -> Evaluator:
+    """Compile a rule node into a closure."""
+    if isinstance(node, dict) and len(node) == 1:
+        ((operator, raw_args),) = node.items()
+        factory = _OPERATORS.get(operator)
+        if factory is None:
+            msg = f"Operator '{operator}' cannot be evaluated locally"
+            raise EvaluationError(msg)
+        args = raw_args if isinstance(raw_args, list) else [raw_args]
+        return factory([_compile(arg) for arg in args])
+
+    if isinstance(node, list):
+        items = [_compile(item) for item in node]
+        return lambda data: [item(data) for item in items]
+
+    return lambda _data: node
+
+
+def _input(args: list[Evaluator]) -> Evaluator:
+    """Compile ``input``: the value of the input data for a key."""
+    key = args[0]
+    return lambda data: data.get(str(key(data)))
+
+
+def _bool(args: list[Evaluator]) -> Evaluator:
+    """Compile ``bool``: the truthiness of the value."""
+    value = args[0]
+    return lambda data: is_truthy(value(data))
+
+
+def _and(args: list[Evaluator]) -> Evaluator:
+    """Compile ``and``: true if all conditions are truthy, evaluated left to right."""
+    return lambda data: all(is_truthy(condition(data)) for condition in args)
+
+
+def _num_reduce(operation: Callable[[float, float], float]) -> Callable[[list[Evaluator]], Evaluator]:
+    """Compile a ``num.*`` arithmetic operation folded from left to right."""
+
+    def factory(args: list[Evaluator]) -> Evaluator:
+        return lambda data: reduce(operation, (to_number(arg(data)) for arg in args))
+
+    return factory
+
+
+def _num_compare(operation: Callable[[float, float], bool]) -> Callable[[list[Evaluator]], Evaluator]:
+    """Compile a ``num.*`` comparison of two values."""
+
+    def factory(args: list[Evaluator]) -> Evaluator:
+        left, right = args
+        return lambda data: operation(to_number(left(data)), to_number(right(data)))
+
+    return factory
+
+
+def _num_extreme(pick: Callable[[list[float]], float]) -> Callable[[list[Evaluator]], Evaluator]:
+    """Compile ``num.max``/``num.min``, which are NaN if any value is NaN."""
+
+    def factory(args: list[Evaluator]) -> Evaluator:
+        def evaluate_extreme(data: Mapping[str, Any]) -> float:
+            values = [to_number(arg(data)) for arg in args]
+            return math.nan if any(math.isnan(value) for value in values) else pick(values)
+
+        return evaluate_extreme
+
+    return factory
+
+
+def _num_between(args: list[Evaluator]) -> Evaluator:
+    """Compile ``num.between``: whether the value is within the bounds (inclusive)."""
+    value, lower, upper = args
+    return lambda data: to_number(lower(data)) <= to_number(value(data)) <= to_number(upper(data))
+
+
+def _decimal_reduce(
+    operation: Callable[[decimal.Decimal, decimal.Decimal], decimal.Decimal],
+) -> Callable[[list[Evaluator]], Evaluator]:
+    """Compile a ``decimal.*`` operation folded from left to right."""
+
+    def factory(args: list[Evaluator]) -> Evaluator:
+        def evaluate_decimal(data: Mapping[str, Any]) -> decimal.Decimal:
+            operands = [_to_decimal_operand(arg(data)) for arg in args]
+            try:
+                return reduce(operation, operands).normalize(DECIMAL_CONTEXT)
+            except decimal.DecimalException as e:
+                msg = f"Invalid decimal operation: {e!r}"
+                raise EvaluationError(msg) from e
+
+        return evaluate_decimal
+
+    return factory
+
+
+def to_number(value: object) -> float:  # noqa: PLR0911
+    """Convert a value to a number like JavaScript's ``Number()``.
+
+    Args:
+        value (object): The value to convert.
+
+    Returns:
+        float: The number, NaN if the value is not numeric.
+    """
+    if isinstance(value, float):
+        return value
+    if value is None:
+        return 0.0
+    if isinstance(value, (bool, int, decimal.Decimal)):
+        return float(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if not text:
+            return 0.0
+        if text in {"Infinity", "+Infinity", "-Infinity"}:
+            return float(text.replace("Infinity", "inf"))
+        if NUMERIC_LITERAL.fullmatch(text):
+            return float(text)
+    return math.nan
+
+
+def _to_decimal_operand(value: object) -> decimal.Decimal:
+    """Convert an operand of a ``decimal.*`` operation."""
+    if isinstance(value, float):
+        value = format_number(value)
+    number = parse_decimal(value)
+    if number is None:
+        msg = f"Invalid decimal operand: {value!r}"
+        raise EvaluationError(msg)
+    return number
+
+
+def format_number(value: float) -> str:
+    """Format a number like JavaScript's ``String()``.
+
+    Args:
+        value (float): The number to format.
+
+    Returns:
+        str: The formatted number.
+    """
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "Infinity" if value > 0 else "-Infinity"
+    # repr は最短の往復可能な桁を返すため、JavaScriptと同じ桁になる
+    return format_decimal(decimal.Decimal(repr(value)))
+
+
+def _to_json(value: object) -> object:
+    """Convert an evaluated value to the JSON value returned by the API."""
+    if isinstance(value, float):
+        return json.loads(format_number(value)) if math.isfinite(value) else None
+    if isinstance(value, decimal.Decimal):
+        return format_decimal(value)
+    if isinstance(value, list):
+        return [_to_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    return value
+
+
+def _js_mod(left: float, right: float) -> float:
+    """Remainder with the sign of the dividend, NaN for a zero divisor."""
+    return math.nan if right == 0 else math.fmod(left, right)
+
+
+def _js_div(left: float, right: float) -> float:
+    """Division that returns Infinity or NaN for a zero divisor."""
+    if right != 0:
+        return left / right
+    if left == 0 or math.isnan(left):
+        return math.nan
+    return math.copysign(math.inf, left) * math.copysign(1, right)
+
+
+_OPERATORS: dict[str, Callable[[list[Evaluator]], Evaluator]] = {
+    "input": _input,
+    "bool": _bool,
+    "and": _and,
+    "num": lambda args: lambda data: to_number(args[0](data)),
+    "num.add": _num_reduce(lambda a, b: a + b),
+    "num.sub": _num_reduce(lambda a, b: a - b),
+    "num.mul": _num_reduce(lambda a, b: a * b),
+    "num.div": _num_reduce(_js_div),
+    "num.mod": _num_reduce(_js_mod),
+    "num.max": _num_extreme(max),
+    "num.min": _num_extreme(min),
+    "num.gt": _num_compare(lambda a, b: a > b),
+    "num.gte": _num_compare(lambda a, b: a >= b),
+    "num.lt": _num_compare(lambda a, b: a < b),
+    "num.lte": _num_compare(lambda a, b: a <= b),
+    "num.between": _num_between,
+    "decimal.add": _decimal_reduce(DECIMAL_CONTEXT.add),
+    "decimal.sub": _decimal_reduce(DECIMAL_CONTEXT.subtract),
+    "decimal.mul": _decimal_reduce(DECIMAL_CONTEXT.multiply),
+    "decimal.div": _decimal_reduce(DECIMAL_CONTEXT.divide),
+}
+
+# ローカルで評価できる演算子
+SUPPORTED_OPERATORS = frozenset(_OPERATORS)
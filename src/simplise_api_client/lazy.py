@@ -0,0 +1,52 @@
+"""# Lazy Module Attributes
+
+This module builds the module-level ``__getattr__`` and ``__dir__`` that load the public
+attributes of a package from their defining modules on first access.
+"""
+# パッケージの公開属性を初回アクセス時に定義元モジュールから読み込む、__getattr__と__dir__を作成するモジュール。
+
+import importlib
+import sys
+from collections.abc import Callable, Mapping
+
+
+def lazy_module(name: str, lazy_imports: Mapping[str, str]) -> tuple[Callable[[str], object], Callable[[], list[str]]]:
+    """Build the ``__getattr__`` and ``__dir__`` of a module whose attributes are loaded lazily.
+
+    Args:
+        name (str): The name of the module, ``__name__``.
+        lazy_imports (Mapping[str, str]): The defining module of each public attribute,
+            absolute or relative to the module.
+
+    Returns:
+        tuple[Callable[[str], object], Callable[[], list[str]]]: The ``__getattr__`` and ``__dir__``.
+    """
+
+    def __getattr__(attribute: str) -> object:  # noqa: N807
+        """Import a public attribute on first access.
+
+        Args:
+            attribute (str): The attribute name.
+
+        Returns:
+            object: The attribute loaded from its defining module.
+
+        Raises:
+            AttributeError: If the attribute is not part of the public API.
+        """
+        module_name = lazy_imports.get(attribute)
+        if module_name is None:
+            msg = f"module {name!r} has no attribute {attribute!r}"
+            raise AttributeError(msg)
+
+        value = getattr(importlib.import_module(module_name, name), attribute)
+        # 2回目以降は通常の属性参照になるようにモジュールにキャッシュする
+        setattr(sys.modules[name], attribute, value)
+        return value
+
+    def __dir__() -> list[str]:  # noqa: N807
+        """Return the module attributes including the lazily loaded ones."""
+        module = sys.modules[name]
+        return sorted({*vars(module), *getattr(module, "__all__", lazy_imports)})
+
+    return __getattr__, __dir__
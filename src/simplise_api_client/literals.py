@@ -0,0 +1,101 @@
+"""# Literals
+
+This module defines how literal values are read the way the Simplise API reads them:
+which strings are numbers, how decimals are formatted, and which values are false.
+
+The local evaluator and the rule optimizer both build on these helpers, so a constant
+folded by the optimizer is always the value the evaluator (and the API) would produce.
+"""
+# 評価器と最適化器で共通の、数値リテラル・小数の書式・真偽値の変換規則を定義するモジュール。
+
+import decimal
+import math
+import re
+
+# サーバー側の小数演算と同じ有効桁数と丸め方式
+DECIMAL_PRECISION = 20
+DECIMAL_CONTEXT = decimal.Context(
+    prec=DECIMAL_PRECISION,
+    rounding=decimal.ROUND_HALF_UP,
+    traps=[decimal.InvalidOperation, decimal.DivisionByZero, decimal.Overflow],
+)
+
+# 指数表記にならない範囲（JavaScriptの数値の文字列変換と同じ）
+PLAIN_EXPONENT_MIN = -7
+PLAIN_EXPONENT_MAX = 21
+
+NUMERIC_LITERAL = re.compile(r"[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?")
+
+FALSY_STRINGS = frozenset({"", "false", "FALSE", "False"})
+
+
+def parse_decimal(value: object) -> decimal.Decimal | None:
+    """Parse a numeric literal, returning None for anything that is not a plain finite number.
+
+    Args:
+        value (object): The value to parse.
+
+    Returns:
+        decimal.Decimal | None: The parsed number.
+    """
+    if isinstance(value, bool) or not isinstance(value, (str, int, float, decimal.Decimal)):
+        return None
+
+    text = str(value)
+    if not NUMERIC_LITERAL.fullmatch(text):
+        return None
+    return decimal.Decimal(text)
+
+
+def is_truthy(value: object) -> bool:
+    """Return whether a value is converted to true by the ``bool`` action.
+
+    Empty strings, "false" in any of its usual spellings, numeric zero (also as a string),
+    NaN, empty arrays, empty objects and null are false; everything else is true.
+
+    Args:
+        value (object): The value to convert.
+
+    Returns:
+        bool: The boolean value.
+    """
+    if isinstance(value, str):
+        number = parse_decimal(value)
+        return value not in FALSY_STRINGS and (number is None or not number.is_zero())
+    if isinstance(value, float):
+        return not (value == 0 or math.isnan(value))
+    if isinstance(value, (bool, int, decimal.Decimal)):
+        return bool(value)
+    return value is not None and value not in ([], {})
+
+
+def plain_decimal(value: decimal.Decimal) -> str | None:
+    """Format a decimal in plain notation as the API returns it.
+
+    Args:
+        value (decimal.Decimal): The number to format.
+
+    Returns:
+        str | None: The formatted number, or None if the API would use exponential notation.
+    """
+    if value.is_zero():
+        return "0"
+    normalized = value.normalize(DECIMAL_CONTEXT)
+    if not PLAIN_EXPONENT_MIN < normalized.adjusted() < PLAIN_EXPONENT_MAX:
+        return None
+    return format(normalized, "f")
+
+
+def format_decimal(value: decimal.Decimal) -> str:
+    """Format a decimal as the API returns it, in exponential notation outside of the plain range.
+
+    Args:
+        value (decimal.Decimal): The number to format.
+
+    Returns:
+        str: The formatted number.
+    """
+    plain = plain_decimal(value)
+    if plain is not None:
+        return plain
+    return format(value.normalize(DECIMAL_CONTEXT), "e").replace("E", "e")
@@ -0,0 +1,388 @@
+"""# Metrics
+
+This module provides an in-process registry of per-endpoint request metrics.
+
+For every endpoint the registry counts requests, responses by status code, transport
+errors, retries, 202 polls and bytes sent/received, and keeps a log-bucketed latency
+histogram. The clients record into ``client.metrics``; read it with ``snapshot()`` or
+export it in the Prometheus text format with ``to_prometheus()``.
+
+``Timings`` breaks down the time of a call into its phases. ``simplise_client.HttpClient``
+returns them in the ``timings`` of every response; for ``SimpliseClient`` collect them
+with ``collect_timings()``.
+"""
+# リクエスト数、ステータスコード、リトライ、レイテンシなどをエンドポイントごとに記録するモジュール。
+
+import bisect
+import copy
+import threading
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Iterator, Mapping
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from types import TracebackType
+from urllib.parse import urlsplit
+
+# レイテンシのヒストグラムの上限値（秒）。1msから約65秒まで2倍刻み
+LATENCY_BUCKETS: tuple[float, ...] = tuple(0.001 * 2**i for i in range(17))
+
+# Prometheus形式で出力するメトリクス名の接頭辞
+DEFAULT_PREFIX = "simplise_client"
+
+
+class Histogram:
+    """A histogram with fixed, logarithmically spaced buckets."""
+
+    def __init__(self, bounds: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """Initialize an empty histogram.
+
+        Args:
+            bounds (tuple[float, ...]): Sorted upper bounds of the buckets. Larger values fall into ``+Inf``.
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record a value."""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket that contains it.
+
+        Args:
+            q (float): The quantile, between 0 and 1.
+
+        Returns:
+            float: The estimated value, ``inf`` if it is above the largest bound and 0 if the histogram is empty.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip((*self.bounds, float("inf")), self.counts, strict=True):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Return the cumulative count of every bucket, ending with ``+Inf``."""
+        buckets = []
+        total = 0
+        for bound, count in zip((*self.bounds, float("inf")), self.counts, strict=True):
+            total += count
+            buckets.append((bound, total))
+        return buckets
+
+
+@dataclass
+class EndpointMetrics:
+    """Metrics of one endpoint."""
+
+    requests: int = 0
+    errors: int = 0
+    retries: int = 0
+    polls: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    statuses: Counter[int] = field(default_factory=Counter)
+    latency: Histogram = field(default_factory=Histogram)
+
+
+@dataclass
+class Observation:
+    """The outcome of a request being measured, filled in by the caller."""
+
+    status: int | None = None
+    bytes_received: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the measurement started."""
+        return time.perf_counter() - self.started
+
+
+@dataclass
+class Timings:
+    """Where the time of one call went, in seconds.
+
+    Phases that the transport does not report are None. The sync client cannot see
+    the connection setup, so its ``ttfb`` includes it; with httpx the DNS lookup is part
+    of ``connect``. For a call that is retried or polled, the phases are those of the last
+    attempt.
+
+    Attributes:
+        connect (float | None): Opening the TCP connection, None if a pooled connection was reused.
+        tls (float | None): The TLS handshake.
+        ttfb (float | None): From sending the request to receiving the response headers.
+        download (float | None): Reading the response body.
+        decode (float | None): Decoding and validating the response body.
+        prepare (float | None): Client-side validation and serialization of the request.
+        retry_wait (float): Time slept before retries and 202 polls.
+        total (float | None): The whole call.
+    """
+
+    connect: float | None = None
+    tls: float | None = None
+    ttfb: float | None = None
+    download: float | None = None
+    decode: float | None = None
+    prepare: float | None = None
+    retry_wait: float = 0.0
+    total: float | None = None
+
+    def add(self, phase: str, seconds: float) -> None:
+        """Add time to a phase."""
+        setattr(self, phase, (getattr(self, phase) or 0.0) + seconds)
+
+
+# collect_timings() のブロック内で呼び出しのタイミングを集計するTimings
+_current_timings: ContextVar[Timings | None] = ContextVar("simplise_timings", default=None)
+
+# タイミングを集計していない場合に共有するコンテキストマネージャー
+_NOT_TIMED: AbstractContextManager[None] = nullcontext()
+
+
+@contextmanager
+def collect_timings() -> Iterator[Timings]:
+    """Collect the timings of the ``SimpliseClient`` calls made in the ``with`` block.
+
+    The phases of several calls add up, and ``total`` is the duration of the block.
+    Collection follows the current thread or asyncio task; calls made outside of a
+    ``collect_timings()`` block are not timed.
+
+    Yields:
+        Timings: The timings, filled in as the calls are made.
+    """
+    timings = Timings()
+    token = _current_timings.set(timings)
+    started = time.perf_counter()
+    try:
+        yield timings
+    finally:
+        timings.total = time.perf_counter() - started
+        _current_timings.reset(token)
+
+
+def current_timings() -> Timings | None:
+    """Return the timings being collected by ``collect_timings()``, if any."""
+    return _current_timings.get()
+
+
+def timed(phase: str) -> AbstractContextManager[object]:
+    """Add the time spent in the ``with`` block to a phase of the timings being collected, if any."""
+    timings = _current_timings.get()
+    return _NOT_TIMED if timings is None else _PhaseTimer(timings, phase)
+
+
+class _PhaseTimer:
+    """Adds the duration of a ``with`` block to a phase of timings."""
+
+    def __init__(self, timings: Timings, phase: str) -> None:
+        self._timings = timings
+        self._phase = phase
+        self._started = 0.0
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self._timings.add(self._phase, time.perf_counter() - self._started)
+
+
+class TransportTrace:
+    """Collects the phases of a request from the ``trace`` request extension of httpx.
+
+    Pass an instance as ``extensions={"trace": trace}`` and call ``fill`` once the body is read.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty trace."""
+        self._events: dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: Mapping[str, object]) -> None:  # noqa: ARG002
+        """Record when an event of the transport happened."""
+        # "http11.receive_response_headers.complete" のようなイベント名からプロトコル名を除いて記録する
+        self._events.setdefault(event_name.partition(".")[2], time.perf_counter())
+
+    def fill(self, timings: Timings) -> None:
+        """Set the connection and transfer phases of the timings from the recorded events."""
+        timings.connect = self._between("connect_tcp.started", "connect_tcp.complete")
+        timings.tls = self._between("start_tls.started", "start_tls.complete")
+        timings.ttfb = self._between("send_request_headers.started", "receive_response_headers.complete")
+        timings.download = self._between("receive_response_headers.complete", "receive_response_body.complete")
+
+    def _between(self, start: str, end: str) -> float | None:
+        """Seconds between two events, or None if either did not happen."""
+        if start not in self._events or end not in self._events:
+            return None
+        return self._events[end] - self._events[start]
+
+
+class MetricsRegistry:
+    """Thread-safe registry of per-endpoint request metrics."""
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._lock = threading.Lock()
+        self._endpoints: dict[str, EndpointMetrics] = {}
+
+    def observe(
+        self,
+        endpoint: str,
+        *,
+        status: int | None,
+        latency: float,
+        bytes_sent: int = 0,
+        bytes_received: int = 0,
+    ) -> None:
+        """Record a completed request.
+
+        Args:
+            endpoint (str): The endpoint path or URL. Query strings are ignored.
+            status (int | None): The response status code, or None if no response was received.
+            latency (float): Duration of the request in seconds.
+            bytes_sent (int): Size of the request body.
+            bytes_received (int): Size of the response body.
+        """
+        with self._lock:
+            metrics = self._metrics(endpoint)
+            metrics.requests += 1
+            if status is None:
+                metrics.errors += 1
+            else:
+                metrics.statuses[status] += 1
+            metrics.bytes_sent += bytes_sent
+            metrics.bytes_received += bytes_received
+            metrics.latency.observe(latency)
+
+    def increment_retries(self, endpoint: str) -> None:
+        """Count a retry of a request to the endpoint."""
+        with self._lock:
+            self._metrics(endpoint).retries += 1
+
+    def increment_polls(self, endpoint: str) -> None:
+        """Count a poll after a 202 Accepted response from the endpoint."""
+        with self._lock:
+            self._metrics(endpoint).polls += 1
+
+    @contextmanager
+    def measure(self, endpoint: str, *, bytes_sent: int = 0) -> Iterator[Observation]:
+        """Measure a request made in the ``with`` block.
+
+        Set ``status`` and ``bytes_received`` of the yielded observation once the response
+        is received; a request that leaves the block without a status is counted as an error.
+
+        Args:
+            endpoint (str): The endpoint path or URL.
+            bytes_sent (int): Size of the request body.
+
+        Yields:
+            Observation: The outcome to fill in.
+        """
+        observation = Observation()
+        try:
+            yield observation
+        finally:
+            self.observe(
+                endpoint,
+                status=observation.status,
+                latency=observation.elapsed,
+                bytes_sent=bytes_sent,
+                bytes_received=observation.bytes_received,
+            )
+
+    def snapshot(self) -> dict[str, EndpointMetrics]:
+        """Return a consistent copy of the metrics of every endpoint."""
+        with self._lock:
+            return copy.deepcopy(self._endpoints)
+
+    def reset(self) -> None:
+        """Discard all recorded metrics."""
+        with self._lock:
+            self._endpoints.clear()
+
+    def to_prometheus(self, prefix: str = DEFAULT_PREFIX) -> str:
+        """Export the metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Prefix of the metric names.
+
+        Returns:
+            str: The exposition text.
+        """
+        snapshot = self.snapshot()
+        lines: list[str] = []
+
+        def family(name: str, kind: str, description: str) -> str:
+            metric = f"{prefix}_{name}"
+            lines.extend((f"# HELP {metric} {description}", f"# TYPE {metric} {kind}"))
+            return metric
+
+        metric = family("requests_total", "counter", "Responses received, by endpoint and status code.")
+        for endpoint, metrics in snapshot.items():
+            for status, count in sorted(metrics.statuses.items()):
+                lines.append(f'{metric}{{endpoint="{_escape(endpoint)}",status="{status}"}} {count}')
+
+        counters = (
+            ("request_errors_total", "Requests that failed without a response.", "errors"),
+            ("retries_total", "Retried requests.", "retries"),
+            ("polls_total", "Polls after 202 Accepted responses.", "polls"),
+            ("sent_bytes_total", "Request body bytes sent.", "bytes_sent"),
+            ("received_bytes_total", "Response body bytes received.", "bytes_received"),
+        )
+        for name, description, attribute in counters:
+            metric = family(name, "counter", description)
+            for endpoint, metrics in snapshot.items():
+                lines.append(f'{metric}{{endpoint="{_escape(endpoint)}"}} {getattr(metrics, attribute)}')
+
+        metric = family("request_duration_seconds", "histogram", "Request latency in seconds.")
+        for endpoint, metrics in snapshot.items():
+            label = f'endpoint="{_escape(endpoint)}"'
+            for bound, count in metrics.latency.cumulative():
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{metric}_bucket{{{label},le="{le}"}} {count}')
+            lines.append(f"{metric}_sum{{{label}}} {metrics.latency.sum!r}")
+            lines.append(f"{metric}_count{{{label}}} {metrics.latency.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def _metrics(self, endpoint: str) -> EndpointMetrics:
+        """Return the metrics of an endpoint, creating them on first use. Call with the lock held."""
+        # クエリ文字列ごとに系列が増えないようにパスのみをラベルにする
+        path = urlsplit(endpoint).path or "/"
+        metrics = self._endpoints.get(path)
+        if metrics is None:
+            metrics = self._endpoints[path] = EndpointMetrics()
+        return metrics
+
+
+def iter_counted(chunks: Iterator[bytes], observation: Observation) -> Iterator[bytes]:
+    """Yield the chunks of a streamed response body while counting their size."""
+    for chunk in chunks:
+        observation.bytes_received += len(chunk)
+        yield chunk
+
+
+async def aiter_counted(chunks: AsyncIterator[bytes], observation: Observation) -> AsyncIterator[bytes]:
+    """Yield the chunks of a streamed response body while counting their size."""
+    async for chunk in chunks:
+        observation.bytes_received += len(chunk)
+        yield chunk
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,109 @@
+"""# Middleware
+
+This module provides the request lifecycle hooks shared by the clients.
+
+Subclass ``Middleware`` and override the hooks you need, then pass instances to
+``SimpliseClient``, ``AsyncSimpliseClient`` or ``simplise_client.HttpClient``:
+
+- ``before_request`` may return a modified ``PreparedRequest`` (e.g. with extra headers)
+- ``after_response`` is called with every response received, including retried ones
+- ``on_retry`` is called before a request is retried
+- ``on_error`` is called when a request fails without a response
+
+``before_request`` hooks run in the order the middleware were given, the other hooks in
+reverse order, so the first middleware wraps all the others. Hooks run on the thread or
+event loop sending the request and must not block. The clients skip an empty chain,
+so requests without middleware do not pay for it.
+"""
+# キャッシュ、メトリクス、トレーシング、認証などをサブクラス化せずに組み合わせるためのフック。
+
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from simplise_api_client.core import PreparedRequest
+
+
+@dataclass(frozen=True)
+class ResponseInfo:
+    """A response as seen by the middleware.
+
+    Attributes:
+        status (int): The HTTP status code.
+        headers (Mapping[str, str]): The response headers.
+        elapsed (float): Seconds from sending the request to receiving the response headers
+            (to the end of the body when it is buffered).
+        content (bytes | None): The response body, or None when it is streamed.
+    """
+
+    status: int
+    headers: Mapping[str, str]
+    elapsed: float
+    content: bytes | None = None
+
+
+class Middleware:
+    """Base class of request lifecycle hooks. Every hook does nothing by default."""
+
+    def before_request(self, request: "PreparedRequest") -> "PreparedRequest":
+        """Inspect or replace a request before it is sent.
+
+        Args:
+            request (PreparedRequest): The request about to be sent.
+
+        Returns:
+            PreparedRequest: The request to send, e.g. ``dataclasses.replace(request, headers=...)``.
+        """
+        return request
+
+    def after_response(self, request: "PreparedRequest", response: ResponseInfo) -> None:
+        """Called with every response received, whatever its status."""
+
+    def on_retry(self, request: "PreparedRequest", attempt: int) -> None:
+        """Called before a request is sent again; ``attempt`` is the number of the failed attempt, from 0."""
+
+    def on_error(self, request: "PreparedRequest", error: Exception) -> None:
+        """Called when a request fails without a response."""
+
+
+class MiddlewareChain:
+    """An ordered chain of middleware, invoked by the clients."""
+
+    def __init__(self, middleware: Iterable[Middleware] = ()) -> None:
+        """Initialize the chain.
+
+        Args:
+            middleware (Iterable[Middleware]): The middleware, outermost first.
+        """
+        self._middleware = tuple(middleware)
+        self._reversed = self._middleware[::-1]
+
+    def __bool__(self) -> bool:
+        """Return whether the chain has any middleware."""
+        return bool(self._middleware)
+
+    def __len__(self) -> int:
+        """Return the number of middleware."""
+        return len(self._middleware)
+
+    def before_request(self, request: "PreparedRequest") -> "PreparedRequest":
+        """Pass the request through every ``before_request`` hook, outermost first."""
+        for middleware in self._middleware:
+            request = middleware.before_request(request)
+        return request
+
+    def after_response(self, request: "PreparedRequest", response: ResponseInfo) -> None:
+        """Call every ``after_response`` hook, innermost first."""
+        for middleware in self._reversed:
+            middleware.after_response(request, response)
+
+    def on_retry(self, request: "PreparedRequest", attempt: int) -> None:
+        """Call every ``on_retry`` hook, innermost first."""
+        for middleware in self._reversed:
+            middleware.on_retry(request, attempt)
+
+    def on_error(self, request: "PreparedRequest", error: Exception) -> None:
+        """Call every ``on_error`` hook, innermost first."""
+        for middleware in self._reversed:
+            middleware.on_error(request, error)
@@ -0,0 +1,379 @@
+"""# Multipart
+
+This module provides multipart/form-data encoders for the action-logic endpoint.
+
+``MultipartEncoder`` encodes already serialized ``action``/``input`` parts as a list of
+memoryviews over the pre-encoded bytes (scatter/gather), reusing a precomputed boundary
+and part headers, so the part contents are never copied into a new body buffer.
+
+For streamed uploads, the ``input`` part can be taken from a file path, a memory-mapped file (``mmap``), a bytes-like
+buffer or a (async) byte iterator. Its content is passed to the transport in chunks
+without ever building a second full copy of the input in memory.
+"""
+# 大きな入力データをメモリ上に複製せずに multipart/form-data として送信するためのモジュール。
+
+import asyncio
+import os
+import secrets
+from collections.abc import AsyncIterable, AsyncIterator, Buffer, Iterable, Iterator
+from pathlib import Path
+from typing import TypeGuard
+
+type InputSource = os.PathLike[str] | Buffer | Iterator[bytes] | AsyncIterable[bytes]
+
+# ストリーミング送信時の1チャンクあたりの最大サイズ（バイト）
+MULTIPART_CHUNK_SIZE = 64 * 1024
+
+# この長さ以下のボディは結合して1回の書き込みで送信する（バイト）
+INLINE_BODY_LIMIT = 64 * 1024
+
+_CRLF = b"\r\n"
+
+
+def is_input_source(value: object) -> TypeGuard[InputSource]:
+    """Return whether the value is a raw input source rather than structured input data.
+
+    Args:
+        value (object): The input passed by the caller.
+
+    Returns:
+        bool: True for paths, buffers and byte iterators.
+    """
+    return isinstance(value, (os.PathLike, Buffer, Iterator, AsyncIterable))
+
+
+def new_boundary() -> str:
+    """Return a random multipart boundary."""
+    return secrets.token_hex(16)
+
+
+def content_type(boundary: str) -> str:
+    """Return the Content-Type header value for a multipart body.
+
+    Args:
+        boundary (str): The multipart boundary.
+
+    Returns:
+        str: The header value.
+    """
+    return f"multipart/form-data; boundary={boundary}"
+
+
+def _part_header(boundary: str, name: str) -> bytes:
+    """Return the delimiter and headers that start a JSON part."""
+    return (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\nContent-Type: application/json\r\n\r\n'
+    ).encode()
+
+
+def _closing(boundary: str) -> bytes:
+    """Return the closing delimiter of the multipart body."""
+    return f"\r\n--{boundary}--\r\n".encode()
+
+
+def _prefix(action: bytes, boundary: str) -> bytes:
+    """Return the bytes that precede the content of the input part."""
+    return _part_header(boundary, "action") + action + _CRLF + _part_header(boundary, "input")
+
+
+def multipart_length(action: bytes, source: InputSource, boundary: str) -> int | None:
+    """Return the size of the encoded body, or None if the input size is not known in advance.
+
+    Args:
+        action (bytes): The encoded JSON rule.
+        source (InputSource): The input source.
+        boundary (str): The multipart boundary.
+
+    Returns:
+        int | None: The body size in bytes.
+    """
+    if isinstance(source, os.PathLike):
+        size = Path(source).stat().st_size
+    elif isinstance(source, Buffer):
+        size = memoryview(source).nbytes
+    else:
+        return None
+    return len(_prefix(action, boundary)) + size + len(_closing(boundary))
+
+
+def _iter_source(source: os.PathLike[str] | Buffer | Iterable[bytes], chunk_size: int) -> Iterator[bytes | memoryview]:
+    """Yield the content of an input source in bounded chunks."""
+    if isinstance(source, os.PathLike):
+        with Path(source).open("rb") as file:
+            while chunk := file.read(chunk_size):
+                yield chunk
+    elif isinstance(source, Buffer):
+        # バッファはコピーせずにスライスのビューを渡す
+        view = memoryview(source).cast("B")
+        for offset in range(0, len(view), chunk_size):
+            yield view[offset : offset + chunk_size]
+    else:
+        yield from source
+
+
+def iter_multipart(
+    action: bytes,
+    source: os.PathLike[str] | Buffer | Iterable[bytes],
+    boundary: str,
+    chunk_size: int = MULTIPART_CHUNK_SIZE,
+) -> Iterator[bytes | memoryview]:
+    """Encode the action and a streamed input as multipart/form-data.
+
+    Args:
+        action (bytes): The encoded JSON rule.
+        source (os.PathLike | Buffer | Iterable[bytes]): The input source.
+        boundary (str): The multipart boundary.
+        chunk_size (int): Maximum size of the chunks taken from paths and buffers.
+
+    Yields:
+        bytes | memoryview: Chunks of the encoded body.
+    """
+    yield _prefix(action, boundary)
+    yield from _iter_source(source, chunk_size)
+    yield _closing(boundary)
+
+
+async def aiter_multipart(
+    action: bytes,
+    source: InputSource,
+    boundary: str,
+    chunk_size: int = MULTIPART_CHUNK_SIZE,
+) -> AsyncIterator[bytes | memoryview]:
+    """Encode the action and a streamed input as multipart/form-data asynchronously.
+
+    Files are read in a worker thread so that disk reads do not block the event loop.
+
+    Args:
+        action (bytes): The encoded JSON rule.
+        source (InputSource): The input source.
+        boundary (str): The multipart boundary.
+        chunk_size (int): Maximum size of the chunks taken from paths and buffers.
+
+    Yields:
+        bytes | memoryview: Chunks of the encoded body.
+    """
+    yield _prefix(action, boundary)
+    if isinstance(source, os.PathLike):
+        file = await asyncio.to_thread(Path(source).open, "rb")
+        with file:
+            while chunk := await asyncio.to_thread(file.read, chunk_size):
+                yield chunk
+    elif isinstance(source, AsyncIterable):
+        async for chunk in source:
+            yield chunk
+    else:
+        for chunk in _iter_source(source, chunk_size):
+            yield chunk
+    yield _closing(boundary)
+
+
+def replayable(source: InputSource) -> bool:
+    """Return whether the input source can be encoded more than once (e.g. for a retry).
+
+    Args:
+        source (InputSource): The input source.
+
+    Returns:
+        bool: True for paths and buffers.
+    """
+    return isinstance(source, (os.PathLike, Buffer))
+
+
+def describe(source: InputSource) -> str:
+    """Return a short description of an input source for logging."""
+    if isinstance(source, os.PathLike):
+        return f"file {os.fspath(source)}"
+    if isinstance(source, Buffer):
+        return f"buffer of {memoryview(source).nbytes} bytes"
+    return f"stream {type(source).__name__}"
+
+
+class _BaseMultipartBody:
+    """Multipart body for the action-logic endpoint whose input part is streamed from an input source.
+
+    The body is encoded again on every iteration, so that a request with a path or
+    buffer source can be retried. Iterator sources can only be sent once.
+    """
+
+    def __init__(
+        self,
+        action: bytes,
+        source: InputSource,
+        chunk_size: int = MULTIPART_CHUNK_SIZE,
+        boundary: str | None = None,
+    ) -> None:
+        """Initialize the body.
+
+        Args:
+            action (bytes): The encoded JSON rule.
+            source (InputSource): The input source.
+            chunk_size (int): Maximum size of the chunks taken from paths and buffers.
+            boundary (str | None): The multipart boundary. A random boundary is used if omitted.
+        """
+        self.action = action
+        self.source = source
+        self.chunk_size = chunk_size
+        self.boundary = boundary or new_boundary()
+        self.length = multipart_length(action, source, self.boundary)
+        self._consumed = False
+
+    @property
+    def headers(self) -> dict[str, str]:
+        """Content headers of the body."""
+        headers = {"Content-Type": content_type(self.boundary)}
+        if self.length is not None:
+            # 長さが分かる場合はチャンク転送ではなくContent-Lengthを送る
+            headers["Content-Length"] = str(self.length)
+        return headers
+
+    def _start(self) -> None:
+        """Record a new iteration and reject replaying a consumed iterator source."""
+        if self._consumed and not replayable(self.source):
+            msg = f"Input {describe(self.source)} has already been consumed and cannot be sent again"
+            raise RuntimeError(msg)
+        self._consumed = True
+
+
+class MultipartBody(_BaseMultipartBody):
+    """Streamed multipart body for synchronous transports such as requests.
+
+    入力ソースから input パートを逐次読み込む multipart/form-data のリクエストボディ（同期版）。
+    入力サイズが分かる場合は ``len()`` で本文の長さを返し、Content-Length付きで送信される。
+    """
+
+    def __bool__(self) -> bool:
+        """Return True: the body is never empty, even when its size is not known."""
+        return True
+
+    def __len__(self) -> int:
+        """Return the size of the encoded body.
+
+        Raises:
+            TypeError: If the size of the input source is not known in advance.
+        """
+        if self.length is None:
+            msg = f"The size of {describe(self.source)} is not known in advance"
+            raise TypeError(msg)
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes | memoryview]:
+        """Iterate over the encoded body.
+
+        Raises:
+            TypeError: If the input source is an async iterable.
+        """
+        if isinstance(self.source, AsyncIterable):
+            msg = "Async iterable input sources can only be sent by the async client"
+            raise TypeError(msg)
+        self._start()
+        return iter_multipart(self.action, self.source, self.boundary, self.chunk_size)
+
+
+class AsyncMultipartBody(_BaseMultipartBody):
+    """Streamed multipart body for asynchronous transports such as httpx.
+
+    入力ソースから input パートを逐次読み込む multipart/form-data のリクエストボディ（非同期版）。
+    httpx が同期ストリームとして扱わないように、非同期イテレーションのみを提供する。
+    """
+
+    def __aiter__(self) -> AsyncIterator[bytes | memoryview]:
+        """Iterate asynchronously over the encoded body."""
+        self._start()
+        return aiter_multipart(self.action, self.source, self.boundary, self.chunk_size)
+
+
+class EncodedBody:
+    """Multipart body held as a list of memoryviews over the pre-encoded parts.
+
+    事前にエンコードされたパートを参照するメモリビューのリストとして保持するリクエストボディ。
+    requests にはサイズ付きのイテラブルとして、httpx には ``for_async()`` の戻り値として渡す。
+    """
+
+    def __init__(self, segments: list[memoryview], content_type: str) -> None:
+        """Initialize the body.
+
+        Args:
+            segments (list[memoryview]): The body segments in order.
+            content_type (str): The Content-Type header value.
+        """
+        self.segments = segments
+        self.length = sum(segment.nbytes for segment in segments)
+        self.headers = {"Content-Type": content_type, "Content-Length": str(self.length)}
+
+    def __len__(self) -> int:
+        """Return the size of the body in bytes."""
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes | memoryview]:
+        """Iterate over the body segments.
+
+        Small bodies are joined so that they are written with a single send call;
+        larger bodies are written segment by segment without being copied.
+        """
+        if self.length <= INLINE_BODY_LIMIT:
+            yield b"".join(self.segments)
+        else:
+            yield from self.segments
+
+    def __bytes__(self) -> bytes:
+        """Return the body as a single bytes object."""
+        return b"".join(self.segments)
+
+    def for_async(self) -> bytes | AsyncIterable[bytes | memoryview]:
+        """Return the body in the form expected by asynchronous transports such as httpx.
+
+        Returns:
+            bytes | AsyncIterable[bytes | memoryview]: The joined body for small bodies,
+                otherwise a re-iterable asynchronous view of the segments.
+        """
+        if self.length <= INLINE_BODY_LIMIT:
+            return bytes(self)
+        return _AsyncSegments(self.segments)
+
+
+class _AsyncSegments:
+    """Re-iterable asynchronous view of body segments (retries iterate it again)."""
+
+    def __init__(self, segments: list[memoryview]) -> None:
+        self._segments = segments
+
+    async def __aiter__(self) -> AsyncIterator[memoryview]:
+        for segment in self._segments:
+            yield segment
+
+
+class MultipartEncoder:
+    """Encoder for the ``action``/``input`` multipart body of the action-logic endpoint.
+
+    action-logic エンドポイント用の multipart/form-data エンコーダー。
+    境界文字列とパートヘッダーを事前に計算して再利用する。
+    """
+
+    def __init__(self, boundary: str | None = None) -> None:
+        """Initialize the encoder.
+
+        Args:
+            boundary (str | None): The multipart boundary. A random boundary is used if omitted.
+        """
+        self.boundary = boundary or new_boundary()
+        self.content_type = content_type(self.boundary)
+        # 境界文字列を含む固定部分は一度だけエンコードする
+        self._action_header = memoryview(_part_header(self.boundary, "action"))
+        self._input_header = memoryview(_CRLF + _part_header(self.boundary, "input"))
+        self._closing = memoryview(_closing(self.boundary))
+
+    def encode(self, action: bytes, input_data: bytes | None = None) -> EncodedBody:
+        """Encode the serialized parts without copying them.
+
+        Args:
+            action (bytes): The encoded JSON rule.
+            input_data (bytes | None): The encoded JSON input, if any.
+
+        Returns:
+            EncodedBody: The encoded body.
+        """
+        segments = [self._action_header, memoryview(action)]
+        if input_data is not None:
+            segments += [self._input_header, memoryview(input_data)]
+        segments.append(self._closing)
+        return EncodedBody(segments, self.content_type)
@@ -0,0 +1,241 @@
+"""# Rule optimizer
+
+This module rewrites JsonLogic rules before they are sent to the Simplise API.
+
+The optimizer only applies rewrites that preserve the result of the rule:
+
+- constant folding of ``decimal.*`` sub-expressions using exact decimal arithmetic
+- flattening of nested associative operations (e.g. ``num.add`` of ``num.add``)
+- short-circuiting of ``and`` after a literal false condition
+- removal of duplicated operands of idempotent operations (``and``, ``num.max``, ``num.min``)
+"""
+# 送信前にJsonLogicルールを書き換え、ペイロードサイズとサーバー側の評価コストを削減するモジュール。
+
+import decimal
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from functools import reduce
+from typing import cast
+
+from simplise_api_client.actions.operation import Operation
+from simplise_api_client.literals import DECIMAL_CONTEXT, DECIMAL_PRECISION, is_truthy, parse_decimal, plain_decimal
+from simplise_api_client.type import JsonLogicRule, JsonLogicValue
+
+# 丸めが発生しない範囲でのみ畳み込むための有効桁数（評価器とサーバー側の小数精度と同じ）
+FOLD_PRECISION = DECIMAL_PRECISION
+
+# 左から順に評価される演算子。先頭引数の同一演算子のみ平坦化できる
+_LEFT_ASSOCIATIVE = frozenset({"num.add", "decimal.add", "decimal.mul"})
+
+# 評価順序に依存しない結合的な演算子。任意の位置の同一演算子を平坦化できる
+_ASSOCIATIVE = frozenset({"and", "num.max", "num.min"})
+
+# 同じ引数を複数回与えても結果が変わらない演算子
+_IDEMPOTENT = frozenset({"and", "num.max", "num.min"})
+
+_DECIMAL_FOLDERS: dict[str, Callable[[decimal.Decimal, decimal.Decimal], decimal.Decimal]] = {
+    "decimal.add": lambda a, b: a + b,
+    "decimal.sub": lambda a, b: a - b,
+    "decimal.mul": lambda a, b: a * b,
+    "decimal.div": lambda a, b: a / b,
+}
+
+# 評価器と同じ精度で、丸めが発生する場合は畳み込まない
+_FOLD_CONTEXT = DECIMAL_CONTEXT.copy()
+_FOLD_CONTEXT.traps[decimal.Inexact] = True
+
+
+@dataclass
+class OptimizationReport:
+    """Summary of the rewrites applied to a rule.
+
+    ルールに適用された書き換えの集計。
+
+    Attributes:
+        folded (int): Number of constant sub-expressions folded into literals.
+        flattened (int): Number of nested associative operations merged into their parent.
+        short_circuited (int): Number of operands dropped after a literal false in ``and``.
+        deduplicated (int): Number of duplicated operands removed from idempotent operations.
+        size_before (int): Size of the compact JSON encoding before optimization, in bytes.
+        size_after (int): Size of the compact JSON encoding after optimization, in bytes.
+    """
+
+    folded: int = 0
+    flattened: int = 0
+    short_circuited: int = 0
+    deduplicated: int = 0
+    size_before: int = 0
+    size_after: int = 0
+
+    @property
+    def changed(self) -> bool:
+        """Whether any rewrite was applied."""
+        return bool(self.folded or self.flattened or self.short_circuited or self.deduplicated)
+
+
+def optimize_rule(rule: Operation | JsonLogicRule) -> tuple[JsonLogicRule, OptimizationReport]:
+    """Optimize a rule before it is sent to the API.
+
+    The root operation is never replaced by a literal so that the result
+    is always a valid rule, but all of its sub-expressions may be rewritten.
+
+    Args:
+        rule (Operation | JsonLogicRule): The operation or JsonLogic rule to optimize.
+
+    Returns:
+        tuple[JsonLogicRule, OptimizationReport]: The optimized rule and a report of the applied rewrites.
+    """
+    if isinstance(rule, Operation):
+        rule = rule.to_dict()
+
+    report = OptimizationReport(size_before=_encoded_size(rule))
+    optimized: JsonLogicRule = {}
+    for operator, raw in rule.items():
+        args = _optimize_args(operator, _as_args(raw), report)
+        # ルート演算子が1つの場合のみ演算子として書き換える
+        if len(rule) == 1:
+            args = _rewrite_args(operator, args, report)
+        optimized[operator] = _pack_args(raw, args)
+    report.size_after = _encoded_size(optimized)
+    return optimized, report
+
+
+def _encoded_size(value: JsonLogicValue) -> int:
+    """Return the size of the compact JSON encoding of a value."""
+    return len(json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode())
+
+
+def _canonical(value: JsonLogicValue) -> str:
+    """Return a canonical JSON string used to compare operands."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _as_args(value: JsonLogicValue) -> list[JsonLogicValue]:
+    """Return the operand list of an operation, accepting the single-operand shorthand."""
+    return value if isinstance(value, list) else [value]
+
+
+def _pack_args(raw: JsonLogicValue, args: list[JsonLogicValue]) -> JsonLogicValue:
+    """Return the operands in the same shape as the original, keeping the single-operand shorthand."""
+    if not isinstance(raw, list) and len(args) == 1:
+        return args[0]
+    return args
+
+
+def _operator_of(value: JsonLogicValue) -> str | None:
+    """Return the operator name if the value is an operation node."""
+    if isinstance(value, dict) and len(value) == 1:
+        return next(iter(value))
+    return None
+
+
+def _optimize_args(operator: str, args: list[JsonLogicValue], report: OptimizationReport) -> list[JsonLogicValue]:
+    """Optimize each operand of an operation."""
+    # input の引数はキー名なので書き換えない
+    if operator == "input":
+        return args
+    return [_optimize_value(arg, report) for arg in args]
+
+
+def _optimize_value(value: JsonLogicValue, report: OptimizationReport) -> JsonLogicValue:
+    """Optimize a single value, folding it into a literal when possible."""
+    operator = _operator_of(value)
+    if operator is None:
+        return value
+
+    raw = cast("dict[str, JsonLogicValue]", value)[operator]
+    args = _rewrite_args(operator, _optimize_args(operator, _as_args(raw), report), report)
+
+    folded = _fold_decimal(operator, args)
+    if folded is not None:
+        report.folded += 1
+        return folded
+    return {operator: _pack_args(raw, args)}
+
+
+def _rewrite_args(operator: str, args: list[JsonLogicValue], report: OptimizationReport) -> list[JsonLogicValue]:
+    """Apply flattening, short-circuiting and deduplication to operands."""
+    args = _flatten(operator, args, report)
+    if operator == "and":
+        args = _short_circuit_and(args, report)
+    if operator in _IDEMPOTENT:
+        args = _deduplicate(args, report)
+    return args
+
+
+def _flatten(operator: str, args: list[JsonLogicValue], report: OptimizationReport) -> list[JsonLogicValue]:
+    """Merge nested operations of the same associative operator into the parent."""
+    if operator not in _ASSOCIATIVE and operator not in _LEFT_ASSOCIATIVE:
+        return args
+
+    flattened: list[JsonLogicValue] = []
+    for index, arg in enumerate(args):
+        # 評価順序が変わらないよう、左結合の演算子は先頭引数のみ平坦化する
+        mergeable = operator in _ASSOCIATIVE or index == 0
+        if mergeable and _operator_of(arg) == operator:
+            nested = cast("dict[str, JsonLogicValue]", arg)
+            flattened.extend(_as_args(nested[operator]))
+            report.flattened += 1
+        else:
+            flattened.append(arg)
+    return flattened
+
+
+def _short_circuit_and(args: list[JsonLogicValue], report: OptimizationReport) -> list[JsonLogicValue]:
+    """Drop the operands of ``and`` that follow a literal false condition."""
+    for index, arg in enumerate(args):
+        if _is_literal_false(arg):
+            report.short_circuited += len(args) - index - 1
+            return args[: index + 1]
+    return args
+
+
+def _deduplicate(args: list[JsonLogicValue], report: OptimizationReport) -> list[JsonLogicValue]:
+    """Remove repeated operands, keeping the first occurrence."""
+    seen: set[str] = set()
+    unique: list[JsonLogicValue] = []
+    for arg in args:
+        key = _canonical(arg)
+        if key in seen:
+            report.deduplicated += 1
+            continue
+        seen.add(key)
+        unique.append(arg)
+    return unique
+
+
+def _fold_decimal(operator: str, args: list[JsonLogicValue]) -> str | None:
+    """Evaluate a decimal operation on literal operands.
+
+    Returns:
+        str | None: The result as a plain decimal string, or None if the operation cannot be folded exactly.
+    """
+    folder = _DECIMAL_FOLDERS.get(operator)
+    if folder is None or len(args) < 2:  # noqa: PLR2004
+        return None
+
+    operands = [parse_decimal(arg) for arg in args]
+    if any(operand is None for operand in operands):
+        return None
+
+    try:
+        with decimal.localcontext(_FOLD_CONTEXT):
+            result = reduce(folder, cast("list[decimal.Decimal]", operands))
+    except decimal.DecimalException:
+        # 丸めやゼロ除算が発生する場合はサーバーでの評価に任せる
+        return None
+    # 指数表記になる結果は表記揺れを避けるため畳み込まない
+    return plain_decimal(result)
+
+
+def _is_literal_false(value: JsonLogicValue) -> bool:
+    """Return whether the value is a condition that is always false."""
+    if value is False:
+        return True
+
+    if _operator_of(value) != "bool":
+        return False
+
+    args = _as_args(cast("dict[str, JsonLogicValue]", value)["bool"])
+    return len(args) == 1 and not is_truthy(args[0])
@@ -0,0 +1,85 @@
+"""# Parallel
+
+This module provides a bounded, order-preserving parallel map over a thread pool
+(or any other ``concurrent.futures`` executor, such as a process pool).
+
+At most ``max_pending`` items are taken from the input and submitted at a time, so
+generator inputs are consumed only as fast as results are yielded and memory use
+stays bounded regardless of the input length.
+"""
+# スレッドプールで並列実行し、入力順に結果を返すためのモジュール。
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+
+# execute_many の既定の並列数
+DEFAULT_WORKERS = 8
+
+# 入力の終端を示す番兵
+_EXHAUSTED = object()
+
+
+def map_ordered[T, R](  # noqa: PLR0913
+    func: Callable[[T], R],
+    items: Iterable[T],
+    *,
+    workers: int = DEFAULT_WORKERS,
+    max_pending: int | None = None,
+    initializer: Callable[..., object] | None = None,
+    initargs: tuple[object, ...] = (),
+    executor_class: Callable[..., Executor] = ThreadPoolExecutor,
+) -> Iterator[R | Exception]:
+    """Apply a function to every item in a worker pool and yield the results in input order.
+
+    An exception raised for an item is yielded in place of its result instead of
+    stopping the iteration.
+
+    Args:
+        func (Callable[[T], R]): The function to apply.
+        items (Iterable[T]): The input items. Generators are consumed lazily.
+        workers (int): Number of workers.
+        max_pending (int | None): Maximum number of submitted items whose result has not
+            been yielded yet. Defaults to twice the number of workers.
+        initializer (Callable[..., object] | None): Called once in each worker with ``initargs``.
+        initargs (tuple[object, ...]): Arguments passed to the initializer.
+        executor_class (Callable[..., Executor]): The executor to run the workers, e.g.
+            ``ProcessPoolExecutor`` for CPU-bound functions.
+
+    Yields:
+        R | Exception: The result, or the exception raised, for each item.
+
+    Raises:
+        ValueError: If workers or max_pending is less than 1.
+    """
+    if workers < 1:
+        msg = f"workers must be at least 1, got {workers}"
+        raise ValueError(msg)
+    window = max_pending if max_pending is not None else workers * 2
+    if window < 1:
+        msg = f"max_pending must be at least 1, got {window}"
+        raise ValueError(msg)
+
+    iterator = iter(items)
+    pending: deque[Future[R]] = deque()
+    executor = executor_class(max_workers=workers, initializer=initializer, initargs=initargs)
+    try:
+        while True:
+            # 未取得の結果が上限に達するまでだけ入力を読み進める（バックプレッシャー）
+            while len(pending) < window:
+                item = next(iterator, _EXHAUSTED)
+                if item is _EXHAUSTED:
+                    break
+                pending.append(executor.submit(func, item))  # type: ignore[arg-type]
+            if not pending:
+                return
+
+            future = pending.popleft()
+            try:
+                result: R | Exception = future.result()
+            except Exception as e:
+                result = e
+            yield result
+    finally:
+        # 途中で反復を止められた場合は未実行のタスクを取り消す
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,108 @@
+"""# References
+
+This module lets the clients send rules by reference instead of re-uploading them on every call.
+
+With ``rule_references=True``, a rule is first sent in full in the ``action`` part, with the
+SHA-256 of the part in the ``sp-rule-hash`` header. A server that supports references
+stores the rule and echoes the header in its response, and the client records the hash as
+acknowledged. From then on the ``action`` part only holds ``{"$ref": "<sha256>"}``.
+
+If the server answers a reference with ``412 Precondition Failed`` (for example because it
+restarted and lost the rule), the client forgets the hash and resends the full rule once.
+A server that does not support references never echoes the header, so its rules keep being
+sent in full.
+"""
+# 大きなルールをハッシュで参照し、毎回のアップロードを省略するためのモジュール。
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+# ルールのハッシュを送受信するヘッダー
+RULE_HASH_HEADER = "sp-rule-hash"
+
+# action パートでハッシュを参照するキー
+REFERENCE_KEY = "$ref"
+
+# サーバーが参照されたルールを保持していない場合のステータス
+HTTP_PRECONDITION_FAILED = 412
+
+# 既定で記録する承認済みハッシュの最大数
+DEFAULT_REGISTRY_SIZE = 1024
+
+
+def rule_digest(action: bytes) -> str:
+    """Return the content hash of an encoded rule.
+
+    Args:
+        action (bytes): The content of the ``action`` part.
+
+    Returns:
+        str: The hex SHA-256 of the content.
+    """
+    return hashlib.sha256(action).hexdigest()
+
+
+def reference(digest: str) -> bytes:
+    """Return the ``action`` part that refers to a rule by its hash.
+
+    Args:
+        digest (str): The hash of the rule.
+
+    Returns:
+        bytes: The encoded reference.
+    """
+    return json.dumps({REFERENCE_KEY: digest}).encode()
+
+
+class RuleRegistry:
+    """Hashes of the rules the server has acknowledged, least recently used first.
+
+    The registry is shared by the worker threads of ``execute_many`` and is therefore
+    guarded by a lock. When it is full, the least recently used hash is dropped and its
+    rule is sent in full again the next time.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_REGISTRY_SIZE) -> None:
+        """Initialize an empty registry.
+
+        Args:
+            max_size (int): Maximum number of hashes to remember.
+        """
+        self.max_size = max_size
+        self._digests: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, digest: object) -> bool:
+        """Return whether the server has acknowledged the hash, marking it as recently used."""
+        with self._lock:
+            if digest not in self._digests:
+                return False
+            self._digests.move_to_end(digest)
+            return True
+
+    def __len__(self) -> int:
+        """Return the number of acknowledged hashes."""
+        return len(self._digests)
+
+    def acknowledge(self, digest: str) -> None:
+        """Record that the server has stored the rule with the hash.
+
+        Args:
+            digest (str): The hash of the rule.
+        """
+        with self._lock:
+            self._digests[digest] = None
+            self._digests.move_to_end(digest)
+            if len(self._digests) > self.max_size:
+                self._digests.popitem(last=False)
+
+    def forget(self, digest: str) -> None:
+        """Forget a hash that the server no longer knows.
+
+        Args:
+            digest (str): The hash of the rule.
+        """
+        with self._lock:
+            self._digests.pop(digest, None)
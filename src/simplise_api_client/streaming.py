@@ -0,0 +1,286 @@
+"""# Streaming
+
+This module provides incremental decoders for streamed action results.
+
+The decoders are independent of any HTTP library: they are fed the raw
+response chunks and return the items that became complete, so that only
+the item currently being received is kept in memory.
+
+- ``bytes``: the raw chunks are passed through unchanged
+- ``ndjson``: one JSON value per line
+- ``json``: the items of a top-level JSON array, or of the array under the ``result`` key of
+  an object such as the API response (any other JSON value is yielded as a single item)
+"""
+# レスポンスを逐次デコードし、結果のサイズに関係なくメモリ使用量を一定に保つためのモジュール。
+
+import codecs
+import json
+from collections.abc import AsyncIterable, AsyncIterator, Iterable, Iterator
+from typing import Any, Literal
+
+type StreamFormat = Literal["bytes", "ndjson", "json"]
+
+_WHITESPACE = " \t\r\n"
+
+# トップレベルで要素の終わりを示す文字
+_ITEM_END = ",]" + _WHITESPACE
+
+# レスポンスのオブジェクトで結果を持つキー
+RESULT_KEY = "result"
+
+_JSON = json.JSONDecoder()
+
+
+class NdjsonDecoder:
+    """Incremental decoder for newline-delimited JSON.
+
+    改行区切りJSONを逐次デコードするクラス。
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """Feed a chunk and return the values of the lines completed by it.
+
+        Args:
+            chunk (bytes): The next chunk of the response body.
+
+        Returns:
+            list[Any]: The decoded values.
+        """
+        self._buffer += chunk
+        *lines, rest = self._buffer.split(b"\n")
+        self._buffer = bytearray(rest)
+        return [json.loads(line) for line in lines if line.strip()]
+
+    def close(self) -> list[Any]:
+        """Return the value of the last line if it is not terminated by a newline.
+
+        Returns:
+            list[Any]: The decoded values.
+        """
+        rest, self._buffer = self._buffer, bytearray()
+        return [json.loads(rest)] if rest.strip() else []
+
+
+class JsonArrayDecoder:
+    """Incremental decoder for the items of a JSON array.
+
+    JSON配列の要素を逐次デコードするクラス。
+    トップレベルの配列に加えて、APIのレスポンスのように ``{"result": [...]}`` の形で
+    キーの下にある配列も逐次デコードする。
+    キーの値が配列以外の場合はその値を、キーを持たないオブジェクトやその他のJSON値は全体を受信した後に1つの要素として返す。
+    """
+
+    def __init__(self, key: str = RESULT_KEY) -> None:
+        """Initialize the decoder.
+
+        Args:
+            key (str): The key of the array when the body is an object.
+        """
+        self._key = key
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._pos = 0
+        self._start: int | None = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # None: 未判定, array: 配列の要素, envelope: オブジェクトのキーの探索中, value: 全体を1つの値として扱う
+        self._mode: Literal["array", "envelope", "value"] | None = None
+        self._done = False
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """Feed a chunk and return the array items completed by it.
+
+        Args:
+            chunk (bytes): The next chunk of the response body.
+
+        Returns:
+            list[Any]: The decoded items.
+        """
+        self._buffer += self._decoder.decode(chunk)
+        if self._mode is None:
+            stripped = self._buffer.lstrip(_WHITESPACE)
+            if not stripped:
+                return []
+            self._mode = {"[": "array", "{": "envelope"}.get(stripped[0], "value")
+            self._pos = len(self._buffer) - len(stripped) + 1
+        if self._mode == "envelope":
+            return self._scan_envelope()
+        if self._mode == "array":
+            return self._scan()
+        return []
+
+    def close(self) -> list[Any]:
+        """Finish decoding and return any remaining value.
+
+        Returns:
+            list[Any]: The decoded items.
+
+        Raises:
+            ValueError: If the body ends in the middle of a JSON array.
+        """
+        self._buffer += self._decoder.decode(b"", final=True)
+        items = self._scan_envelope() if self._mode == "envelope" else []
+        if self._mode == "array":
+            items += self._scan()
+            if not self._done:
+                msg = "Incomplete JSON array in response body"
+                raise ValueError(msg)
+            return items
+        if self._done:
+            return items
+        return [json.loads(self._buffer)] if self._buffer.strip(_WHITESPACE) else []
+
+    def _scan_envelope(self) -> list[Any]:
+        """Skip the members of the object until the value of the key, then decode it."""
+        # キーより前のメンバーは読み飛ばし、オブジェクトの全体はキーが見つかるまでバッファに残す
+        buffer = self._buffer
+        pos = self._pos
+        while not self._done:
+            pos = _skip(buffer, pos, _WHITESPACE + ",")
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "}":
+                # キーを持たないオブジェクトは全体を1つの値として返す
+                self._mode = "value"
+                break
+            try:
+                key, colon = _JSON.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break
+            start = _skip(buffer, _skip(buffer, colon, _WHITESPACE) + 1, _WHITESPACE)
+            if start >= len(buffer):
+                break
+            if key == self._key and buffer[start] == "[":
+                self._mode = "array"
+                self._buffer = buffer[start + 1 :]
+                self._pos = 0
+                return self._scan()
+            try:
+                value, end = _JSON.raw_decode(buffer, start)
+            except json.JSONDecodeError:
+                break
+            # 数値は続く文字を受信するまで確定しない
+            if _skip(buffer, end, _WHITESPACE) == len(buffer):
+                break
+            pos = end
+            if key == self._key:
+                self._done = True
+                self._pos = pos
+                return [value]
+        self._pos = pos
+        return []
+
+    def _scan(self) -> list[Any]:
+        """Scan the buffered text and decode every complete item."""
+        items: list[Any] = []
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer) and not self._done:
+            char = buffer[pos]
+            if self._in_string:
+                self._advance_string(char)
+            elif self._depth == 0 and char in _ITEM_END:
+                # トップレベルの区切りで要素が確定する
+                if self._start is not None:
+                    items.append(json.loads(buffer[self._start : pos]))
+                    self._start = None
+                self._done = char == "]"
+            else:
+                self._advance_value(char, pos)
+            pos += 1
+
+        # 確定した要素を破棄してバッファを現在の要素のみに縮める
+        keep = pos if self._start is None else self._start
+        self._buffer = buffer[keep:]
+        self._pos = pos - keep
+        if self._start is not None:
+            self._start = 0
+        return items
+
+    def _advance_string(self, char: str) -> None:
+        """Track the end of a string, ignoring escaped quotes."""
+        # 文字列中の区切り文字は無視する
+        if self._escape:
+            self._escape = False
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+
+    def _advance_value(self, char: str, pos: int) -> None:
+        """Track the start and nesting depth of the current item."""
+        if self._start is None:
+            self._start = pos
+        if char == '"':
+            self._in_string = True
+        elif char in "[{":
+            self._depth += 1
+        elif char in "]}":
+            self._depth -= 1
+
+
+def _skip(text: str, pos: int, chars: str) -> int:
+    """Return the position of the first character from pos that is not one of chars."""
+    while pos < len(text) and text[pos] in chars:
+        pos += 1
+    return pos
+
+
+def _make_decoder(stream_format: StreamFormat) -> NdjsonDecoder | JsonArrayDecoder | None:
+    """Return the decoder for a stream format, or None for raw bytes."""
+    match stream_format:
+        case "bytes":
+            return None
+        case "ndjson":
+            return NdjsonDecoder()
+        case "json":
+            return JsonArrayDecoder()
+        case _:
+            msg = f"Unsupported stream format: {stream_format}"
+            raise ValueError(msg)
+
+
+def iter_decoded(chunks: Iterable[bytes], stream_format: StreamFormat = "bytes") -> Iterator[Any]:
+    """Decode an iterable of response chunks.
+
+    Args:
+        chunks (Iterable[bytes]): The response body chunks.
+        stream_format (StreamFormat): How to decode the body.
+
+    Yields:
+        Any: Raw chunks for ``bytes``, decoded JSON values otherwise.
+    """
+    decoder = _make_decoder(stream_format)
+    if decoder is None:
+        yield from chunks
+        return
+
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    yield from decoder.close()
+
+
+async def aiter_decoded(chunks: AsyncIterable[bytes], stream_format: StreamFormat = "bytes") -> AsyncIterator[Any]:
+    """Decode an asynchronous iterable of response chunks.
+
+    Args:
+        chunks (AsyncIterable[bytes]): The response body chunks.
+        stream_format (StreamFormat): How to decode the body.
+
+    Yields:
+        Any: Raw chunks for ``bytes``, decoded JSON values otherwise.
+    """
+    decoder = _make_decoder(stream_format)
+    async for chunk in chunks:
+        if decoder is None:
+            yield chunk
+            continue
+        for item in decoder.feed(chunk):
+            yield item
+    if decoder is not None:
+        for item in decoder.close():
+            yield item
@@ -0,0 +1,637 @@
+"""# Testing
+
+This module provides a stand-in for the Simplise API that runs in-process on a
+background thread, so that retries, polling, rate limiting and connection reuse can be
+exercised over real HTTP without the live service.
+
+The server implements:
+
+- ``POST /action-logic``: a multipart ``action``/``input`` request, or a JSON rule
+- ``GET``/``POST /action`` and ``/logic``: the query string is a URL-encoded JSON rule
+  and the ``POST`` body is the input data
+- ``/auth/login``, ``/auth/logout``, ``/auth/csrf-token``, ``/auth/verify``,
+  ``/auth/password-reset`` and ``/auth/password-reset/confirm``
+
+``/action-logic`` also stores rules sent with an ``sp-rule-hash`` header and accepts them
+by reference afterwards (see ``simplise_api_client.references``).
+
+``StandInRedis`` is an in-memory stand-in for the Redis client used by
+``simplise_api_client.cache.RedisCache``, so that several clients can share a cache
+without a Redis server.
+
+Rules are evaluated with the local evaluator, so only the operators it supports can be
+used. Latency, ``202 Accepted`` responses polled through ``sp-resource-path``, and
+``429 Too Many Requests`` with ``Retry-After`` are configurable::
+
+    with StandInServer(latency=0.05, rate_limit=100) as server:
+        client = SimpliseClient(api_key="test", base_url=server.url)
+"""
+# Simplise APIの代替サーバーをプロセス内で起動し、実際のHTTP通信でクライアントを検証するためのモジュール。
+
+import json
+import math
+import secrets
+import threading
+import time
+from collections import Counter
+from collections.abc import Mapping
+from email.parser import BytesParser
+from email.policy import HTTP
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import TracebackType
+from typing import Any, Self
+from urllib.parse import unquote, urlsplit
+
+from simplise_api_client.evaluator import evaluate
+from simplise_api_client.references import REFERENCE_KEY, RULE_HASH_HEADER, rule_digest
+
+# クエリ文字列のルールを評価するエンドポイント
+QUERY_ENDPOINTS = ("/action", "/logic")
+
+# 202 Accepted の結果を取得するパスの接頭辞
+RESULTS_PATH = "/results/"
+
+# セッションとCSRFトークンのクッキー名
+SESSION_COOKIE = "jwt"
+CSRF_COOKIE = "csrf_token"
+
+# 停止の要求を確認する間隔（秒）
+SHUTDOWN_POLL_INTERVAL = 0.05
+
+
+class StandInServer:
+    """An in-process stand-in for the Simplise API.
+
+    Attributes:
+        url (str): The base URL of the server, available once it is started.
+        hits (Counter[str]): The number of requests received per path, including
+            rate-limited ones.
+        rules (dict[str, Any]): The rules stored for reference, by hash. Clear it to
+            simulate a server that lost them.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        api_key: str | None = None,
+        latency: float = 0.0,
+        accepted_polls: int = 0,
+        poll_interval: int = 0,
+        rate_limit: int | None = None,
+        rate_window: float = 1.0,
+        retry_after: int | None = None,
+        users: Mapping[str, str] | None = None,
+        rule_references: bool = True,
+    ) -> None:
+        """Initialize the server without starting it.
+
+        Args:
+            api_key (str | None): The API key required as a Bearer token by the rule
+                endpoints and ``/auth/verify``. Any key is accepted when None.
+            latency (float): Seconds to wait before every response.
+            accepted_polls (int): Number of ``202 Accepted`` responses returned for a rule
+                before its result. The first is returned by the rule endpoint, the others
+                by the ``sp-resource-path`` it points to.
+            poll_interval (int): The ``Retry-After`` seconds of ``202 Accepted`` responses.
+            rate_limit (int | None): Maximum number of requests per ``rate_window``;
+                requests beyond it get ``429 Too Many Requests``. Unlimited when None.
+            rate_window (float): Length in seconds of the fixed rate limit window.
+            retry_after (int | None): The ``Retry-After`` seconds of ``429`` responses.
+                Defaults to the seconds left in the current window.
+            users (Mapping[str, str] | None): Usernames and passwords accepted by
+                ``/auth/login``. Any non-empty credentials are accepted when None.
+            rule_references (bool): Whether rules sent with an ``sp-rule-hash`` header are
+                stored and can then be sent by reference.
+        """
+        # [AI GENERATED] 応答の挙動の設定
+        self.api_key = api_key
+        self.latency = latency
+        self.accepted_polls = accepted_polls
+        self.poll_interval = poll_interval
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.retry_after = retry_after
+        self.users = users
+        self.rule_references = rule_references
+
+        # [AI GENERATED] ハンドラーのスレッド間で共有する状態
+        self.hits: Counter[str] = Counter()
+        self.rules: dict[str, Any] = {}
+        self.url = ""
+        self._lock = threading.Lock()
+        self._window_start = 0.0
+        self._window_count = 0
+        self._pending: dict[str, tuple[Any, Any, int]] = {}
+        self._sessions: set[str] = set()
+        self._server: _StandInHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> str:
+        """Start serving on an ephemeral port of 127.0.0.1 in a daemon thread.
+
+        Returns:
+            str: The base URL of the server.
+        """
+        # [AI GENERATED] 空いているポートで起動し、スレッドごとにリクエストを処理する
+        self._server = _StandInHTTPServer(self)
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": SHUTDOWN_POLL_INTERVAL}, daemon=True
+        )
+        self._thread.start()
+        self.url = f"http://127.0.0.1:{self._server.server_port}"
+        return self.url
+
+    def stop(self) -> None:
+        """Stop the server and wait for its thread to exit."""
+        if self._server is None or self._thread is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def __enter__(self) -> Self:
+        """Start the server.
+
+        Returns:
+            StandInServer: The started server.
+        """
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Stop the server."""
+        self.stop()
+
+    def create_session(self) -> str:
+        """Open a session, as ``/auth/login`` does.
+
+        Returns:
+            str: The session token, sent as the ``jwt`` cookie.
+        """
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self._sessions.add(token)
+        return token
+
+    def end_session(self, token: str | None) -> None:
+        """Close a session, as ``/auth/logout`` does.
+
+        Args:
+            token (str | None): The session token. Unknown tokens are ignored.
+        """
+        with self._lock:
+            self._sessions.discard(token or "")
+
+    def has_session(self, token: str | None) -> bool:
+        """Check whether a session is open.
+
+        Args:
+            token (str | None): The session token.
+
+        Returns:
+            bool: True if the session is open.
+        """
+        with self._lock:
+            return token in self._sessions
+
+    def admit(self, path: str) -> int | None:
+        """Count a request against the rate limit.
+
+        Args:
+            path (str): The path of the request.
+
+        Returns:
+            int | None: The Retry-After seconds if the request is rate-limited, otherwise None.
+        """
+        with self._lock:
+            self.hits[path] += 1
+            if self.rate_limit is None:
+                return None
+            # [AI GENERATED] 固定ウィンドウで数え、ウィンドウが終わったらリセットする
+            now = time.monotonic()
+            if now - self._window_start >= self.rate_window:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            if self._window_count <= self.rate_limit:
+                return None
+            if self.retry_after is not None:
+                return self.retry_after
+            return math.ceil(self._window_start + self.rate_window - now)
+
+    def defer(self, rule: Any, data: Any) -> str | None:  # noqa: ANN401
+        """Store a rule to be evaluated after the configured 202 polls.
+
+        Args:
+            rule (Any): The rule.
+            data (Any): The input data.
+
+        Returns:
+            str | None: The resource path to poll, or None if the rule is evaluated immediately.
+        """
+        if self.accepted_polls <= 0:
+            return None
+        resource_id = secrets.token_hex(8)
+        with self._lock:
+            self._pending[resource_id] = (rule, data, self.accepted_polls - 1)
+        return RESULTS_PATH + resource_id
+
+    def poll(self, resource_id: str) -> tuple[Any, Any] | None:
+        """Consume a poll of a deferred rule.
+
+        Args:
+            resource_id (str): The ID of the deferred rule.
+
+        Returns:
+            tuple[Any, Any] | None: The rule and input data once all polls are consumed,
+            otherwise None.
+
+        Raises:
+            KeyError: If there is no deferred rule with the ID.
+        """
+        with self._lock:
+            rule, data, remaining = self._pending[resource_id]
+            if remaining > 0:
+                self._pending[resource_id] = (rule, data, remaining - 1)
+                return None
+            del self._pending[resource_id]
+            return rule, data
+
+
+class StandInRedis:
+    """An in-memory stand-in for the ``get`` and ``set`` commands of a Redis client.
+
+    Values are returned as bytes and expire after ``px`` milliseconds, like ``redis.Redis``.
+
+    Attributes:
+        commands (Counter[str]): The number of commands received per command name.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty store."""
+        self.commands: Counter[str] = Counter()
+        self._values: dict[str, tuple[bytes, float | None]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> bytes | None:
+        """Return the value of a key, or None if it does not exist or has expired.
+
+        Args:
+            name (str): The key.
+
+        Returns:
+            bytes | None: The value.
+        """
+        with self._lock:
+            self.commands["get"] += 1
+            entry = self._values.get(name)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._values[name]
+                return None
+            return value
+
+    def set(self, name: str, value: str | bytes, *, px: int | None = None) -> bool:
+        """Set the value of a key.
+
+        Args:
+            name (str): The key.
+            value (str | bytes): The value.
+            px (int | None): Milliseconds after which the key expires. The key never expires when None.
+
+        Returns:
+            bool: Always True.
+        """
+        data = value.encode() if isinstance(value, str) else value
+        expires = None if px is None else time.monotonic() + px / 1000
+        with self._lock:
+            self.commands["set"] += 1
+            self._values[name] = (data, expires)
+        return True
+
+    def flushall(self) -> None:
+        """Remove every key."""
+        with self._lock:
+            self._values.clear()
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    """An HTTP server holding the stand-in that configures its handlers."""
+
+    daemon_threads = True
+
+    def __init__(self, stand_in: StandInServer) -> None:
+        self.stand_in = stand_in
+        super().__init__(("127.0.0.1", 0), _StandInHandler)
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Handle Simplise API requests with the local evaluator."""
+
+    # [AI GENERATED] コネクションの再利用を検証できるようにキープアライブに対応する
+    protocol_version = "HTTP/1.1"
+    server: _StandInHTTPServer
+
+    def do_GET(self) -> None:
+        """Handle a GET request."""
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        """Handle a POST request."""
+        self._handle("POST")
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002, ANN401
+        """Do not log every request."""
+
+    def _handle(self, method: str) -> None:
+        """Serve a request, dropping the connection quietly if the client has gone away.
+
+        Args:
+            method (str): The HTTP method.
+        """
+        try:
+            self._route(method)
+        except (BrokenPipeError, ConnectionResetError):
+            # [AI GENERATED] 期限切れなどで応答を待たずに切断したクライアントのエラーは出力しない
+            self.close_connection = True
+
+    def _route(self, method: str) -> None:
+        """Apply the latency and rate limit, then route the request.
+
+        Args:
+            method (str): The HTTP method.
+        """
+        # [AI GENERATED] エラーを返す場合もキープアライブのためにボディを読み切る
+        body = self._read_body()
+        path = urlsplit(self.path).path
+        stand_in = self.server.stand_in
+        if stand_in.latency > 0:
+            time.sleep(stand_in.latency)
+
+        retry_after = stand_in.admit(path)
+        if retry_after is not None:
+            self._respond(HTTPStatus.TOO_MANY_REQUESTS, "too many requests", {"Retry-After": str(retry_after)})
+            return
+
+        try:
+            if path.startswith("/auth/"):
+                self._auth(method, path, body)
+            elif path.startswith(RESULTS_PATH) and method == "GET":
+                self._result(path.removeprefix(RESULTS_PATH))
+            elif (path, method) != ("/action-logic", "POST") and path not in QUERY_ENDPOINTS:
+                self._respond(HTTPStatus.NOT_FOUND, "not found")
+            elif not self._authorized():
+                self._respond(HTTPStatus.UNAUTHORIZED, "unauthorized")
+            elif path == "/action-logic":
+                self._action_logic(*_parse_action_logic(self.headers.get("Content-Type", ""), body))
+            else:
+                self._rule(json.loads(unquote(urlsplit(self.path).query)), json.loads(body or b"{}"))
+        except (ValueError, KeyError) as e:
+            # [AI GENERATED] 不正なリクエストと評価できないルールは 400 を返す
+            self._respond(HTTPStatus.BAD_REQUEST, str(e))
+
+    def _authorized(self) -> bool:
+        """Return whether the request has the configured API key as a Bearer token."""
+        api_key = self.server.stand_in.api_key
+        return api_key is None or self.headers.get("Authorization") == f"Bearer {api_key}"
+
+    def _action_logic(self, action: bytes, data: Any) -> None:  # noqa: ANN401
+        """Resolve a rule sent in full or by reference, then evaluate it.
+
+        Args:
+            action (bytes): The content of the ``action`` part.
+            data (Any): The input data.
+        """
+        stand_in = self.server.stand_in
+        digest = self.headers.get(RULE_HASH_HEADER) if stand_in.rule_references else None
+        rule = json.loads(action)
+        if digest is None:
+            self._rule(rule, data)
+            return
+        if isinstance(rule, dict) and rule.keys() == {REFERENCE_KEY}:
+            rule = stand_in.rules.get(rule[REFERENCE_KEY])
+            if rule is None:
+                self._respond(HTTPStatus.PRECONDITION_FAILED, "unknown rule")
+                return
+        elif rule_digest(action) == digest:
+            stand_in.rules[digest] = rule
+        else:
+            self._respond(HTTPStatus.BAD_REQUEST, "rule hash mismatch")
+            return
+        # [AI GENERATED] ハッシュを返してルールを保持したことをクライアントに伝える
+        self._rule(rule, data, {RULE_HASH_HEADER: digest})
+
+    def _rule(self, rule: Any, data: Any, headers: Mapping[str, str] | None = None) -> None:  # noqa: ANN401
+        """Evaluate a rule, or accept it to be polled.
+
+        Args:
+            rule (Any): The rule.
+            data (Any): The input data.
+            headers (Mapping[str, str] | None): Additional response headers.
+        """
+        resource_path = self.server.stand_in.defer(rule, data)
+        if resource_path is None:
+            self._respond(HTTPStatus.OK, evaluate(rule, data), headers)
+        else:
+            self._accepted(resource_path, headers)
+
+    def _result(self, resource_id: str) -> None:
+        """Return the result of a deferred rule, or another 202 if polls remain.
+
+        Args:
+            resource_id (str): The ID of the deferred rule.
+        """
+        try:
+            pending = self.server.stand_in.poll(resource_id)
+        except KeyError:
+            self._respond(HTTPStatus.NOT_FOUND, "not found")
+            return
+        if pending is None:
+            self._accepted(RESULTS_PATH + resource_id)
+        else:
+            self._respond(HTTPStatus.OK, evaluate(*pending))
+
+    def _accepted(self, resource_path: str, headers: Mapping[str, str] | None = None) -> None:
+        """Return 202 Accepted pointing to the resource to poll.
+
+        Args:
+            resource_path (str): The path of the resource.
+            headers (Mapping[str, str] | None): Additional response headers.
+        """
+        self._respond(
+            HTTPStatus.ACCEPTED,
+            "accepted",
+            {
+                "sp-resource-path": resource_path,
+                "Retry-After": str(self.server.stand_in.poll_interval),
+                **(headers or {}),
+            },
+        )
+
+    def _auth(self, method: str, path: str, body: bytes) -> None:
+        """Handle the authentication endpoints.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The path of the request.
+            body (bytes): The request body.
+        """
+        stand_in = self.server.stand_in
+        session = self._cookie(SESSION_COOKIE)
+        match method, path:
+            case "POST", "/auth/login":
+                credentials = json.loads(body)
+                _require(credentials, "username", "password")
+                username, password = credentials["username"], credentials["password"]
+                if not username or not password or (stand_in.users and stand_in.users.get(username) != password):
+                    self._respond_json(HTTPStatus.UNAUTHORIZED, {"success": False})
+                    return
+                token = stand_in.create_session()
+                self._respond_json(HTTPStatus.OK, {"success": True}, {"Set-Cookie": _cookie(SESSION_COOKIE, token)})
+            case "POST", "/auth/logout":
+                stand_in.end_session(session)
+                self._respond_json(HTTPStatus.OK, {"success": True}, {"Set-Cookie": _cookie(SESSION_COOKIE, "")})
+            case "GET", "/auth/csrf-token":
+                if not stand_in.has_session(session):
+                    self._respond_json(HTTPStatus.UNAUTHORIZED, {"success": False})
+                    return
+                token = secrets.token_urlsafe(16)
+                self._respond_json(HTTPStatus.OK, {"csrfToken": token}, {"Set-Cookie": _cookie(CSRF_COOKIE, token)})
+            case "GET", "/auth/verify":
+                authorized = (
+                    stand_in.api_key is None or self.headers.get("Authorization") == f"Bearer {stand_in.api_key}"
+                )
+                valid = authorized or stand_in.has_session(session)
+                self._respond_json(HTTPStatus.OK if valid else HTTPStatus.UNAUTHORIZED, {"valid": valid})
+            case "POST", "/auth/password-reset":
+                _require(json.loads(body), "email")
+                self._respond_json(HTTPStatus.OK, {"success": True})
+            case "POST", "/auth/password-reset/confirm":
+                _require(json.loads(body), "token", "newPassword")
+                self._respond_json(HTTPStatus.OK, {"success": True})
+            case _:
+                self._respond(HTTPStatus.NOT_FOUND, "not found")
+
+    def _cookie(self, name: str) -> str | None:
+        """Return the value of a request cookie.
+
+        Args:
+            name (str): The name of the cookie.
+
+        Returns:
+            str | None: The value, or None if the cookie is not sent.
+        """
+        for pair in self.headers.get("Cookie", "").split(";"):
+            key, _, value = pair.strip().partition("=")
+            if key == name:
+                return value
+        return None
+
+    def _read_body(self) -> bytes:
+        """Read a Content-Length or chunked request body.
+
+        Returns:
+            bytes: The body.
+        """
+        if self.headers.get("Transfer-Encoding", "").lower() != "chunked":
+            return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        chunks = []
+        while size := int(self.rfile.readline().split(b";")[0], 16):
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+        # [AI GENERATED] 最後のチャンクの後のトレーラーを読み飛ばす
+        while self.rfile.readline() not in {b"\r\n", b"\n", b""}:
+            pass
+        return b"".join(chunks)
+
+    def _respond_json(self, status: HTTPStatus, data: object, headers: Mapping[str, str] | None = None) -> None:
+        """Send a JSON response.
+
+        Args:
+            status (HTTPStatus): The status.
+            data (object): The JSON-serializable body.
+            headers (Mapping[str, str] | None): Additional headers.
+        """
+        self._respond(status, json.dumps(data), headers, "application/json")
+
+    def _respond(
+        self,
+        status: HTTPStatus,
+        text: str,
+        headers: Mapping[str, str] | None = None,
+        content_type: str = "text/plain; charset=utf-8",
+    ) -> None:
+        """Send a response.
+
+        Args:
+            status (HTTPStatus): The status.
+            text (str): The body.
+            headers (Mapping[str, str] | None): Additional headers.
+            content_type (str): The content type of the body.
+        """
+        content = text.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+
+def _cookie(name: str, value: str) -> str:
+    """Format a Set-Cookie header value, expiring the cookie if the value is empty.
+
+    Args:
+        name (str): The name of the cookie.
+        value (str): The value of the cookie.
+
+    Returns:
+        str: The header value.
+    """
+    expires = "; Max-Age=0" if not value else ""
+    return f"{name}={value}; Path=/; HttpOnly{expires}"
+
+
+def _require(data: Mapping[str, Any], *keys: str) -> None:
+    """Check that a JSON request body has the required fields.
+
+    Args:
+        data (Mapping[str, Any]): The request body.
+        *keys (str): The required fields.
+
+    Raises:
+        KeyError: If a field is missing.
+    """
+    missing = [key for key in keys if key not in data]
+    if missing:
+        raise KeyError(", ".join(missing))
+
+
+def _parse_action_logic(content_type: str, body: bytes) -> tuple[bytes, Any]:
+    """Extract the rule and input data from an action-logic request body.
+
+    Args:
+        content_type (str): The Content-Type of the request.
+        body (bytes): The request body.
+
+    Returns:
+        tuple[bytes, Any]: The encoded rule and the decoded input data.
+    """
+    if not content_type.startswith("multipart/"):
+        return body, {}
+    message = BytesParser(policy=HTTP).parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+    parts = {
+        part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+        for part in message.iter_parts()
+    }
+    return parts["action"], json.loads(parts.get("input") or b"{}")
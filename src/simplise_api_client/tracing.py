@@ -0,0 +1,159 @@
+"""# Tracing
+
+This module provides optional tracing spans around rule execution.
+
+Pass an OpenTelemetry tracer (``opentelemetry.trace.get_tracer(...)``) or any object with
+the same ``start_as_current_span`` interface as ``tracer=`` to a client. The clients then
+open a span per ``execute``/``execute_logic`` call with child spans for validation,
+serialization, each HTTP attempt, Retry-After sleeps and 202 polls, and propagate the
+active span in a W3C ``traceparent`` header.
+
+Without a tracer no span is created and no span attribute (such as the rule hash) is
+computed: every span is a shared no-op context manager.
+"""
+# OpenTelemetry互換のトレーサーでルール実行のスパンを記録し、traceparentヘッダーを伝播するモジュール。
+
+import dataclasses
+import hashlib
+import json
+from collections.abc import Mapping, Sequence
+from contextlib import AbstractContextManager, nullcontext
+from typing import TYPE_CHECKING, Protocol
+
+from simplise_api_client.type import JsonLogicRule
+
+if TYPE_CHECKING:
+    from simplise_api_client.core import PreparedRequest
+
+type AttributeValue = str | bool | int | float | Sequence[str] | Sequence[bool] | Sequence[int] | Sequence[float]
+
+# スパン名
+SPAN_EXECUTE = "simplise.execute"
+SPAN_EXECUTE_LOGIC = "simplise.execute_logic"
+SPAN_VALIDATE = "simplise.validate"
+SPAN_SERIALIZE = "simplise.serialize"
+SPAN_HTTP = "simplise.http"
+SPAN_RETRY_WAIT = "simplise.retry_wait"
+SPAN_POLL_WAIT = "simplise.poll_wait"
+
+TRACEPARENT_HEADER = "traceparent"
+
+# トレーサーが設定されていない場合に共有するスパン
+_NO_SPAN: AbstractContextManager[None] = nullcontext()
+
+
+class SpanContext(Protocol):
+    """The identifiers of a span, as in ``opentelemetry.trace.SpanContext``."""
+
+    @property
+    def trace_id(self) -> int: ...
+
+    @property
+    def span_id(self) -> int: ...
+
+    @property
+    def trace_flags(self) -> int: ...
+
+    @property
+    def is_valid(self) -> bool: ...
+
+
+class Span(Protocol):
+    """The subset of ``opentelemetry.trace.Span`` used by the clients."""
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None: ...
+
+    def get_span_context(self) -> SpanContext: ...
+
+
+class Tracer(Protocol):
+    """The subset of ``opentelemetry.trace.Tracer`` used by the clients.
+
+    The tracer is expected to record exceptions raised in a span and mark it as failed,
+    as OpenTelemetry tracers do by default.
+    """
+
+    def start_as_current_span(
+        self, name: str, *, attributes: Mapping[str, AttributeValue] | None = None
+    ) -> AbstractContextManager[Span]: ...
+
+
+class Tracing:
+    """Opens spans with the configured tracer, or does nothing without one."""
+
+    def __init__(self, tracer: Tracer | None = None) -> None:
+        """Initialize tracing.
+
+        Args:
+            tracer (Tracer | None): The tracer to open spans with. None disables tracing.
+        """
+        self.tracer = tracer
+
+    def __bool__(self) -> bool:
+        """Return whether a tracer is configured."""
+        return self.tracer is not None
+
+    def span(
+        self, name: str, attributes: Mapping[str, AttributeValue] | None = None
+    ) -> AbstractContextManager[Span | None]:
+        """Open a span as a child of the current span.
+
+        Args:
+            name (str): The span name.
+            attributes (Mapping[str, AttributeValue] | None): Initial attributes of the span.
+
+        Returns:
+            AbstractContextManager[Span | None]: The span, or a no-op yielding None without a tracer.
+        """
+        if self.tracer is None:
+            return _NO_SPAN
+        return self.tracer.start_as_current_span(name, attributes=attributes)
+
+
+def traceparent(span: Span) -> str | None:
+    """Format the W3C ``traceparent`` header value of a span.
+
+    Args:
+        span (Span): The span to propagate.
+
+    Returns:
+        str | None: The header value, or None if the span context is not valid.
+    """
+    context = span.get_span_context()
+    if not context.is_valid:
+        return None
+    return f"00-{context.trace_id:032x}-{context.span_id:016x}-{int(context.trace_flags):02x}"
+
+
+def traced_request(request: "PreparedRequest", span: Span | None) -> "PreparedRequest":
+    """Describe an HTTP attempt on its span and propagate the span in the request headers.
+
+    Args:
+        request (PreparedRequest): The request about to be sent.
+        span (Span | None): The span of the attempt, None when tracing is disabled.
+
+    Returns:
+        PreparedRequest: The request to send, with a ``traceparent`` header if the span is valid.
+    """
+    if span is None:
+        return request
+    span.set_attribute("http.request.method", request.method)
+    span.set_attribute("url.full", request.url)
+    span.set_attribute("http.request.body.size", request.content_length)
+    value = traceparent(span)
+    if value is None:
+        return request
+    return dataclasses.replace(request, headers={**request.headers, TRACEPARENT_HEADER: value})
+
+
+def rule_hash(rule: JsonLogicRule) -> str:
+    """Return a stable hash of a rule, used to correlate spans of the same rule.
+
+    Args:
+        rule (JsonLogicRule): The rule.
+
+    Returns:
+        str: The first 16 hex digits of the SHA-256 of the canonical JSON of the rule.
+    """
+    canonical = json.dumps(rule, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
@@ -1,24 +1,70 @@
 """Simplise API Client for Python."""
+# 初回アクセス時に属性を読み込み、httpx のインポートを実際に使用するまで遅延する。
 
-from .action_client import ActionClient
-from .actions import Action
-from .auth_client import AuthClient
-from .http_client import HttpClient
-from .main_client import SimpliseClient
-from .types import (
-    ActionParams,
-    ApiConfig,
-    ApiError,
-    ApiResponse,
-    AuthSession,
-    ErrorResponse,
-    HttpMethod,
-    JsonLogicRule,
-    JsonValue,
-    LoginCredentials,
-    RequestOptions,
-    RetryConfig,
-)
+from typing import TYPE_CHECKING
+
+from simplise_api_client.lazy import lazy_module
+
+if TYPE_CHECKING:
+    from .action_client import ActionClient
+    from .actions import Action
+    from .auth_client import AuthClient, SessionManager
+    from .deadlines import DeadlineExceededError, deadline
+    from .http_cache import DiskHttpCacheStore, HttpCache, MemoryHttpCacheStore
+    from .http_client import HttpClient
+    from .load_balancing import BalancingStrategy, LoadBalancer
+    from .main_client import SimpliseClient
+    from .scheduler import Priority, PriorityClassConfig, RequestScheduler, request_priority
+    from .transport import DnsCache, PooledTransport
+    from .types import (
+        ActionParams,
+        ApiConfig,
+        ApiError,
+        ApiResponse,
+        AuthSession,
+        ErrorResponse,
+        HttpMethod,
+        JsonLogicRule,
+        JsonValue,
+        LoginCredentials,
+        RequestOptions,
+        RetryConfig,
+    )
+
+# 公開名とその定義元モジュールの対応表
+_LAZY_IMPORTS: dict[str, str] = {
+    "Action": ".actions",
+    "ActionClient": ".action_client",
+    "ActionParams": ".types",
+    "ApiConfig": ".types",
+    "ApiError": ".types",
+    "ApiResponse": ".types",
+    "AuthClient": ".auth_client",
+    "AuthSession": ".types",
+    "BalancingStrategy": ".load_balancing",
+    "DeadlineExceededError": ".deadlines",
+    "DiskHttpCacheStore": ".http_cache",
+    "DnsCache": ".transport",
+    "ErrorResponse": ".types",
+    "HttpCache": ".http_cache",
+    "HttpClient": ".http_client",
+    "HttpMethod": ".types",
+    "JsonLogicRule": ".types",
+    "JsonValue": ".types",
+    "LoadBalancer": ".load_balancing",
+    "LoginCredentials": ".types",
+    "MemoryHttpCacheStore": ".http_cache",
+    "PooledTransport": ".transport",
+    "Priority": ".scheduler",
+    "PriorityClassConfig": ".scheduler",
+    "RequestOptions": ".types",
+    "RequestScheduler": ".scheduler",
+    "RetryConfig": ".types",
+    "SessionManager": ".auth_client",
+    "SimpliseClient": ".main_client",
+    "deadline": ".deadlines",
+    "request_priority": ".scheduler",
+}
 
 __all__ = [
     "Action",
@@ -29,15 +75,33 @@ __all__ = [
     "ApiResponse",
     "AuthClient",
     "AuthSession",
+    "BalancingStrategy",
+    "DeadlineExceededError",
+    "DiskHttpCacheStore",
+    "DnsCache",
     "ErrorResponse",
+    "HttpCache",
     "HttpClient",
     "HttpMethod",
     "JsonLogicRule",
     "JsonValue",
+    "LoadBalancer",
     "LoginCredentials",
+    "MemoryHttpCacheStore",
+    "PooledTransport",
+    "Priority",
+    "PriorityClassConfig",
     "RequestOptions",
+    "RequestScheduler",
     "RetryConfig",
+    "SessionManager",
     "SimpliseClient",
+    "deadline",
+    "request_priority",
 ]
 
+
+__getattr__, __dir__ = lazy_module(__name__, _LAZY_IMPORTS)
+
+
 # [AI GENERATED] Main package exports for Simplise API Client
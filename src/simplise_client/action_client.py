@@ -1,10 +1,19 @@
 """Action client for Simplise API."""
 
+import asyncio
 import json
 import logging
+from collections.abc import AsyncGenerator, AsyncIterable, AsyncIterator, Iterable, Mapping
+from typing import Any
+
+from simplise_api_client.multipart import AsyncMultipartBody, InputSource, MultipartEncoder, describe, is_input_source
+from simplise_api_client.streaming import StreamFormat, aiter_decoded
+from simplise_api_client.tracing import SPAN_EXECUTE_LOGIC, SPAN_SERIALIZE, rule_hash
 
 from .http_client import HttpClient
-from .types import ApiResponse, JsonLogicRule, JsonValue
+from .pipeline import DEFAULT_CONCURRENCY, map_bounded
+from .scheduler import Priority, request_priority
+from .types import ApiResponse, HttpMethod, JsonLogicRule, JsonValue, RequestOptions
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +29,7 @@ class ActionClient:
         """
         # [AI GENERATED] Initialize action client with HTTP client
         self.http_client = http_client
+        self._encoder = MultipartEncoder()
 
     async def execute_url(self, endpoint: str) -> ApiResponse:
         """Execute action using URL parameters.
@@ -59,34 +69,114 @@ class ActionClient:
         # [AI GENERATED] Execute action with JSON body
         return await self.http_client.post(f"/action?{endpoint}", data)
 
-    async def execute_logic(self, rule: JsonLogicRule, input_data: JsonValue | None = None) -> ApiResponse:
+    async def execute_logic(
+        self, rule: JsonLogicRule, input_data: JsonValue | InputSource | None = None
+    ) -> ApiResponse:
         """Execute JsonLogic rule.
 
         Args:
             rule: JsonLogic rule to execute
-            input_data: Optional input data
+            input_data: Optional input data. A file path, memory-mapped file, bytes-like buffer or
+                (async) byte iterator holding the encoded JSON input is streamed into the request
+                without being loaded into memory
+
+        Returns:
+            API response
+        """
+        # [AI GENERATED] Trace the whole execution, including retries and 202 polls
+        with self.http_client.tracing.span(SPAN_EXECUTE_LOGIC) as span:
+            if span is not None:
+                span.set_attribute("simplise.rule_hash", rule_hash(rule))
+            return await self._send_logic(rule, input_data)
+
+    async def _send_logic(self, rule: JsonLogicRule, input_data: JsonValue | InputSource | None) -> ApiResponse:
+        """Send a JsonLogic rule to the action-logic endpoint.
+
+        Args:
+            rule: JsonLogic rule to execute
+            input_data: Optional input data or input source
 
         Returns:
             API response
         """
         # [AI GENERATED] Execute JsonLogic rule with optional input data
-        if input_data is not None:
-            # Send as multipart/form-data when input data is provided
-            logger.info("Sending multipart/form-data:")
+        if is_input_source(input_data):
+            # Stream the input part from the source instead of serializing it in memory
+            body = AsyncMultipartBody(json.dumps(rule).encode(), input_data, boundary=self._encoder.boundary)
+            logger.info("Sending multipart/form-data with streamed input:")
             logger.info(f"Action: {json.dumps(rule, indent=2)}")
-            logger.info(f"Input: {json.dumps(input_data, indent=2)}")
+            logger.info(f"Input: {describe(input_data)}")
 
-            # Create form data with proper content types
-            form_data = {
-                "action": (None, json.dumps(rule), "application/json"),
-                "input": (None, json.dumps(input_data), "application/json"),
-            }
+            return await self.http_client.request(
+                "/action-logic", {"method": HttpMethod.POST, "body": body, "headers": body.headers}
+            )
+        if input_data is not None:
+            # Send as multipart/form-data when input data is provided
+            if logger.isEnabledFor(logging.INFO):
+                # Avoid serializing large inputs a second time when logging is disabled
+                logger.info("Sending multipart/form-data:")
+                logger.info(f"Action: {json.dumps(rule, indent=2)}")
+                logger.info(f"Input: {json.dumps(input_data, indent=2)}")
 
-            return await self.http_client.post_form("/action-logic", form_data)
+            return await self.http_client.request("/action-logic", self._multipart_options(rule, input_data))
         # Send as JSON when no input data
         logger.info(json.dumps(rule, indent=2))
         return await self.http_client.post("/action-logic", rule)
 
+    async def execute_logic_stream(
+        self,
+        rule: JsonLogicRule,
+        input_data: JsonValue | InputSource | None = None,
+        stream_format: StreamFormat = "bytes",
+    ) -> AsyncIterator[Any]:
+        """Execute JsonLogic rule and stream the result.
+
+        Use this instead of execute_logic for large results: the result is yielded
+        incrementally while it is downloaded instead of being buffered as a whole.
+
+        Args:
+            rule: JsonLogic rule to execute
+            input_data: Optional input data, or an input source streamed as in execute_logic
+            stream_format: ``bytes`` for raw chunks, ``ndjson`` for one JSON value per line,
+                or ``json`` for the items of a JSON array, also under the ``result`` key of the response
+
+        Yields:
+            Raw chunks for ``bytes``, decoded JSON values otherwise
+        """
+        # [AI GENERATED] Stream JsonLogic rule result with the same request format as execute_logic
+        if is_input_source(input_data):
+            body = AsyncMultipartBody(json.dumps(rule).encode(), input_data, boundary=self._encoder.boundary)
+            chunks = self.http_client.stream(
+                "/action-logic", {"method": HttpMethod.POST, "body": body, "headers": body.headers}
+            )
+        elif input_data is not None:
+            chunks = self.http_client.stream("/action-logic", self._multipart_options(rule, input_data))
+        else:
+            options: RequestOptions = {
+                "method": HttpMethod.POST,
+                "body": json.dumps(rule),
+                "headers": {"Content-Type": "application/json"},
+            }
+            chunks = self.http_client.stream("/action-logic", options)
+
+        async for item in aiter_decoded(chunks, stream_format):
+            yield item
+
+    def _multipart_options(self, rule: JsonLogicRule, input_data: JsonValue) -> RequestOptions:
+        """Build request options with a multipart body for the action-logic endpoint.
+
+        Args:
+            rule: JsonLogic rule to execute
+            input_data: Input data
+
+        Returns:
+            Request options with the encoded body and its content headers
+        """
+        # [AI GENERATED] Encode the serialized parts without copying them into a new buffer
+        with self.http_client.tracing.span(SPAN_SERIALIZE):
+            body = self._encoder.encode(json.dumps(rule).encode(), json.dumps(input_data).encode())
+        return {"method": HttpMethod.POST, "body": body.for_async(), "headers": body.headers}
+
     async def execute_query(self, query_rule: str) -> ApiResponse:
         """Execute query rule.
 
@@ -117,47 +207,77 @@ class ActionClient:
 
         return await self.execute_logic(composite_rule)
 
-    # async def execute_batch(
-    #     self,
-    #     actions: list[dict[str, Any]]
-    # ) -> ApiResponse[list[Any]]:
-    #     """Execute multiple actions in batch.
-    #
-    #     Args:
-    #         actions: List of action configurations
-    #
-    #     Returns:
-    #         API response with batch results
-    #     """
-    #     # [AI GENERATED] Execute multiple actions concurrently
-    #     import asyncio
-    #
-    #     async def execute_single_action(action: dict[str, Any]) -> Any:
-    #         if "endpoint" in action:
-    #             response = await self.execute_url(action["endpoint"])
-    #         elif "rule" in action:
-    #             response = await self.execute_logic(
-    #                 action["rule"],
-    #                 action.get("input_data")
-    #             )
-    #         else:
-    #             raise ValueError("Action must have either endpoint or rule")
-    #
-    #         return response.get("data")
-    #
-    #     try:
-    #         tasks = [execute_single_action(action) for action in actions]
-    #         results = await asyncio.gather(*tasks)
-    #
-    #         return {
-    #             "success": True,
-    #             "data": results,
-    #             "status": 200
-    #         }
-    #
-    #     except Exception as e:
-    #         return {
-    #             "success": False,
-    #             "error": str(e),
-    #             "status": 500
-    #         }
+    async def execute_batch(
+        self, actions: Iterable[Mapping[str, Any]], priority: Priority = Priority.BATCH
+    ) -> list[ApiResponse]:
+        """Execute multiple actions concurrently.
+
+        The requests are sent with the priority given, so that with a scheduler on the HTTP
+        client, bulk traffic cannot hold back interactive calls.
+
+        Args:
+            actions: Actions with either an ``endpoint`` as in execute_url, or a ``rule`` and an
+                optional ``input_data`` as in execute_logic
+            priority: Priority class of the requests
+
+        Returns:
+            API responses, in the order of the actions
+
+        Raises:
+            ValueError: If an action has neither an endpoint nor a rule
+        """
+        # [AI GENERATED] Validate every action before sending any of them
+        actions = list(actions)
+        if any("endpoint" not in action and "rule" not in action for action in actions):
+            msg = "Action must have either endpoint or rule"
+            raise ValueError(msg)
+
+        async def execute_single_action(action: Mapping[str, Any]) -> ApiResponse:
+            if "endpoint" in action:
+                return await self.execute_url(action["endpoint"])
+            return await self.execute_logic(action["rule"], action.get("input_data"))
+
+        # The priority propagates to the tasks started by gather
+        with request_priority(priority):
+            return list(await asyncio.gather(*(execute_single_action(action) for action in actions)))
+
+    def pipeline(
+        self,
+        source: AsyncIterable[JsonValue | InputSource],
+        rule: JsonLogicRule,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        max_buffer: int | None = None,
+        *,
+        ordered: bool = True,
+        priority: Priority = Priority.BATCH,
+    ) -> AsyncGenerator[tuple[JsonValue | InputSource, ApiResponse | Exception]]:
+        """Execute a JsonLogic rule for each input of an async stream, with bounded in-flight work.
+
+        Inputs are taken from the source only as fast as results are consumed, so memory stays
+        bounded on infinite streams such as a message queue consumer. Each input is executed
+        as in execute_logic, with the retries of the HTTP client.
+
+        Args:
+            source: Input data of each execution, consumed lazily
+            rule: JsonLogic rule to execute
+            concurrency: Maximum number of requests in flight
+            max_buffer: Maximum number of completed results held until they are consumed;
+                defaults to the concurrency
+            ordered: Whether to yield the results in input order rather than as they complete
+            priority: Priority class of the requests
+
+        Returns:
+            An async generator of each input with its response, or the exception raised for it
+
+        Raises:
+            ValueError: If concurrency is less than 1 or max_buffer is negative
+        """
+
+        # [AI GENERATED] Set the priority in each request, as the pipeline runs them in its own tasks
+        async def execute_single_input(input_data: JsonValue | InputSource) -> ApiResponse:
+            with request_priority(priority):
+                return await self.execute_logic(rule, input_data)
+
+        return map_bounded(
+            execute_single_input, source, concurrency=concurrency, max_buffer=max_buffer, ordered=ordered
+        )
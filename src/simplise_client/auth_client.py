@@ -1,13 +1,30 @@
 """Authentication client for Simplise API."""
 
+import asyncio
+import base64
+import binascii
 import json
 import logging
+import time
+from collections.abc import Mapping
+from email.utils import parsedate_to_datetime
+from http.cookies import CookieError, SimpleCookie
 
 from .http_client import HttpClient
-from .types import ApiResponse, AuthSession, HttpMethod, LoginCredentials, RequestOptions
+from .types import ApiError, ApiResponse, AuthSession, ErrorResponse, HttpMethod, LoginCredentials, RequestOptions
 
 logger = logging.getLogger(__name__)
 
+# Names of the session and CSRF cookies
+SESSION_COOKIE = "jwt"
+CSRF_COOKIE = "csrf_token"
+
+# Seconds before expiry at which a session is refreshed in the background
+DEFAULT_REFRESH_MARGIN = 60.0
+
+# Lifetime assumed for sessions whose expiry the server does not tell, in seconds
+DEFAULT_SESSION_LIFETIME = 900.0
+
 
 class AuthClient:
     """Authentication client for Simplise API."""
@@ -68,12 +85,14 @@ class AuthClient:
         try:
             options: RequestOptions = {"method": HttpMethod.GET, "headers": {"Cookie": session_cookie}}
 
-            await self.http_client.request_without_auth("/auth/csrf-token", options)
+            response = await self.http_client.request_without_auth("/auth/csrf-token", options)
 
-            # Note: In browser environments, Set-Cookie headers are typically not accessible
-            # In a real implementation, the server should return the CSRF token in the response body
-            # For now, return a placeholder token
-            return "csrf-token-from-response"
+            # The token is returned in the body, and also set as a cookie
+            data = response.get("data")
+            if isinstance(data, dict) and isinstance(data.get("csrfToken"), str):
+                return data["csrfToken"]
+            cookie = _set_cookie(response.get("headers"), CSRF_COOKIE)
+            return None if cookie is None else cookie[0]
 
         except Exception as e:
             logger.warning(f"Failed to get CSRF token: {e}")
@@ -96,18 +115,49 @@ class AuthClient:
                 logger.warning("Login failed")
                 return None
 
-            # In a real implementation, extract session cookie from login response
-            # For browser environments, cookies are automatically handled
-            # This implementation assumes server-side usage
-            session_cookie = "jwt=extracted-from-response"
+            # Extract the session cookie and its expiry from the Set-Cookie header
+            cookie = _set_cookie(login_response.get("headers"), SESSION_COOKIE)
+            if cookie is None:
+                logger.warning("Login response has no session cookie")
+                return None
+            token, expires_at = cookie
+            session_cookie = f"{SESSION_COOKIE}={token}"
             csrf_token = await self.get_csrf_token(session_cookie)
 
-            return {"session_cookie": session_cookie, "csrf_token": csrf_token}
+            return {
+                "session_cookie": session_cookie,
+                "csrf_token": csrf_token,
+                "expires_at": expires_at if expires_at is not None else _jwt_expiry(token),
+            }
 
         except Exception:
             logger.exception("Failed to establish session")
             return None
 
+    def session_manager(
+        self,
+        credentials: LoginCredentials,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        default_lifetime: float = DEFAULT_SESSION_LIFETIME,
+    ) -> "SessionManager":
+        """Create a session manager and attach it to the HTTP client.
+
+        ``HttpClient.request_with_csrf`` then takes the session cookie and CSRF token from
+        the manager when they are omitted.
+
+        Args:
+            credentials: Login credentials
+            refresh_margin: Seconds before expiry at which the session is refreshed
+            default_lifetime: Lifetime of sessions whose expiry the server does not tell, in seconds
+
+        Returns:
+            The session manager
+        """
+        # [AI GENERATED] Share one manager between every caller of the HTTP client
+        manager = SessionManager(self, credentials, refresh_margin, default_lifetime)
+        self.http_client.session_manager = manager
+        return manager
+
     async def verify_token(self) -> ApiResponse:
         """Verify authentication token.
 
@@ -149,3 +199,151 @@ class AuthClient:
         options: RequestOptions = {"method": HttpMethod.POST, "body": json.dumps(reset_data)}
 
         return await self.http_client.request_without_auth("/auth/password-reset/confirm", options)
+
+
+class SessionManager:
+    """Shares one authentication session between concurrent callers.
+
+    The session is established on first use and reused until it expires. Callers that find
+    no valid session wait for a single login instead of each logging in. Within
+    ``refresh_margin`` seconds of expiry, the current session is still returned while one
+    background task logs in again, so callers do not wait for the refresh.
+    """
+
+    def __init__(
+        self,
+        auth: AuthClient,
+        credentials: LoginCredentials,
+        refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+        default_lifetime: float = DEFAULT_SESSION_LIFETIME,
+    ) -> None:
+        """Initialize session manager.
+
+        Args:
+            auth: Authentication client used to log in
+            credentials: Login credentials
+            refresh_margin: Seconds before expiry at which the session is refreshed
+            default_lifetime: Lifetime of sessions whose expiry the server does not tell, in seconds
+        """
+        # [AI GENERATED] No session is established until it is first needed
+        self.auth = auth
+        self.credentials = credentials
+        self.refresh_margin = refresh_margin
+        self.default_lifetime = default_lifetime
+        self.logins = 0
+        self._session: AuthSession | None = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh: asyncio.Task[AuthSession] | None = None
+
+    async def session(self) -> AuthSession:
+        """Return a valid session, logging in if there is none.
+
+        Returns:
+            Authentication session with its session cookie and CSRF token
+
+        Raises:
+            ApiError: If the login or the CSRF token request fails
+        """
+        # [AI GENERATED] Serve the current session, refreshing it early in the background
+        session = self._session
+        remaining = self._expires_at - time.time()
+        if session is not None and remaining > 0:
+            if remaining <= self.refresh_margin and self._refresh is None:
+                self._refresh = asyncio.create_task(self._establish(session))
+                self._refresh.add_done_callback(self._refreshed)
+            return session
+        return await self._establish(session)
+
+    def invalidate(self, session: AuthSession) -> None:
+        """Drop a session the server rejected, unless it has already been replaced.
+
+        Args:
+            session: The rejected session
+        """
+        # [AI GENERATED] Compare identities so that a newer session is kept
+        if self._session is session:
+            self._session = None
+
+    async def close(self) -> None:
+        """Log out the current session."""
+        # [AI GENERATED] Wait for a background refresh so that its session is logged out too
+        if self._refresh is not None:
+            await asyncio.gather(self._refresh, return_exceptions=True)
+        session, self._session = self._session, None
+        if session is not None:
+            await self.auth.logout(session["session_cookie"])
+
+    async def _establish(self, stale: AuthSession | None) -> AuthSession:
+        """Log in, unless another caller replaced the stale session meanwhile.
+
+        Args:
+            stale: The session the caller found, or None
+
+        Returns:
+            The new session
+        """
+        # [AI GENERATED] Callers waiting on the lock reuse the session of the first one
+        async with self._lock:
+            if self._session is not None and self._session is not stale:
+                return self._session
+            session = await self.auth.establish_session(self.credentials)
+            self.logins += 1
+            if session is None or session.get("csrf_token") is None:
+                error: ErrorResponse = {"error": "Failed to establish session", "status": 401, "message": None}
+                raise ApiError(error["status"], error)
+            expires_at = session.get("expires_at")
+            self._expires_at = time.time() + self.default_lifetime if expires_at is None else expires_at
+            self._session = session
+            return session
+
+    def _refreshed(self, task: "asyncio.Task[AuthSession]") -> None:
+        """Forget a finished background refresh, logging its failure."""
+        self._refresh = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background session refresh failed: {task.exception()}")
+
+
+def _set_cookie(headers: Mapping[str, str] | None, name: str) -> tuple[str, float | None] | None:
+    """Find a cookie in the Set-Cookie header of a response.
+
+    Args:
+        headers: Response headers
+        name: Cookie name
+
+    Returns:
+        The cookie value and its expiry as a Unix timestamp (None for a session cookie),
+        or None if the cookie is not set
+    """
+    # [AI GENERATED] Max-Age takes precedence over Expires (RFC 6265 5.3)
+    header = next((value for key, value in (headers or {}).items() if key.lower() == "set-cookie"), None)
+    cookie: SimpleCookie = SimpleCookie()
+    try:
+        cookie.load(header or "")
+    except CookieError:
+        return None
+    morsel = cookie.get(name)
+    if morsel is None or not morsel.value:
+        return None
+    if morsel["max-age"]:
+        return morsel.value, time.time() + int(morsel["max-age"])
+    if morsel["expires"]:
+        try:
+            return morsel.value, parsedate_to_datetime(morsel["expires"]).timestamp()
+        except (TypeError, ValueError):
+            pass
+    return morsel.value, None
+
+
+def _jwt_expiry(token: str) -> float | None:
+    """Return the exp claim of a JWT, or None if the token is not a JWT with one."""
+    # [AI GENERATED] The signature is not verified; the claim is only used to schedule refreshes
+    parts = token.split(".")
+    if len(parts) != 3:  # noqa: PLR2004
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+    except (binascii.Error, ValueError):
+        return None
+    exp = payload.get("exp") if isinstance(payload, dict) else None
+    return float(exp) if isinstance(exp, int | float) else None
@@ -0,0 +1,110 @@
+"""Deadlines that bound the total time of calls, including their retries and polls."""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+_current_deadline: ContextVar["Deadline | None"] = ContextVar("simplise_client_deadline", default=None)
+
+
+class DeadlineExceededError(TimeoutError):
+    """The deadline of a call passed before it completed."""
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """A point in time, on the monotonic clock, by which a call must complete."""
+
+    expires_at: float
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        """Return the deadline a number of seconds from now.
+
+        Args:
+            seconds: Time budget in seconds
+
+        Returns:
+            The deadline
+        """
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        """Return the seconds left before the deadline, 0 once it has passed."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def cap(self, timeout: float | None) -> float:
+        """Limit a timeout to the time left.
+
+        Args:
+            timeout: Timeout in seconds, or None for no timeout
+
+        Returns:
+            The smaller of the timeout and the time left
+        """
+        remaining = self.remaining()
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def check(self, what: str = "request") -> None:
+        """Raise if the deadline has passed.
+
+        Args:
+            what: What was about to be done, for the error message
+
+        Raises:
+            DeadlineExceededError: If no time is left
+        """
+        # [AI GENERATED] Stop before starting work whose caller has already given up
+        if self.remaining() <= 0:
+            msg = f"Deadline exceeded before {what}"
+            raise DeadlineExceededError(msg)
+
+
+@contextmanager
+def deadline(seconds: float | None) -> Iterator[Deadline | None]:
+    """Bound the total time of the ``HttpClient`` calls made in the ``with`` block.
+
+    Deadlines nest: an inner block never extends the deadline of an outer one. The deadline
+    follows the current asyncio task, so it propagates to the calls the block awaits.
+
+    Args:
+        seconds: Time budget in seconds, or None to keep the current deadline
+
+    Yields:
+        The deadline in effect, or None if there is none
+    """
+    limit = effective_deadline(seconds)
+    if seconds is None:
+        yield limit
+        return
+    token = _current_deadline.set(limit)
+    try:
+        yield limit
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Deadline | None:
+    """Return the deadline set by the innermost ``deadline()`` block, if any."""
+    return _current_deadline.get()
+
+
+def effective_deadline(seconds: float | None) -> Deadline | None:
+    """Return the deadline a ``deadline(seconds)`` block would set, without entering it.
+
+    Args:
+        seconds: Time budget in seconds, or None to keep the current deadline
+
+    Returns:
+        The earlier of the current deadline and the time budget, or None if there is neither
+    """
+    # [AI GENERATED] Keep the earlier of the outer and the new deadline
+    outer = _current_deadline.get()
+    if seconds is None:
+        return outer
+    limit = Deadline.after(seconds)
+    if outer is not None and outer.expires_at < limit.expires_at:
+        return outer
+    return limit
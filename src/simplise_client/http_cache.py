@@ -0,0 +1,497 @@
+"""HTTP cache for GET requests of Simplise API (RFC 9111 private cache)."""
+
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field, replace
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Protocol
+
+import httpx
+
+from simplise_api_client.core import PreparedRequest
+
+# Statuses whose responses are stored
+CACHEABLE_STATUSES = frozenset({200, 203})
+
+# Status of a successful revalidation
+HTTP_NOT_MODIFIED = 304
+
+# Fraction of the time since Last-Modified used as the heuristic freshness lifetime (RFC 9111 4.2.2)
+HEURISTIC_FRACTION = 0.1
+
+# Default maximum number of responses kept in memory
+DEFAULT_MAX_ENTRIES = 256
+
+# Headers of a 304 response that must not replace the stored ones (RFC 9111 3.2)
+_UNUPDATED_HEADERS = frozenset({"content-length", "content-encoding", "transfer-encoding", "content-type"})
+
+# Headers describing the encoded body, dropped because the decoded body is stored
+_ENCODING_HEADERS = frozenset({"content-length", "content-encoding", "transfer-encoding"})
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A stored response and the request header values it was selected with."""
+
+    status: int
+    headers: tuple[tuple[str, str], ...]
+    content: bytes
+    stored_at: float = field(default_factory=time.time)
+    vary: tuple[tuple[str, str | None], ...] = ()
+
+    def header(self, name: str) -> str | None:
+        """Return the value of a response header.
+
+        Args:
+            name: Header name, case-insensitive
+
+        Returns:
+            The header value, or None if it is absent
+        """
+        # [AI GENERATED] Look up headers case-insensitively
+        name = name.lower()
+        return next((value for key, value in self.headers if key.lower() == name), None)
+
+    def age(self, now: float | None = None) -> float:
+        """Return the current age of the response in seconds (RFC 9111 4.2.3).
+
+        Args:
+            now: Current time as a Unix timestamp
+
+        Returns:
+            The Age header plus the time the response has been stored
+        """
+        # [AI GENERATED] Ignore malformed Age headers
+        try:
+            age = float(self.header("age") or 0)
+        except ValueError:
+            age = 0.0
+        return max(0.0, age) + max(0.0, (time.time() if now is None else now) - self.stored_at)
+
+    def freshness_lifetime(self) -> float:
+        """Return how long the response is fresh in seconds (RFC 9111 4.2.1).
+
+        Returns:
+            The max-age directive, else Expires minus Date, else a tenth of the time since
+            Last-Modified, else 0
+        """
+        # [AI GENERATED] A private cache ignores s-maxage and treats no-cache as always stale
+        directives = cache_control(self.header("cache-control"))
+        if "no-cache" in directives:
+            return 0.0
+        max_age = _seconds(directives.get("max-age"))
+        if max_age is not None:
+            return max_age
+        date = _timestamp(self.header("date")) or self.stored_at
+        expires = self.header("expires")
+        if expires is not None:
+            expires_at = _timestamp(expires)
+            return 0.0 if expires_at is None else max(0.0, expires_at - date)
+        last_modified = _timestamp(self.header("last-modified"))
+        if last_modified is not None:
+            return max(0.0, (date - last_modified) * HEURISTIC_FRACTION)
+        return 0.0
+
+    def is_fresh(self, now: float | None = None) -> bool:
+        """Return whether the response can be served without contacting the server.
+
+        Args:
+            now: Current time as a Unix timestamp
+
+        Returns:
+            Whether the age of the response is below its freshness lifetime
+        """
+        return self.age(now) < self.freshness_lifetime()
+
+    def validators(self) -> dict[str, str]:
+        """Return the conditional request headers that revalidate the response.
+
+        Returns:
+            If-None-Match for an ETag and If-Modified-Since for a Last-Modified header
+        """
+        # [AI GENERATED] Send both validators; the server gives If-None-Match precedence
+        headers: dict[str, str] = {}
+        etag = self.header("etag")
+        if etag is not None:
+            headers["If-None-Match"] = etag
+        last_modified = self.header("last-modified")
+        if last_modified is not None:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def matches(self, request_headers: Mapping[str, str]) -> bool:
+        """Return whether a request selects this response according to its Vary header.
+
+        Args:
+            request_headers: Headers of the new request
+
+        Returns:
+            Whether every header named by Vary has the value it had when the response was stored
+        """
+        return all(_request_header(request_headers, name) == value for name, value in self.vary)
+
+    def freshen(self, headers: httpx.Headers) -> "CachedResponse":
+        """Return the response updated with the headers of a 304 response (RFC 9111 4.3.4).
+
+        Args:
+            headers: Headers of the 304 response
+
+        Returns:
+            The response with the new headers, stored now
+        """
+        # [AI GENERATED] Replace the stored headers that the 304 response carries again
+        updated = {key.lower() for key in headers if key.lower() not in _UNUPDATED_HEADERS}
+        kept = [(key, value) for key, value in self.headers if key.lower() not in updated]
+        fresh = [(key, value) for key, value in headers.multi_items() if key.lower() in updated]
+        return replace(self, headers=_decoded_headers((*kept, *fresh)), stored_at=time.time())
+
+    def to_response(self) -> httpx.Response:
+        """Return the stored response as an httpx response.
+
+        Returns:
+            The response, with the stored status, headers and body
+        """
+        return httpx.Response(self.status, headers=list(self.headers), content=self.content)
+
+
+class HttpCacheStore(Protocol):
+    """Storage of cached responses, keyed by request URL and credentials."""
+
+    def get(self, key: str) -> CachedResponse | None:
+        """Return the stored response, or None if there is none."""
+        ...
+
+    def set(self, key: str, response: CachedResponse) -> None:
+        """Store a response."""
+        ...
+
+    def delete(self, key: str) -> None:
+        """Remove a stored response."""
+        ...
+
+
+class MemoryHttpCacheStore:
+    """In-memory store that evicts the least recently used responses."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        """Initialize an empty store.
+
+        Args:
+            max_entries: Maximum number of responses to keep
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CachedResponse | None:
+        """Return the stored response, marking it as recently used.
+
+        Args:
+            key: Cache key of the request
+
+        Returns:
+            The response, or None if it is not stored
+        """
+        with self._lock:
+            response = self._entries.get(key)
+            if response is not None:
+                self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: CachedResponse) -> None:
+        """Store a response, evicting the least recently used one if the store is full.
+
+        Args:
+            key: Cache key of the request
+            response: The response
+        """
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        """Remove a stored response.
+
+        Args:
+            key: Cache key of the request
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        """Return the number of stored responses."""
+        return len(self._entries)
+
+
+class DiskHttpCacheStore:
+    """Store that keeps each response in a JSON file of a directory, surviving restarts."""
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        """Initialize the store, creating the directory if needed.
+
+        Args:
+            directory: Directory of the response files. ``~`` is expanded.
+        """
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> CachedResponse | None:
+        """Return the stored response.
+
+        Args:
+            key: Cache key of the request
+
+        Returns:
+            The response, or None if it is not stored or the file is unreadable
+        """
+        # [AI GENERATED] Treat missing and corrupt files as misses
+        try:
+            data = json.loads(self._path(key).read_text())
+            return CachedResponse(
+                status=data["status"],
+                headers=tuple((name, value) for name, value in data["headers"]),
+                content=base64.b64decode(data["content"]),
+                stored_at=data["stored_at"],
+                vary=tuple((name, value) for name, value in data["vary"]),
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def set(self, key: str, response: CachedResponse) -> None:
+        """Store a response, replacing the file atomically.
+
+        Args:
+            key: Cache key of the request
+            response: The response
+        """
+        # [AI GENERATED] Write to a temporary file first so that readers never see a partial file
+        data = {
+            "status": response.status,
+            "headers": response.headers,
+            "content": base64.b64encode(response.content).decode(),
+            "stored_at": response.stored_at,
+            "vary": response.vary,
+        }
+        path = self._path(key)
+        temporary = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temporary.write_text(json.dumps(data))
+        temporary.replace(path)
+
+    def delete(self, key: str) -> None:
+        """Remove a stored response.
+
+        Args:
+            key: Cache key of the request
+        """
+        self._path(key).unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        """Return the file of a key."""
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+
+class HttpCache:
+    """Private HTTP cache of GET responses, honoring Cache-Control, ETag and Last-Modified.
+
+    Fresh responses are served without a request. Stale responses with validators are
+    revalidated with If-None-Match and If-Modified-Since, and a 304 response serves the
+    stored body. Successful requests with other methods invalidate the stored response
+    of their URL.
+
+    Responses are stored per Authorization header, so that a store shared by clients with
+    different API keys never serves the response of one credential to another.
+    """
+
+    def __init__(self, store: HttpCacheStore | None = None) -> None:
+        """Initialize the cache.
+
+        Args:
+            store: Where responses are kept. A MemoryHttpCacheStore when None.
+        """
+        self.store: HttpCacheStore = MemoryHttpCacheStore() if store is None else store
+
+    def lookup(self, request: PreparedRequest) -> CachedResponse | None:
+        """Return the stored response a request may be served or revalidated with.
+
+        Args:
+            request: The request about to be sent
+
+        Returns:
+            The stored response, or None if the request is not a GET, bypasses the cache
+            or has no stored response
+        """
+        # [AI GENERATED] Only GET requests are served from the cache
+        if request.method != "GET" or "no-store" in _request_directives(request):
+            return None
+        cached = self.store.get(cache_key(request))
+        if cached is None or not cached.matches(request.headers):
+            return None
+        return cached
+
+    def is_fresh(self, request: PreparedRequest, cached: CachedResponse) -> bool:
+        """Return whether a stored response can be served to a request without revalidation.
+
+        Args:
+            request: The request about to be sent
+            cached: The stored response
+
+        Returns:
+            Whether the response is fresh and the request does not ask to revalidate
+        """
+        # [AI GENERATED] Honor the no-cache and max-age request directives
+        directives = _request_directives(request)
+        if "no-cache" in directives:
+            return False
+        max_age = _seconds(directives.get("max-age"))
+        if max_age is not None and cached.age() > max_age:
+            return False
+        return cached.is_fresh()
+
+    def conditional(self, request: PreparedRequest, cached: CachedResponse | None) -> PreparedRequest:
+        """Add the validators of a stored response to a request.
+
+        Args:
+            request: The request about to be sent
+            cached: The stored response, if any
+
+        Returns:
+            The conditional request, or the request unchanged if there is nothing to validate
+        """
+        validators = {} if cached is None else cached.validators()
+        if not validators:
+            return request
+        return replace(request, headers={**request.headers, **validators})
+
+    def update(
+        self, request: PreparedRequest, response: httpx.Response, cached: CachedResponse | None
+    ) -> httpx.Response:
+        """Store or freshen a response and return the response to hand to the caller.
+
+        Args:
+            request: The request sent
+            response: The response received
+            cached: The stored response the request was made conditional with, if any
+
+        Returns:
+            The stored response for a 304, otherwise the response received
+        """
+        # [AI GENERATED] A 304 freshens the stored response and serves its body
+        if request.method != "GET":
+            if response.is_success:
+                self.store.delete(cache_key(request))
+            return response
+        if response.status_code == HTTP_NOT_MODIFIED and cached is not None:
+            freshened = cached.freshen(response.headers)
+            self.store.set(cache_key(request), freshened)
+            return freshened.to_response()
+        if self._storable(request, response):
+            self.store.set(
+                cache_key(request),
+                CachedResponse(
+                    status=response.status_code,
+                    headers=_decoded_headers(response.headers.multi_items()),
+                    content=response.content,
+                    vary=tuple((name, _request_header(request.headers, name)) for name in _vary(response.headers)),
+                ),
+            )
+        return response
+
+    def _storable(self, request: PreparedRequest, response: httpx.Response) -> bool:
+        """Return whether a response may be stored and is worth storing (RFC 9111 3)."""
+        # [AI GENERATED] Responses without freshness information or validators could never be reused
+        if response.status_code not in CACHEABLE_STATUSES or "no-store" in _request_directives(request):
+            return False
+        directives = cache_control(response.headers.get("cache-control"))
+        if "no-store" in directives or "*" in _vary(response.headers):
+            return False
+        return any(
+            (
+                "max-age" in directives,
+                "no-cache" in directives,
+                "expires" in response.headers,
+                "etag" in response.headers,
+                "last-modified" in response.headers,
+            )
+        )
+
+
+def cache_control(value: str | None) -> dict[str, str | None]:
+    """Parse a Cache-Control header.
+
+    Args:
+        value: The header value
+
+    Returns:
+        Lower-cased directive names and their unquoted arguments, or None for directives without one
+    """
+    # [AI GENERATED] Split on commas; directive arguments are quoted strings or tokens
+    directives: dict[str, str | None] = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.strip().lower()] = argument.strip().strip('"') if argument else None
+    return directives
+
+
+def cache_key(request: PreparedRequest) -> str:
+    """Return the key a request's response is stored under.
+
+    Args:
+        request: The request
+
+    Returns:
+        The request URL, followed by a hash of the Authorization header if there is one
+    """
+    authorization = _request_header(request.headers, "authorization")
+    if authorization is None:
+        return request.url
+    return f"{request.url} {hashlib.sha256(authorization.encode()).hexdigest()}"
+
+
+def _request_directives(request: PreparedRequest) -> dict[str, str | None]:
+    """Return the Cache-Control directives of a request."""
+    return cache_control(_request_header(request.headers, "cache-control"))
+
+
+def _request_header(headers: Mapping[str, str], name: str) -> str | None:
+    """Return a request header case-insensitively."""
+    return next((value for key, value in headers.items() if key.lower() == name), None)
+
+
+def _decoded_headers(headers: Iterable[tuple[str, str]]) -> tuple[tuple[str, str], ...]:
+    """Return response headers without those describing the encoding of the body, for the decoded body."""
+    return tuple((key, value) for key, value in headers if key.lower() not in _ENCODING_HEADERS)
+
+
+def _vary(headers: httpx.Headers) -> list[str]:
+    """Return the lower-cased header names of the Vary header."""
+    return [name.strip().lower() for name in headers.get("vary", "").split(",") if name.strip()]
+
+
+def _seconds(value: str | None) -> float | None:
+    """Parse a delta-seconds directive argument, or None if it is absent or malformed."""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(int(value)))
+    except ValueError:
+        return None
+
+
+def _timestamp(value: str | None) -> float | None:
+    """Parse an HTTP date as a Unix timestamp, or None if it is absent or malformed."""
+    if value is None:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
@@ -3,12 +3,28 @@
 import asyncio
 import json
 import logging
+import ssl
+import time
+from collections.abc import AsyncIterator, Iterable, Mapping
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
 from datetime import datetime
-from typing import Any
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Self
 
 import httpx
 
+from simplise_api_client.core import PreparedRequest
+from simplise_api_client.metrics import MetricsRegistry, Observation, Timings, TransportTrace, aiter_counted
+from simplise_api_client.middleware import Middleware, MiddlewareChain, ResponseInfo
+from simplise_api_client.tracing import SPAN_HTTP, SPAN_POLL_WAIT, SPAN_RETRY_WAIT, Tracer, Tracing, traced_request
+
+from .deadlines import Deadline, DeadlineExceededError, current_deadline, deadline, effective_deadline
+from .http_cache import HttpCache
+from .load_balancing import HTTP_SERVER_ERROR, Backend, BalancingStrategy, LoadBalancer
+from .scheduler import Priority, RequestScheduler, request_priority
+from .transport import DEFAULT_LIMITS, DnsCache, PooledTransport
 from .types import (
+    AUTH_ERROR_STATUSES,
     HTTP_ACCEPTED,
     HTTP_TOO_MANY_REQUESTS,
     ApiConfig,
@@ -21,25 +37,65 @@ from .types import (
     RetryConfig,
 )
 
+if TYPE_CHECKING:
+    from .auth_client import SessionManager
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_BASE_URL = "https://api.usebootstrap.org"
+DEFAULT_TIMEOUT = 5  # seconds
+
 
 class HttpClient:
     """HTTP client with retry functionality."""
 
-    def __init__(self, config: ApiConfig) -> None:
+    def __init__(  # noqa: PLR0913
+        self,
+        config: ApiConfig,
+        *,
+        middleware: Iterable[Middleware] = (),
+        tracer: Tracer | None = None,
+        http_cache: HttpCache | None = None,
+        scheduler: RequestScheduler | None = None,
+        dns_cache: DnsCache | None = None,
+        limits: httpx.Limits = DEFAULT_LIMITS,
+        verify: ssl.SSLContext | str | bool = True,
+        trust_env: bool = True,
+        http2: bool = False,
+        proxy: httpx.Proxy | str | None = None,
+    ) -> None:
         """Initialize HTTP client.
 
         Args:
             config: API configuration
+            middleware: Request lifecycle hooks, outermost first
+            tracer: An OpenTelemetry-compatible tracer to record spans with
+            http_cache: HTTP cache of GET responses; responses are not cached when None
+            scheduler: Admission of requests by priority class; requests are sent at once when None
+            dns_cache: Cache of the host name resolutions of the connections; names are resolved by httpx
+                on each connection when None
+            limits: Limits of the connection pool shared by the requests
+            verify: Whether to verify TLS certificates, a CA bundle path or an SSL context, as in httpx
+            trust_env: Whether to use the environment, as in httpx. With a DNS cache, only SSL_CERT_FILE and
+                SSL_CERT_DIR are used, and proxies from the environment are not
+            http2: Whether to negotiate HTTP/2
+            proxy: Proxy to connect through; with a DNS cache, an HTTP or HTTPS proxy whose own host name is
+                resolved through the cache
         """
         # [AI GENERATED] Initialize HTTP client with configuration and retry settings
+        # Keys set to None, as SimpliseClient passes them, fall back to the defaults too
+        base_url = config.get("base_url") or DEFAULT_BASE_URL
+        timeout = config.get("timeout")
         self.config: ApiConfig = {
             "api_key": config["api_key"],
-            "base_url": config.get("base_url", "https://api.usebootstrap.org"),
-            "timeout": config.get("timeout", 5),
+            "base_url": base_url,
+            "timeout": DEFAULT_TIMEOUT if timeout is None else timeout,
             "retry_config": config.get("retry_config"),
         }
+        self.load_balancer = LoadBalancer(
+            [base_url] if isinstance(base_url, str) else base_url,
+            config.get("load_balancing", BalancingStrategy.ROUND_ROBIN),
+        )
 
         self.retry_config: RetryConfig = {
             "max_retries": 3,
@@ -51,6 +107,103 @@ class HttpClient:
         if self.config["retry_config"]:
             self.retry_config.update(self.config["retry_config"])
 
+        self.metrics = MetricsRegistry()
+        self.middleware = MiddlewareChain(middleware)
+        self.tracing = Tracing(tracer)
+        self.http_cache = http_cache
+        self.scheduler = scheduler
+        self.session_manager: SessionManager | None = None
+        self.dns_cache = dns_cache
+        self.limits = limits
+        self.verify = verify
+        self.trust_env = trust_env
+        self.http2 = http2
+        self.proxy = proxy
+        self.transport: PooledTransport | None = None
+        self._http: httpx.AsyncClient | None = None
+        self._http_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """The underlying httpx client with the connection pool, created on first use in each event loop."""
+        # [AI GENERATED] Connections belong to the event loop that opened them, so a new loop gets a new pool
+        loop = asyncio.get_running_loop()
+        if self._http is None or self._http.is_closed or self._http_loop is not loop:
+            # httpx's own transport unless DNS caching is asked for, so tools patching it (pytest-httpx) still apply
+            if self.dns_cache is None:
+                self._http = httpx.AsyncClient(
+                    limits=self.limits, verify=self.verify, trust_env=self.trust_env, http2=self.http2, proxy=self.proxy
+                )
+            else:
+                self.transport = PooledTransport(
+                    self.dns_cache,
+                    self.limits,
+                    verify=self.verify,
+                    trust_env=self.trust_env,
+                    http2=self.http2,
+                    proxy=self.proxy,
+                )
+                # The proxy stays out of the client, which would otherwise route around the transport
+                self._http = httpx.AsyncClient(transport=self.transport, trust_env=self.trust_env, http2=self.http2)
+            self._http_loop = loop
+        return self._http
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self.transport = None
+
+    async def __aenter__(self) -> Self:
+        """Return the client for use in an ``async with`` block."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the client when leaving the ``async with`` block."""
+        await self.aclose()
+
+    async def warmup(self, n_connections: int = 1, path: str = "/") -> int:
+        """Resolve the base URLs and open pooled connections to them ahead of traffic.
+
+        Sends ``n_connections`` concurrent GET requests to ``path`` on each base URL, so that
+        the pool opens that many connections and keeps them for the next requests. The
+        responses are discarded, but a 5xx response, like a connection error, counts as a
+        failure of the base URL in the load balancer. Connections beyond the
+        ``max_keepalive_connections`` of the limits are closed again once idle.
+
+        Args:
+            n_connections: Number of connections to open to each base URL
+            path: Path requested on each base URL
+
+        Returns:
+            The number of requests that got a response
+        """
+        # [AI GENERATED] Warmup failures count against the health of the base URL like any request
+        client = self.http
+
+        async def touch(backend: Backend) -> bool:
+            with self.load_balancer.track(backend) as outcome:
+                try:
+                    response = await client.get(f"{backend.url}{path}", timeout=self.config["timeout"])
+                except httpx.TransportError:
+                    outcome.failed = True
+                    logger.warning(f"Warmup request to {backend.url} failed", exc_info=True)
+                    return False
+                # A 5xx counts against the health of the base URL as in request, though the connection is open
+                outcome.failed = response.status_code >= HTTP_SERVER_ERROR
+            return True
+
+        results = await asyncio.gather(
+            *(touch(backend) for backend in self.load_balancer.backends for _ in range(n_connections))
+        )
+        return sum(results)
+
     def _parse_retry_after(self, retry_after: str | None) -> int:
         """Parse Retry-After header value.
 
@@ -100,67 +253,321 @@ class HttpClient:
 
         return status == HTTP_ACCEPTED and self.retry_config["enable_retry_for_202"]
 
-    async def _perform_request(self, endpoint: str, options: RequestOptions | None = None) -> ApiResponse:
+    async def _perform_request(
+        self, base_url: str, endpoint: str, options: RequestOptions | None = None, timings: Timings | None = None
+    ) -> ApiResponse:
         """Perform actual HTTP request.
 
         Args:
+            base_url: Base URL to send the request to
             endpoint: API endpoint
             options: Request options
+            timings: Timings to fill in with the phases of this attempt
 
         Returns:
-            API response with headers
+            API response with headers and timings
+
+        Raises:
+            DeadlineExceededError: If the deadline has already passed
         """
         # [AI GENERATED] Execute HTTP request with proper error handling and response parsing
-        if options is None:
-            options = {}
+        limit = current_deadline()
+        if limit is not None:
+            limit.check(f"request to {endpoint}")
+        if timings is None:
+            timings = Timings()
+        started = time.perf_counter()
+        request = self._prepare(base_url, endpoint, options or {})
+        timings.prepare = time.perf_counter() - started
 
-        url = f"{self.config['base_url']}{endpoint}"
-        method = options.get("method", HttpMethod.GET)
-        headers = {"Authorization": f"Bearer {self.config['api_key']}", **(options.get("headers", {}))}
-        timeout = options.get("timeout", self.config["timeout"])
+        try:
+            if self.http_cache is None:
+                response = await self._send(endpoint, request, timings)
+            else:
+                response = await self._send_cached(self.http_cache, endpoint, request, timings)
+        except Exception as error:
+            logger.exception("Request failed")
+            if self.middleware:
+                self.middleware.on_error(request, error)
+            raise
 
+        # Convert headers to dict
+        response_headers = dict(response.headers)
+
+        if not response.is_success:
+            timings.total = time.perf_counter() - started
+            return {
+                "success": False,
+                "status": response.status_code,
+                "headers": response_headers,
+                "error": f"HTTP error! status: {response.status_code}",
+                "timings": timings,
+            }
+
+        decode_started = time.perf_counter()
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
+            data = response.json()
+        except json.JSONDecodeError:
+            data = response.text
+        timings.decode = time.perf_counter() - decode_started
+        timings.total = time.perf_counter() - started
+
+        return {
+            "success": True,
+            "data": data,
+            "status": response.status_code,
+            "headers": response_headers,
+            "timings": timings,
+        }
+
+    async def _send(self, endpoint: str, request: PreparedRequest, timings: Timings) -> httpx.Response:
+        """Send a request and read its body.
+
+        Args:
+            endpoint: API endpoint, for the metrics
+            request: The request to send
+            timings: Timings to fill in with the phases of this attempt
+
+        Returns:
+            The response, with its body read
+        """
+        # [AI GENERATED] Record the transport phases, metrics and span of a single exchange
+        trace = TransportTrace()
+        client = self.http
+        async with self._slot():
+            with (
+                self.tracing.span(SPAN_HTTP) as span,
+                self.metrics.measure(endpoint, bytes_sent=_body_size(request.headers, request.body)) as observation,
+            ):
+                request = traced_request(request, span)
                 response = await client.request(
-                    method=method.value,
-                    url=url,
-                    headers=headers,
-                    content=options.get("body"),
+                    method=request.method,
+                    url=request.url,
+                    headers=request.headers,
+                    content=request.body,
+                    extensions={"trace": trace},
+                    timeout=request.timeout,
                 )
+                trace.fill(timings)
+                observation.status = response.status_code
+                observation.bytes_received = len(response.content)
+                self._after_response(request, response, observation, response.content)
+                if span is not None:
+                    span.set_attribute("http.response.status_code", response.status_code)
+                    span.set_attribute("http.response.body.size", observation.bytes_received)
+        return response
+
+    async def _send_cached(
+        self, http_cache: HttpCache, endpoint: str, request: PreparedRequest, timings: Timings
+    ) -> httpx.Response:
+        """Serve a request from the HTTP cache, or send it conditionally and cache the response.
+
+        Args:
+            http_cache: The HTTP cache
+            endpoint: API endpoint, for the metrics
+            request: The request to send
+            timings: Timings to fill in with the phases of this attempt
 
-                # Convert headers to dict
-                response_headers = dict(response.headers)
+        Returns:
+            The fresh stored response, the stored response revalidated by a 304, or the response received
+        """
+        # [AI GENERATED] Fresh responses are served without a request, so no metrics are recorded for them
+        cached = http_cache.lookup(request)
+        if cached is not None and http_cache.is_fresh(request, cached):
+            return cached.to_response()
+        request = http_cache.conditional(request, cached)
+        response = await self._send(endpoint, request, timings)
+        return http_cache.update(request, response, cached)
 
-                if not response.is_success:
-                    return {
-                        "success": False,
-                        "status": response.status_code,
-                        "headers": response_headers,
-                        "error": f"HTTP error! status: {response.status_code}",
-                    }
+    def _slot(self, priority: Priority | None = None) -> AbstractAsyncContextManager[None]:
+        """Return the context that holds a scheduler slot while a request is sent.
 
-                try:
-                    data = response.json()
-                except json.JSONDecodeError:
-                    data = response.text
+        Args:
+            priority: Priority class of the request; the current ``request_priority()`` when None
+
+        Returns:
+            The slot of the current priority class, or a no-op without a scheduler
+        """
+        # [AI GENERATED] Hold the slot per attempt, so retry waits and polls do not keep it
+        return nullcontext() if self.scheduler is None else self.scheduler.slot(priority)
+
+    async def _send_direct(  # noqa: PLR0913
+        self,
+        endpoint: str,
+        method: HttpMethod,
+        url: str,
+        headers: dict[str, str],
+        *,
+        timeout: float | None,  # noqa: ASYNC109
+        content: Any = None,  # noqa: ANN401
+        files: dict[str, Any] | None = None,
+        priority: Priority | None = None,
+    ) -> httpx.Response:
+        """Send a request of the form, auth and CSRF calls, which do not go through request.
 
-                return {
-                    "success": True,
-                    "data": data,
-                    "status": response.status_code,
-                    "headers": response_headers,
-                }
+        Args:
+            endpoint: API endpoint, for the metrics
+            method: HTTP method
+            url: Full URL of the request
+            headers: Request headers
+            timeout: Timeout of the request in seconds, capped by the current deadline
+            content: Request body
+            files: Multipart form data sent instead of the body
+            priority: Priority class of the request; the current ``request_priority()`` when None
 
-        except Exception:
-            logger.exception("Request failed")
-            raise
+        Returns:
+            The response, with its body read
+        """
+        # [AI GENERATED] Hold a scheduler slot like request, so these calls share its concurrency and rate budget
+        limit = current_deadline()
+        if limit is not None:
+            limit.check(f"request to {endpoint}")
+            timeout = limit.cap(timeout)
+        client = self.http
+        async with self._slot(priority):
+            with self.metrics.measure(endpoint, bytes_sent=_body_size(headers, content)) as observation:
+                response = await client.request(
+                    method=method.value, url=url, headers=headers, content=content, files=files, timeout=timeout
+                )
+                observation.status = response.status_code
+                observation.bytes_received = len(response.content)
+        return response
+
+    def _request_of(self, base_url: str, endpoint: str, options: RequestOptions) -> PreparedRequest:
+        """Build the request for an endpoint and options.
+
+        Args:
+            base_url: Base URL to send the request to
+            endpoint: API endpoint
+            options: Request options
+
+        Returns:
+            The request with the authorization header
+        """
+        # [AI GENERATED] Build the request passed to the middleware, capping its timeout by the deadline
+        timeout = options.get("timeout", self.config["timeout"])
+        limit = current_deadline()
+        return PreparedRequest(
+            method=options.get("method", HttpMethod.GET).value,
+            url=f"{base_url}{endpoint}",
+            headers={"Authorization": f"Bearer {self.config['api_key']}", **(options.get("headers") or {})},
+            body=options.get("body"),
+            timeout=timeout if limit is None else limit.cap(timeout),
+        )
+
+    def _prepare(self, base_url: str, endpoint: str, options: RequestOptions) -> PreparedRequest:
+        """Build the request and pass it through the middleware.
+
+        Args:
+            base_url: Base URL to send the request to
+            endpoint: API endpoint
+            options: Request options
+
+        Returns:
+            The request to send
+        """
+        # [AI GENERATED] Skip the middleware chain entirely when it is empty
+        request = self._request_of(base_url, endpoint, options)
+        return self.middleware.before_request(request) if self.middleware else request
+
+    def _after_response(
+        self, request: PreparedRequest, response: httpx.Response, observation: Observation, content: bytes | None
+    ) -> None:
+        """Notify the middleware of a response.
+
+        Args:
+            request: The request sent
+            response: The response received
+            observation: The metrics observation of the request
+            content: The response body, or None when it is streamed
+        """
+        # [AI GENERATED] Avoid building the response info when there is no middleware
+        if self.middleware:
+            self.middleware.after_response(
+                request, ResponseInfo(response.status_code, response.headers, observation.elapsed, content)
+            )
+
+    async def _wait(self, span_name: str, delay: float, attempt: int, timings: Timings) -> None:
+        """Sleep before the next attempt, in a span of its own.
+
+        Args:
+            span_name: Name of the span of the wait
+            delay: Delay in seconds
+            attempt: Number of the attempt waited after, from 0
+            timings: Timings of the call, to add the wait to
+
+        Raises:
+            DeadlineExceededError: If the wait would outlast the deadline
+        """
+        # [AI GENERATED] Do not sleep past the deadline; the caller would have given up by then
+        limit = current_deadline()
+        if limit is not None and delay >= limit.remaining():
+            msg = f"Deadline exceeded before retrying after {delay}s"
+            raise DeadlineExceededError(msg)
+
+        # [AI GENERATED] Make Retry-After and backoff sleeps visible in traces
+        started = time.perf_counter()
+        with self.tracing.span(span_name, {"simplise.delay": delay, "simplise.attempt": attempt}):
+            await asyncio.sleep(delay)
+        timings.retry_wait += time.perf_counter() - started
 
     async def request(self, endpoint: str, options: RequestOptions | None = None) -> ApiResponse:
         """Make HTTP request with retry functionality.
 
+        The call, including its retries, Retry-After sleeps and 202 polls, is bounded by the
+        ``total_timeout`` option and by the enclosing ``deadline()`` block, whichever ends first.
+        Each attempt's timeout is capped by the time left, and a wait that would outlast the
+        deadline is not started. With a scheduler, each attempt waits for a slot of the ``priority``
+        option, or of the enclosing ``request_priority()`` block.
+
+        Args:
+            endpoint: API endpoint
+            options: Request options
+
+        Returns:
+            API response, with the timings of the last attempt and of the whole call
+
+        Raises:
+            DeadlineExceededError: If the deadline passes before the call completes
+        """
+        # [AI GENERATED] Measure the whole call, including the retries and 202 polls
+        started = time.perf_counter()
+        timings = Timings()
+        with request_priority((options or {}).get("priority")):
+            async with self._within_deadline((options or {}).get("total_timeout"), f"request to {endpoint}"):
+                response = await self._request(endpoint, options, timings)
+        timings.total = time.perf_counter() - started
+        return response
+
+    @asynccontextmanager
+    async def _within_deadline(self, total_timeout: float | None, what: str) -> AsyncIterator[None]:
+        """Bound the calls made in the block by a total timeout and the enclosing ``deadline()`` block.
+
+        Args:
+            total_timeout: Time budget of the block in seconds, or None for the enclosing deadline only
+            what: What the block does, for the error message
+
+        Yields:
+            Nothing; the block is cancelled when the deadline passes
+
+        Raises:
+            DeadlineExceededError: If the deadline passes before the block completes
+        """
+        with deadline(total_timeout) as limit:
+            async with _until(limit, what):
+                yield
+
+    async def _request(self, endpoint: str, options: RequestOptions | None, timings: Timings) -> ApiResponse:  # noqa: C901, PLR0912, PLR0915
+        """Make HTTP request, retrying on 429, 202 and network errors.
+
+        Each attempt is sent to a base URL chosen by the load balancer. With several base URLs,
+        a connection error or 5xx response is retried at once on another healthy one, while the
+        polls of a 202 stay on the base URL that accepted the request.
+
         Args:
             endpoint: API endpoint
             options: Request options
+            timings: Timings of the call, filled in by every attempt and wait
 
         Returns:
             API response
@@ -175,10 +582,14 @@ class HttpClient:
 
         last_error: Exception | None = None
         current_endpoint = endpoint
+        # Base URLs that failed during this call, and the one polled for an accepted request
+        failed: list[Backend] = []
+        pinned: Backend | None = None
 
         for attempt in range(merged_retry_config["max_retries"] + 1):
+            backend = pinned or self.load_balancer.choose(failed)
             try:
-                response = await self._perform_request(current_endpoint, options)
+                response = await self._attempt(backend, current_endpoint, options, timings)
 
                 # Handle 202 Accepted
                 if response.get("status") == HTTP_ACCEPTED and merged_retry_config["enable_retry_for_202"]:
@@ -191,8 +602,10 @@ class HttpClient:
                     retry_after = headers.get("retry-after")
 
                     if retry_after:
-                        delay = self._parse_retry_after(retry_after)
-                        await asyncio.sleep(delay)
+                        await self._wait(SPAN_POLL_WAIT, self._parse_retry_after(retry_after), attempt, timings)
+
+                    self.metrics.increment_polls(endpoint)
+                    pinned = backend
 
                     # Use new endpoint if sp-resource-path is provided
                     if sp_resource_path:
@@ -205,8 +618,18 @@ class HttpClient:
                 if response.get("success"):
                     return response
 
-                # Check if should retry
+                # Fail over to another base URL on a server error
                 status = response.get("status")
+                if (
+                    pinned is None
+                    and (status or 0) >= HTTP_SERVER_ERROR
+                    and attempt < merged_retry_config["max_retries"]
+                    and self._fail_over(backend, failed)
+                ):
+                    self._count_retry(backend, current_endpoint, options, attempt)
+                    continue
+
+                # Check if should retry
                 if not self._should_retry(status, attempt):
                     return response
 
@@ -216,15 +639,17 @@ class HttpClient:
                     if attempt >= merged_retry_config["max_retries"]:
                         return response
 
-                    headers = response.get("headers", {})
-                    retry_after = headers.get("retry-after")
-                    delay = self._parse_retry_after(retry_after)
-                    await asyncio.sleep(delay)
+                    retry_after = response.get("headers", {}).get("retry-after")
+                    await self._wait(SPAN_RETRY_WAIT, self._parse_retry_after(retry_after), attempt, timings)
+                    self._count_retry(backend, current_endpoint, options, attempt)
                     continue
 
                 # Return other errors
                 return response
 
+            except DeadlineExceededError:
+                raise
+
             except Exception as error:
                 last_error = error
 
@@ -232,8 +657,12 @@ class HttpClient:
                 if attempt == merged_retry_config["max_retries"]:
                     raise last_error from None
 
-                # Wait before retry for network errors
-                await asyncio.sleep(min(1.0 * (2**attempt), 5.0))
+                # Wait before retry for network errors, unless another base URL can take the request
+                if not (
+                    pinned is None and isinstance(error, httpx.TransportError) and self._fail_over(backend, failed)
+                ):
+                    await self._wait(SPAN_RETRY_WAIT, min(1.0 * (2**attempt), 5.0), attempt, timings)
+                self._count_retry(backend, current_endpoint, options, attempt)
 
         # Should not reach here, but raise error for safety
         if last_error:
@@ -241,6 +670,128 @@ class HttpClient:
         msg = "Request failed after all retries"
         raise RuntimeError(msg)
 
+    async def _attempt(self, backend: Backend, endpoint: str, options: RequestOptions, timings: Timings) -> ApiResponse:
+        """Perform one attempt on a base URL and record its outcome in the load balancer.
+
+        Args:
+            backend: The base URL chosen for the attempt
+            endpoint: API endpoint
+            options: Request options
+            timings: Timings of the call
+
+        Returns:
+            API response
+        """
+        # [AI GENERATED] Connection errors and 5xx responses count against the health of the base URL
+        with self.load_balancer.track(backend) as outcome:
+            try:
+                response = await self._perform_request(backend.url, endpoint, options, timings)
+            except httpx.TransportError:
+                outcome.failed = True
+                raise
+            outcome.failed = (response.get("status") or 0) >= HTTP_SERVER_ERROR
+        return response
+
+    def _fail_over(self, backend: Backend, failed: list[Backend]) -> bool:
+        """Leave a base URL out for the rest of the call, if another one can take the request.
+
+        Args:
+            backend: The base URL that failed
+            failed: Base URLs that failed during the call, extended with this one
+
+        Returns:
+            Whether a healthy base URL that has not failed during the call remains
+        """
+        failed.append(backend)
+        return len(self.load_balancer) > 1 and self.load_balancer.can_fail_over(failed)
+
+    def _count_retry(self, backend: Backend, endpoint: str, options: RequestOptions, attempt: int) -> None:
+        """Record a retry in the metrics and notify the middleware.
+
+        Args:
+            backend: The base URL of the attempt retried
+            endpoint: API endpoint
+            options: Request options
+            attempt: Number of the attempt retried, from 0
+        """
+        self.metrics.increment_retries(endpoint)
+        if self.middleware:
+            self.middleware.on_retry(self._request_of(backend.url, endpoint, options), attempt)
+
+    async def stream(
+        self, endpoint: str, options: RequestOptions | None = None, form_data: dict[str, Any] | None = None
+    ) -> AsyncIterator[bytes]:
+        """Make HTTP request and stream the response body.
+
+        The body is yielded as it is received instead of being buffered.
+        Streamed requests are not retried. Connecting and each read of the body are bounded
+        by the ``total_timeout`` option and by the enclosing ``deadline()`` block.
+
+        Args:
+            endpoint: API endpoint
+            options: Request options
+            form_data: Optional multipart form data sent instead of the body
+
+        Yields:
+            Chunks of the response body
+
+        Raises:
+            ApiError: If the response status is not successful
+            DeadlineExceededError: If the deadline passes before the body has been received
+        """
+        # [AI GENERATED] Stream response body chunks without buffering the whole response
+        request = self._prepare(self.load_balancer.choose().url, endpoint, options or {})
+        # The generator yields between reads, so the deadline bounds each step rather than a block
+        limit = effective_deadline((options or {}).get("total_timeout"))
+        what = f"stream from {endpoint}"
+        if limit is not None:
+            limit.check(f"request to {endpoint}")
+
+        # [AI GENERATED] Record the latency until the whole body has been streamed
+        with (
+            self.tracing.span(SPAN_HTTP) as span,
+            self.metrics.measure(endpoint, bytes_sent=_body_size(request.headers, request.body)) as observation,
+        ):
+            request = traced_request(request, span)
+            try:
+                async with self._slot((options or {}).get("priority")):
+                    sent = self.http.build_request(
+                        method=request.method,
+                        url=request.url,
+                        headers=request.headers,
+                        content=request.body,
+                        files=form_data,
+                        timeout=request.timeout if limit is None else limit.cap(request.timeout),
+                    )
+                    async with _until(limit, what):
+                        response = await self.http.send(sent, stream=True)
+                    try:
+                        observation.status = response.status_code
+                        self._after_response(request, response, observation, None)
+                        if span is not None:
+                            span.set_attribute("http.response.status_code", response.status_code)
+                        if not response.is_success:
+                            error_response: ErrorResponse = {
+                                "error": f"HTTP error! status: {response.status_code}",
+                                "status": response.status_code,
+                                "message": None,
+                            }
+                            raise ApiError(response.status_code, error_response)
+
+                        chunks = aiter_counted(response.aiter_bytes(), observation)
+                        while True:
+                            async with _until(limit, what):
+                                chunk = await anext(chunks, None)
+                            if chunk is None:
+                                break
+                            yield chunk
+                    finally:
+                        await response.aclose()
+            except httpx.TransportError as error:
+                if self.middleware:
+                    self.middleware.on_error(request, error)
+                raise
+
     async def get(self, endpoint: str, headers: dict[str, str] | None = None) -> ApiResponse:
         """Make GET request.
 
@@ -316,39 +867,41 @@ class HttpClient:
             request_headers = {k: v for k, v in headers.items() if k.lower() != "content-type"}
 
         try:
-            async with httpx.AsyncClient(timeout=self.config["timeout"]) as client:
-                response = await client.post(
-                    f"{self.config['base_url']}{endpoint}",
-                    headers={"Authorization": f"Bearer {self.config['api_key']}", **request_headers},
+            async with self._within_deadline(None, f"form request to {endpoint}"):
+                response = await self._send_direct(
+                    endpoint,
+                    HttpMethod.POST,
+                    f"{self.load_balancer.preferred().url}{endpoint}",
+                    {"Authorization": f"Bearer {self.config['api_key']}", **request_headers},
+                    timeout=self.config["timeout"],
                     files=form_data,
                 )
-
-                response_headers = dict(response.headers)
-
-                if not response.is_success:
-                    return {
-                        "success": False,
-                        "status": response.status_code,
-                        "headers": response_headers,
-                        "error": f"HTTP error! status: {response.status_code}",
-                    }
-
-                try:
-                    data = response.json()
-                except json.JSONDecodeError:
-                    data = response.text
-
-                return {
-                    "success": True,
-                    "data": data,
-                    "status": response.status_code,
-                    "headers": response_headers,
-                }
-
         except Exception:
             logger.exception("Form request failed")
             raise
 
+        response_headers = dict(response.headers)
+
+        if not response.is_success:
+            return {
+                "success": False,
+                "status": response.status_code,
+                "headers": response_headers,
+                "error": f"HTTP error! status: {response.status_code}",
+            }
+
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            data = response.text
+
+        return {
+            "success": True,
+            "data": data,
+            "status": response.status_code,
+            "headers": response_headers,
+        }
+
     async def put(
         self, endpoint: str, data: JsonValue | None = None, headers: dict[str, str] | None = None
     ) -> ApiResponse:
@@ -383,18 +936,23 @@ class HttpClient:
     async def request_without_auth(self, endpoint: str, options: RequestOptions | None = None) -> ApiResponse:
         """Make request without authentication.
 
+        The request is bounded by the ``total_timeout`` option and by the enclosing ``deadline()`` block.
+
         Args:
             endpoint: API endpoint
             options: Request options
 
         Returns:
             API response
+
+        Raises:
+            DeadlineExceededError: If the deadline passes before the request completes
         """
         # [AI GENERATED] Request method without authentication header
         if options is None:
             options = {}
 
-        url = f"{self.config['base_url']}{endpoint}"
+        url = f"{self.load_balancer.preferred().url}{endpoint}"
         method = options.get("method", HttpMethod.GET)
         headers = {"Content-Type": "application/json"}
 
@@ -404,44 +962,115 @@ class HttpClient:
         timeout = options.get("timeout", self.config["timeout"])
 
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.request(
-                    method=method.value,
-                    url=url,
-                    headers=headers,
+            async with self._within_deadline(options.get("total_timeout"), f"request to {endpoint}"):
+                response = await self._send_direct(
+                    endpoint,
+                    method,
+                    url,
+                    headers,
+                    timeout=timeout,
                     content=options.get("body"),
+                    priority=options.get("priority"),
                 )
-
-                if not response.is_success:
-                    error_response: ErrorResponse = {
-                        "error": f"HTTP error! status: {response.status_code}",
-                        "status": response.status_code,
-                        "message": None,
-                    }
-                    raise ApiError(response.status_code, error_response)
-
-                try:
-                    data = response.json()
-                except json.JSONDecodeError:
-                    data = response.text
-
-                return {
-                    "success": True,
-                    "data": data,
-                    "status": response.status_code,
-                }
-
-        except ApiError:
-            raise
         except Exception:
             logger.exception("Request without auth failed")
             raise
 
+        if not response.is_success:
+            error_response: ErrorResponse = {
+                "error": f"HTTP error! status: {response.status_code}",
+                "status": response.status_code,
+                "message": None,
+            }
+            raise ApiError(response.status_code, error_response)
+
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            data = response.text
+
+        return {
+            "success": True,
+            "data": data,
+            "status": response.status_code,
+            "headers": dict(response.headers),
+        }
+
     async def request_with_csrf(
-        self, endpoint: str, session_cookie: str, csrf_token: str, options: RequestOptions | None = None
+        self,
+        endpoint: str,
+        session_cookie: str | None = None,
+        csrf_token: str | None = None,
+        options: RequestOptions | None = None,
     ) -> ApiResponse:
         """Make request with CSRF token.
 
+        When the session cookie or CSRF token is omitted, both are taken from the attached
+        session manager, and a request rejected with 401 or 403 is retried once with a new session.
+        The call, including the login and that retry, is bounded by the ``total_timeout`` option
+        and by the enclosing ``deadline()`` block, whichever ends first.
+
+        Args:
+            endpoint: API endpoint
+            session_cookie: Session cookie, or None to use the session manager
+            csrf_token: CSRF token, or None to use the session manager
+            options: Request options
+
+        Returns:
+            API response
+
+        Raises:
+            ValueError: If the credentials are omitted and no session manager is attached
+            DeadlineExceededError: If the deadline passes before the call completes
+        """
+        # [AI GENERATED] Bound the whole call, including the login and the retry after a rejection
+        async with self._within_deadline((options or {}).get("total_timeout"), f"CSRF request to {endpoint}"):
+            return await self._request_with_session(endpoint, session_cookie, csrf_token, options)
+
+    async def _request_with_session(
+        self,
+        endpoint: str,
+        session_cookie: str | None,
+        csrf_token: str | None,
+        options: RequestOptions | None,
+    ) -> ApiResponse:
+        """Make request with CSRF token, renewing the session of the session manager once if rejected.
+
+        Args:
+            endpoint: API endpoint
+            session_cookie: Session cookie, or None to use the session manager
+            csrf_token: CSRF token, or None to use the session manager
+            options: Request options
+
+        Returns:
+            API response
+
+        Raises:
+            ValueError: If the credentials are omitted and no session manager is attached
+        """
+        # [AI GENERATED] Explicit credentials are sent as is
+        if session_cookie is not None and csrf_token is not None:
+            return await self._request_with_csrf(endpoint, session_cookie, csrf_token, options)
+        if self.session_manager is None:
+            msg = "session_cookie and csrf_token are required without a session manager"
+            raise ValueError(msg)
+
+        session = await self.session_manager.session()
+        try:
+            return await self._request_with_csrf(endpoint, session["session_cookie"], session["csrf_token"], options)
+        except ApiError as error:
+            if error.status not in AUTH_ERROR_STATUSES:
+                raise
+            # [AI GENERATED] The server dropped the session; log in again once
+            self.session_manager.invalidate(session)
+        session = await self.session_manager.session()
+        return await self._request_with_csrf(endpoint, session["session_cookie"], session["csrf_token"], options)
+
+    async def _request_with_csrf(
+        self, endpoint: str, session_cookie: str, csrf_token: str | None, options: RequestOptions | None
+    ) -> ApiResponse:
+        """Make request with the given session cookie and CSRF token.
+
         Args:
             endpoint: API endpoint
             session_cookie: Session cookie
@@ -455,11 +1084,11 @@ class HttpClient:
         if options is None:
             options = {}
 
-        url = f"{self.config['base_url']}{endpoint}"
+        url = f"{self.load_balancer.preferred().url}{endpoint}"
         method = options.get("method", HttpMethod.POST)
         headers = {
             "Cookie": f"{session_cookie}; csrf={csrf_token}",
-            "X-CSRF-Token": csrf_token,
+            "X-CSRF-Token": csrf_token or "",
             "Content-Type": "application/json",
         }
 
@@ -469,35 +1098,70 @@ class HttpClient:
         timeout = options.get("timeout", self.config["timeout"])
 
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.request(
-                    method=method.value,
-                    url=url,
-                    headers=headers,
-                    content=options.get("body"),
-                )
+            response = await self._send_direct(
+                endpoint,
+                method,
+                url,
+                headers,
+                timeout=timeout,
+                content=options.get("body"),
+                priority=options.get("priority"),
+            )
+        except Exception:
+            logger.exception("CSRF request failed")
+            raise
 
-                if not response.is_success:
-                    error_response: ErrorResponse = {
-                        "error": f"HTTP error! status: {response.status_code}",
-                        "status": response.status_code,
-                        "message": None,
-                    }
-                    raise ApiError(response.status_code, error_response)
+        if not response.is_success:
+            error_response: ErrorResponse = {
+                "error": f"HTTP error! status: {response.status_code}",
+                "status": response.status_code,
+                "message": None,
+            }
+            raise ApiError(response.status_code, error_response)
 
-                try:
-                    data = response.json()
-                except json.JSONDecodeError:
-                    data = response.text
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            data = response.text
+
+        return {
+            "success": True,
+            "data": data,
+            "status": response.status_code,
+        }
 
-                return {
-                    "success": True,
-                    "data": data,
-                    "status": response.status_code,
-                }
 
-        except ApiError:
-            raise
-        except Exception:
-            logger.exception("CSRF request failed")
+def _body_size(headers: Mapping[str, str] | None, body: object) -> int:
+    """Size of the request body in bytes, 0 if it is streamed without a known length."""
+    if headers and "Content-Length" in headers:
+        return int(headers["Content-Length"])
+    if isinstance(body, str):
+        return len(body.encode())
+    if isinstance(body, bytes):
+        return len(body)
+    return 0
+
+
+@asynccontextmanager
+async def _until(limit: Deadline | None, what: str) -> AsyncIterator[None]:
+    """Cancel the block when a deadline passes.
+
+    Args:
+        limit: The deadline, or None for no bound
+        what: What the block does, for the error message
+
+    Yields:
+        Nothing; the block is cancelled when the deadline passes
+
+    Raises:
+        DeadlineExceededError: If the deadline passes before the block completes
+    """
+    try:
+        async with asyncio.timeout(None if limit is None else limit.remaining()):
+            yield
+    except TimeoutError as error:
+        # The request in flight is cancelled when the deadline passes
+        if isinstance(error, DeadlineExceededError) or limit is None or limit.remaining() > 0:
             raise
+        msg = f"Deadline exceeded during {what}"
+        raise DeadlineExceededError(msg) from error
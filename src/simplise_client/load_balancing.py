@@ -0,0 +1,191 @@
+"""Load balancing and failover of requests across several base URLs."""
+
+import itertools
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import StrEnum
+
+# Statuses at or above which a response counts as a failure of the backend
+HTTP_SERVER_ERROR = 500
+
+
+class BalancingStrategy(StrEnum):
+    """Strategies for choosing the base URL of a request."""
+
+    # [AI GENERATED] Strategy names as accepted in ApiConfig
+    ROUND_ROBIN = "round_robin"
+    LEAST_OUTSTANDING = "least_outstanding"
+    LATENCY_EWMA = "latency_ewma"
+
+
+@dataclass
+class Backend:
+    """A base URL and what the client has observed of it."""
+
+    url: str
+    # Requests sent to the backend that have not completed yet
+    outstanding: int = 0
+    # Exponentially weighted moving average of the latency in seconds, None until measured
+    latency: float | None = None
+    # Failures since the last success
+    consecutive_failures: int = 0
+    # Monotonic time until which the backend is left out after failing, 0 when it is healthy
+    ejected_until: float = 0.0
+
+    def healthy(self, now: float) -> bool:
+        """Return whether the backend may be chosen.
+
+        Args:
+            now: Current monotonic time
+        """
+        return self.ejected_until <= now
+
+    def cost(self) -> float:
+        """Return the expected latency of one more request, unmeasured backends first."""
+        # [AI GENERATED] Weight the latency by the queue, so a fast backend is not piled onto
+        return (self.latency or 0.0) * (self.outstanding + 1)
+
+
+@dataclass
+class Attempt:
+    """Outcome of a request to a backend, filled in while it is in flight."""
+
+    backend: Backend
+    failed: bool = False
+
+
+class LoadBalancer:
+    """Choice of the base URL of each request, with passive health tracking.
+
+    A backend that fails ``max_failures`` times in a row, with a connection error or a 5xx
+    response, is left out for ``cooldown`` seconds and then tried again. When every backend
+    has been left out, the one that comes back first is still used rather than failing.
+    """
+
+    def __init__(
+        self,
+        base_urls: Iterable[str],
+        strategy: BalancingStrategy = BalancingStrategy.ROUND_ROBIN,
+        *,
+        max_failures: int = 3,
+        cooldown: float = 30.0,
+        decay: float = 0.3,
+    ) -> None:
+        """Initialize the load balancer.
+
+        Args:
+            base_urls: Base URLs to balance across, in order of preference
+            strategy: How to choose among the healthy backends
+            max_failures: Consecutive failures after which a backend is left out
+            cooldown: Seconds a failing backend is left out
+            decay: Weight of the latest latency in the moving average, between 0 and 1
+
+        Raises:
+            ValueError: If no base URL is given
+        """
+        # [AI GENERATED] Keep the given order; it is the order of preference for session affinity
+        self.backends = [Backend(url.rstrip("/")) for url in dict.fromkeys(base_urls)]
+        if not self.backends:
+            msg = "At least one base URL is required"
+            raise ValueError(msg)
+        self.strategy = BalancingStrategy(strategy)
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.decay = decay
+        self._turn = itertools.count()
+
+    def __len__(self) -> int:
+        """Return the number of backends."""
+        return len(self.backends)
+
+    def choose(self, exclude: Iterable[Backend] = ()) -> Backend:
+        """Choose the backend of the next request.
+
+        Args:
+            exclude: Backends that already failed during the current call
+
+        Returns:
+            A healthy backend not excluded, chosen by the strategy; if there is none, the
+            backend that comes back first, preferring those not excluded
+        """
+        # [AI GENERATED] Rotate the candidates so ties are broken in turn rather than always by the first
+        now = time.monotonic()
+        excluded = set(map(id, exclude))
+        remaining = [backend for backend in self.backends if id(backend) not in excluded] or self.backends
+        candidates = [backend for backend in remaining if backend.healthy(now)]
+        if not candidates:
+            return min(remaining, key=lambda backend: backend.ejected_until)
+        offset = next(self._turn) % len(candidates)
+        candidates = candidates[offset:] + candidates[:offset]
+        match self.strategy:
+            case BalancingStrategy.LEAST_OUTSTANDING:
+                return min(candidates, key=lambda backend: backend.outstanding)
+            case BalancingStrategy.LATENCY_EWMA:
+                return min(candidates, key=Backend.cost)
+            case _:
+                return candidates[0]
+
+    def preferred(self) -> Backend:
+        """Return the first healthy backend in the order given, for requests bound to a session."""
+        now = time.monotonic()
+        return next(
+            (backend for backend in self.backends if backend.healthy(now)),
+            min(self.backends, key=lambda backend: backend.ejected_until),
+        )
+
+    def can_fail_over(self, tried: Iterable[Backend]) -> bool:
+        """Return whether a healthy backend remains that has not failed during the current call.
+
+        Args:
+            tried: Backends that already failed during the current call
+        """
+        now = time.monotonic()
+        failed = set(map(id, tried))
+        return any(backend.healthy(now) and id(backend) not in failed for backend in self.backends)
+
+    @contextmanager
+    def track(self, backend: Backend) -> Iterator[Attempt]:
+        """Count a request as outstanding and record its latency and outcome when it completes.
+
+        The caller sets ``failed`` for connection errors and responses that count as failures.
+        A request that raises without being marked as failed, such as one cancelled by the
+        caller, is not recorded.
+
+        Args:
+            backend: The backend the request is sent to
+
+        Yields:
+            The attempt, to mark as failed
+        """
+        attempt = Attempt(backend)
+        backend.outstanding += 1
+        started = time.perf_counter()
+        completed = False
+        try:
+            yield attempt
+            completed = True
+        finally:
+            backend.outstanding -= 1
+            if completed or attempt.failed:
+                self._record(attempt, time.perf_counter() - started)
+
+    def _record(self, attempt: Attempt, elapsed: float) -> None:
+        """Update the health and latency of a backend after a request.
+
+        Args:
+            attempt: The completed attempt
+            elapsed: Latency of the request in seconds
+        """
+        backend = attempt.backend
+        if not attempt.failed:
+            backend.consecutive_failures = 0
+            backend.ejected_until = 0.0
+            backend.latency = (
+                elapsed if backend.latency is None else self.decay * elapsed + (1 - self.decay) * backend.latency
+            )
+            return
+        backend.consecutive_failures += 1
+        if backend.consecutive_failures >= self.max_failures:
+            backend.ejected_until = time.monotonic() + self.cooldown
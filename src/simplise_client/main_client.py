@@ -1,30 +1,72 @@
 """Main client for Simplise API (equivalent to executer.ts)."""
 
-from typing import Any
+import ssl
+from collections.abc import Iterable
+from types import TracebackType
+from typing import Any, Self
+
+import httpx
+
+from simplise_api_client.middleware import Middleware
+from simplise_api_client.tracing import Tracer
 
 from .action_client import ActionClient
 from .auth_client import AuthClient
+from .http_cache import HttpCache
 from .http_client import HttpClient
+from .load_balancing import BalancingStrategy
+from .scheduler import RequestScheduler
+from .transport import DEFAULT_LIMITS, DnsCache
 from .types import ApiConfig, ApiResponse, HttpMethod, RetryConfig
 
 
 class SimpliseClient:
     """Main Simplise API client."""
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         api_key: str,
-        base_url: str | None = None,
+        base_url: str | list[str] | None = None,
         timeout: int | None = None,
         retry_config: RetryConfig | None = None,
+        *,
+        middleware: Iterable[Middleware] = (),
+        tracer: Tracer | None = None,
+        http_cache: HttpCache | None = None,
+        scheduler: RequestScheduler | None = None,
+        load_balancing: BalancingStrategy = BalancingStrategy.ROUND_ROBIN,
+        dns_cache: DnsCache | None = None,
+        limits: httpx.Limits = DEFAULT_LIMITS,
+        verify: ssl.SSLContext | str | bool = True,
+        trust_env: bool = True,
+        http2: bool = False,
+        proxy: httpx.Proxy | str | None = None,
     ) -> None:
         """Initialize Simplise client.
 
         Args:
             api_key (str): API key for authentication
-            base_url (str | None): Base URL for the API
+            base_url (str | list[str] | None): Base URL for the API, or several base URLs, such as
+                regional endpoints, to balance requests across and fail over between
             timeout (int | None): Request timeout in seconds
             retry_config (RetryConfig | None): Retry configuration for HTTP requests
+            middleware (Iterable[Middleware]): Request lifecycle hooks, outermost first
+            tracer (Tracer | None): An OpenTelemetry-compatible tracer to record spans with
+            http_cache (HttpCache | None): HTTP cache of GET responses, such as those of
+                ``action.execute_url`` and ``action.execute_query``
+            scheduler (RequestScheduler | None): Admission of requests by priority class, so that
+                ``action.execute_batch`` cannot starve interactive calls
+            load_balancing (BalancingStrategy): How to choose among several base URLs
+            dns_cache (DnsCache | None): Cache of the host name resolutions of the connections; names are
+                resolved on each connection when None
+            limits (httpx.Limits): Limits of the connection pool shared by the requests
+            verify (ssl.SSLContext | str | bool): Whether to verify TLS certificates, a CA bundle path or
+                an SSL context, as in httpx
+            trust_env (bool): Whether to use the environment, as in httpx. With a DNS cache, only
+                SSL_CERT_FILE and SSL_CERT_DIR are used, and proxies from the environment are not
+            http2 (bool): Whether to negotiate HTTP/2
+            proxy (httpx.Proxy | str | None): Proxy to connect through; only HTTP and HTTPS proxies with
+                a DNS cache
         """
         # [AI GENERATED] Initialize main client with all sub-clients
         config: ApiConfig = {
@@ -38,11 +80,54 @@ class SimpliseClient:
                 "enable_retry_for_429": True,
                 "enable_retry_for_202": True,
             },
+            "load_balancing": load_balancing,
         }
-        self.http_client = HttpClient(config)
+        self.http_client = HttpClient(
+            config,
+            middleware=middleware,
+            tracer=tracer,
+            http_cache=http_cache,
+            scheduler=scheduler,
+            dns_cache=dns_cache,
+            limits=limits,
+            verify=verify,
+            trust_env=trust_env,
+            http2=http2,
+            proxy=proxy,
+        )
+        self.metrics = self.http_client.metrics
         self.auth = AuthClient(self.http_client)
         self.action = ActionClient(self.http_client)
 
+    async def warmup(self, n_connections: int = 1, path: str = "/") -> int:
+        """Resolve the base URLs and open pooled connections to them ahead of traffic.
+
+        Args:
+            n_connections: Number of connections to open to each base URL
+            path: Path requested on each base URL
+
+        Returns:
+            The number of requests that got a response
+        """
+        return await self.http_client.warmup(n_connections, path)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        await self.http_client.aclose()
+
+    async def __aenter__(self) -> Self:
+        """Return the client for use in an ``async with`` block."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the client when leaving the ``async with`` block."""
+        await self.aclose()
+
     async def custom_request(
         self,
         endpoint: str,
@@ -0,0 +1,128 @@
+"""Bounded asynchronous pipeline that applies backpressure to its source."""
+
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterable, Awaitable, Callable
+
+# Default number of items processed at once
+DEFAULT_CONCURRENCY = 8
+
+# Marks the end of the results
+_DONE = object()
+
+
+def map_bounded[T, R](
+    func: Callable[[T], Awaitable[R]],
+    source: AsyncIterable[T],
+    *,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_buffer: int | None = None,
+    ordered: bool = True,
+) -> AsyncGenerator[tuple[T, R | Exception]]:
+    """Apply an async function to the items of an async iterable with bounded in-flight work.
+
+    An item is taken from the source only when a slot is free and fewer than
+    ``concurrency + max_buffer`` items are awaiting their turn to be yielded, so a slow
+    consumer or a slow item holds back the source and memory stays bounded on infinite
+    streams. An exception raised for an item is yielded in place of its result instead of
+    stopping the iteration; an exception raised by the source is raised once the results of
+    the items before it have been yielded.
+
+    Args:
+        func: The function to apply
+        source: The input items, consumed lazily
+        concurrency: Maximum number of items processed at once
+        max_buffer: Maximum number of completed results held until they are yielded, when
+            the consumer is slower than the pipeline or, if ordered, an earlier item is still
+            in flight. Defaults to the concurrency
+        ordered: Whether to yield the results in input order rather than as they complete
+
+    Returns:
+        An async generator of each item with its result, or the exception raised for it
+
+    Raises:
+        ValueError: If concurrency is less than 1 or max_buffer is negative
+    """
+    if concurrency < 1:
+        msg = f"concurrency must be at least 1, got {concurrency}"
+        raise ValueError(msg)
+    buffer = concurrency if max_buffer is None else max_buffer
+    if buffer < 0:
+        msg = f"max_buffer must not be negative, got {buffer}"
+        raise ValueError(msg)
+    return _run(func, source, concurrency, buffer, ordered=ordered)
+
+
+async def _run[T, R](
+    func: Callable[[T], Awaitable[R]],
+    source: AsyncIterable[T],
+    concurrency: int,
+    buffer: int,
+    *,
+    ordered: bool,
+) -> AsyncGenerator[tuple[T, R | Exception]]:
+    """Run the pipeline validated by map_bounded.
+
+    Args:
+        func: The function to apply
+        source: The input items
+        concurrency: Maximum number of items processed at once
+        buffer: Maximum number of completed results held until they are yielded
+        ordered: Whether to yield the results in input order
+
+    Yields:
+        Each item with its result, or the exception raised for it
+    """
+    # [AI GENERATED] A feeder task pulls the source, so results are yielded even while the source is idle
+    window = asyncio.Semaphore(concurrency + buffer)
+    running = asyncio.Semaphore(concurrency)
+    # Tasks in input order if ordered, otherwise as they complete, then _DONE
+    results: asyncio.Queue[asyncio.Task[tuple[T, R | Exception]] | object] = asyncio.Queue()
+    tasks: set[asyncio.Task[tuple[T, R | Exception]]] = set()
+
+    async def process(item: T) -> tuple[T, R | Exception]:
+        try:
+            return item, await func(item)
+        except Exception as error:
+            return item, error
+        finally:
+            running.release()
+
+    async def feed() -> None:
+        iterator = aiter(source)
+        try:
+            while True:
+                # Take the slots before the item, so an item taken from the source is started at once
+                await window.acquire()
+                await running.acquire()
+                try:
+                    item = await anext(iterator)
+                except StopAsyncIteration:
+                    break
+                task = asyncio.create_task(process(item))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                if ordered:
+                    results.put_nowait(task)
+                else:
+                    task.add_done_callback(results.put_nowait)
+        finally:
+            # Unordered results are queued as they complete, so wait for those in flight
+            current = asyncio.current_task()
+            if not ordered and tasks and not (current is not None and current.cancelling()):
+                await asyncio.wait(set(tasks))
+            results.put_nowait(_DONE)
+
+    feeder = asyncio.create_task(feed())
+    try:
+        while (entry := await results.get()) is not _DONE:
+            outcome = await entry  # type: ignore[misc]
+            window.release()
+            yield outcome
+        # Raise the error of the source, if any
+        await feeder
+    finally:
+        # Stop pulling the source and cancel the items in flight when the consumer stops early
+        feeder.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(feeder, *tasks, return_exceptions=True)
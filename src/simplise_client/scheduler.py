@@ -0,0 +1,258 @@
+"""Priority-aware scheduling of the requests of an HttpClient."""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator, Mapping
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import TypedDict
+
+
+class Priority(StrEnum):
+    """Priority classes of requests."""
+
+    # [AI GENERATED] Latency-sensitive calls first, bulk and maintenance traffic behind them
+    INTERACTIVE = "interactive"
+    BATCH = "batch"
+    BACKGROUND = "background"
+
+
+class PriorityClassConfig(TypedDict, total=False):
+    """Scheduling configuration of a priority class."""
+
+    # [AI GENERATED] Share of the slots under contention and cap on the slots in use
+    weight: float
+    max_concurrency: int | None
+
+
+DEFAULT_PRIORITY_CLASSES: Mapping[Priority, PriorityClassConfig] = {
+    Priority.INTERACTIVE: {"weight": 8},
+    Priority.BATCH: {"weight": 2},
+    Priority.BACKGROUND: {"weight": 1},
+}
+
+_current_priority: ContextVar[Priority] = ContextVar("simplise_client_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: Priority | None) -> Iterator[Priority]:
+    """Set the priority of the ``HttpClient`` calls made in the ``with`` block.
+
+    The priority follows the current asyncio task, so it propagates to the tasks the block starts.
+
+    Args:
+        priority: Priority class of the calls, or None to keep the current priority
+
+    Yields:
+        The priority in effect
+    """
+    if priority is None:
+        yield _current_priority.get()
+        return
+    token = _current_priority.set(priority)
+    try:
+        yield priority
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    """Return the priority set by the innermost ``request_priority()`` block, interactive by default."""
+    return _current_priority.get()
+
+
+@dataclass
+class _ClassState:
+    """Queue and counters of a priority class."""
+
+    weight: float
+    max_concurrency: int | None
+    waiters: deque[asyncio.Future[None]] = field(default_factory=deque)
+    active: int = 0
+    # Virtual start time of the next slot granted to the class
+    start: float = 0.0
+
+    def eligible(self) -> bool:
+        """Return whether the class has a waiter that its cap allows to start."""
+        return bool(self.waiters) and (self.max_concurrency is None or self.active < self.max_concurrency)
+
+    def pending(self) -> bool:
+        """Return whether the class has a request waiting for a slot."""
+        return any(not waiter.done() for waiter in self.waiters)
+
+    def finish(self) -> float:
+        """Return the virtual finish time of the next slot granted to the class."""
+        return self.start + 1 / self.weight
+
+
+class RequestScheduler:
+    """Admission of requests to the connections by priority class.
+
+    Waiting requests are granted slots by weighted fair queuing: under contention, each class
+    with waiting requests receives slots in proportion to its weight, so bulk traffic cannot
+    starve interactive calls. Each class may also be capped at a number of concurrent slots.
+    With ``rate``, slots are additionally paced by a token bucket, granted in the same order.
+    Every request of ``HttpClient`` takes a slot, including streams, form uploads, ``/auth``
+    calls and requests with a CSRF token.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 10,
+        classes: Mapping[Priority, PriorityClassConfig] | None = None,
+        *,
+        rate: float | None = None,
+        burst: int = 1,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            max_concurrency: Number of requests sent at once across all classes
+            classes: Weight and concurrency cap of each class; classes left out get weight 1 and no cap
+            rate: Requests started per second across all classes, or None for no limit
+            burst: Number of requests that may start at once when the rate allows
+
+        Raises:
+            ValueError: If a limit or weight is not positive
+        """
+        # [AI GENERATED] Validate the limits up front; a zero weight or cap would block a class forever
+        if max_concurrency < 1 or burst < 1 or (rate is not None and rate <= 0):
+            msg = "max_concurrency, burst and rate must be positive"
+            raise ValueError(msg)
+        configs = DEFAULT_PRIORITY_CLASSES if classes is None else classes
+        self.max_concurrency = max_concurrency
+        self.rate = rate
+        self.burst = burst
+        self._classes: dict[Priority, _ClassState] = {}
+        for priority in Priority:
+            config = configs.get(priority, {})
+            weight = config.get("weight", 1)
+            cap = config.get("max_concurrency")
+            if weight <= 0 or (cap is not None and cap < 1):
+                msg = f"Weight and max_concurrency of {priority.value} must be positive"
+                raise ValueError(msg)
+            self._classes[priority] = _ClassState(weight, cap)
+        self._active = 0
+        self._virtual_time = 0.0
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._timer: asyncio.TimerHandle | None = None
+
+    def active(self, priority: Priority | None = None) -> int:
+        """Return the number of slots in use.
+
+        Args:
+            priority: Priority class to count, or None for all classes
+
+        Returns:
+            The number of slots in use
+        """
+        return self._active if priority is None else self._classes[priority].active
+
+    def waiting(self, priority: Priority | None = None) -> int:
+        """Return the number of requests waiting for a slot.
+
+        Args:
+            priority: Priority class to count, or None for all classes
+
+        Returns:
+            The number of waiting requests
+        """
+        states = self._classes.values() if priority is None else [self._classes[priority]]
+        return sum(sum(not waiter.done() for waiter in state.waiters) for state in states)
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority | None = None) -> AsyncIterator[None]:
+        """Wait for a slot and hold it for the duration of the ``async with`` block.
+
+        Args:
+            priority: Priority class of the request; the current ``request_priority()`` when None
+
+        Yields:
+            None, once the request may be sent
+        """
+        priority = current_priority() if priority is None else priority
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    async def acquire(self, priority: Priority) -> None:
+        """Wait until a request of a priority class may be sent.
+
+        Args:
+            priority: Priority class of the request
+        """
+        # [AI GENERATED] Queue behind the waiting requests so the fair order is kept
+        state = self._classes[priority]
+        if not state.pending():
+            # A class that was idle does not bank the slots it did not use
+            state.start = max(state.start, self._virtual_time)
+        waiter = asyncio.get_running_loop().create_future()
+        state.waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted as the caller gave up; hand it to the next waiter
+                self.release(priority)
+            elif waiter in state.waiters:
+                state.waiters.remove(waiter)
+            raise
+
+    def release(self, priority: Priority) -> None:
+        """Return the slot of a completed request and grant it to the next waiter.
+
+        Args:
+            priority: Priority class of the request
+        """
+        self._active -= 1
+        self._classes[priority].active -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant the free slots to the waiters, in weighted fair order."""
+        # [AI GENERATED] Pick the class whose next slot finishes earliest in virtual time
+        while self._active < self.max_concurrency:
+            for state in self._classes.values():
+                while state.waiters and state.waiters[0].done():
+                    state.waiters.popleft()
+            eligible = [state for state in self._classes.values() if state.eligible()]
+            if not eligible:
+                return
+            if not self._take_token():
+                return
+            state = min(eligible, key=_ClassState.finish)
+            self._virtual_time = state.start
+            state.start = state.finish()
+            state.active += 1
+            self._active += 1
+            state.waiters.popleft().set_result(None)
+
+    def _take_token(self) -> bool:
+        """Take a token from the bucket, scheduling a dispatch for when the next one is due.
+
+        Returns:
+            Whether a request may start now
+        """
+        if self.rate is None:
+            return True
+        now = time.monotonic()
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later((1 - self._tokens) / self.rate, self._on_timer)
+        return False
+
+    def _on_timer(self) -> None:
+        """Dispatch the waiters once a token is due."""
+        self._timer = None
+        self._dispatch()
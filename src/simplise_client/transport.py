@@ -0,0 +1,365 @@
+"""Pooled HTTP transport that resolves host names through a DNS cache."""
+
+import asyncio
+import ipaddress
+import socket
+import ssl
+import time
+from collections.abc import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import cast
+
+import httpcore
+import httpx
+
+# Resolves a host name to its addresses, with the TTL of the records if the resolver knows it
+Resolver = Callable[[str, int], Awaitable[tuple[list[str], float | None]]]
+
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
+
+
+async def system_resolver(host: str, port: int) -> tuple[list[str], float | None]:
+    """Resolve a host name with the resolver of the operating system.
+
+    Args:
+        host: Host name
+        port: Port to connect to
+
+    Returns:
+        The addresses in the order returned, and None as the system resolver does not report TTLs
+    """
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return list(dict.fromkeys(str(info[4][0]) for info in infos)), None
+
+
+@dataclass
+class _Resolution:
+    """Addresses of a host name and when they expire."""
+
+    addresses: list[str]
+    expires_at: float
+
+
+class DnsCache:
+    """Cache of host name resolutions, kept for the TTL of their records.
+
+    Concurrent lookups of the same host name share one resolution. When a resolution
+    expires and resolving again fails, the expired addresses are used rather than failing.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        *,
+        min_ttl: float = 1.0,
+        max_ttl: float = 3600.0,
+        resolver: Resolver = system_resolver,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            ttl: Seconds to keep resolutions whose resolver does not report a TTL
+            min_ttl: Lower bound of the TTLs reported by the resolver
+            max_ttl: Upper bound of the TTLs reported by the resolver
+            resolver: Resolves a host name; a resolver built on a DNS library can report the
+                TTL of the records, which is then respected
+        """
+        self.ttl = ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.resolver = resolver
+        # Number of resolutions performed, for monitoring the hit rate
+        self.resolutions = 0
+        self._entries: dict[str, _Resolution] = {}
+        self._pending: dict[str, asyncio.Future[list[str]]] = {}
+
+    def __len__(self) -> int:
+        """Return the number of host names cached."""
+        return len(self._entries)
+
+    async def resolve(self, host: str, port: int) -> list[str]:
+        """Return the addresses of a host name, resolving it if it is not cached or has expired.
+
+        Args:
+            host: Host name
+            port: Port to connect to
+
+        Returns:
+            The addresses of the host
+        """
+        # [AI GENERATED] Serve fresh entries at once; concurrent misses wait for a single resolution
+        entry = self._entries.get(host)
+        if entry is not None and entry.expires_at > time.monotonic():
+            return entry.addresses
+        pending = self._pending.get(host)
+        if pending is None:
+            pending = asyncio.ensure_future(self._resolve(host, port))
+            self._pending[host] = pending
+            pending.add_done_callback(lambda future: self._settled(host, future))
+        return await asyncio.shield(pending)
+
+    def invalidate(self, host: str | None = None) -> None:
+        """Forget the addresses of a host name, or of every host name.
+
+        Args:
+            host: Host name, or None for all
+        """
+        if host is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(host, None)
+
+    def _settled(self, host: str, future: asyncio.Future[list[str]]) -> None:
+        """Stop sharing a completed resolution.
+
+        Args:
+            host: Host name
+            future: The completed resolution
+        """
+        self._pending.pop(host, None)
+        if not future.cancelled():
+            # Mark the error as retrieved even if every caller gave up waiting
+            future.exception()
+
+    async def _resolve(self, host: str, port: int) -> list[str]:
+        """Resolve a host name and cache its addresses.
+
+        Args:
+            host: Host name
+            port: Port to connect to
+
+        Returns:
+            The addresses of the host
+        """
+        self.resolutions += 1
+        try:
+            addresses, ttl = await self.resolver(host, port)
+        except OSError:
+            stale = self._entries.get(host)
+            if stale is None:
+                raise
+            return stale.addresses
+        if not addresses:
+            msg = f"No addresses found for {host}"
+            raise OSError(msg)
+        ttl = self.ttl if ttl is None else min(max(ttl, self.min_ttl), self.max_ttl)
+        self._entries[host] = _Resolution(addresses, time.monotonic() + ttl)
+        return addresses
+
+
+class _CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """Network backend that connects to the addresses cached for a host name."""
+
+    def __init__(self, dns_cache: DnsCache, backend: httpcore.AsyncNetworkBackend | None = None) -> None:
+        self._dns_cache = dns_cache
+        self._backend = backend or httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = None,  # noqa: ASYNC109
+        local_address: str | None = None,
+        socket_options: Iterable[httpcore.SOCKET_OPTION] | None = None,
+    ) -> httpcore.AsyncNetworkStream:
+        """Connect to the first address of the host that accepts the connection."""
+        # [AI GENERATED] TLS still verifies the host name, which httpcore passes to start_tls separately
+        if _is_address(host):
+            return await self._backend.connect_tcp(host, port, timeout, local_address, socket_options)
+        try:
+            async with asyncio.timeout(timeout):
+                addresses = await self._dns_cache.resolve(host, port)
+        except TimeoutError as error:
+            raise httpcore.ConnectTimeout(str(error)) from error
+        except OSError as error:
+            raise httpcore.ConnectError(str(error)) from error
+
+        last_error: Exception | None = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(address, port, timeout, local_address, socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as error:
+                last_error = error
+        # The host may have moved; resolve it again on the next connection
+        self._dns_cache.invalidate(host)
+        raise last_error or httpcore.ConnectError(host)
+
+    async def connect_unix_socket(
+        self,
+        path: str,
+        timeout: float | None = None,  # noqa: ASYNC109
+        socket_options: Iterable[httpcore.SOCKET_OPTION] | None = None,
+    ) -> httpcore.AsyncNetworkStream:
+        """Connect to a Unix socket."""
+        return await self._backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        """Sleep for a number of seconds."""
+        await self._backend.sleep(seconds)
+
+
+# httpcore errors and the httpx errors raised for them, most specific first
+_HTTPX_ERRORS: dict[type[Exception], type[httpx.TransportError]] = {
+    httpcore.ConnectTimeout: httpx.ConnectTimeout,
+    httpcore.ReadTimeout: httpx.ReadTimeout,
+    httpcore.WriteTimeout: httpx.WriteTimeout,
+    httpcore.PoolTimeout: httpx.PoolTimeout,
+    httpcore.ConnectError: httpx.ConnectError,
+    httpcore.ReadError: httpx.ReadError,
+    httpcore.WriteError: httpx.WriteError,
+    httpcore.ProxyError: httpx.ProxyError,
+    httpcore.UnsupportedProtocol: httpx.UnsupportedProtocol,
+    httpcore.LocalProtocolError: httpx.LocalProtocolError,
+    httpcore.RemoteProtocolError: httpx.RemoteProtocolError,
+    httpcore.TimeoutException: httpx.TimeoutException,
+    httpcore.NetworkError: httpx.NetworkError,
+    httpcore.ProtocolError: httpx.ProtocolError,
+}
+
+
+@contextmanager
+def _httpx_errors(request: httpx.Request) -> Iterator[None]:
+    """Raise the httpx counterparts of the httpcore errors raised in the block.
+
+    Args:
+        request: The request being sent
+    """
+    try:
+        yield
+    except Exception as error:
+        for cls in type(error).__mro__:
+            mapped = _HTTPX_ERRORS.get(cls)
+            if mapped is not None:
+                raise mapped(str(error), request=request) from error
+        raise
+
+
+class _ResponseStream(httpx.AsyncByteStream):
+    """Body of a response read from the connection pool."""
+
+    def __init__(self, stream: AsyncIterable[bytes], request: httpx.Request) -> None:
+        self._stream = stream
+        self._request = request
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        """Yield the chunks of the body as they are received."""
+        with _httpx_errors(self._request):
+            async for chunk in self._stream:
+                yield chunk
+
+    async def aclose(self) -> None:
+        """Release the connection back to the pool."""
+        close = getattr(self._stream, "aclose", None)
+        if close is not None:
+            await close()
+
+
+class PooledTransport(httpx.AsyncBaseTransport):
+    """HTTP transport with a connection pool whose connections resolve host names through a DNS cache."""
+
+    def __init__(
+        self,
+        dns_cache: DnsCache,
+        limits: httpx.Limits = DEFAULT_LIMITS,
+        *,
+        verify: ssl.SSLContext | str | bool = True,
+        trust_env: bool = True,
+        http2: bool = False,
+        proxy: httpx.Proxy | str | None = None,
+    ) -> None:
+        """Initialize the transport.
+
+        Args:
+            dns_cache: Cache of the host name resolutions
+            limits: Limits of the connection pool
+            verify: Whether to verify TLS certificates, a CA bundle path or an SSL context, as in httpx
+            trust_env: Whether to load CA certificates from SSL_CERT_FILE and SSL_CERT_DIR
+            http2: Whether to negotiate HTTP/2
+            proxy: HTTP proxy to connect through; only the name of the proxy goes through the DNS cache
+
+        Raises:
+            ValueError: If the proxy is not an HTTP or HTTPS proxy
+        """
+        # [AI GENERATED] httpx does not take a network backend, so the transport owns its httpcore pool
+        ssl_context = httpx.create_ssl_context(verify=verify, trust_env=trust_env)
+        network_backend = _CachingNetworkBackend(dns_cache)
+        proxy = httpx.Proxy(proxy) if isinstance(proxy, str) else proxy
+        if proxy is None:
+            self.pool = httpcore.AsyncConnectionPool(
+                ssl_context=ssl_context,
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                keepalive_expiry=limits.keepalive_expiry,
+                http2=http2,
+                network_backend=network_backend,
+            )
+        elif proxy.url.scheme in {"http", "https"}:
+            self.pool = httpcore.AsyncHTTPProxy(
+                proxy_url=httpcore.URL(
+                    scheme=proxy.url.raw_scheme,
+                    host=proxy.url.raw_host,
+                    port=proxy.url.port,
+                    target=proxy.url.raw_path,
+                ),
+                proxy_auth=proxy.raw_auth,
+                proxy_headers=proxy.headers.raw,
+                proxy_ssl_context=proxy.ssl_context,
+                ssl_context=ssl_context,
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                keepalive_expiry=limits.keepalive_expiry,
+                http2=http2,
+                network_backend=network_backend,
+            )
+        else:
+            msg = f"A DNS cache supports HTTP and HTTPS proxies only, got {proxy.url.scheme!r}"
+            raise ValueError(msg)
+
+    @property
+    def idle_connections(self) -> int:
+        """The number of open connections ready for a request."""
+        return sum(connection.is_idle() for connection in self.pool.connections)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send a request through the connection pool.
+
+        Args:
+            request: The request to send
+
+        Returns:
+            The response, with its body still to be read
+        """
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=cast("AsyncIterable[bytes]", request.stream),
+            extensions=request.extensions,
+        )
+        with _httpx_errors(request):
+            response = await self.pool.handle_async_request(core_request)
+        return httpx.Response(
+            status_code=response.status,
+            headers=response.headers,
+            stream=_ResponseStream(cast("AsyncIterable[bytes]", response.stream), request),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        await self.pool.aclose()
+
+
+def _is_address(host: str) -> bool:
+    """Return whether a host is an IP address rather than a name."""
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
@@ -1,12 +1,21 @@
 """Type definitions for Simplise API Client."""
 
+from collections.abc import AsyncIterable
 from enum import Enum
-from typing import Any, Protocol, TypedDict
+from typing import Any, NotRequired, Protocol, TypedDict
+
+from simplise_api_client.metrics import Timings
+
+from .load_balancing import BalancingStrategy
+from .scheduler import Priority
 
 # HTTP status code constants
 HTTP_ACCEPTED = 202
 HTTP_TOO_MANY_REQUESTS = 429
 
+# Statuses of requests rejected because the session is invalid
+AUTH_ERROR_STATUSES = frozenset({401, 403})
+
 
 class HttpMethod(str, Enum):
     """HTTP methods."""
@@ -34,9 +43,10 @@ class ApiConfig(TypedDict):
 
     # [AI GENERATED] Main configuration for API client
     api_key: str
-    base_url: str | None
+    base_url: str | list[str] | None  # several base URLs are balanced across, in order of preference
     timeout: int | None  # seconds
     retry_config: RetryConfig | None
+    load_balancing: NotRequired[BalancingStrategy]
 
 
 class ApiResponse(TypedDict, total=False):
@@ -48,6 +58,7 @@ class ApiResponse(TypedDict, total=False):
     error: str | None
     status: int | None
     headers: dict[str, str] | None
+    timings: Timings
 
 
 class ErrorResponse(TypedDict):
@@ -65,8 +76,10 @@ class RequestOptions(TypedDict, total=False):
     # [AI GENERATED] Options for HTTP requests
     method: HttpMethod
     headers: dict[str, str]
-    body: str | bytes | None
-    timeout: int
+    body: str | bytes | AsyncIterable[bytes] | None
+    timeout: float  # seconds, per attempt
+    total_timeout: float  # seconds, for the whole call including retries and polls
+    priority: Priority
     retry_config: RetryConfig
 
 
@@ -76,6 +89,7 @@ class AuthSession(TypedDict, total=False):
     # [AI GENERATED] Authentication session information
     session_cookie: str
     csrf_token: str | None
+    expires_at: float | None  # Unix timestamp, None if the server did not tell
 
 
 class LoginCredentials(TypedDict, total=False):
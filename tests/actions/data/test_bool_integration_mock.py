@@ -4,6 +4,9 @@
 モックAPIを使用した統合テストが含まれています。
 """
 
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Any
 from unittest.mock import Mock, patch
 
 from simplise_api_client.actions.data.bool import action_bool
@@ -13,6 +16,16 @@ from simplise_api_client.base import SimpliseClient
 DEFAULT_TIMEOUT = 30.0
 
 
+def _form_parts(kwargs: dict[str, Any]) -> dict[str, tuple[str, str]]:
+    """送信されたmultipart/form-dataを解析し、パート名と（内容, Content-Type）の対応を返す。"""
+    header = f"Content-Type: {kwargs['headers']['Content-Type']}\r\n\r\n".encode()
+    message = BytesParser(policy=HTTP).parsebytes(header + bytes(kwargs["data"]))
+    return {
+        part.get_param("name", header="content-disposition"): (part.get_payload(), part.get_content_type())
+        for part in message.iter_parts()
+    }
+
+
 class TestActionBoolIntegrationMock:
     """action_boolとSimpliseClient.action.executeのモック統合テスト。
 
@@ -93,8 +106,9 @@ class TestActionBoolIntegrationMock:
             call_args = mock_post.call_args
 
             # [AI GENERATED] リクエストデータが正しいことを確認
-            assert call_args[1]["files"]["action"][1] == expected_json, (
-                f"Expected JSON {expected_json} for input {input_value!r}, got {call_args[1]['files']['action'][1]}"
+            action_json = _form_parts(call_args[1])["action"][0]
+            assert action_json == expected_json, (
+                f"Expected JSON {expected_json} for input {input_value!r}, got {action_json}"
             )
 
     @patch("simplise_api_client.base.requests.post")
@@ -133,11 +147,11 @@ class TestActionBoolIntegrationMock:
         assert headers["Authorization"] == "Bearer test_api_key"
 
         # [AI GENERATED] multipart/form-dataとしてactionデータが送信されることを確認
-        files = call_args[1]["files"]
-        assert "action" in files
-        action_data = files["action"]
-        assert action_data[1] == '{"bool": ["0"]}'
-        assert action_data[2] == "application/json"
+        parts = _form_parts(call_args[1])
+        assert "action" in parts
+        action_data = parts["action"]
+        assert action_data[0] == '{"bool": ["0"]}'
+        assert action_data[1] == "application/json"
 
         # [AI GENERATED] タイムアウトが設定されていることを確認
         timeout = call_args[1]["timeout"]
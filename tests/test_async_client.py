@@ -0,0 +1,105 @@
+"""AsyncSimpliseClientのテスト。
+
+このモジュールには、非同期クライアントのライブラリモデル実行、JsonLogic実行、
+同期クライアントとのリクエスト形式の一致、エラーハンドリング、複数のイベントループでの再利用のテストケースが含まれています。
+"""
+
+import asyncio
+from unittest.mock import Mock, patch
+
+import pytest
+from pytest_httpx import HTTPXMock, IteratorStream
+
+from simplise_api_client import Action, AsyncSimpliseClient
+from simplise_api_client.base import SimpliseClient
+from simplise_api_client.multipart import MultipartEncoder
+from simplise_api_client.testing import StandInServer
+
+BASE_URL = "https://test.example.com"
+URL = f"{BASE_URL}/action-logic"
+BOUNDARY = "test-boundary"
+
+
+class TestAsyncSimpliseClient:
+    """AsyncSimpliseClientのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_execute_operation(self, httpx_mock: HTTPXMock) -> None:
+        """Operationが非同期に実行され、結果が返されることをテスト。"""
+        httpx_mock.add_response(url=URL, method="POST", text="15")
+
+        async with AsyncSimpliseClient(api_key="test_api_key", base_url=BASE_URL) as client:
+            result = await client.action.execute(Action.Decimal.add(Action.Data.input("value"), 10), {"value": "5"})
+
+        # [AI GENERATED] 結果と認証ヘッダーを検証
+        request = httpx_mock.get_request()
+        assert request is not None
+        assert result == "15"
+        assert request.headers["Authorization"] == "Bearer test_api_key"
+
+    @pytest.mark.asyncio
+    @patch("requests.post")
+    async def test_request_matches_sync_client(self, mock_post: Mock, httpx_mock: HTTPXMock) -> None:
+        """同期クライアントと同一のリクエストボディが送信されることをテスト。"""
+        mock_post.return_value = Mock(text="ok")
+        httpx_mock.add_response(url=URL, method="POST", text="ok")
+        rule = {"num.add": [{"var": "a"}, 1, True]}
+        input_data = {"a": 2, "flag": False}
+
+        # [AI GENERATED] 境界文字列を揃えて同期・非同期の両方で実行
+        sync_client = SimpliseClient(api_key="test_api_key", base_url=BASE_URL)
+        sync_client.action_logic._core.encoder = MultipartEncoder(BOUNDARY)  # noqa: SLF001
+        async_client = AsyncSimpliseClient(api_key="test_api_key", base_url=BASE_URL)
+        async_client.action_logic._core.encoder = MultipartEncoder(BOUNDARY)  # noqa: SLF001
+        sync_client.action.execute_logic(rule, input_data)
+        await async_client.action.execute_logic(rule, input_data)
+        await async_client.aclose()
+
+        # [AI GENERATED] 値の文字列化を含めてボディとヘッダーが一致することを検証
+        request = httpx_mock.get_request()
+        assert request is not None
+        sync_kwargs = mock_post.call_args[1]
+        assert request.read() == bytes(sync_kwargs["data"])
+        assert request.headers["Content-Type"] == sync_kwargs["headers"]["Content-Type"]
+        assert b'"1", "True"' in request.read()
+
+    @pytest.mark.asyncio
+    async def test_http_error_is_wrapped(self, httpx_mock: HTTPXMock) -> None:
+        """HTTPエラーがRuntimeErrorとして送出されることをテスト。"""
+        httpx_mock.add_response(url=URL, method="POST", status_code=500)
+
+        async with AsyncSimpliseClient(api_key="test_api_key", base_url=BASE_URL) as client:
+            with pytest.raises(RuntimeError, match="Error sending request"):
+                await client.action.execute_logic({"var": "a"}, {"a": "1"})
+
+    @pytest.mark.asyncio
+    async def test_execute_logic_stream(self, httpx_mock: HTTPXMock) -> None:
+        """非同期ストリーミング実行でJSON配列の要素が返されることをテスト。"""
+        httpx_mock.add_response(url=URL, method="POST", stream=IteratorStream([b'["a", ', b'"b"]']))
+
+        async with AsyncSimpliseClient(api_key="test_api_key", base_url=BASE_URL) as client:
+            result = [item async for item in client.action.execute_logic_stream({"var": "x"}, {"x": "1"}, "json")]
+
+        assert result == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_client_is_reopened_after_close(self, httpx_mock: HTTPXMock) -> None:
+        """aclose後も次のリクエストで接続が再作成されることをテスト。"""
+        httpx_mock.add_response(url=URL, method="POST", text="1", is_reusable=True)
+        client = AsyncSimpliseClient(api_key="test_api_key", base_url=BASE_URL)
+
+        await client.action_logic.post({"var": "a"})
+        await client.aclose()
+
+        assert await client.action_logic.post({"var": "a"}) == "1"
+        await client.aclose()
+
+    def test_reused_across_event_loops(self) -> None:
+        """別のイベントループで使用した場合に、新しい接続を作成することをテスト。"""
+        with StandInServer() as server:
+            client = AsyncSimpliseClient(api_key="test_api_key", base_url=server.url)
+
+            first = asyncio.run(client.action_logic.post({"num.add": ["1", "2"]}))
+            second = asyncio.run(client.action_logic.post({"num.add": ["1", "2"]}))
+
+        assert first == second == "3"
@@ -0,0 +1,140 @@
+"""認証セッションの管理のテスト。
+
+このモジュールには、代替サーバーに対するSessionManagerの同時ログインの集約、期限前のバックグラウンドでの更新、
+拒否されたセッションの再確立、request_with_csrfへの認証情報の自動付与と、
+ログインのレスポンスからのセッションの有効期限の取得のテストケースが含まれています。
+"""
+
+import asyncio
+import base64
+import json
+import time
+
+import pytest
+from pytest_httpx import HTTPXMock
+
+from simplise_api_client.testing import StandInServer
+from simplise_client import AuthClient, HttpClient, HttpMethod, LoginCredentials
+
+API_KEY = "test-api-key"
+BASE_URL = "https://test.example.com"
+CREDENTIALS: LoginCredentials = {"username": "user", "password": "password"}
+# [AI GENERATED] 同時にセッションを要求するコルーチンの数
+CONCURRENT_CALLERS = 20
+
+
+def _auth_client(url: str) -> AuthClient:
+    """代替サーバーに接続するAuthClientを返す。"""
+    return AuthClient(HttpClient({"api_key": API_KEY, "base_url": url, "timeout": 5, "retry_config": None}))
+
+
+class TestSessionManager:
+    """SessionManagerのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_one_login(self) -> None:
+        """同時にセッションを要求しても、ログインとCSRFトークンの取得が一度だけ行われることをテスト。"""
+        with StandInServer(api_key=API_KEY, latency=0.05) as server:
+            manager = _auth_client(server.url).session_manager(CREDENTIALS)
+
+            sessions = await asyncio.gather(*(manager.session() for _ in range(CONCURRENT_CALLERS)))
+
+        assert all(session is sessions[0] for session in sessions)
+        assert sessions[0]["session_cookie"].startswith("jwt=")
+        assert server.hits["/auth/login"] == 1
+        assert server.hits["/auth/csrf-token"] == 1
+
+    @pytest.mark.asyncio
+    async def test_request_with_csrf_uses_session(self) -> None:
+        """request_with_csrfで認証情報を省略すると、管理しているセッションが送信されることをテスト。"""
+        with StandInServer(api_key=API_KEY) as server:
+            auth = _auth_client(server.url)
+            auth.session_manager(CREDENTIALS)
+
+            responses = await asyncio.gather(
+                *(
+                    auth.http_client.request_with_csrf("/auth/verify", options={"method": HttpMethod.GET})
+                    for _ in range(CONCURRENT_CALLERS)
+                )
+            )
+
+        assert all(response["data"] == {"valid": True} for response in responses)
+        assert server.hits["/auth/login"] == 1
+
+    @pytest.mark.asyncio
+    async def test_rejected_session_is_renewed(self) -> None:
+        """サーバーがセッションを拒否した場合に、一度だけログインし直して再送することをテスト。"""
+        with StandInServer(api_key=API_KEY) as server:
+            auth = _auth_client(server.url)
+            manager = auth.session_manager(CREDENTIALS)
+            first = await manager.session()
+            server.end_session(first["session_cookie"].removeprefix("jwt="))
+
+            response = await auth.http_client.request_with_csrf("/auth/verify", options={"method": HttpMethod.GET})
+
+        assert response["data"] == {"valid": True}
+        assert manager.logins == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_refreshes_before_expiry(self) -> None:
+        """期限が近づいたセッションを返しながら、バックグラウンドで一度だけ更新することをテスト。"""
+        with StandInServer(api_key=API_KEY, latency=0.05) as server:
+            manager = _auth_client(server.url).session_manager(CREDENTIALS, refresh_margin=9.9, default_lifetime=10)
+            first = await manager.session()
+            await asyncio.sleep(0.15)
+
+            current = await asyncio.gather(*(manager.session() for _ in range(CONCURRENT_CALLERS)))
+            await asyncio.sleep(0.5)
+            logins = manager.logins
+            refreshed = await manager.session()
+            await manager.close()
+
+        assert all(session is first for session in current)
+        assert logins == 2  # noqa: PLR2004
+        assert refreshed is not first
+        assert server.hits["/auth/logout"] == 1
+
+    @pytest.mark.asyncio
+    async def test_request_with_csrf_requires_credentials(self) -> None:
+        """セッションの管理がない場合に、認証情報を省略するとエラーになることをテスト。"""
+        client = HttpClient({"api_key": API_KEY, "base_url": BASE_URL, "timeout": 5, "retry_config": None})
+
+        with pytest.raises(ValueError, match="session manager"):
+            await client.request_with_csrf("/auth/verify")
+
+
+class TestSessionExpiry:
+    """ログインのレスポンスからのセッションの有効期限の取得のテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_expiry_from_max_age(self, httpx_mock: HTTPXMock) -> None:
+        """Set-CookieのMax-Ageから有効期限を取得することをテスト。"""
+        httpx_mock.add_response(
+            url=f"{BASE_URL}/auth/login", json={"success": True}, headers={"Set-Cookie": "jwt=token; Max-Age=120"}
+        )
+        httpx_mock.add_response(url=f"{BASE_URL}/auth/csrf-token", json={"csrfToken": "csrf"})
+
+        session = await _auth_client(BASE_URL).establish_session(CREDENTIALS)
+
+        assert session is not None
+        assert session["session_cookie"] == "jwt=token"
+        assert session["csrf_token"] == "csrf"  # noqa: S105
+        assert session["expires_at"] == pytest.approx(time.time() + 120, abs=5)
+
+    @pytest.mark.asyncio
+    async def test_expiry_from_jwt(self, httpx_mock: HTTPXMock) -> None:
+        """Set-Cookieに期限がない場合に、JWTのexpクレームから有効期限を取得することをテスト。"""
+        payload = base64.urlsafe_b64encode(json.dumps({"exp": 2_000_000_000}).encode()).decode().rstrip("=")
+        token = f"header.{payload}.signature"
+        httpx_mock.add_response(
+            url=f"{BASE_URL}/auth/login", json={"success": True}, headers={"Set-Cookie": f"jwt={token}; HttpOnly"}
+        )
+        httpx_mock.add_response(
+            url=f"{BASE_URL}/auth/csrf-token", json={}, headers={"Set-Cookie": "csrf_token=from-cookie"}
+        )
+
+        session = await _auth_client(BASE_URL).establish_session(CREDENTIALS)
+
+        assert session is not None
+        assert session["csrf_token"] == "from-cookie"  # noqa: S105
+        assert session["expires_at"] == 2_000_000_000  # noqa: PLR2004
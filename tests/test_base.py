@@ -184,8 +184,10 @@ class TestActionLogicAPI:
         assert call_args[1]["headers"]["Authorization"] == "Bearer test_api_key", (
             "Authorization header should contain correct API key"
         )
-        assert "action" in call_args[1]["files"], "Request should include action file"
-        assert "input" in call_args[1]["files"], "Request should include input file"
+        body = bytes(call_args[1]["data"])
+        assert b'name="action"' in body, "Request should include action part"
+        assert b'name="input"' in body, "Request should include input part"
+        assert len(body) == int(call_args[1]["headers"]["Content-Length"]), "Content-Length should match body"
 
     @patch("requests.post")
     def test_post_request_without_input_data(self, mock_post: Mock) -> None:
@@ -208,10 +210,11 @@ class TestActionLogicAPI:
         # [AI GENERATED] 成功レスポンスを検証
         assert result == "success", f"Expected 'success', got '{result}'"
 
-        # [AI GENERATED] リクエストにアクションファイルのみが含まれ、入力ファイルが含まれないことを検証
+        # [AI GENERATED] リクエストにアクションパートのみが含まれ、入力パートが含まれないことを検証
         call_args = mock_post.call_args
-        assert "action" in call_args[1]["files"], "Request should include action file"
-        assert "input" not in call_args[1]["files"], "Request should not include input file when no input data provided"
+        body = bytes(call_args[1]["data"])
+        assert b'name="action"' in body, "Request should include action part"
+        assert b'name="input"' not in body, "Request should not include input part when no input data provided"
 
 
 class TestAction:
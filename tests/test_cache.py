@@ -0,0 +1,359 @@
+"""結果キャッシュのテスト。
+
+このモジュールには、キャッシュキーの正規化、決定的なルールの判定、SQLiteCacheの有効期限・LRUでの削除・
+最終使用時刻の更新間隔・プロセス間での共有、MemoryCache・RedisCache・TieredCacheの二層構成・エラーのキャッシュ・同時のミスの集約・
+期限切れの結果の再検証と、同期・非同期クライアントでのキャッシュの利用のテストケースが含まれています。
+"""
+
+import asyncio
+import io
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+from pytest_httpx import HTTPXMock
+
+from simplise_api_client import Action, AsyncSimpliseClient
+from simplise_api_client.base import SimpliseClient
+from simplise_api_client.cache import (
+    CachedError,
+    MemoryCache,
+    RedisCache,
+    SQLiteCache,
+    TieredCache,
+    deterministic,
+    deterministic_error,
+    result_key,
+)
+from simplise_api_client.testing import StandInRedis
+
+BASE_URL = "https://test.example.com"
+RULE = {"decimal.add": [{"input": ["value"]}, "10"]}
+# [AI GENERATED] プロセスごとに書き込む結果の数
+WRITES_PER_PROCESS = 50
+# [AI GENERATED] 同時に同じキーを要求する呼び出しの数
+CONCURRENT_CALLS = 8
+
+
+def _write_results(path: Path, worker: int) -> None:
+    """別のプロセスから結果を書き込む。"""
+    cache = SQLiteCache(path)
+    for i in range(WRITES_PER_PROCESS):
+        cache.set(f"{worker}-{i}", str(i))
+    cache.close()
+
+
+class TestCacheKey:
+    """キャッシュキーと決定的なルールの判定のテストケース。"""
+
+    def test_result_key_is_canonical(self) -> None:
+        """キーの順序や数値と文字列の違いによらず、同じルールと入力は同じキーになることをテスト。"""
+        assert result_key({"num.add": [1, 2]}, {"a": "1", "b": "2"}) == result_key(
+            {"num.add": ["1", "2"]}, {"b": "2", "a": 1}
+        )
+        assert result_key(RULE, None) == result_key(RULE, {})
+        assert result_key(RULE, {"value": "1"}) != result_key(RULE, {"value": "2"})
+
+    def test_deterministic(self) -> None:
+        """ローカル評価器の演算子のみのルールだけが決定的と判定されることをテスト。"""
+        assert deterministic({"and": [{"num.gt": [{"input": ["a"]}, "1"]}, {"decimal.mul": ["2", "3"]}]})
+        assert not deterministic({"decimal.add": [{"state.get": ["counter"]}, "1"]})
+
+
+class TestSQLiteCache:
+    """SQLiteCacheのテストケース。"""
+
+    def test_persists_across_instances(self, tmp_path: Path) -> None:
+        """保存した結果が別のインスタンスから読み込めることをテスト。"""
+        path = tmp_path / "results.db"
+        SQLiteCache(path).set("key", "15")
+
+        assert SQLiteCache(path).get("key") == "15"
+        assert SQLiteCache(path).get("missing") is None
+
+    def test_ttl(self, tmp_path: Path) -> None:
+        """有効期限を過ぎた結果が返されず、削除されることをテスト。"""
+        cache = SQLiteCache(tmp_path / "results.db", ttl=0.05)
+        cache.set("key", "15")
+        assert cache.get("key") == "15"
+
+        time.sleep(0.1)
+        assert cache.get("key") is None
+        cache.evict()
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self, tmp_path: Path) -> None:
+        """上限を超えた場合に最も長く使われていない結果が削除されることをテスト。"""
+        cache = SQLiteCache(tmp_path / "results.db", max_entries=2, access_resolution=0)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        cache.evict()
+
+        assert cache.get("a") == "1"
+        assert cache.get("b") is None
+        assert cache.get("c") == "3"
+
+    def test_throttles_access_updates(self, tmp_path: Path) -> None:
+        """最終使用時刻が更新間隔内の読み込みでは、データベースに書き込まないことをテスト。"""
+        cache = SQLiteCache(tmp_path / "results.db", access_resolution=0.05)
+        cache.set("key", "15")
+        connection = cache._connection()  # noqa: SLF001
+        changes = connection.total_changes
+        for _ in range(10):
+            assert cache.get("key") == "15"
+        assert connection.total_changes == changes
+
+        time.sleep(0.1)
+        assert cache.get("key") == "15"
+        assert connection.total_changes == changes + 1
+
+    def test_shared_across_processes(self, tmp_path: Path) -> None:
+        """複数のプロセスから同時に書き込んだ結果がすべて保存されることをテスト。"""
+        path = tmp_path / "results.db"
+        SQLiteCache(path)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            list(executor.map(_write_results, [path, path], [0, 1]))
+
+        cache = SQLiteCache(path)
+        assert len(cache) == 2 * WRITES_PER_PROCESS
+        assert cache.get(f"1-{WRITES_PER_PROCESS - 1}") == str(WRITES_PER_PROCESS - 1)
+
+
+class TestMemoryCache:
+    """MemoryCacheのテストケース。"""
+
+    def test_evicts_least_recently_used(self) -> None:
+        """上限を超えた場合に最も長く使われていない結果が削除されることをテスト。"""
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+
+        assert cache.get("a") == "1"
+        assert cache.get("b") is None
+        assert len(cache) == 2  # noqa: PLR2004
+
+    def test_ttl(self) -> None:
+        """結果ごとの有効期限が既定の有効期限より優先されることをテスト。"""
+        cache = MemoryCache(ttl=10)
+        cache.set("short", "1", ttl=0.05)
+        cache.set("long", "2")
+
+        time.sleep(0.1)
+        assert cache.get("short") is None
+        assert cache.get("long") == "2"
+
+
+class TestRedisCache:
+    """代替のRedisクライアントに対するRedisCacheのテストケース。"""
+
+    def test_get_and_set(self) -> None:
+        """接頭辞付きのキーに保存し、バイト列を文字列として返すことをテスト。"""
+        redis = StandInRedis()
+        cache = RedisCache(redis, prefix="test:")
+        cache.set("key", "15")
+
+        assert cache.get("key") == "15"
+        assert redis.get("test:key") == b"15"
+        assert cache.get("missing") is None
+
+    def test_ttl(self) -> None:
+        """有効期限がミリ秒単位でRedisに渡されることをテスト。"""
+        cache = RedisCache(StandInRedis(), ttl=0.05)
+        cache.set("key", "15")
+        assert cache.get("key") == "15"
+
+        time.sleep(0.1)
+        assert cache.get("key") is None
+
+
+class TestTieredCache:
+    """TieredCacheのテストケース。"""
+
+    def test_shares_results_across_local_caches(self) -> None:
+        """共有キャッシュの結果が別のホストのローカルキャッシュに取り込まれることをテスト。"""
+        redis = StandInRedis()
+        first = TieredCache(RedisCache(redis))
+        second = TieredCache(RedisCache(redis))
+
+        assert first.fetch("key", lambda: "15") == "15"
+        assert second.fetch("key", Mock(side_effect=AssertionError)) == "15"
+        gets = redis.commands["get"]
+        assert second.fetch("key", Mock(side_effect=AssertionError)) == "15"
+        assert redis.commands["get"] == gets
+        assert second.get("key") == "15"
+
+    def test_caches_deterministic_errors(self) -> None:
+        """400のエラーはキャッシュして再送せず、それ以外のエラーはキャッシュしないことをテスト。"""
+        cache = TieredCache(error_ttl=10)
+        bad_request = _http_error(400)
+        compute = Mock(side_effect=bad_request)
+
+        with pytest.raises(RuntimeError):
+            cache.fetch("bad", compute)
+        with pytest.raises(CachedError, match="400"):
+            cache.fetch("bad", compute)
+        assert compute.call_count == 1
+
+        unavailable = Mock(side_effect=[_http_error(503), "15"])
+        with pytest.raises(RuntimeError):
+            cache.fetch("flaky", unavailable)
+        assert cache.fetch("flaky", unavailable) == "15"
+
+    def test_deterministic_error(self) -> None:
+        """ラップされたHTTPエラーのステータスで決定的なエラーを判定することをテスト。"""
+        assert deterministic_error(_http_error(422))
+        assert not deterministic_error(_http_error(500))
+        assert not deterministic_error(ValueError("invalid"))
+
+    def test_coalesces_concurrent_misses(self) -> None:
+        """同じキーの同時のミスで計算が一度だけ行われることをテスト。"""
+        cache = TieredCache(RedisCache(StandInRedis()))
+        calls = 0
+        barrier = threading.Barrier(CONCURRENT_CALLS)
+
+        def compute() -> str:
+            nonlocal calls
+            calls += 1
+            time.sleep(0.1)
+            return "15"
+
+        def call(_: int) -> str:
+            barrier.wait()
+            return cache.fetch("key", compute)
+
+        with ThreadPoolExecutor(max_workers=CONCURRENT_CALLS) as executor:
+            results = list(executor.map(call, range(CONCURRENT_CALLS)))
+
+        assert results == ["15"] * CONCURRENT_CALLS
+        assert calls == 1
+
+    def test_serves_stale_while_revalidating(self) -> None:
+        """期限切れの結果を返しながら、バックグラウンドで更新することをテスト。"""
+        cache = TieredCache(ttl=0.05, stale_ttl=10)
+        cache.fetch("key", lambda: "old")
+        time.sleep(0.1)
+        refreshed = threading.Event()
+
+        def compute() -> str:
+            refreshed.set()
+            return "new"
+
+        assert cache.fetch("key", compute) == "old"
+        assert refreshed.wait(5)
+        for _ in range(100):
+            if cache.get("key") == "new":
+                break
+            time.sleep(0.01)
+        assert cache.fetch("key", Mock(side_effect=AssertionError)) == "new"
+
+    def test_expires_after_stale_window(self) -> None:
+        """再検証の期間も過ぎた結果は返さずに計算し直すことをテスト。"""
+        cache = TieredCache(ttl=0.02, stale_ttl=0.02)
+        cache.fetch("key", lambda: "old")
+        time.sleep(0.1)
+
+        assert cache.fetch("key", lambda: "new") == "new"
+
+    @pytest.mark.asyncio
+    async def test_async_coalescing_and_revalidation(self) -> None:
+        """非同期でも同時のミスが集約され、期限切れの結果が再検証されることをテスト。"""
+        cache = TieredCache(RedisCache(StandInRedis()), ttl=0.05, stale_ttl=10)
+        calls = 0
+
+        async def compute() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return str(calls)
+
+        results = await asyncio.gather(*(cache.afetch("key", compute) for _ in range(CONCURRENT_CALLS)))
+        assert results == ["1"] * CONCURRENT_CALLS
+        assert calls == 1
+
+        await asyncio.sleep(0.1)
+        assert await cache.afetch("key", compute) == "1"
+        await asyncio.sleep(0.1)
+        assert await cache.afetch("key", compute) == "2"
+        assert calls == 2  # noqa: PLR2004
+
+
+def _http_error(status_code: int) -> RuntimeError:
+    """クライアントと同じようにHTTPエラーをラップしたエラーを返す。"""
+    cause = requests.HTTPError(f"{status_code} Error", response=Mock(status_code=status_code))
+    error = RuntimeError(f"Error sending request: {cause}")
+    error.__cause__ = cause
+    return error
+
+
+class TestClientCache:
+    """クライアントでの結果キャッシュの利用のテストケース。"""
+
+    @patch("requests.post")
+    def test_sync_client_reuses_result(self, mock_post: Mock, tmp_path: Path) -> None:
+        """同じルールと入力の2回目の実行ではAPIを呼び出さないことをテスト。"""
+        mock_post.return_value = Mock(status_code=200, content=b"15", text="15")
+        cache = SQLiteCache(tmp_path / "results.db")
+        client = SimpliseClient(api_key="test_api_key", base_url=BASE_URL, result_cache=cache)
+        operation = Action.Decimal.add(Action.Data.input("value"), 10)
+
+        assert client.action.execute(operation, {"value": "5"}) == "15"
+        assert client.action.execute(operation, {"value": "5"}) == "15"
+        assert client.action.execute_logic(RULE, {"value": "5"}) == "15"
+        assert mock_post.call_count == 1
+
+        # [AI GENERATED] 別のクライアント（再起動後のワーカー）でも結果を再利用する
+        restarted = SimpliseClient(api_key="test_api_key", base_url=BASE_URL, result_cache=SQLiteCache(cache.path))
+        assert restarted.action.execute(operation, {"value": "5"}) == "15"
+        assert mock_post.call_count == 1
+
+    @patch("requests.post")
+    def test_sync_client_skips_uncacheable(self, mock_post: Mock, tmp_path: Path) -> None:
+        """決定的でないルールと入力ソースの結果はキャッシュしないことをテスト。"""
+        mock_post.return_value = Mock(status_code=200, content=b"1", text="1")
+        cache = SQLiteCache(tmp_path / "results.db")
+        client = SimpliseClient(api_key="test_api_key", base_url=BASE_URL, result_cache=cache)
+
+        for _ in range(2):
+            client.action.execute_logic({"state.get": ["counter"]})
+            client.action.execute_logic(RULE, io.BytesIO(b'{"value": "5"}'))
+
+        assert mock_post.call_count == 4  # noqa: PLR2004
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_async_client_reuses_result(self, httpx_mock: HTTPXMock, tmp_path: Path) -> None:
+        """非同期クライアントでも2回目の実行ではAPIを呼び出さないことをテスト。"""
+        httpx_mock.add_response(url=f"{BASE_URL}/action-logic", text="15")
+        cache = SQLiteCache(tmp_path / "results.db")
+
+        async with AsyncSimpliseClient(api_key="test_api_key", base_url=BASE_URL, result_cache=cache) as client:
+            assert await client.action.execute_logic(RULE, {"value": "5"}) == "15"
+            assert await client.action.execute_logic(RULE, {"value": "5"}) == "15"
+
+        assert len(httpx_mock.get_requests()) == 1
+
+    @pytest.mark.asyncio
+    async def test_async_client_tiered_cache(self, httpx_mock: HTTPXMock) -> None:
+        """非同期クライアントで同時の実行が集約され、400のエラーがキャッシュされることをテスト。"""
+        httpx_mock.add_response(url=f"{BASE_URL}/action-logic", text="15")
+        httpx_mock.add_response(url=f"{BASE_URL}/action-logic", status_code=400)
+        cache = TieredCache(RedisCache(StandInRedis()))
+
+        async with AsyncSimpliseClient(api_key="test_api_key", base_url=BASE_URL, result_cache=cache) as client:
+            results = await asyncio.gather(
+                *(client.action.execute_logic(RULE, {"value": "5"}) for _ in range(CONCURRENT_CALLS))
+            )
+            for _ in range(2):
+                with pytest.raises(RuntimeError, match="400"):
+                    await client.action.execute_logic(RULE, {"value": "x"})
+
+        assert results == ["15"] * CONCURRENT_CALLS
+        assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
@@ -0,0 +1,124 @@
+"""simplise-runコマンドのテスト。
+
+このモジュールには、JSONL・CSV入力の一括実行、結果の順序、行ごとのエラー、不正な入力行、
+モジュールパスによるルール指定、チェックポイントからの再開、httpxが未インストールの場合の案内のテストケースが含まれています。
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+import simplise_api_client
+from simplise_api_client.cli import load_rule, main
+
+BASE_URL = "https://test.example.com"
+URL = f"{BASE_URL}/action-logic"
+
+# [AI GENERATED] モジュールパス指定のテストで読み込むルール
+RULE = {"var": "value"}
+
+
+def _echo_input(request: httpx.Request) -> httpx.Response:
+    """リクエストのinputパートの値をそのまま返す。"""
+    body = request.read()
+    start = body.index(b'{"value"')
+    value = json.loads(body[start : body.index(b"}", start) + 1])["value"]
+    return httpx.Response(200, text=value)
+
+
+def _run(tmp_path: Path, rows: str, *args: str, suffix: str = ".jsonl") -> tuple[int, list[dict[str, object]]]:
+    """入力ファイルを作成してコマンドを実行し、終了コードと出力行を返す。"""
+    rule_path = tmp_path / "rule.json"
+    rule_path.write_text(json.dumps(RULE))
+    input_path = tmp_path / f"rows{suffix}"
+    input_path.write_text(rows)
+    output_path = tmp_path / "results.jsonl"
+
+    argv = [str(rule_path), str(input_path), "-o", str(output_path), "--api-key", "test", "--base-url", BASE_URL]
+    exit_code = main([*argv, *args])
+    return exit_code, [json.loads(line) for line in output_path.read_text().splitlines()]
+
+
+class TestSimpliseRun:
+    """simplise-runのテストケース。"""
+
+    def test_jsonl_results_are_ordered(self, tmp_path: Path, httpx_mock: HTTPXMock) -> None:
+        """JSONL入力の各行が実行され、入力順に結果が出力されることをテスト。"""
+        httpx_mock.add_callback(_echo_input, url=URL, is_reusable=True)
+        rows = "".join(json.dumps({"value": str(i)}) + "\n" for i in range(20))
+
+        exit_code, results = _run(tmp_path, rows, "--concurrency", "4")
+
+        assert exit_code == 0
+        assert results == [{"row": i, "result": str(i)} for i in range(20)]
+
+    def test_csv_input(self, tmp_path: Path, httpx_mock: HTTPXMock) -> None:
+        """CSV入力がヘッダー行を列名として読み込まれることをテスト。"""
+        httpx_mock.add_callback(_echo_input, url=URL, is_reusable=True)
+
+        exit_code, results = _run(tmp_path, "value,other\na,1\nb,2\n", suffix=".csv")
+
+        assert exit_code == 0
+        assert [result["result"] for result in results] == ["a", "b"]
+
+    def test_failed_rows_are_reported(
+        self, tmp_path: Path, httpx_mock: HTTPXMock, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """失敗した行がエラーとして出力され、終了コードと集計に反映されることをテスト。"""
+        httpx_mock.add_response(url=URL, text="ok")
+        httpx_mock.add_response(url=URL, status_code=500)
+
+        exit_code, results = _run(tmp_path, '{"value": "a"}\n{"value": "b"}\n', "--concurrency", "1")
+
+        assert exit_code == 1
+        assert results[0] == {"row": 0, "result": "ok"}
+        assert "Error sending request" in str(results[1]["error"])
+        assert "rows: 2 (1 failed, 0 skipped by resume)" in capsys.readouterr().err
+
+    def test_malformed_rows_are_reported(self, tmp_path: Path, httpx_mock: HTTPXMock) -> None:
+        """JSONとして不正な行やオブジェクトでない行が失敗した行として出力され、実行が続くことをテスト。"""
+        httpx_mock.add_callback(_echo_input, url=URL, is_reusable=True)
+
+        exit_code, results = _run(tmp_path, '{"value": "a"}\n{"value": \n[1]\n{"value": "d"}\n')
+
+        assert exit_code == 1
+        assert results[0] == {"row": 0, "result": "a"}
+        assert str(results[1]["error"]).startswith("Invalid row: ")
+        assert results[2] == {"row": 2, "error": "Invalid row: Expected a JSON object, got list"}
+        assert results[3] == {"row": 3, "result": "d"}
+        assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
+
+    def test_resume_skips_written_rows(self, tmp_path: Path, httpx_mock: HTTPXMock) -> None:
+        """再開時に書き込み済みの行が読み飛ばされ、途中まで書き込まれた行が破棄されることをテスト。"""
+        httpx_mock.add_callback(_echo_input, url=URL, is_reusable=True)
+        # [AI GENERATED] 2行の完了後にクラッシュした出力ファイルを用意
+        (tmp_path / "results.jsonl").write_text('{"row": 0, "result": "0"}\n{"row": 1, "result": "1"}\n{"row": 2, "re')
+        rows = "".join(json.dumps({"value": str(i)}) + "\n" for i in range(4))
+
+        exit_code, results = _run(tmp_path, rows, "--resume")
+
+        assert exit_code == 0
+        assert results == [{"row": i, "result": str(i)} for i in range(4)]
+        assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
+
+    def test_load_rule_from_module(self) -> None:
+        """module:attribute形式でルールが読み込まれることをテスト。"""
+        assert load_rule("tests.test_cli:RULE") == RULE
+
+    def test_missing_async_extra(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """httpxが未インストールの場合は、トレースバックではなくインストール方法を案内して終了することをテスト。"""
+        # [AI GENERATED] async_client の読み込みを失敗させて基本インストールを再現
+        monkeypatch.setitem(sys.modules, "simplise_api_client.async_client", None)
+        monkeypatch.delattr(simplise_api_client, "async_client", raising=False)
+
+        with pytest.raises(SystemExit) as exit_info:
+            _run(tmp_path, '{"value": "a"}\n')
+
+        assert exit_info.value.code == 2  # noqa: PLR2004
+        assert "pip install simplise-api-client[async]" in capsys.readouterr().err
@@ -0,0 +1,201 @@
+"""呼び出し全体の期限のテスト。
+
+このモジュールには、deadlineの入れ子、期限による各試行のタイムアウトの制限、Retry-Afterの待機と
+202ポーリング・遅いサーバーでの期限切れ、asyncioのキャンセル、フォーム・認証・CSRFトークン付きのリクエストとストリーミングの期限のテストケースが含まれています。
+"""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from simplise_api_client.core import PreparedRequest
+from simplise_api_client.middleware import Middleware
+from simplise_api_client.testing import StandInServer
+from simplise_client import DeadlineExceededError, HttpClient, HttpMethod, RetryConfig, deadline
+
+BASE_URL = "https://test.example.com"
+RULE = {"num": ["1"]}
+RETRY_CONFIG: RetryConfig = {"max_retries": 3, "max_retry_delay": 30}
+
+
+class SlowStream(httpx.AsyncByteStream):
+    """最初のチャンクの後に長く待つレスポンス本文。"""
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield b"[1, "
+        await asyncio.sleep(2)
+        yield b"2]"
+
+
+class TimeoutRecorder(Middleware):
+    """送信されたリクエストのタイムアウトを記録するミドルウェア。"""
+
+    def __init__(self) -> None:
+        self.timeouts: list[float | None] = []
+
+    def before_request(self, request: PreparedRequest) -> PreparedRequest:
+        self.timeouts.append(request.timeout)
+        return request
+
+
+async def _collect(chunks: AsyncIterator[bytes], received: list[bytes]) -> None:
+    """ストリーミングのレスポンス本文のチャンクを受信した順に記録する。"""
+    async for chunk in chunks:
+        received.append(chunk)  # noqa: PERF401
+
+
+def _client(url: str, *middleware: Middleware) -> HttpClient:
+    """1試行あたり5秒のタイムアウトでリトライするHttpClientを返す。"""
+    return HttpClient(
+        {"api_key": "test", "base_url": url, "timeout": 5, "retry_config": RETRY_CONFIG}, middleware=middleware
+    )
+
+
+class TestDeadline:
+    """deadlineのテストケース。"""
+
+    def test_inner_deadline_does_not_extend_outer(self) -> None:
+        """内側のdeadlineが外側の期限を延ばさず、短くはできることをテスト。"""
+        with deadline(1) as outer:
+            assert outer is not None
+            with deadline(10) as inner:
+                assert inner is outer
+            with deadline(0.1) as shorter:
+                assert shorter is not None
+                assert shorter.remaining() <= 0.1  # noqa: PLR2004
+            with deadline(None) as unchanged:
+                assert unchanged is outer
+
+    def test_cap(self) -> None:
+        """タイムアウトが残り時間で制限されることをテスト。"""
+        with deadline(1) as limit:
+            assert limit is not None
+            assert limit.cap(5) <= 1
+            assert limit.cap(0.5) == 0.5  # noqa: PLR2004
+            assert limit.cap(None) <= 1
+
+
+class TestHttpClientDeadline:
+    """HttpClientの呼び出し全体の期限のテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_attempt_timeout_is_capped(self) -> None:
+        """各試行のタイムアウトが残り時間で制限されることをテスト。"""
+        recorder = TimeoutRecorder()
+        with StandInServer() as server:
+            response = await _client(server.url, recorder).request(
+                "/action-logic", {"method": HttpMethod.POST, "body": '{"num": ["1"]}', "total_timeout": 2}
+            )
+
+        assert response["data"] == 1
+        assert recorder.timeouts[0] is not None
+        assert recorder.timeouts[0] <= 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_retry_after_beyond_deadline(self, httpx_mock: HTTPXMock) -> None:
+        """Retry-Afterの待機が期限を超える場合は、待たずに期限切れになることをテスト。"""
+        httpx_mock.add_response(url=f"{BASE_URL}/action-logic", status_code=429, headers={"retry-after": "10"})
+        client = _client(BASE_URL)
+
+        started = time.perf_counter()
+        with pytest.raises(DeadlineExceededError):
+            await client.request("/action-logic", {"total_timeout": 1})
+
+        assert time.perf_counter() - started < 0.5  # noqa: PLR2004
+        assert len(httpx_mock.get_requests()) == 1
+
+    @pytest.mark.asyncio
+    async def test_polls_stop_at_deadline(self) -> None:
+        """202ポーリングがdeadlineのブロックの期限で打ち切られることをテスト。"""
+        with StandInServer(accepted_polls=10, poll_interval=0, latency=0.1) as server:
+            client = _client(server.url)
+            client.retry_config["max_retries"] = 20
+            started = time.perf_counter()
+            with deadline(0.35), pytest.raises(DeadlineExceededError):
+                await client.post("/action-logic", RULE)
+
+        assert time.perf_counter() - started < 0.6  # noqa: PLR2004
+        assert sum(server.hits.values()) < 5  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_slow_server(self) -> None:
+        """遅いサーバーへの試行が期限で打ち切られ、リトライされないことをテスト。"""
+        with StandInServer(latency=2) as server:
+            client = _client(server.url)
+            started = time.perf_counter()
+            with pytest.raises(DeadlineExceededError):
+                await client.request("/action-logic", {"method": HttpMethod.POST, "body": "{}", "total_timeout": 0.3})
+
+        assert time.perf_counter() - started < 1
+        assert client.metrics.snapshot()["/action-logic"].retries == 0
+
+    @pytest.mark.asyncio
+    async def test_cancellation(self) -> None:
+        """呼び出し元のキャンセルで試行が中断され、リトライされないことをテスト。"""
+        with StandInServer(latency=2) as server:
+            client = _client(server.url)
+            task = asyncio.create_task(client.post("/action-logic", RULE))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            started = time.perf_counter()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        assert time.perf_counter() - started < 0.5  # noqa: PLR2004
+        assert client.metrics.snapshot()["/action-logic"].retries == 0
+
+    @pytest.mark.asyncio
+    async def test_direct_requests_are_bounded(self) -> None:
+        """フォームの送信、認証なしのリクエスト、CSRFトークン付きのリクエストも期限で打ち切られることをテスト。"""
+        with StandInServer(latency=2) as server:
+            client = _client(server.url)
+            calls = [
+                lambda: client.request_without_auth("/auth/verify", {"total_timeout": 0.3}),
+                lambda: client.request_with_csrf("/auth/logout", "session=1", "csrf", {"total_timeout": 0.3}),
+                lambda: client.post_form("/action-logic", {"rule": b"{}"}),
+            ]
+            for call in calls:
+                started = time.perf_counter()
+                with deadline(0.3), pytest.raises(DeadlineExceededError):
+                    await call()
+                assert time.perf_counter() - started < 1
+
+    @pytest.mark.asyncio
+    async def test_direct_request_timeout_is_capped(self, httpx_mock: HTTPXMock) -> None:
+        """CSRFトークン付きのリクエストのタイムアウトが残り時間で制限されることをテスト。"""
+        httpx_mock.add_response(url=f"{BASE_URL}/auth/logout", json={"ok": True})
+        client = _client(BASE_URL)
+
+        with deadline(1):
+            await client.request_with_csrf("/auth/logout", "session=1", "csrf", {"method": HttpMethod.POST})
+
+        assert httpx_mock.get_requests()[0].extensions["timeout"]["read"] <= 1
+
+    @pytest.mark.asyncio
+    async def test_slow_stream(self, httpx_mock: HTTPXMock) -> None:
+        """ストリーミングのレスポンス本文の読み込みが期限で打ち切られることをテスト。"""
+        httpx_mock.add_response(url=f"{BASE_URL}/action-logic", stream=SlowStream())
+        client = _client(BASE_URL)
+        chunks: list[bytes] = []
+
+        started = time.perf_counter()
+        with deadline(0.3), pytest.raises(DeadlineExceededError, match="stream from /action-logic"):
+            await _collect(client.stream("/action-logic", {"method": HttpMethod.POST, "body": "{}"}), chunks)
+
+        assert chunks == [b"[1, "]
+        assert time.perf_counter() - started < 1
+
+    @pytest.mark.asyncio
+    async def test_slow_stream_connection(self) -> None:
+        """total_timeoutでストリーミングのリクエストの応答待ちが打ち切られることをテスト。"""
+        with StandInServer(latency=2) as server:
+            client = _client(server.url)
+            started = time.perf_counter()
+            with pytest.raises(DeadlineExceededError):
+                await _collect(client.stream("/action-logic", {"method": HttpMethod.POST, "total_timeout": 0.3}), [])
+
+        assert time.perf_counter() - started < 1
@@ -0,0 +1,76 @@
+"""ローカル評価のテスト。
+
+このモジュールには、evaluateによるルールのローカル評価、値の文字列化と結果の表記、
+未対応の演算子のエラー、evaluate_manyによるマルチプロセスでの一括評価のテストケースが含まれています。
+"""
+
+from typing import Any
+
+import pytest
+
+from simplise_api_client import Action, EvaluationError, evaluate, evaluate_many
+
+
+class TestEvaluate:
+    """evaluateのテストケース。"""
+
+    @pytest.mark.parametrize(
+        ("rule", "data", "expected"),
+        [
+            (Action.Decimal.add(Action.Data.input("value"), 10), {"value": "5"}, "15"),
+            ({"decimal.add": ["0.1", "0.2"]}, None, "0.3"),
+            ({"decimal.div": ["1", "3"]}, None, "0.33333333333333333333"),
+            ({"decimal.mul": ["1e30", "1"]}, None, "1e+30"),
+            ({"num.add": [{"input": "a"}, 0.2]}, {"a": 0.1}, "0.30000000000000004"),
+            ({"num.add": ["abc", 1]}, None, "NaN"),
+            ({"num.div": [1, 0]}, None, "Infinity"),
+            ({"num.mod": [-7, 2]}, None, "-1"),
+            ({"num.max": [1, "3", 2]}, None, "3"),
+            ({"num.between": [5, 1, 5]}, None, "true"),
+            ({"bool": [{"input": "a"}]}, {"a": "0.0"}, "false"),
+            ({"bool": [{"input": "a"}]}, {"a": False}, "false"),
+            ({"and": [True, "x", {"num.gt": [2, 1]}]}, None, "true"),
+            ({"input": "a"}, {"a": [1, 2]}, '["1","2"]'),
+        ],
+    )
+    def test_evaluate(self, rule: Any, data: dict[str, Any] | None, expected: str) -> None:  # noqa: ANN401
+        """クライアントと同じ文字列化を行い、APIと同じ表記で結果が返されることをテスト。"""
+        assert evaluate(rule, data) == expected
+
+    def test_unsupported_operator(self) -> None:
+        """ローカルで評価できない演算子でEvaluationErrorが送出されることをテスト。"""
+        with pytest.raises(EvaluationError, match=r"'str\.upper'"):
+            evaluate({"str.upper": ["a"]})
+
+    def test_invalid_decimal_operand(self) -> None:
+        """小数演算の不正な入力でEvaluationErrorが送出されることをテスト。"""
+        with pytest.raises(EvaluationError, match="Invalid decimal operand"):
+            evaluate({"decimal.add": [{"input": "a"}, "1"]}, {"a": "abc"})
+
+
+class TestEvaluateMany:
+    """evaluate_manyのテストケース。"""
+
+    def test_results_are_ordered(self) -> None:
+        """複数のワーカープロセスで評価した結果が入力順に返されることをテスト。"""
+        rule = Action.Decimal.mul(Action.Data.input("value"), "1.1")
+        rows = ({"value": str(i)} for i in range(50))
+
+        results = list(evaluate_many(rule, rows, processes=2, batch_size=7))
+
+        assert results == [evaluate(rule, {"value": str(i)}) for i in range(50)]
+
+    def test_exceptions_are_returned_per_row(self) -> None:
+        """評価に失敗した行の例外が結果の位置に返され、他の行は継続されることをテスト。"""
+        rule = {"decimal.div": ["1", {"input": "value"}]}
+
+        results = list(evaluate_many(rule, [{"value": "4"}, {"value": "0"}, {"value": "8"}], processes=1))
+
+        assert results[0] == "0.25"
+        assert isinstance(results[1], EvaluationError)
+        assert results[2] == "0.125"
+
+    def test_unsupported_operator_is_raised_before_starting(self) -> None:
+        """未対応の演算子が入力を読み込む前に送出されることをテスト。"""
+        with pytest.raises(EvaluationError):
+            evaluate_many({"str.upper": ["a"]}, [{}])
@@ -0,0 +1,234 @@
+"""HTTPキャッシュのテスト。
+
+このモジュールには、Cache-Controlによる新鮮さの判定、ETag・Last-Modifiedによる条件付きリクエストと304での再検証、
+no-store・Varyの扱い、圧縮されたレスポンスの保存、GET以外のリクエストによる無効化、APIキーごとの保存、ディスクへの保存と、
+ActionClientのGETクエリでのキャッシュの利用のテストケースが含まれています。
+"""
+
+import gzip
+from email.utils import formatdate
+from pathlib import Path
+
+import pytest
+from pytest_httpx import HTTPXMock, IteratorStream
+
+from simplise_api_client.core import PreparedRequest
+from simplise_client import DiskHttpCacheStore, HttpCache, HttpClient, MemoryHttpCacheStore, SimpliseClient
+from simplise_client.http_cache import CachedResponse, cache_control, cache_key
+
+BASE_URL = "https://test.example.com"
+QUERY_URL = f"{BASE_URL}/logic?query"
+ETAG = '"v1"'
+
+
+def _client(http_cache: HttpCache) -> HttpClient:
+    """HTTPキャッシュを使用するHttpClientを返す。"""
+    return HttpClient(
+        {"api_key": "test", "base_url": BASE_URL, "timeout": 5, "retry_config": None}, http_cache=http_cache
+    )
+
+
+class TestCachedResponse:
+    """保存したレスポンスの新鮮さの判定のテストケース。"""
+
+    def test_freshness_lifetime(self) -> None:
+        """max-age、Expires、Last-Modifiedの順に新鮮さの期間が決まることをテスト。"""
+        now = 1_700_000_000.0
+        date = formatdate(now, usegmt=True)
+
+        def lifetime(*headers: tuple[str, str]) -> float:
+            return CachedResponse(200, (("Date", date), *headers), b"", stored_at=now).freshness_lifetime()
+
+        assert lifetime(("Cache-Control", "max-age=60"), ("Expires", formatdate(now + 10, usegmt=True))) == 60  # noqa: PLR2004
+        assert lifetime(("Expires", formatdate(now + 10, usegmt=True))) == 10  # noqa: PLR2004
+        assert lifetime(("Last-Modified", formatdate(now - 1000, usegmt=True))) == 100  # noqa: PLR2004
+        assert lifetime(("Cache-Control", "no-cache, max-age=60")) == 0
+        assert lifetime() == 0
+
+    def test_age_includes_age_header(self) -> None:
+        """Ageヘッダーと保存してからの時間の合計が経過時間になることをテスト。"""
+        response = CachedResponse(200, (("Age", "30"), ("Cache-Control", "max-age=40")), b"", stored_at=1000.0)
+
+        assert response.age(now=1005.0) == 35  # noqa: PLR2004
+        assert response.is_fresh(now=1005.0)
+        assert not response.is_fresh(now=1011.0)
+
+    def test_cache_control(self) -> None:
+        """Cache-Controlのディレクティブと引数が解析されることをテスト。"""
+        assert cache_control('Max-Age=60, no-cache="Set-Cookie", private') == {
+            "max-age": "60",
+            "no-cache": "Set-Cookie",
+            "private": None,
+        }
+
+
+class TestHttpCache:
+    """HttpClientでのHTTPキャッシュのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_serves_fresh_response(self, httpx_mock: HTTPXMock) -> None:
+        """新鮮なレスポンスはリクエストを送信せずに返すことをテスト。"""
+        httpx_mock.add_response(url=QUERY_URL, json={"result": "15"}, headers={"Cache-Control": "max-age=60"})
+        client = _client(HttpCache())
+
+        first = await client.get("/logic?query")
+        second = await client.get("/logic?query")
+
+        assert first["data"] == second["data"] == {"result": "15"}
+        assert len(httpx_mock.get_requests()) == 1
+        assert client.metrics.snapshot()["/logic"].requests == 1
+
+    @pytest.mark.asyncio
+    async def test_serves_encoded_response(self, httpx_mock: HTTPXMock) -> None:
+        """gzipで圧縮されたレスポンスを展開した本文で保存し、キャッシュから返せることをテスト。"""
+        body = b'{"result":"15"}'
+        httpx_mock.add_response(
+            url=QUERY_URL,
+            stream=IteratorStream([gzip.compress(body)]),
+            headers={"Content-Encoding": "gzip", "Content-Type": "application/json", "Cache-Control": "max-age=60"},
+        )
+        store = MemoryHttpCacheStore()
+        client = _client(HttpCache(store))
+
+        first = await client.get("/logic?query")
+        second = await client.get("/logic?query")
+
+        assert first["data"] == second["data"] == {"result": "15"}
+        cached = store.get(cache_key(PreparedRequest("GET", QUERY_URL, {"Authorization": "Bearer test"}, None, None)))
+        assert cached is not None
+        assert cached.content == body
+        assert cached.header("content-encoding") is None
+
+    @pytest.mark.asyncio
+    async def test_revalidates_with_etag(self, httpx_mock: HTTPXMock) -> None:
+        """古くなったレスポンスをIf-None-Matchで再検証し、304では保存した本文を返すことをテスト。"""
+        httpx_mock.add_response(
+            url=QUERY_URL, json={"result": "15"}, headers={"ETag": ETAG, "Cache-Control": "no-cache"}
+        )
+        httpx_mock.add_response(
+            url=QUERY_URL, status_code=304, headers={"ETag": ETAG}, match_headers={"If-None-Match": ETAG}
+        )
+        client = _client(HttpCache())
+
+        await client.get("/logic?query")
+        response = await client.get("/logic?query")
+
+        assert response["success"]
+        assert response["status"] == 200  # noqa: PLR2004
+        assert response["data"] == {"result": "15"}
+        assert client.metrics.snapshot()["/logic"].bytes_received == len(b'{"result":"15"}')
+
+    @pytest.mark.asyncio
+    async def test_revalidates_with_last_modified(self, httpx_mock: HTTPXMock) -> None:
+        """Last-ModifiedのみのレスポンスをIf-Modified-Sinceで再検証し、304のヘッダーで更新することをテスト。"""
+        last_modified = formatdate(0, usegmt=True)
+        httpx_mock.add_response(
+            url=QUERY_URL,
+            text="15",
+            headers={"Last-Modified": last_modified, "Cache-Control": "max-age=0"},
+        )
+        httpx_mock.add_response(
+            url=QUERY_URL,
+            status_code=304,
+            headers={"Cache-Control": "max-age=60"},
+            match_headers={"If-Modified-Since": last_modified},
+        )
+        client = _client(HttpCache())
+
+        await client.get("/logic?query")
+        assert (await client.get("/logic?query"))["data"] == 15  # noqa: PLR2004
+        assert (await client.get("/logic?query"))["data"] == 15  # noqa: PLR2004
+        assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_request_no_cache_revalidates(self, httpx_mock: HTTPXMock) -> None:
+        """リクエストのCache-Control: no-cacheでは新鮮なレスポンスも再検証することをテスト。"""
+        httpx_mock.add_response(url=QUERY_URL, text="1", headers={"ETag": ETAG, "Cache-Control": "max-age=60"})
+        httpx_mock.add_response(url=QUERY_URL, status_code=304, match_headers={"If-None-Match": ETAG})
+        client = _client(HttpCache())
+
+        await client.get("/logic?query")
+        response = await client.get("/logic?query", {"Cache-Control": "no-cache"})
+
+        assert response["data"] == 1
+        assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_does_not_store_uncacheable_responses(self, httpx_mock: HTTPXMock) -> None:
+        """no-store、Vary: *、検証子も有効期限もないレスポンスは保存しないことをテスト。"""
+        store = MemoryHttpCacheStore()
+        client = _client(HttpCache(store))
+        for headers in ({"Cache-Control": "no-store, max-age=60"}, {"Cache-Control": "max-age=60", "Vary": "*"}, {}):
+            httpx_mock.add_response(url=QUERY_URL, text="1", headers=headers)
+            await client.get("/logic?query")
+
+        assert len(store) == 0
+
+    @pytest.mark.asyncio
+    async def test_vary(self, httpx_mock: HTTPXMock) -> None:
+        """Varyで指定されたリクエストヘッダーが異なる場合は保存したレスポンスを使用しないことをテスト。"""
+        headers = {"Cache-Control": "max-age=60", "Vary": "Accept-Language"}
+        httpx_mock.add_response(url=QUERY_URL, text="1", headers=headers)
+        httpx_mock.add_response(url=QUERY_URL, text="2", headers=headers)
+        client = _client(HttpCache())
+
+        assert (await client.get("/logic?query", {"Accept-Language": "ja"}))["data"] == 1
+        assert (await client.get("/logic?query", {"Accept-Language": "ja"}))["data"] == 1
+        assert (await client.get("/logic?query", {"Accept-Language": "en"}))["data"] == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_unsafe_method_invalidates(self, httpx_mock: HTTPXMock) -> None:
+        """同じURLへのPOSTが成功すると保存したレスポンスが削除されることをテスト。"""
+        httpx_mock.add_response(url=QUERY_URL, method="GET", text="1", headers={"Cache-Control": "max-age=60"})
+        httpx_mock.add_response(url=QUERY_URL, method="POST", text="ok")
+        httpx_mock.add_response(url=QUERY_URL, method="GET", text="2", headers={"Cache-Control": "max-age=60"})
+        client = _client(HttpCache())
+
+        await client.get("/logic?query")
+        await client.post("/logic?query", {"value": "5"})
+
+        assert (await client.get("/logic?query"))["data"] == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_store_is_keyed_by_credentials(self, httpx_mock: HTTPXMock, tmp_path: Path) -> None:
+        """APIキーが異なるクライアントが同じストアを共有しても、互いのレスポンスを使用しないことをテスト。"""
+        headers = {"Cache-Control": "max-age=60"}
+        httpx_mock.add_response(url=QUERY_URL, text="1", headers=headers, match_headers={"Authorization": "Bearer a"})
+        httpx_mock.add_response(url=QUERY_URL, text="2", headers=headers, match_headers={"Authorization": "Bearer b"})
+        http_cache = HttpCache(DiskHttpCacheStore(tmp_path))
+
+        def client(api_key: str) -> HttpClient:
+            return HttpClient(
+                {"api_key": api_key, "base_url": BASE_URL, "timeout": 5, "retry_config": None}, http_cache=http_cache
+            )
+
+        assert (await client("a").get("/logic?query"))["data"] == 1
+        assert (await client("b").get("/logic?query"))["data"] == 2  # noqa: PLR2004
+        assert (await client("a").get("/logic?query"))["data"] == 1
+        assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_disk_store_survives_restart(self, httpx_mock: HTTPXMock, tmp_path: Path) -> None:
+        """ディスクに保存したレスポンスを別のクライアントが再検証に使用することをテスト。"""
+        httpx_mock.add_response(
+            url=QUERY_URL, json={"result": "15"}, headers={"ETag": ETAG, "Cache-Control": "no-cache"}
+        )
+        httpx_mock.add_response(url=QUERY_URL, status_code=304, match_headers={"If-None-Match": ETAG})
+        await _client(HttpCache(DiskHttpCacheStore(tmp_path))).get("/logic?query")
+
+        restarted = _client(HttpCache(DiskHttpCacheStore(tmp_path)))
+        assert (await restarted.get("/logic?query"))["data"] == {"result": "15"}
+
+    @pytest.mark.asyncio
+    async def test_action_client_queries(self, httpx_mock: HTTPXMock) -> None:
+        """SimpliseClientのexecute_urlとexecute_queryのGETがキャッシュされることをテスト。"""
+        headers = {"Cache-Control": "max-age=60"}
+        httpx_mock.add_response(url=f"{BASE_URL}/action?decimal.add=1,2", text="3", headers=headers)
+        httpx_mock.add_response(url=QUERY_URL, text="4", headers=headers)
+        client = SimpliseClient(api_key="test", base_url=BASE_URL, timeout=5, http_cache=HttpCache())
+
+        for _ in range(2):
+            assert (await client.action.execute_url("decimal.add=1,2"))["data"] == 3  # noqa: PLR2004
+            assert (await client.action.execute_query("query"))["data"] == 4  # noqa: PLR2004
+
+        assert len(httpx_mock.get_requests()) == 2  # noqa: PLR2004
@@ -0,0 +1,78 @@
+"""パッケージのインポート時間のテスト。
+
+このモジュールには、`python -X importtime` を使用してパッケージのインポート時に
+重い依存ライブラリが読み込まれないことを検証し、インポート時間を記録するテストと、
+各パッケージの公開属性の遅延読み込みのテストが含まれています。
+"""
+
+import importlib
+import os
+import subprocess
+import sys
+from collections.abc import Callable
+
+import pytest
+
+# [AI GENERATED] インポート時に読み込まれてはならない重い依存ライブラリ
+HEAVY_MODULES = ("requests", "pydantic", "httpx")
+
+
+def _measure_import(module: str) -> dict[str, int]:
+    """サブプロセスでモジュールをインポートし、モジュールごとの累積インポート時間（マイクロ秒）を返す。"""
+    # [AI GENERATED] テスト実行中と同じsys.pathでサブプロセスを起動
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    completed = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+    # [AI GENERATED] "import time: self [us] | cumulative | imported package" 形式の行を解析
+    timings: dict[str, int] = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+@pytest.mark.parametrize("module", ["simplise_api_client", "simplise_api_client.actions", "simplise_client"])
+def test_import_does_not_load_heavy_dependencies(module: str, record_property: Callable[[str, object], None]) -> None:
+    """パッケージのインポート時に重い依存ライブラリが読み込まれないことをテスト。
+
+    インポート時間はテストレポートのプロパティとして記録し、回帰の追跡に使用します。
+    """
+    timings = _measure_import(module)
+
+    # [AI GENERATED] インポート時間をテストレポートに記録
+    record_property(f"{module}_import_time_us", timings[module])
+
+    # [AI GENERATED] 重い依存ライブラリが読み込まれていないことを検証
+    loaded = [name for name in HEAVY_MODULES if name in timings]
+    assert not loaded, f"Importing {module} should not load {loaded}"
+
+
+@pytest.mark.parametrize(
+    ("module", "attribute", "defining_module"),
+    [
+        ("simplise_api_client", "SimpliseClient", "simplise_api_client.base"),
+        ("simplise_api_client.actions", "Action", "simplise_api_client.actions.utils"),
+        ("simplise_client", "DnsCache", "simplise_client.transport"),
+    ],
+)
+def test_lazy_attribute_loads_dependency_on_first_use(module: str, attribute: str, defining_module: str) -> None:
+    """公開属性への初回アクセス時に定義元モジュールが読み込まれ、モジュールにキャッシュされることをテスト。"""
+    package = importlib.import_module(module)
+
+    # [AI GENERATED] 属性アクセスで定義元モジュールが読み込まれることを検証
+    value = getattr(package, attribute)
+    assert value.__module__ == defining_module
+    assert vars(package)[attribute] is value
+    assert attribute in dir(package)
+
+    # [AI GENERATED] 存在しない属性はAttributeErrorになることを検証
+    with pytest.raises(AttributeError, match=f"module '{module}' has no attribute 'missing'"):
+        _ = package.missing
@@ -0,0 +1,197 @@
+"""複数のベースURLの負荷分散とフェイルオーバーのテスト。
+
+このモジュールには、LoadBalancerのラウンドロビン・未完了のリクエスト数・レイテンシの移動平均による選択、
+連続した失敗による除外と復帰、HttpClientでの5xxと接続エラーのフェイルオーバー、202ポーリングの送信先の固定、
+代替サーバーと停止したベースURLを混在させたSimpliseClientのテストケースが含まれています。
+"""
+
+import asyncio
+import socket
+import time
+
+import httpx
+import pytest
+from pytest_httpx import HTTPXMock
+
+from simplise_api_client.testing import StandInServer
+from simplise_client import BalancingStrategy, HttpClient, LoadBalancer, SimpliseClient
+
+PRIMARY = "https://tokyo.example.com"
+SECONDARY = "https://osaka.example.com"
+RULE = {"decimal.add": ["1", "2"]}
+
+
+def _client(*base_urls: str) -> HttpClient:
+    """複数のベースURLに送信するHttpClientを返す。"""
+    return HttpClient(
+        {
+            "api_key": "test",
+            "base_url": list(base_urls),
+            "timeout": 5,
+            "retry_config": {"max_retries": 3},
+            "load_balancing": BalancingStrategy.ROUND_ROBIN,
+        }
+    )
+
+
+def _closed_url() -> str:
+    """接続を受け付けないローカルのベースURLを返す。"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+class TestLoadBalancer:
+    """LoadBalancerのテストケース。"""
+
+    def test_round_robin(self) -> None:
+        """ラウンドロビンで順番にベースURLを選択することをテスト。"""
+        balancer = LoadBalancer(["https://a", "https://b", "https://c", "https://a"])
+
+        assert [balancer.choose().url for _ in range(6)] == ["https://a", "https://b", "https://c"] * 2
+
+    def test_least_outstanding(self) -> None:
+        """未完了のリクエストが最も少ないベースURLを選択することをテスト。"""
+        balancer = LoadBalancer(["https://a", "https://b"], BalancingStrategy.LEAST_OUTSTANDING)
+        first, second = balancer.backends
+
+        with balancer.track(first), balancer.track(first), balancer.track(second):
+            assert [balancer.choose() for _ in range(3)] == [second] * 3
+        assert first.outstanding == second.outstanding == 0
+
+    def test_latency_ewma(self) -> None:
+        """計測前のベースURLを試した後は、レイテンシの移動平均が小さいベースURLを選択することをテスト。"""
+        balancer = LoadBalancer(["https://a", "https://b"], BalancingStrategy.LATENCY_EWMA, decay=0.5)
+        slow, fast = balancer.backends
+        with balancer.track(slow):
+            time.sleep(0.02)
+
+        assert balancer.choose() is fast
+        with balancer.track(fast):
+            pass
+        assert [balancer.choose() for _ in range(3)] == [fast] * 3
+        assert slow.latency is not None
+        assert slow.latency >= 0.02  # noqa: PLR2004
+
+    def test_ejects_and_restores_failing_backend(self) -> None:
+        """連続して失敗したベースURLを一定時間除外し、その後に再び選択することをテスト。"""
+        balancer = LoadBalancer(["https://a", "https://b"], max_failures=2, cooldown=0.05)
+        failing, healthy = balancer.backends
+        for _ in range(2):
+            with balancer.track(failing) as outcome:
+                outcome.failed = True
+
+        assert [balancer.choose() for _ in range(3)] == [healthy] * 3
+        assert balancer.preferred() is healthy
+        time.sleep(0.06)
+        assert any(balancer.choose() is failing for _ in range(2))
+
+    def test_all_ejected_uses_first_to_return(self) -> None:
+        """すべてのベースURLが除外された場合は、最も早く復帰するベースURLを選択することをテスト。"""
+        balancer = LoadBalancer(["https://a", "https://b"], max_failures=1)
+        first, second = balancer.backends
+        for backend in (second, first):
+            with balancer.track(backend) as outcome:
+                outcome.failed = True
+
+        assert balancer.choose() is second
+        assert balancer.choose(exclude=[second]) is first
+
+    def test_cancelled_request_is_not_recorded(self) -> None:
+        """失敗として記録されずに中断したリクエストは、健全性にもレイテンシにも影響しないことをテスト。"""
+        balancer = LoadBalancer(["https://a"], max_failures=1)
+        backend = balancer.backends[0]
+
+        with pytest.raises(asyncio.CancelledError), balancer.track(backend):
+            raise asyncio.CancelledError
+
+        assert backend.consecutive_failures == 0
+        assert backend.latency is None
+        assert backend.outstanding == 0
+
+
+class TestFailover:
+    """HttpClientでのフェイルオーバーのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_server_error_fails_over(self, httpx_mock: HTTPXMock) -> None:
+        """5xxのレスポンスは待たずに別のベースURLで再送することをテスト。"""
+        httpx_mock.add_response(url=f"{PRIMARY}/action-logic", status_code=503)
+        httpx_mock.add_response(url=f"{SECONDARY}/action-logic", json=3)
+        client = _client(PRIMARY, SECONDARY)
+
+        started = time.perf_counter()
+        response = await client.post("/action-logic", RULE)
+
+        assert response["data"] == 3  # noqa: PLR2004
+        assert time.perf_counter() - started < 0.5  # noqa: PLR2004
+        assert client.metrics.snapshot()["/action-logic"].retries == 1
+        assert client.load_balancer.backends[0].consecutive_failures == 1
+
+    @pytest.mark.asyncio
+    async def test_connection_error_fails_over(self, httpx_mock: HTTPXMock) -> None:
+        """接続エラーは待たずに別のベースURLで再送することをテスト。"""
+        httpx_mock.add_exception(httpx.ConnectError("refused"), url=f"{PRIMARY}/action-logic")
+        httpx_mock.add_response(url=f"{SECONDARY}/action-logic", json=3)
+        client = _client(PRIMARY, SECONDARY)
+
+        started = time.perf_counter()
+        response = await client.post("/action-logic", RULE)
+
+        assert response["data"] == 3  # noqa: PLR2004
+        assert time.perf_counter() - started < 0.5  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_single_base_url_returns_server_error(self, httpx_mock: HTTPXMock) -> None:
+        """ベースURLが1つの場合は、5xxのレスポンスを再送せずに返すことをテスト。"""
+        httpx_mock.add_response(url=f"{PRIMARY}/action-logic", status_code=500)
+
+        response = await _client(PRIMARY).post("/action-logic", RULE)
+
+        assert response["status"] == 500  # noqa: PLR2004
+        assert len(httpx_mock.get_requests()) == 1
+
+    @pytest.mark.asyncio
+    async def test_polls_stay_on_accepting_base_url(self, httpx_mock: HTTPXMock) -> None:
+        """202のポーリングは、リクエストを受け付けたベースURLに送信することをテスト。"""
+        httpx_mock.add_response(url=f"{PRIMARY}/action-logic", status_code=202, headers={"sp-resource-path": "/jobs/1"})
+        httpx_mock.add_response(url=f"{PRIMARY}/jobs/1", status_code=503)
+        client = _client(PRIMARY, SECONDARY)
+
+        response = await client.post("/action-logic", RULE)
+
+        assert response["status"] == 503  # noqa: PLR2004
+        assert [str(request.url) for request in httpx_mock.get_requests()] == [
+            f"{PRIMARY}/action-logic",
+            f"{PRIMARY}/jobs/1",
+        ]
+
+
+class TestSimpliseClientBaseUrls:
+    """SimpliseClientの複数のベースURLのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_stopped_base_url_is_left_out(self) -> None:
+        """停止したベースURLを含んでいてもすべての呼び出しが成功し、除外後は送信しないことをテスト。"""
+        dead = _closed_url()
+        with StandInServer() as first, StandInServer() as second:
+            client = SimpliseClient(
+                api_key="test",
+                base_url=[dead, first.url, second.url],
+                load_balancing=BalancingStrategy.LATENCY_EWMA,
+            )
+
+            responses = [await client.action.execute_logic(RULE) for _ in range(12)]
+
+        assert all(response["data"] == 3 for response in responses)  # noqa: PLR2004
+        assert client.http_client.load_balancer.backends[0].consecutive_failures == 3  # noqa: PLR2004
+        assert first.hits["/action-logic"] + second.hits["/action-logic"] == 12  # noqa: PLR2004
+
+    def test_defaults_for_unset_options(self) -> None:
+        """base_urlとtimeoutを省略した場合に既定値を使用することをテスト。"""
+        client = SimpliseClient(api_key="test")
+
+        assert client.http_client.config["base_url"] == "https://api.usebootstrap.org"
+        assert client.http_client.config["timeout"] == 5  # noqa: PLR2004
+        assert client.http_client.load_balancer.preferred().url == "https://api.usebootstrap.org"
@@ -0,0 +1,159 @@
+"""メトリクスのテスト。
+
+このモジュールには、MetricsRegistryの集計とヒストグラム、Prometheus形式での出力、
+同期クライアントとHttpClientでのリクエスト数・ステータス・リトライ・202ポーリングの記録、
+呼び出しごとのタイミングの内訳のテストケースが含まれています。
+"""
+
+import asyncio
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+from pytest_httpx import HTTPXMock
+
+from simplise_api_client import Action, MetricsRegistry, collect_timings
+from simplise_api_client.base import SimpliseClient
+from simplise_api_client.metrics import Timings, TransportTrace
+from simplise_client import HttpClient
+
+BASE_URL = "https://test.example.com"
+
+
+class TestMetricsRegistry:
+    """MetricsRegistryのテストケース。"""
+
+    def test_snapshot_aggregates_per_endpoint(self) -> None:
+        """クエリ文字列を除いたエンドポイントごとに集計されることをテスト。"""
+        metrics = MetricsRegistry()
+        metrics.observe("/action?a=1", status=200, latency=0.003, bytes_sent=10, bytes_received=5)
+        metrics.observe(f"{BASE_URL}/action?a=2", status=500, latency=0.5)
+        metrics.observe("/action", status=None, latency=2.0)
+        metrics.increment_retries("/action")
+
+        snapshot = metrics.snapshot()
+
+        action = snapshot["/action"]
+        assert (action.requests, action.errors, action.retries) == (3, 1, 1)
+        assert action.statuses == {200: 1, 500: 1}
+        assert (action.bytes_sent, action.bytes_received) == (10, 5)
+        assert action.latency.quantile(0.5) == pytest.approx(0.512)
+        # [AI GENERATED] スナップショットはその後の記録の影響を受けない
+        metrics.observe("/action", status=200, latency=0.1)
+        assert snapshot["/action"].requests == 3  # noqa: PLR2004
+
+    def test_to_prometheus(self) -> None:
+        """Prometheusのテキスト形式で累積ヒストグラムとカウンターが出力されることをテスト。"""
+        metrics = MetricsRegistry()
+        metrics.observe("/action-logic", status=200, latency=0.0015, bytes_sent=100)
+        metrics.observe("/action-logic", status=200, latency=100.0)
+
+        lines = metrics.to_prometheus().splitlines()
+
+        assert "# TYPE simplise_client_request_duration_seconds histogram" in lines
+        assert 'simplise_client_requests_total{endpoint="/action-logic",status="200"} 2' in lines
+        assert 'simplise_client_sent_bytes_total{endpoint="/action-logic"} 100' in lines
+        assert 'simplise_client_request_duration_seconds_bucket{endpoint="/action-logic",le="0.001"} 0' in lines
+        assert 'simplise_client_request_duration_seconds_bucket{endpoint="/action-logic",le="0.002"} 1' in lines
+        assert 'simplise_client_request_duration_seconds_bucket{endpoint="/action-logic",le="+Inf"} 2' in lines
+        assert 'simplise_client_request_duration_seconds_count{endpoint="/action-logic"} 2' in lines
+
+
+class TestClientMetrics:
+    """クライアントでのメトリクス記録のテストケース。"""
+
+    @patch("requests.post")
+    def test_sync_client_records_requests(self, mock_post: Mock) -> None:
+        """同期クライアントのリクエストのステータスと送受信バイト数が記録されることをテスト。"""
+        mock_post.side_effect = [
+            Mock(status_code=200, content=b"15", text="15"),
+            requests.ConnectionError("boom"),
+        ]
+        client = SimpliseClient(api_key="test_api_key", base_url=BASE_URL)
+
+        client.action.execute(Action.Decimal.add(Action.Data.input("value"), 10), {"value": "5"})
+        with pytest.raises(RuntimeError):
+            client.action.execute(Action.Decimal.add(Action.Data.input("value"), 10), {"value": "5"})
+
+        metrics = client.metrics.snapshot()["/action-logic"]
+        assert (metrics.requests, metrics.errors) == (2, 1)
+        assert metrics.statuses == {200: 1}
+        assert metrics.bytes_sent == int(mock_post.call_args[1]["headers"]["Content-Length"]) * 2
+        assert metrics.bytes_received == len(b"15")
+
+    @pytest.mark.asyncio
+    async def test_http_client_records_retries_and_polls(self, httpx_mock: HTTPXMock) -> None:
+        """HttpClientの429リトライと202ポーリングが記録されることをテスト。"""
+        httpx_mock.add_response(url=f"{BASE_URL}/action-logic", status_code=429, headers={"retry-after": "0"})
+        httpx_mock.add_response(
+            url=f"{BASE_URL}/action-logic",
+            status_code=202,
+            headers={"retry-after": "0", "sp-resource-path": "/results/1"},
+        )
+        httpx_mock.add_response(url=f"{BASE_URL}/results/1", json={"result": "ok"})
+        client = HttpClient({"api_key": "test", "base_url": BASE_URL, "timeout": 5, "retry_config": None})
+
+        response = await client.post("/action-logic", {"var": "a"})
+
+        snapshot = client.metrics.snapshot()
+        assert response["data"] == {"result": "ok"}
+        assert snapshot["/action-logic"].statuses == {429: 1, 202: 1}
+        assert (snapshot["/action-logic"].retries, snapshot["/action-logic"].polls) == (1, 1)
+        assert snapshot["/results/1"].statuses == {200: 1}
+
+
+class TestTimings:
+    """タイミングの内訳のテストケース。"""
+
+    def test_transport_trace(self) -> None:
+        """httpxのtraceイベントから接続・TTFB・ダウンロードの時間が求められ、発生しなかった段階はNoneになることをテスト。"""
+        trace = TransportTrace()
+        events = [
+            "connection.connect_tcp.started",
+            "connection.connect_tcp.complete",
+            "http11.send_request_headers.started",
+            "http11.receive_response_headers.complete",
+            "http11.receive_response_body.complete",
+        ]
+        with patch("time.perf_counter", side_effect=[1.0, 1.5, 2.0, 3.0, 3.25]):
+            for event in events:
+                asyncio.run(trace(event, {}))
+        timings = Timings()
+
+        trace.fill(timings)
+
+        assert (timings.connect, timings.tls, timings.ttfb, timings.download) == (0.5, None, 1.0, 0.25)
+
+    @patch("requests.post")
+    def test_sync_client_collects_timings(self, mock_post: Mock) -> None:
+        """collect_timingsのブロック内の同期クライアントの呼び出しの内訳が集計されることをテスト。"""
+        mock_post.return_value = Mock(status_code=200, content=b"15", text="15", elapsed=timedelta(milliseconds=5))
+        client = SimpliseClient(api_key="test_api_key", base_url=BASE_URL)
+
+        with collect_timings() as timings:
+            client.action.execute(Action.Decimal.add(Action.Data.input("value"), 10), {"value": "5"})
+            client.action.execute(Action.Decimal.add(Action.Data.input("value"), 10), {"value": "5"})
+        client.action.execute(Action.Decimal.add(Action.Data.input("value"), 10), {"value": "5"})
+
+        assert timings.ttfb == pytest.approx(0.01)
+        assert timings.connect is None
+        assert timings.prepare is not None
+        assert timings.decode is not None
+        assert timings.total is not None
+        assert timings.total >= timings.prepare + timings.decode
+
+    @pytest.mark.asyncio
+    async def test_http_client_returns_timings(self, httpx_mock: HTTPXMock) -> None:
+        """HttpClientのレスポンスに最後の試行の内訳と呼び出し全体の待機時間・合計時間が含まれることをテスト。"""
+        httpx_mock.add_response(url=f"{BASE_URL}/action-logic", status_code=429, headers={"retry-after": "0"})
+        httpx_mock.add_response(url=f"{BASE_URL}/action-logic", json={"result": "ok"})
+        client = HttpClient({"api_key": "test", "base_url": BASE_URL, "timeout": 5, "retry_config": None})
+
+        response = await client.post("/action-logic", {"var": "a"})
+
+        timings = response["timings"]
+        assert timings.prepare is not None
+        assert timings.decode is not None
+        assert timings.total is not None
+        assert timings.total >= timings.retry_wait > 0
@@ -0,0 +1,106 @@
+"""ミドルウェアのテスト。
+
+このモジュールには、同期クライアントとHttpClientでのリクエストの書き換え、レスポンス・リトライ・エラーの通知、
+複数のミドルウェアの呼び出し順序のテストケースが含まれています。
+"""
+
+import dataclasses
+from unittest.mock import Mock, patch
+
+import httpx
+import pytest
+import requests
+from pytest_httpx import HTTPXMock
+
+from simplise_api_client import Middleware, ResponseInfo
+from simplise_api_client.base import SimpliseClient
+from simplise_api_client.core import PreparedRequest
+from simplise_client import ApiConfig, HttpClient
+
+BASE_URL = "https://test.example.com"
+
+
+class Recorder(Middleware):
+    """呼び出されたフックを記録し、リクエストにヘッダーを追加するミドルウェア。"""
+
+    def __init__(self, name: str, events: list[str]) -> None:
+        self.name = name
+        self.events = events
+        self.responses: list[ResponseInfo] = []
+
+    def before_request(self, request: PreparedRequest) -> PreparedRequest:
+        self.events.append(f"{self.name}.before")
+        return dataclasses.replace(request, headers={**request.headers, f"X-{self.name}": "1"})
+
+    def after_response(self, request: PreparedRequest, response: ResponseInfo) -> None:
+        self.events.append(f"{self.name}.after:{response.status}")
+        self.responses.append(response)
+
+    def on_retry(self, request: PreparedRequest, attempt: int) -> None:
+        self.events.append(f"{self.name}.retry:{attempt}")
+
+    def on_error(self, request: PreparedRequest, error: Exception) -> None:
+        self.events.append(f"{self.name}.error:{type(error).__name__}")
+
+
+class TestSyncMiddleware:
+    """同期クライアントのミドルウェアのテストケース。"""
+
+    @patch("requests.post")
+    def test_hooks_wrap_the_request(self, mock_post: Mock) -> None:
+        """before_requestが登録順、after_responseが逆順に呼ばれ、書き換えたリクエストが送信されることをテスト。"""
+        mock_post.return_value = Mock(status_code=200, content=b"ok", text="ok", headers={})
+        events: list[str] = []
+        outer, inner = Recorder("outer", events), Recorder("inner", events)
+        client = SimpliseClient(api_key="test_api_key", base_url=BASE_URL, middleware=[outer, inner])
+
+        assert client.action_logic.post({"var": "a"}, {"a": "1"}) == "ok"
+
+        headers = mock_post.call_args[1]["headers"]
+        assert headers["X-outer"] == headers["X-inner"] == "1"
+        assert events == ["outer.before", "inner.before", "inner.after:200", "outer.after:200"]
+        assert outer.responses[0].content == b"ok"
+
+    @patch("requests.post")
+    def test_on_error(self, mock_post: Mock) -> None:
+        """レスポンスを受け取れなかった場合にon_errorが呼ばれることをテスト。"""
+        mock_post.side_effect = requests.ConnectionError("boom")
+        events: list[str] = []
+        client = SimpliseClient(api_key="test_api_key", base_url=BASE_URL, middleware=[Recorder("m", events)])
+
+        with pytest.raises(requests.ConnectionError):
+            client.action_logic.post({"var": "a"})
+
+        assert events == ["m.before", "m.error:ConnectionError"]
+
+
+class TestHttpClientMiddleware:
+    """HttpClientのミドルウェアのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_retry_and_responses_are_notified(self, httpx_mock: HTTPXMock) -> None:
+        """429のリトライでon_retryが呼ばれ、各レスポンスがafter_responseに通知されることをテスト。"""
+        httpx_mock.add_response(url=f"{BASE_URL}/action-logic", status_code=429, headers={"retry-after": "0"})
+        httpx_mock.add_response(url=f"{BASE_URL}/action-logic", json={"result": "ok"})
+        events: list[str] = []
+        config: ApiConfig = {"api_key": "test", "base_url": BASE_URL, "timeout": 5, "retry_config": None}
+        client = HttpClient(config, middleware=[Recorder("m", events)])
+
+        response = await client.post("/action-logic", {"var": "a"})
+
+        assert response["data"] == {"result": "ok"}
+        assert events == ["m.before", "m.after:429", "m.retry:0", "m.before", "m.after:200"]
+        assert all(request.headers["X-m"] == "1" for request in httpx_mock.get_requests())
+
+    @pytest.mark.asyncio
+    async def test_on_error(self, httpx_mock: HTTPXMock) -> None:
+        """通信エラーでon_errorが呼ばれることをテスト。"""
+        httpx_mock.add_exception(httpx.ConnectError("boom"))
+        events: list[str] = []
+        config: ApiConfig = {"api_key": "test", "base_url": BASE_URL, "timeout": 5, "retry_config": {"max_retries": 0}}
+        client = HttpClient(config, middleware=[Recorder("m", events)])
+
+        with pytest.raises(httpx.ConnectError):
+            await client.get("/action")
+
+        assert events == ["m.before", "m.error:ConnectError"]
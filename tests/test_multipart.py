@@ -0,0 +1,211 @@
+"""入力データのストリーミング送信のテスト。
+
+このモジュールには、multipart/form-dataエンコーダーと、ファイルパス、バッファ、
+バイトイテレーターを入力とする同期クライアントおよび非同期クライアントのテストケースが含まれています。
+"""
+
+import json
+import mmap
+from collections.abc import AsyncIterator
+from email.parser import BytesParser
+from email.policy import HTTP
+from pathlib import Path
+from unittest.mock import Mock, patch
+
+import pytest
+import requests
+from pytest_httpx import HTTPXMock
+
+import simplise_client
+from simplise_api_client.base import SimpliseClient
+from simplise_api_client.multipart import INLINE_BODY_LIMIT, MultipartBody, MultipartEncoder
+
+RULE = {"var": "items"}
+CHUNK_SIZE = 1024
+
+
+def _parse_parts(body: bytes, content_type: str) -> dict[str, bytes]:
+    """multipart/form-dataのボディを解析し、パート名と内容の対応を返す。"""
+    message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+    return {part.get_param("name", header="content-disposition"): part.get_content() for part in message.iter_parts()}
+
+
+class TestMultipartBody:
+    """MultipartBodyのテストケース。"""
+
+    def test_file_source_is_encoded_with_known_length(self, tmp_path: Path) -> None:
+        """ファイルパスの入力がチャンク分割され、正しい長さでエンコードされることをテスト。"""
+        # [AI GENERATED] チャンクサイズより大きい入力ファイルを用意
+        document = json.dumps({"items": ["x" * 100] * 50}).encode()
+        path = tmp_path / "input.json"
+        path.write_bytes(document)
+
+        body = MultipartBody(json.dumps(RULE).encode(), path, chunk_size=CHUNK_SIZE)
+        chunks = list(body)
+        encoded = b"".join(chunks)
+
+        # [AI GENERATED] 入力がチャンクサイズ以下で読み込まれ、Content-Lengthと一致することを検証
+        assert max(len(chunk) for chunk in chunks[1:-1]) <= CHUNK_SIZE
+        assert len(encoded) == len(body) == int(body.headers["Content-Length"])
+        parts = _parse_parts(encoded, body.headers["Content-Type"])
+        assert json.loads(parts["action"]) == RULE
+        assert parts["input"] == document
+
+    def test_buffer_source_is_sliced_without_copy(self) -> None:
+        """バッファの入力がコピーされずにメモリビューのスライスとして渡されることをテスト。"""
+        document = bytearray(b'{"items": [1, 2, 3]}')
+
+        chunks = list(MultipartBody(b"{}", document, chunk_size=4))
+
+        # [AI GENERATED] 入力部分のチャンクが元のバッファを参照していることを検証
+        assert all(isinstance(chunk, memoryview) and chunk.obj is document for chunk in chunks[1:-1])
+        assert b"".join(chunks[1:-1]) == document
+
+    def test_iterator_source_has_unknown_length_and_cannot_be_replayed(self) -> None:
+        """イテレーターの入力は長さが不明で、2回目の送信で例外が発生することをテスト。"""
+        body = MultipartBody(b"{}", iter([b'{"a": ', b"1}"]))
+
+        assert "Content-Length" not in body.headers
+        with pytest.raises(TypeError, match="not known in advance"):
+            len(body)
+        # [AI GENERATED] requestsは長さが不明なボディをチャンク転送で送信する
+        prepared = requests.Request("POST", "http://localhost/action-logic", data=body).prepare()
+        assert prepared.headers["Transfer-Encoding"] == "chunked"
+        assert b'{"a": 1}' in b"".join(body)
+        with pytest.raises(RuntimeError, match="already been consumed"):
+            iter(body)
+
+
+class TestMultipartEncoder:
+    """MultipartEncoderのテストケース。"""
+
+    def test_parts_are_referenced_without_copy(self) -> None:
+        """エンコード済みのパートがコピーされずに参照されることをテスト。"""
+        action = json.dumps(RULE).encode()
+        input_data = b"[" + b"1," * INLINE_BODY_LIMIT + b"1]"
+        encoder = MultipartEncoder()
+
+        body = encoder.encode(action, input_data)
+
+        # [AI GENERATED] 各パートの内容が元のバイト列を参照していることを検証
+        assert body.segments[1].obj is action
+        assert body.segments[3].obj is input_data
+        # [AI GENERATED] 大きいボディはセグメント単位で送信され、正しく解析できることを検証
+        assert list(body) == body.segments
+        parts = _parse_parts(bytes(body), body.headers["Content-Type"])
+        assert parts == {"action": action, "input": input_data}
+        assert len(body) == int(body.headers["Content-Length"])
+
+    def test_header_prefix_is_reused_across_requests(self) -> None:
+        """境界文字列とヘッダーが事前計算され、リクエスト間で再利用されることをテスト。"""
+        encoder = MultipartEncoder()
+
+        first = encoder.encode(b"{}")
+        second = encoder.encode(b"[]")
+
+        assert first.segments[0] is second.segments[0]
+        assert first.segments[-1] is second.segments[-1]
+        assert _parse_parts(bytes(second), second.headers["Content-Type"]) == {"action": b"[]"}
+
+    def test_small_body_is_joined_into_single_write(self) -> None:
+        """小さいボディが1回の書き込みにまとめられることをテスト。"""
+        body = MultipartEncoder().encode(b"{}", b'{"a": "1"}')
+
+        assert list(body) == [bytes(body)]
+        assert body.for_async() == bytes(body)
+
+
+class TestSyncUpload:
+    """同期クライアントの入力ストリーミングのテストケース。"""
+
+    @patch("requests.post")
+    def test_execute_logic_streams_memory_mapped_file(self, mock_post: Mock, tmp_path: Path) -> None:
+        """メモリマップされたファイルの入力がフォームデータを使わずに送信されることをテスト。"""
+        # [AI GENERATED] モックレスポンスを設定
+        mock_response = Mock()
+        mock_response.text = "3"
+        mock_response.raise_for_status.return_value = None
+        mock_post.return_value = mock_response
+
+        path = tmp_path / "input.json"
+        path.write_bytes(b'{"items": [1, 2]}')
+        client = SimpliseClient(api_key="test_api_key")
+        with path.open("rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            result = client.action.execute_logic({"num.add": [{"var": "items"}, 1]}, mapped)
+
+            # [AI GENERATED] ストリーミング用のボディとヘッダーで送信されることを検証
+            kwargs = mock_post.call_args[1]
+            body = kwargs["data"]
+            assert "files" not in kwargs
+            assert kwargs["headers"]["Authorization"] == "Bearer test_api_key"
+            assert kwargs["headers"]["Content-Type"].startswith("multipart/form-data; boundary=")
+            parts = _parse_parts(b"".join(body), kwargs["headers"]["Content-Type"])
+
+        # [AI GENERATED] ルールの値は文字列化され、入力はそのまま送信されることを検証
+        assert result == "3"
+        assert json.loads(parts["action"]) == {"num.add": [{"var": "items"}, "1"]}
+        assert parts["input"] == b'{"items": [1, 2]}'
+
+
+class TestAsyncUpload:
+    """非同期クライアントの入力ストリーミングのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_execute_logic_streams_async_iterator(self, httpx_mock: HTTPXMock) -> None:
+        """非同期イテレーターの入力がチャンク転送で送信されることをテスト。"""
+        httpx_mock.add_response(url="https://test.example.com/action-logic", method="POST", json={"result": "ok"})
+
+        async def chunks() -> AsyncIterator[bytes]:
+            yield b'{"items": '
+            yield b"[1, 2]}"
+
+        client = simplise_client.SimpliseClient(api_key="test_api_key", base_url="https://test.example.com")
+        response = await client.action.execute_logic(RULE, chunks())
+
+        # [AI GENERATED] 入力がinputパートとして送信されることを検証
+        request = httpx_mock.get_request()
+        assert request is not None
+        assert response["success"] is True
+        assert request.headers["Transfer-Encoding"] == "chunked"
+        parts = _parse_parts(request.read(), request.headers["Content-Type"])
+        assert parts["input"] == b'{"items": [1, 2]}'
+
+    @pytest.mark.asyncio
+    async def test_execute_logic_encodes_structured_input(self, httpx_mock: HTTPXMock) -> None:
+        """構造化された入力データがContent-Length付きのmultipartとして送信されることをテスト。"""
+        httpx_mock.add_response(url="https://test.example.com/action-logic", method="POST", json={"result": "ok"})
+        input_data = {"items": ["x" * 1000] * 100}
+
+        client = simplise_client.SimpliseClient(api_key="test_api_key", base_url="https://test.example.com")
+        response = await client.action.execute_logic(RULE, input_data)
+
+        # [AI GENERATED] 大きい入力も一括で正しく送信されることを検証
+        request = httpx_mock.get_request()
+        assert request is not None
+        assert response["success"] is True
+        content = request.read()
+        assert len(content) == int(request.headers["Content-Length"])
+        parts = _parse_parts(content, request.headers["Content-Type"])
+        assert json.loads(parts["action"]) == RULE
+        assert json.loads(parts["input"]) == input_data
+
+    @pytest.mark.asyncio
+    async def test_file_input_is_resent_on_retry(self, httpx_mock: HTTPXMock, tmp_path: Path) -> None:
+        """ファイルパスの入力が429応答後の再試行でも完全に送信されることをテスト。"""
+        url = "https://test.example.com/action-logic"
+        httpx_mock.add_response(url=url, method="POST", status_code=429, headers={"Retry-After": "0"})
+        httpx_mock.add_response(url=url, method="POST", json={"result": "ok"})
+        path = tmp_path / "input.json"
+        path.write_bytes(b'{"items": [1, 2]}')
+
+        client = simplise_client.SimpliseClient(api_key="test_api_key", base_url="https://test.example.com")
+        response = await client.action.execute_logic(RULE, path)
+
+        # [AI GENERATED] 2回のリクエストの両方で同じ長さの完全なボディが送信されることを検証
+        requests = httpx_mock.get_requests()
+        assert response["success"] is True
+        assert len(requests) == 2  # noqa: PLR2004
+        for request in requests:
+            content = request.read()
+            assert len(content) == int(request.headers["Content-Length"])
+            assert _parse_parts(content, request.headers["Content-Type"])["input"] == path.read_bytes()
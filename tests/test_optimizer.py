@@ -0,0 +1,155 @@
+"""ルール最適化のテスト。
+
+このモジュールには、optimize_ruleによる定数畳み込みとローカル評価との一致、平坦化、
+短絡評価、重複除去のテストケースが含まれています。
+"""
+
+from typing import TYPE_CHECKING
+from unittest.mock import Mock, patch
+
+import pytest
+
+from simplise_api_client.actions.utils import Action
+from simplise_api_client.base import ActionLogicAPI, SimpliseClient
+from simplise_api_client.evaluator import evaluate
+from simplise_api_client.optimizer import optimize_rule
+
+if TYPE_CHECKING:
+    from simplise_api_client.type import JsonLogicRule
+
+
+class TestConstantFolding:
+    """定数畳み込みのテストケース。"""
+
+    def test_folds_constant_decimal_subexpression(self) -> None:
+        """入力に依存しない小数演算が文字列リテラルに畳み込まれることをテスト。"""
+        # [AI GENERATED] 入力に依存しない乗算を含むルールを作成
+        rule = Action.Decimal.add(10, Action.Data.input("value"), Action.Decimal.mul(3, 4))
+
+        optimized, report = optimize_rule(rule)
+
+        # [AI GENERATED] 乗算部分のみが畳み込まれることを検証
+        assert optimized == {"decimal.add": [10, {"input": ["value"]}, "12"]}
+        assert report.folded == 1
+        assert report.size_after < report.size_before
+
+    def test_folds_with_exact_decimal_semantics(self) -> None:
+        """浮動小数点ではなく正確な小数演算で畳み込まれることをテスト。"""
+        rule: JsonLogicRule = {"decimal.add": [{"input": ["x"]}, {"decimal.add": ["0.1", "0.2"]}]}
+
+        optimized, _ = optimize_rule(rule)
+
+        # [AI GENERATED] 0.30000000000000004 ではなく 0.3 になることを検証
+        assert optimized == {"decimal.add": [{"input": ["x"]}, "0.3"]}
+
+    @pytest.mark.parametrize(
+        "constant",
+        [
+            {"decimal.add": ["0.1", "0.2"]},
+            {"decimal.sub": ["1e3", "0.5"]},
+            {"decimal.mul": ["1.50", 2]},
+            {"decimal.div": ["-1", "8"]},
+            {"decimal.mul": ["123456789012345678", "100"]},
+        ],
+    )
+    def test_folded_constant_matches_evaluation(self, constant: "JsonLogicRule") -> None:
+        """畳み込まれたリテラルがローカル評価の結果と一致することをテスト。"""
+        optimized, _ = optimize_rule({"decimal.add": [{"input": ["x"]}, constant]})
+
+        assert optimized == {"decimal.add": [{"input": ["x"]}, evaluate(constant)]}
+
+    def test_does_not_fold_inexact_division(self) -> None:
+        """割り切れない除算やゼロ除算が畳み込まれないことをテスト。"""
+        rule: JsonLogicRule = {
+            "decimal.add": [{"decimal.div": ["1", "3"]}, {"decimal.div": ["1", "0"]}, {"decimal.div": ["1", "4"]}]
+        }
+
+        optimized, report = optimize_rule(rule)
+
+        # [AI GENERATED] 1/4 のみが畳み込まれることを検証
+        assert optimized == {"decimal.add": [{"decimal.div": ["1", "3"]}, {"decimal.div": ["1", "0"]}, "0.25"]}
+        assert report.folded == 1
+
+    def test_root_operation_is_not_replaced_by_literal(self) -> None:
+        """ルート演算子がリテラルに置き換えられないことをテスト。"""
+        rule: JsonLogicRule = {"decimal.mul": ["3", {"decimal.add": ["1", "1"]}]}
+
+        optimized, _ = optimize_rule(rule)
+
+        assert optimized == {"decimal.mul": ["3", "2"]}
+
+    def test_non_numeric_literals_are_not_folded(self) -> None:
+        """数値でない文字列を含む演算が畳み込まれないことをテスト。"""
+        rule: JsonLogicRule = {"bool": [{"decimal.add": ["1", "abc"]}]}
+
+        optimized, report = optimize_rule(rule)
+
+        assert optimized == rule
+        assert not report.changed
+
+
+class TestRewrites:
+    """平坦化、短絡評価、重複除去のテストケース。"""
+
+    def test_flattens_leading_nested_addition(self) -> None:
+        """先頭引数のnum.addが親のnum.addに平坦化されることをテスト。"""
+        rule: JsonLogicRule = {"num.add": [{"num.add": [{"input": ["a"]}, "1"]}, {"num.add": ["2", "3"]}]}
+
+        optimized, report = optimize_rule(rule)
+
+        # [AI GENERATED] 評価順序を保つため、2番目の引数は平坦化されないことを検証
+        assert optimized == {"num.add": [{"input": ["a"]}, "1", {"num.add": ["2", "3"]}]}
+        assert report.flattened == 1
+
+    def test_short_circuits_and_after_literal_false(self) -> None:
+        """リテラルfalse以降のand引数が削除されることをテスト。"""
+        test_false = False
+        rule = Action.Logic.and_op(Action.Data.input("a"), test_false, Action.Data.input("b"))
+
+        optimized, report = optimize_rule(rule)
+
+        assert optimized == {"and": [{"input": ["a"]}, {"bool": [False]}]}
+        assert report.short_circuited == 1
+
+    def test_deduplicates_idempotent_operands(self) -> None:
+        """冪等な演算子の重複した引数が削除されることをテスト。"""
+        rule: JsonLogicRule = {"num.max": [{"input": ["a"]}, "1", {"input": ["a"]}]}
+
+        optimized, report = optimize_rule(rule)
+
+        assert optimized == {"num.max": [{"input": ["a"]}, "1"]}
+        assert report.deduplicated == 1
+
+    def test_preserves_single_operand_shorthand(self) -> None:
+        """配列でない単一引数の形式が保持されることをテスト。"""
+        rule: JsonLogicRule = {"bool": 0}
+
+        optimized, report = optimize_rule(rule)
+
+        assert optimized == {"bool": 0}
+        assert not report.changed
+
+
+class TestClientOptimization:
+    """クライアントでの最適化有効化のテストケース。"""
+
+    @patch.object(ActionLogicAPI, "post")
+    def test_rules_are_sent_unchanged_by_default(self, mock_post: Mock) -> None:
+        """デフォルトではルールが最適化されずに送信されることをテスト。"""
+        mock_post.return_value = "17"
+        client = SimpliseClient(api_key="test_api_key")
+        rule: JsonLogicRule = {"decimal.add": [{"input": ["value"]}, {"decimal.mul": ["3", "4"]}]}
+
+        client.action.execute_logic(rule, {"value": "5"})
+
+        mock_post.assert_called_once_with(rule, {"value": "5"})
+
+    @patch.object(ActionLogicAPI, "post")
+    def test_rules_are_optimized_when_enabled(self, mock_post: Mock) -> None:
+        """optimize_rules有効時に最適化されたルールが送信されることをテスト。"""
+        mock_post.return_value = "17"
+        client = SimpliseClient(api_key="test_api_key", optimize_rules=True)
+
+        client.action.execute(Action.Decimal.add(Action.Data.input("value"), Action.Decimal.mul(3, 4)), {"value": "5"})
+
+        mock_post.assert_called_once_with({"decimal.add": [{"input": ["value"]}, "12"]}, {"value": "5"})
@@ -0,0 +1,124 @@
+"""並列実行のテスト。
+
+このモジュールには、execute_manyによるスレッドプールでの並列実行、
+結果の順序、項目ごとの例外、進捗通知、バックプレッシャー、接続プールの共有のテストケースが含まれています。
+"""
+
+import itertools
+import threading
+import time
+from collections.abc import Iterator
+from typing import Any
+from unittest.mock import Mock, patch
+
+import requests
+
+from simplise_api_client.actions.utils import Action
+from simplise_api_client.base import ActionLogicAPI, SimpliseClient
+
+WORKERS = 4
+
+
+def _pairs(count: int) -> list[tuple[Any, dict[str, str]]]:
+    """入力値の異なる操作のリストを作成する。"""
+    return [(Action.Data.input("value"), {"value": str(i)}) for i in range(count)]
+
+
+class TestExecuteMany:
+    """execute_manyのテストケース。"""
+
+    def test_results_are_ordered_and_run_in_parallel(self) -> None:
+        """完了順に関係なく入力順に結果が返され、並列に実行されることをテスト。"""
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def post(_rule: object, input_data: dict[str, str]) -> str:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            # [AI GENERATED] 先頭の項目ほど遅く完了させる
+            time.sleep(0.02 * (8 - int(input_data["value"])))
+            with lock:
+                running -= 1
+            return input_data["value"]
+
+        client = SimpliseClient(api_key="test_api_key")
+        with patch.object(ActionLogicAPI, "post", side_effect=post):
+            results = list(client.action.execute_many(_pairs(8), workers=WORKERS))
+
+        assert results == [str(i) for i in range(8)]
+        assert peak == WORKERS
+
+    def test_exceptions_are_returned_per_item(self) -> None:
+        """失敗した項目の例外が結果の位置に返され、他の項目は継続されることをテスト。"""
+
+        def post(_rule: object, input_data: dict[str, str]) -> str:
+            if input_data["value"] == "1":
+                msg = "boom"
+                raise requests.ConnectionError(msg)
+            return input_data["value"]
+
+        client = SimpliseClient(api_key="test_api_key")
+        with patch.object(ActionLogicAPI, "post", side_effect=post):
+            results = list(client.action.execute_many(_pairs(3), workers=2))
+
+        assert results[0] == "0"
+        assert isinstance(results[1], RuntimeError)
+        assert results[2] == "2"
+
+    def test_generator_input_is_consumed_with_backpressure(self) -> None:
+        """ジェネレーター入力が未取得の結果の上限までしか読み進められないことをテスト。"""
+        pulled = 0
+
+        def operations() -> Iterator[tuple[Any, dict[str, str]]]:
+            nonlocal pulled
+            for i in itertools.count():
+                pulled += 1
+                yield Action.Data.input("value"), {"value": str(i)}
+
+        client = SimpliseClient(api_key="test_api_key")
+        with patch.object(ActionLogicAPI, "post", return_value="ok"):
+            results = client.action.execute_many(operations(), workers=2, max_pending=3)
+            taken = list(itertools.islice(results, 5))
+            results.close()
+
+        # [AI GENERATED] 無限の入力でも取得した件数と上限分しか読み込まれないことを検証
+        assert taken == ["ok"] * 5
+        assert pulled <= 5 + 3
+
+    def test_progress_is_reported(self) -> None:
+        """完了件数と総数が進捗コールバックに通知されることをテスト。"""
+        progress = Mock()
+
+        client = SimpliseClient(api_key="test_api_key")
+        with patch.object(ActionLogicAPI, "post", return_value="ok"):
+            list(client.action.execute_many(_pairs(3), workers=2, progress=progress))
+
+        assert [call.args for call in progress.call_args_list] == [(1, 3), (2, 3), (3, 3)]
+
+    def test_worker_sessions_share_one_connection_pool(self) -> None:
+        """ワーカースレッドごとのセッションが1つの接続プールを共有することをテスト。"""
+        adapters = set()
+        sessions = set()
+        lock = threading.Lock()
+
+        def session_post(session: requests.Session, url: str, **_kwargs: object) -> Mock:
+            with lock:
+                adapters.add(id(session.get_adapter(url)))
+                sessions.add(id(session))
+            time.sleep(0.01)
+            return Mock(text="ok")
+
+        client = SimpliseClient(api_key="test_api_key")
+        with (
+            patch.object(requests.Session, "post", autospec=True, side_effect=session_post),
+            patch("requests.post") as module_post,
+        ):
+            results = list(client.action.execute_many(_pairs(8), workers=WORKERS))
+
+        assert results == ["ok"] * 8
+        assert len(adapters) == 1
+        assert 1 < len(sessions) <= WORKERS
+        module_post.assert_not_called()
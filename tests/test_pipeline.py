@@ -0,0 +1,177 @@
+"""バックプレッシャー付きの非同期パイプラインのテスト。
+
+このモジュールには、map_boundedの入力順と完了順の結果、同時実行数の上限、遅い消費者と無限の入力に対するバックプレッシャー、
+途中で反復を止めた場合の取り消し、項目ごとの例外と入力の例外、引数の検証、
+代替サーバーに対するActionClient.pipelineのテストケースが含まれています。
+"""
+
+import asyncio
+import itertools
+from collections.abc import AsyncIterator, Iterable
+from contextlib import aclosing
+
+import pytest
+
+from simplise_api_client.testing import StandInServer
+from simplise_client import Priority, RequestScheduler, SimpliseClient
+from simplise_client.pipeline import map_bounded
+
+RULE = {"decimal.add": [{"input": ["value"]}, "10"]}
+
+
+async def _source(items: Iterable[int], pulled: list[int] | None = None) -> AsyncIterator[int]:
+    """項目を順に返し、取り出された項目を記録する非同期イテレーター。"""
+    for item in items:
+        if pulled is not None:
+            pulled.append(item)
+        yield item
+
+
+async def _delayed(item: int) -> int:
+    """項目の値に比例した時間だけ待ってから2倍の値を返す。"""
+    await asyncio.sleep(item * 0.01)
+    return item * 2
+
+
+class TestMapBounded:
+    """map_boundedのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_ordered_and_unordered(self) -> None:
+        """orderedでは入力順に、そうでなければ完了順に結果を返すことをテスト。"""
+        items = [5, 1, 3, 2, 4]
+
+        ordered = [result async for result in map_bounded(_delayed, _source(items), concurrency=5)]
+        unordered = [result async for result in map_bounded(_delayed, _source(items), concurrency=5, ordered=False)]
+
+        assert ordered == [(item, item * 2) for item in items]
+        assert unordered == [(item, item * 2) for item in sorted(items)]
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self) -> None:
+        """同時に処理する項目の数がconcurrencyを超えないことをテスト。"""
+        active = peak = 0
+
+        async def track(item: int) -> int:
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return item
+
+        results = [item async for item, _ in map_bounded(track, _source(range(20)), concurrency=3)]
+
+        assert results == list(range(20))
+        assert peak == 3  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_backpressure_on_infinite_source(self) -> None:
+        """遅い消費者に対して、無限の入力から上限を超えて取り出さないことをテスト。"""
+        pulled: list[int] = []
+        consumed = 0
+
+        async def identity(item: int) -> int:
+            return item
+
+        async with aclosing(
+            map_bounded(identity, _source(itertools.count(), pulled), concurrency=2, max_buffer=3, ordered=False)
+        ) as results:
+            async for _ in results:
+                consumed += 1
+                await asyncio.sleep(0.01)
+                assert len(pulled) - consumed <= 2 + 3
+                if consumed == 10:  # noqa: PLR2004
+                    break
+
+        assert len(pulled) <= 10 + 2 + 3
+
+    @pytest.mark.asyncio
+    async def test_closing_cancels_items_in_flight(self) -> None:
+        """途中で反復を止めると、処理中の項目が取り消されることをテスト。"""
+        started = cancelled = 0
+
+        async def slow(item: int) -> int:
+            nonlocal started, cancelled
+            started += 1
+            try:
+                await asyncio.sleep(0 if item == 0 else 10)
+            except asyncio.CancelledError:
+                cancelled += 1
+                raise
+            return item
+
+        async with asyncio.timeout(1), aclosing(map_bounded(slow, _source(range(100)), concurrency=4)) as results:
+            assert await anext(results) == (0, 0)
+
+        assert started >= 4  # noqa: PLR2004
+        assert cancelled == started - 1
+
+    @pytest.mark.asyncio
+    async def test_exceptions(self) -> None:
+        """項目ごとの例外は結果の代わりに返し、入力の例外はそれまでの結果の後に送出することをテスト。"""
+
+        async def check(item: int) -> int:
+            if item == 1:
+                msg = "odd item"
+                raise ValueError(msg)
+            return item
+
+        async def broken() -> AsyncIterator[int]:
+            yield 0
+            yield 1
+            yield 2
+            msg = "source failed"
+            raise RuntimeError(msg)
+
+        results: list[tuple[int, int | Exception]] = []
+
+        async def collect() -> None:
+            async for result in map_bounded(check, broken(), concurrency=2):
+                results.append(result)  # noqa: PERF401
+
+        with pytest.raises(RuntimeError, match="source failed"):
+            await collect()
+
+        assert [item for item, _ in results] == [0, 1, 2]
+        assert isinstance(results[1][1], ValueError)
+
+    def test_rejects_invalid_limits(self) -> None:
+        """反復を始める前に、1未満のconcurrencyと負のmax_bufferを拒否することをテスト。"""
+        with pytest.raises(ValueError, match="concurrency"):
+            map_bounded(_delayed, _source([]), concurrency=0)
+        with pytest.raises(ValueError, match="max_buffer"):
+            map_bounded(_delayed, _source([]), max_buffer=-1)
+
+
+class TestActionPipeline:
+    """ActionClient.pipelineのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_pipeline_through_client(self) -> None:
+        """入力ごとにルールを実行し、入力と結果の組を入力順に返すことをテスト。"""
+        inputs = ({"value": str(i)} async for i in _source(range(30)))
+        with StandInServer(latency=0.01) as server:
+            async with SimpliseClient(api_key="test", base_url=server.url) as client:
+                results = [result async for result in client.action.pipeline(inputs, RULE, concurrency=4)]
+
+        assert [(data, response["data"]) for data, response in results] == [
+            ({"value": str(i)}, i + 10) for i in range(30)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_pipeline_priority(self) -> None:
+        """パイプラインのリクエストが指定した優先度クラスでスロットを待つことをテスト。"""
+        scheduler = RequestScheduler(10, {Priority.BACKGROUND: {"max_concurrency": 1}})
+        with StandInServer(latency=0.05) as server:
+            async with SimpliseClient(api_key="test", base_url=server.url, scheduler=scheduler) as client:
+                results = client.action.pipeline(
+                    _source(range(3)), RULE, concurrency=3, ordered=False, priority=Priority.BACKGROUND
+                )
+                consumer = asyncio.create_task(anext(results))
+                await asyncio.sleep(0.03)
+                active, waiting = scheduler.active(Priority.BACKGROUND), scheduler.waiting(Priority.BACKGROUND)
+                await consumer
+                await results.aclose()
+
+        assert (active, waiting) == (1, 2)
@@ -0,0 +1,196 @@
+"""ルールのハッシュ参照のテスト。
+
+このモジュールには、承認済みハッシュのレジストリと、代替サーバーに対する同期・非同期クライアントの
+ルール全体の登録・ハッシュでの参照・未知の参照の再送とミドルウェアへのリトライの通知・参照に対応しないサーバーでの動作、
+I/Oを伴わない送信の次の手順の判断のテストケースが含まれています。
+"""
+
+from collections.abc import Iterator
+
+import pytest
+
+from simplise_api_client import AsyncSimpliseClient
+from simplise_api_client.base import SimpliseClient
+from simplise_api_client.core import PreparedRequest, Resend
+from simplise_api_client.metrics import Observation
+from simplise_api_client.middleware import Middleware
+from simplise_api_client.multipart import MultipartBody
+from simplise_api_client.references import HTTP_PRECONDITION_FAILED, RULE_HASH_HEADER, RuleRegistry
+from simplise_api_client.testing import StandInServer
+
+# [AI GENERATED] 約50KBのルール
+LARGE_RULE = {"num.add": [{"input": ["value"]}, *(["1"] * 10000)]}
+INPUT = {"value": "5"}
+RESULT = "10005"
+
+
+@pytest.fixture
+def server() -> Iterator[StandInServer]:
+    """ルールの参照に対応する代替サーバーを起動する。"""
+    with StandInServer() as server:
+        yield server
+
+
+def _bytes_sent(client: SimpliseClient | AsyncSimpliseClient) -> int:
+    """クライアントがaction-logicエンドポイントに送信した累計バイト数を返す。"""
+    return client.metrics.snapshot()["/action-logic"].bytes_sent
+
+
+class RecordingMiddleware(Middleware):
+    """送信されたリクエストとリトライの通知を記録するミドルウェア。"""
+
+    def __init__(self) -> None:
+        self.requests: list[PreparedRequest] = []
+        self.events: list[str] = []
+
+    def before_request(self, request: PreparedRequest) -> PreparedRequest:
+        self.requests.append(request)
+        self.events.append("request")
+        return request
+
+    def on_retry(self, request: PreparedRequest, attempt: int) -> None:
+        self.events.append(f"retry {attempt}")
+
+
+class TestRuleRegistry:
+    """承認済みハッシュのレジストリのテストケース。"""
+
+    def test_evicts_least_recently_used(self) -> None:
+        """上限を超えると最も長く使われていないハッシュが削除されることをテスト。"""
+        registry = RuleRegistry(max_size=2)
+        registry.acknowledge("a")
+        registry.acknowledge("b")
+        assert "a" in registry
+        registry.acknowledge("c")
+
+        assert "a" in registry
+        assert "b" not in registry
+        assert len(registry) == 2  # noqa: PLR2004
+
+    def test_forget(self) -> None:
+        """削除したハッシュが承認済みでなくなることをテスト。"""
+        registry = RuleRegistry()
+        registry.acknowledge("a")
+        registry.forget("a")
+        registry.forget("unknown")
+
+        assert "a" not in registry
+
+
+class TestActionLogicExchange:
+    """送信せずにコアが次の手順を判断するテストケース。"""
+
+    def test_next_steps(self) -> None:
+        """未知の参照には再送を、ハッシュの返却には承認を、送信なしで判断することをテスト。"""
+        recorder = RecordingMiddleware()
+        client = SimpliseClient(api_key="test", rule_references=True, middleware=[recorder])
+        core = client.action_logic._core  # noqa: SLF001
+        digest = core.prepare(LARGE_RULE, INPUT).headers[RULE_HASH_HEADER]
+        assert client.rule_registry is not None
+        client.rule_registry.acknowledge(digest)
+
+        exchange = core.exchange(core.prepare(LARGE_RULE, INPUT), Observation())
+        with exchange.attempt() as request:
+            exchange.received(HTTP_PRECONDITION_FAILED, {}, b"")
+        step = exchange.next_step(HTTP_PRECONDITION_FAILED, {})
+
+        assert isinstance(step, Resend)
+        assert step.attempt == 1
+        assert step.request.fallback is None
+        assert request.fallback is not None
+        assert digest not in client.rule_registry
+        assert recorder.events == ["retry 0", "request"]
+
+        with exchange.attempt():
+            exchange.received(200, {RULE_HASH_HEADER: digest}, b"10005")
+        assert exchange.next_step(200, {RULE_HASH_HEADER: digest}) is None
+        assert exchange.attempts == 2  # noqa: PLR2004
+        assert digest in client.rule_registry
+        assert client.metrics.snapshot()["/action-logic"].retries == 1
+
+
+class TestRuleReferences:
+    """クライアントのルール参照のテストケース。"""
+
+    def test_sends_hash_after_acknowledgement(self, server: StandInServer) -> None:
+        """ルール全体を一度送信した後は、ハッシュのみを送信することをテスト。"""
+        client = SimpliseClient(api_key="test", base_url=server.url, rule_references=True)
+
+        assert client.action.execute_logic(LARGE_RULE, INPUT) == RESULT
+        first = _bytes_sent(client)
+        assert client.action.execute_logic(LARGE_RULE, INPUT) == RESULT
+        second = _bytes_sent(client) - first
+
+        assert first > 50_000  # noqa: PLR2004
+        assert second < 500  # noqa: PLR2004
+        assert len(client.rule_registry or ()) == 1
+        assert len(server.rules) == 1
+
+    def test_resends_unknown_rule(self, server: StandInServer) -> None:
+        """サーバーがルールを保持していない場合に、ルール全体を再送して登録し直すことをテスト。"""
+        client = SimpliseClient(api_key="test", base_url=server.url, rule_references=True)
+        client.action.execute_logic(LARGE_RULE, INPUT)
+        server.rules.clear()
+
+        assert client.action.execute_logic(LARGE_RULE, INPUT) == RESULT
+        assert client.action_logic.post({"num": ["1"]}) == "1"
+        assert server.hits["/action-logic"] == 4  # noqa: PLR2004
+        assert client.metrics.snapshot()["/action-logic"].retries == 1
+        assert len(server.rules) == 2  # noqa: PLR2004
+        assert len(client.rule_registry or ()) == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_resend_notifies_on_retry(self, server: StandInServer) -> None:
+        """未知の参照の再送の前に、同期・非同期クライアントともにon_retryが呼ばれることをテスト。"""
+        recorder = RecordingMiddleware()
+        client = SimpliseClient(api_key="test", base_url=server.url, rule_references=True, middleware=[recorder])
+        client.action.execute_logic(LARGE_RULE, INPUT)
+        server.rules.clear()
+        recorder.events.clear()
+        client.action.execute_logic(LARGE_RULE, INPUT)
+
+        async_recorder = RecordingMiddleware()
+        async with AsyncSimpliseClient(
+            api_key="test", base_url=server.url, rule_references=True, middleware=[async_recorder]
+        ) as async_client:
+            await async_client.action.execute_logic(LARGE_RULE, INPUT)
+            server.rules.clear()
+            async_recorder.events.clear()
+            await async_client.action.execute_logic(LARGE_RULE, INPUT)
+
+        assert recorder.events == async_recorder.events == ["request", "retry 0", "request"]
+
+    def test_server_without_references(self) -> None:
+        """参照に対応しないサーバーにはルール全体を送信し続けることをテスト。"""
+        with StandInServer(rule_references=False) as server:
+            client = SimpliseClient(api_key="test", base_url=server.url, rule_references=True)
+            client.action.execute_logic(LARGE_RULE, INPUT)
+            client.action.execute_logic(LARGE_RULE, INPUT)
+
+        assert _bytes_sent(client) > 100_000  # noqa: PLR2004
+        assert len(client.rule_registry or ()) == 0
+
+    def test_iterator_input_sends_full_rule(self, server: StandInServer) -> None:
+        """再送できないイテレーターの入力では、承認済みでもルール全体を送信することをテスト。"""
+        recorder = RecordingMiddleware()
+        client = SimpliseClient(api_key="test", base_url=server.url, rule_references=True, middleware=[recorder])
+        client.action.execute_logic(LARGE_RULE, INPUT)
+
+        assert client.action.execute_logic(LARGE_RULE, iter([b'{"value": "5"}'])) == RESULT
+        body = recorder.requests[-1].body
+        assert isinstance(body, MultipartBody)
+        assert len(body.action) > 50_000  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_async_client(self, server: StandInServer) -> None:
+        """非同期クライアントでもハッシュでの参照と未知の参照の再送が行われることをテスト。"""
+        async with AsyncSimpliseClient(api_key="test", base_url=server.url, rule_references=True) as client:
+            assert await client.action.execute_logic(LARGE_RULE, INPUT) == RESULT
+            first = _bytes_sent(client)
+            assert await client.action.execute_logic(LARGE_RULE, INPUT) == RESULT
+            second = _bytes_sent(client) - first
+            server.rules.clear()
+            assert await client.action.execute_logic(LARGE_RULE, INPUT) == RESULT
+
+        assert second < 500  # noqa: PLR2004
+        assert server.hits["/action-logic"] == 4  # noqa: PLR2004
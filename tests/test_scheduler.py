@@ -0,0 +1,197 @@
+"""優先度付きのリクエストのスケジューラーのテスト。
+
+このモジュールには、RequestSchedulerの重み付き公平キューイングによる割り当ての順序、優先度クラスごとの同時実行数の上限、
+トークンバケットによる開始のペース配分、待機中のキャンセル、代替サーバーに対するexecute_batchと
+対話的な呼び出しの混在、フォーム・認証・CSRFトークン付きのリクエストのスロットの待機のテストケースが含まれています。
+"""
+
+import asyncio
+import time
+
+import pytest
+from pytest_httpx import HTTPXMock
+
+from simplise_api_client.testing import StandInServer
+from simplise_client import HttpClient, HttpMethod, Priority, RequestScheduler, SimpliseClient, request_priority
+
+RULE = {"decimal.add": ["1", "2"]}
+
+
+async def _grant_order(scheduler: RequestScheduler, priorities: list[Priority]) -> list[Priority]:
+    """スロットを1つ占有した状態で待機させたリクエストに、スロットが割り当てられた順序を返す。"""
+    order: list[Priority] = []
+
+    async def request(priority: Priority) -> None:
+        async with scheduler.slot(priority):
+            order.append(priority)
+
+    async with scheduler.slot(Priority.BACKGROUND):
+        tasks = [asyncio.create_task(request(priority)) for priority in priorities]
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order
+
+
+class TestRequestScheduler:
+    """RequestSchedulerのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_weighted_fair_order(self) -> None:
+        """待機中のクラスに重みに比例してスロットが割り当てられることをテスト。"""
+        scheduler = RequestScheduler(1, {Priority.INTERACTIVE: {"weight": 3}, Priority.BATCH: {"weight": 1}})
+
+        order = await _grant_order(scheduler, [Priority.BATCH] * 8 + [Priority.INTERACTIVE] * 6)
+
+        assert order[:8] == [Priority.INTERACTIVE] * 3 + [Priority.BATCH] + [Priority.INTERACTIVE] * 3 + [
+            Priority.BATCH
+        ]
+        assert order[8:] == [Priority.BATCH] * 6
+
+    @pytest.mark.asyncio
+    async def test_idle_class_does_not_bank_slots(self) -> None:
+        """待機していなかった間のスロットを、後から来たクラスがまとめて使えないことをテスト。"""
+        scheduler = RequestScheduler(1, {Priority.INTERACTIVE: {"weight": 1}, Priority.BATCH: {"weight": 1}})
+        await _grant_order(scheduler, [Priority.BATCH] * 10)
+
+        order = await _grant_order(scheduler, [Priority.BATCH] * 3 + [Priority.INTERACTIVE] * 3)
+
+        assert order.index(Priority.BATCH) <= 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_class_concurrency_cap(self) -> None:
+        """上限に達したクラスが待機しても、他のクラスはすぐに開始できることをテスト。"""
+        scheduler = RequestScheduler(10, {Priority.BATCH: {"max_concurrency": 2}})
+        peak = 0
+        release = asyncio.Event()
+
+        async def batch() -> None:
+            nonlocal peak
+            async with scheduler.slot(Priority.BATCH):
+                peak = max(peak, scheduler.active(Priority.BATCH))
+                await release.wait()
+
+        tasks = [asyncio.create_task(batch()) for _ in range(5)]
+        await asyncio.sleep(0)
+        async with asyncio.timeout(0.1), scheduler.slot(Priority.INTERACTIVE):
+            assert scheduler.waiting(Priority.BATCH) == 3  # noqa: PLR2004
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert peak == 2  # noqa: PLR2004
+        assert scheduler.active() == 0
+
+    @pytest.mark.asyncio
+    async def test_rate(self) -> None:
+        """トークンバケットでスロットの割り当てがペース配分され、対話的なリクエストが先に開始することをテスト。"""
+        scheduler = RequestScheduler(10, rate=20)
+        started: list[tuple[Priority, float]] = []
+
+        async def request(priority: Priority) -> None:
+            async with scheduler.slot(priority):
+                started.append((priority, time.perf_counter()))
+
+        begin = time.perf_counter()
+        await asyncio.gather(*(request(Priority.BATCH) for _ in range(3)), request(Priority.INTERACTIVE))
+
+        assert started[-1][1] - begin >= 0.14  # noqa: PLR2004
+        assert [priority for priority, _ in started].index(Priority.INTERACTIVE) <= 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter(self) -> None:
+        """待機中にキャンセルされたリクエストがスロットを消費しないことをテスト。"""
+        scheduler = RequestScheduler(1)
+
+        async with scheduler.slot(Priority.BATCH):
+            waiter = asyncio.create_task(scheduler.acquire(Priority.BATCH))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+
+        async with asyncio.timeout(0.1), scheduler.slot():
+            assert scheduler.active() == 1
+        assert scheduler.waiting() == 0
+
+    def test_rejects_invalid_limits(self) -> None:
+        """正でない上限や重みを拒否することをテスト。"""
+        with pytest.raises(ValueError, match="positive"):
+            RequestScheduler(0)
+        with pytest.raises(ValueError, match="batch"):
+            RequestScheduler(1, {Priority.BATCH: {"weight": 0}})
+
+
+class TestPriorityWithClient:
+    """SimpliseClientでの優先度付きのスケジューリングのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_interactive_not_starved_by_batch(self) -> None:
+        """execute_batchの大量のリクエストの後に送った対話的な呼び出しが、バッチより先に完了することをテスト。"""
+        with StandInServer(latency=0.02) as server:
+            client = SimpliseClient(api_key="test", base_url=server.url, timeout=5, scheduler=RequestScheduler(2))
+            batch = asyncio.create_task(client.action.execute_batch([{"rule": RULE}] * 40))
+            await asyncio.sleep(0.05)
+
+            started = time.perf_counter()
+            response = await client.action.execute_logic(RULE)
+            interactive_latency = time.perf_counter() - started
+            remaining = client.http_client.scheduler.waiting(Priority.BATCH)
+            responses = await batch
+
+        assert response["data"] == 3  # noqa: PLR2004
+        assert all(batch_response["data"] == 3 for batch_response in responses)  # noqa: PLR2004
+        assert interactive_latency < 0.2  # noqa: PLR2004
+        assert remaining > 10  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_priority_option_and_context(self) -> None:
+        """request_priorityのブロックとリクエストのpriorityオプションの優先度でスロットを待つことをテスト。"""
+        scheduler = RequestScheduler(10, {Priority.BACKGROUND: {"max_concurrency": 1}})
+        with StandInServer(latency=0.1) as server:
+            client = SimpliseClient(api_key="test", base_url=server.url, timeout=5, scheduler=scheduler)
+            with request_priority(Priority.BACKGROUND):
+                first = asyncio.create_task(client.action.execute_logic(RULE))
+            second = asyncio.create_task(
+                client.http_client.request(
+                    "/action-logic",
+                    {"method": HttpMethod.POST, "body": '{"num": ["1"]}', "priority": Priority.BACKGROUND},
+                )
+            )
+            await asyncio.sleep(0.05)
+            active, waiting = scheduler.active(Priority.BACKGROUND), scheduler.waiting(Priority.BACKGROUND)
+            await asyncio.gather(first, second)
+
+        assert (active, waiting) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_execute_batch_requires_endpoint_or_rule(self) -> None:
+        """endpointもruleもないアクションを含む場合は、何も送信せずにエラーになることをテスト。"""
+        client = SimpliseClient(api_key="test", base_url="https://test.example.com")
+
+        with pytest.raises(ValueError, match="endpoint or rule"):
+            await client.action.execute_batch([{"rule": RULE}, {}])
+
+    @pytest.mark.asyncio
+    async def test_direct_requests_take_slots(self, httpx_mock: HTTPXMock) -> None:
+        """フォームの送信、認証なしのリクエスト、CSRFトークン付きのリクエストもスロットを待つことをテスト。"""
+        httpx_mock.add_response(json={"ok": True}, is_reusable=True)
+        scheduler = RequestScheduler(1)
+        client = HttpClient(
+            {"api_key": "test", "base_url": "https://test.example.com", "timeout": 5, "retry_config": None},
+            scheduler=scheduler,
+        )
+
+        async with scheduler.slot(Priority.INTERACTIVE):
+            tasks = [
+                asyncio.create_task(client.post_form("/upload", {"file": b"data"})),
+                asyncio.create_task(client.request_without_auth("/auth/csrf-token")),
+                asyncio.create_task(
+                    client.request_with_csrf("/auth/me", "session=1", "csrf", {"priority": Priority.BACKGROUND})
+                ),
+            ]
+            await asyncio.sleep(0.05)
+            waiting = scheduler.waiting(), scheduler.waiting(Priority.BACKGROUND)
+            assert not httpx_mock.get_requests()
+        responses = await asyncio.gather(*tasks)
+
+        assert waiting == (3, 1)
+        assert all(response["success"] for response in responses)
@@ -0,0 +1,124 @@
+"""ストリーミングレスポンス処理のテスト。
+
+このモジュールには、トップレベルとresultキーの下のJSON配列を含む逐次デコーダーと、
+同期クライアントおよび非同期クライアントのストリーミング実行のテストケースが含まれています。
+"""
+
+import json
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+from pytest_httpx import HTTPXMock, IteratorStream
+
+import simplise_client
+from simplise_api_client.base import SimpliseClient
+from simplise_api_client.streaming import JsonArrayDecoder, iter_decoded
+
+
+def _split(data: bytes, size: int) -> list[bytes]:
+    """データを指定サイズのチャンクに分割する。"""
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+class TestDecoders:
+    """逐次デコーダーのテストケース。"""
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 16, 1024])
+    def test_json_array_items_are_decoded_across_chunk_boundaries(self, chunk_size: int) -> None:
+        """チャンク境界に関係なくJSON配列の要素がデコードされることをテスト。"""
+        # [AI GENERATED] 区切り文字やマルチバイト文字を含む要素を用意
+        items = ['a,]"b', {"k": [1, 2, {"n": None}]}, [], 1.5, True, "日本語"]
+        body = json.dumps(items).encode()
+
+        result = list(iter_decoded(_split(body, chunk_size), "json"))
+
+        assert result == items
+
+    def test_json_array_decoder_yields_items_before_array_is_complete(self) -> None:
+        """配列の受信完了前に確定した要素が返されることをテスト。"""
+        decoder = JsonArrayDecoder()
+
+        # [AI GENERATED] 2番目の要素の途中までを入力
+        assert decoder.feed(b'[{"a": 1}, {"b"') == [{"a": 1}]
+        assert decoder.feed(b": 2}]") == [{"b": 2}]
+        assert decoder.close() == []
+
+    @pytest.mark.parametrize("chunk_size", [1, 3, 16, 1024])
+    def test_json_array_under_result_key_is_decoded(self, chunk_size: int) -> None:
+        """レスポンスのresultキーの下にあるJSON配列の要素が、前後のメンバーに関係なくデコードされることをテスト。"""
+        items = ['a,]"b', {"k": [1, 2]}, 3]
+        body = json.dumps({"meta": {"result": [0], "note": "}"}, "result": items, "count": 3}).encode()
+
+        result = list(iter_decoded(_split(body, chunk_size), "json"))
+
+        assert result == items
+
+    def test_json_array_under_result_key_is_streamed(self) -> None:
+        """resultキーの下の配列の受信完了前に、確定した要素が返されることをテスト。"""
+        decoder = JsonArrayDecoder()
+
+        # [AI GENERATED] キーの途中と2番目の要素の途中までを入力
+        assert decoder.feed(b'{"res') == []
+        assert decoder.feed(b'ult": [{"a": 1}, {"b"') == [{"a": 1}]
+        assert decoder.feed(b": 2}]}") == [{"b": 2}]
+        assert decoder.close() == []
+
+    def test_json_object_without_result_array(self) -> None:
+        """resultキーの値が配列でなければその値を、resultキーがなければオブジェクト全体を返すことをテスト。"""
+        assert list(iter_decoded([b'{"result": 4', b"2}"], "json")) == [42]
+        assert list(iter_decoded([b'{"data": ', b"[1]}"], "json")) == [{"data": [1]}]
+
+    def test_json_non_array_body_is_yielded_as_single_item(self) -> None:
+        """配列でないJSON値が1つの要素として返されることをテスト。"""
+        assert list(iter_decoded([b'"2', b'2"'], "json")) == ["22"]
+
+    def test_incomplete_json_array_raises_error(self) -> None:
+        """途中で終わったJSON配列でValueErrorが発生することをテスト。"""
+        with pytest.raises(ValueError, match="Incomplete JSON array"):
+            list(iter_decoded([b"[1, 2"], "json"))
+
+    def test_ndjson_lines_are_decoded(self) -> None:
+        """改行区切りJSONの各行がデコードされることをテスト。"""
+        chunks = [b'{"a": 1}\n{"b"', b": 2}\n\n", b'"tail"']
+
+        assert list(iter_decoded(chunks, "ndjson")) == [{"a": 1}, {"b": 2}, "tail"]
+
+
+class TestSyncStreaming:
+    """同期クライアントのストリーミング実行のテストケース。"""
+
+    @patch("requests.post")
+    def test_execute_logic_stream_yields_decoded_items(self, mock_post: Mock) -> None:
+        """execute_logic_streamがレスポンスを逐次デコードして返すことをテスト。"""
+        # [AI GENERATED] ストリーミングレスポンスのモックを設定
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
+        mock_response.iter_content.return_value = iter([b'["1", ', b'"2"]'])
+        mock_response.raise_for_status.return_value = None
+        mock_post.return_value = mock_response
+
+        client = SimpliseClient(api_key="test_api_key")
+        result = list(client.action.execute_logic_stream({"var": "items"}, {"key": "value"}, "json"))
+
+        # [AI GENERATED] 要素がデコードされ、stream=Trueでリクエストされることを検証
+        assert result == ["1", "2"]
+        assert mock_post.call_args[1]["stream"] is True
+        assert b'name="input"' in bytes(mock_post.call_args[1]["data"])
+
+
+class TestAsyncStreaming:
+    """非同期クライアントのストリーミング実行のテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_execute_logic_stream_yields_ndjson_items(self, httpx_mock: HTTPXMock) -> None:
+        """非同期execute_logic_streamがNDJSONの各行を返すことをテスト。"""
+        httpx_mock.add_response(
+            url="https://test.example.com/action-logic",
+            method="POST",
+            stream=IteratorStream([b'{"i": 0}\n{"i"', b": 1}\n"]),
+        )
+        client = simplise_client.SimpliseClient(api_key="test_api_key", base_url="https://test.example.com")
+
+        result = [item async for item in client.action.execute_logic_stream({"var": "x"}, {"x": 1}, "ndjson")]
+
+        assert result == [{"i": 0}, {"i": 1}]
@@ -0,0 +1,175 @@
+"""代替サーバーのテスト。
+
+このモジュールには、`StandInServer` に対する同期・非同期クライアントとHttpClientの実際のHTTP通信、
+APIキーの検証、202ポーリング、Retry-After付きの429、応答の遅延、応答前に切断したクライアント、認証エンドポイントのテストケースが含まれています。
+"""
+
+import json
+import socket
+import struct
+import time
+from collections.abc import Iterator
+from urllib.parse import quote, urlsplit
+
+import pytest
+import requests
+
+from simplise_api_client import Action, AsyncSimpliseClient
+from simplise_api_client.base import SimpliseClient
+from simplise_api_client.testing import StandInServer
+from simplise_client import AuthClient, HttpClient
+from simplise_client.types import ApiError
+
+API_KEY = "test_api_key"
+RULE = {"decimal.add": [{"input": ["value"]}, "10"]}
+
+
+@pytest.fixture
+def server() -> Iterator[StandInServer]:
+    """APIキーを検証する代替サーバーを起動する。"""
+    with StandInServer(api_key=API_KEY) as server:
+        yield server
+
+
+def _http_client(url: str) -> HttpClient:
+    """代替サーバーに接続するHttpClientを返す。"""
+    return HttpClient({"api_key": API_KEY, "base_url": url, "timeout": 5, "retry_config": None})
+
+
+class TestRuleEndpoints:
+    """ルールを評価するエンドポイントのテストケース。"""
+
+    def test_sync_client(self, server: StandInServer) -> None:
+        """同期クライアントのmultipartとチャンク転送のリクエストがローカル評価器で評価されることをテスト。"""
+        client = SimpliseClient(api_key=API_KEY, base_url=server.url)
+
+        assert client.action.execute(Action.Decimal.add(Action.Data.input("value"), 10), {"value": "5"}) == "15"
+        assert client.action.execute_logic(RULE, iter([b'{"value": ', b'"5"}'])) == "15"
+        assert server.hits["/action-logic"] == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_async_client(self, server: StandInServer) -> None:
+        """非同期クライアントのリクエストが評価されることをテスト。"""
+        async with AsyncSimpliseClient(api_key=API_KEY, base_url=server.url) as client:
+            assert await client.action.execute_logic(RULE, {"value": "5"}) == "15"
+
+    @pytest.mark.asyncio
+    async def test_query_endpoints(self, server: StandInServer) -> None:
+        """/logicと/actionがクエリ文字列のルールとボディの入力データを評価することをテスト。"""
+        client = _http_client(server.url)
+
+        logic = await client.get("/logic?" + quote(json.dumps({"num.add": ["1", "2"]})))
+        action = await client.post("/action?" + quote(json.dumps(RULE)), {"value": "5"})
+
+        assert logic["data"] == 3  # noqa: PLR2004
+        assert action["data"] == 15  # noqa: PLR2004
+
+    def test_rejects_invalid_requests(self, server: StandInServer) -> None:
+        """APIキーが異なる場合は401、評価できないルールは400、未知のパスは404が返されることをテスト。"""
+        unauthorized = requests.post(
+            f"{server.url}/action-logic", json={"num.add": ["1"]}, headers={"Authorization": "Bearer wrong"}, timeout=5
+        )
+        unsupported = requests.post(
+            f"{server.url}/action-logic",
+            json={"str.upper": ["a"]},
+            headers={"Authorization": f"Bearer {API_KEY}"},
+            timeout=5,
+        )
+        missing = requests.get(f"{server.url}/unknown", timeout=5)
+
+        assert unauthorized.status_code == 401  # noqa: PLR2004
+        assert unsupported.status_code == 400  # noqa: PLR2004
+        assert missing.status_code == 404  # noqa: PLR2004
+
+
+class TestServerBehavior:
+    """遅延・202ポーリング・レート制限の設定のテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_accepted_polls(self) -> None:
+        """設定した回数の202を返した後、sp-resource-pathで結果が返されることをテスト。"""
+        with StandInServer(accepted_polls=2) as server:
+            response = await _http_client(server.url).post("/action-logic", {"decimal.add": ["5", "10"]})
+
+        assert response["data"] == 15  # noqa: PLR2004
+        assert server.hits["/action-logic"] == 1
+        assert sum(count for path, count in server.hits.items() if path.startswith("/results/")) == 2  # noqa: PLR2004
+
+    def test_rate_limit(self) -> None:
+        """制限を超えたリクエストにRetry-After付きの429が返されることをテスト。"""
+        with StandInServer(rate_limit=1, rate_window=60) as server:
+            first = requests.get(f"{server.url}/logic?" + quote(json.dumps({"num": ["1"]})), timeout=5)
+            second = requests.get(f"{server.url}/logic?" + quote(json.dumps({"num": ["1"]})), timeout=5)
+
+        assert first.status_code == 200  # noqa: PLR2004
+        assert second.status_code == 429  # noqa: PLR2004
+        assert second.headers["Retry-After"] == "60"
+
+    @pytest.mark.asyncio
+    async def test_http_client_retries_after_rate_limit(self) -> None:
+        """HttpClientがRetry-Afterの間待機し、ウィンドウのリセット後に成功することをテスト。"""
+        with StandInServer(rate_limit=1, rate_window=0.2) as server:
+            client = _http_client(server.url)
+            await client.post("/action-logic", {"num": ["1"]})
+            response = await client.post("/action-logic", {"num": ["2"]})
+
+        assert response["data"] == 2  # noqa: PLR2004
+        assert server.hits["/action-logic"] == 3  # noqa: PLR2004
+        assert client.metrics.snapshot()["/action-logic"].retries == 1
+
+    def test_latency(self) -> None:
+        """設定した遅延の後に応答が返されることをテスト。"""
+        with StandInServer(latency=0.1) as server:
+            started = time.perf_counter()
+            requests.get(f"{server.url}/logic?" + quote(json.dumps({"num": ["1"]})), timeout=5)
+
+        assert time.perf_counter() - started >= 0.1  # noqa: PLR2004
+
+    def test_client_disconnect(self, capsys: pytest.CaptureFixture[str]) -> None:
+        """応答前に切断したクライアントのエラーを出力せず、次のリクエストに応答することをテスト。"""
+        path = "/logic?" + quote(json.dumps({"num": ["1"]}))
+        with StandInServer(latency=0.1) as server:
+            address = urlsplit(server.url)
+            with socket.create_connection((address.hostname, address.port)) as connection:
+                # [AI GENERATED] 応答を待たずにRSTで切断する
+                connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+                connection.sendall(f"GET {path} HTTP/1.1\r\nHost: {address.netloc}\r\n\r\n".encode())
+            time.sleep(0.2)
+            response = requests.get(f"{server.url}{path}", timeout=5)
+
+        assert response.status_code == 200  # noqa: PLR2004
+        assert "Traceback" not in capsys.readouterr().err
+
+
+class TestAuthEndpoints:
+    """認証エンドポイントのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_auth_client(self) -> None:
+        """AuthClientのログイン・トークンの検証・パスワードのリセットが成功し、誤ったパスワードが拒否されることをテスト。"""
+        with StandInServer(api_key=API_KEY, users={"user": "password"}) as server:
+            auth = AuthClient(_http_client(server.url))
+
+            login = await auth.login({"username": "user", "password": "password"})
+            verify = await auth.verify_token()
+            reset = await auth.request_password_reset("user@example.com")
+            with pytest.raises(ApiError) as excinfo:
+                await auth.login({"username": "user", "password": "wrong"})
+
+        assert login["data"] == {"success": True}
+        assert verify["data"] == {"valid": True}
+        assert reset["data"] == {"success": True}
+        assert excinfo.value.status == 401  # noqa: PLR2004
+
+    def test_session_cookies(self, server: StandInServer) -> None:
+        """ログインのセッションクッキーでCSRFトークンを取得でき、ログアウト後は拒否されることをテスト。"""
+        with requests.Session() as session:
+            session.post(f"{server.url}/auth/login", json={"username": "user", "password": "password"}, timeout=5)
+            csrf = session.get(f"{server.url}/auth/csrf-token", timeout=5)
+            jwt = session.cookies["jwt"]
+            session.post(f"{server.url}/auth/logout", timeout=5)
+            after_logout = session.get(f"{server.url}/auth/csrf-token", cookies={"jwt": jwt}, timeout=5)
+
+        assert csrf.status_code == 200  # noqa: PLR2004
+        assert csrf.json()["csrfToken"] == csrf.cookies["csrf_token"]
+        assert after_logout.status_code == 401  # noqa: PLR2004
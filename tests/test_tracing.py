@@ -0,0 +1,154 @@
+"""トレーシングのテスト。
+
+このモジュールには、traceparentヘッダーの書式とルールのハッシュ、
+同期クライアントとHttpClientでのスパンの親子関係・属性・traceparentの伝播、トレーサー未設定時の動作のテストケースが含まれています。
+"""
+
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from unittest.mock import Mock, patch
+
+import pytest
+from pytest_httpx import HTTPXMock
+
+from simplise_api_client import Action
+from simplise_api_client.base import SimpliseClient
+from simplise_api_client.tracing import AttributeValue, rule_hash, traceparent
+from simplise_client import HttpClient
+
+BASE_URL = "https://test.example.com"
+TRACE_ID = 0x0AF7651916CD43DD8448EB211C80319C
+
+
+@dataclass(frozen=True)
+class FakeSpanContext:
+    """OpenTelemetryのSpanContextを模したスパンの識別子。"""
+
+    trace_id: int
+    span_id: int
+    trace_flags: int = 1
+    is_valid: bool = True
+
+
+@dataclass
+class FakeSpan:
+    """記録された属性と親スパンを保持するスパン。"""
+
+    name: str
+    context: FakeSpanContext
+    parent: "FakeSpan | None"
+    attributes: dict[str, AttributeValue] = field(default_factory=dict)
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        self.attributes[key] = value
+
+    def get_span_context(self) -> FakeSpanContext:
+        return self.context
+
+
+class FakeTracer:
+    """開始したスパンを記録する、OpenTelemetryのTracerと同じインターフェースのトレーサー。"""
+
+    def __init__(self) -> None:
+        self.spans: list[FakeSpan] = []
+        self._current: FakeSpan | None = None
+
+    @contextmanager
+    def start_as_current_span(
+        self, name: str, *, attributes: Mapping[str, AttributeValue] | None = None
+    ) -> Iterator[FakeSpan]:
+        span = FakeSpan(name, FakeSpanContext(TRACE_ID, len(self.spans) + 1), self._current, dict(attributes or {}))
+        self.spans.append(span)
+        parent, self._current = self._current, span
+        try:
+            yield span
+        finally:
+            self._current = parent
+
+    def named(self, name: str) -> list[FakeSpan]:
+        return [span for span in self.spans if span.name == name]
+
+
+class TestTracingHelpers:
+    """traceparentとルールのハッシュのテストケース。"""
+
+    def test_traceparent(self) -> None:
+        """W3C traceparentの書式で出力され、無効なスパンでは出力されないことをテスト。"""
+        span = FakeSpan("s", FakeSpanContext(TRACE_ID, 0xB7AD6B7169203331), None)
+        invalid = FakeSpan("s", FakeSpanContext(0, 0, 0, is_valid=False), None)
+
+        assert traceparent(span) == "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"
+        assert traceparent(invalid) is None
+
+    def test_rule_hash_ignores_key_order(self) -> None:
+        """キーの順序が異なっても同じルールは同じハッシュになることをテスト。"""
+        assert rule_hash({"a": 1, "b": [2]}) == rule_hash({"b": [2], "a": 1})
+        assert rule_hash({"a": 1}) != rule_hash({"a": 2})
+
+
+class TestClientTracing:
+    """クライアントでのスパンの記録のテストケース。"""
+
+    @patch("requests.post")
+    def test_sync_execute_spans(self, mock_post: Mock) -> None:
+        """実行のスパンの下に検証・シリアライズ・HTTPのスパンが作られ、HTTPのスパンが伝播されることをテスト。"""
+        mock_post.return_value = Mock(status_code=200, content=b"15", text="15")
+        tracer = FakeTracer()
+        client = SimpliseClient(api_key="test_api_key", base_url=BASE_URL, tracer=tracer)
+
+        assert client.action.execute(Action.Decimal.add(Action.Data.input("value"), 10), {"value": "5"}) == "15"
+
+        (root,) = tracer.named("simplise.execute")
+        (http,) = tracer.named("simplise.http")
+        assert [span.name for span in tracer.spans if span.parent is root] == [
+            "simplise.validate",
+            "simplise.serialize",
+            "simplise.http",
+        ]
+        assert len(str(root.attributes["simplise.rule_hash"])) == 16  # noqa: PLR2004
+        assert http.attributes["http.response.status_code"] == 200  # noqa: PLR2004
+        assert http.attributes["http.request.body.size"] == int(mock_post.call_args[1]["headers"]["Content-Length"])
+        assert http.attributes["http.response.body.size"] == len(b"15")
+        assert mock_post.call_args[1]["headers"]["traceparent"] == traceparent(http)
+
+    @patch("requests.post")
+    def test_without_tracer(self, mock_post: Mock) -> None:
+        """トレーサーが設定されていない場合はtraceparentヘッダーを送信しないことをテスト。"""
+        mock_post.return_value = Mock(status_code=200, content=b"15", text="15")
+        client = SimpliseClient(api_key="test_api_key", base_url=BASE_URL)
+
+        client.action.execute_logic({"var": "a"}, {"a": "1"})
+
+        assert not client.tracing
+        assert "traceparent" not in mock_post.call_args[1]["headers"]
+
+    @pytest.mark.asyncio
+    async def test_http_client_retries_and_polls(self, httpx_mock: HTTPXMock) -> None:
+        """HttpClientの各試行・Retry-Afterの待機・202ポーリングがスパンとして記録されることをテスト。"""
+        httpx_mock.add_response(url=f"{BASE_URL}/action-logic", status_code=429, headers={"retry-after": "0"})
+        httpx_mock.add_response(
+            url=f"{BASE_URL}/action-logic",
+            status_code=202,
+            headers={"retry-after": "0", "sp-resource-path": "/results/1"},
+        )
+        httpx_mock.add_response(url=f"{BASE_URL}/results/1", json={"result": "ok"})
+        tracer = FakeTracer()
+        client = HttpClient(
+            {"api_key": "test", "base_url": BASE_URL, "timeout": 5, "retry_config": None}, tracer=tracer
+        )
+
+        await client.post("/action-logic", {"var": "a"})
+
+        assert [span.name for span in tracer.spans] == [
+            "simplise.http",
+            "simplise.retry_wait",
+            "simplise.http",
+            "simplise.poll_wait",
+            "simplise.http",
+        ]
+        attempts = tracer.named("simplise.http")
+        assert [span.attributes["http.response.status_code"] for span in attempts] == [429, 202, 200]
+        assert [request.headers["traceparent"] for request in httpx_mock.get_requests()] == [
+            traceparent(span) for span in attempts
+        ]
@@ -0,0 +1,192 @@
+"""DNSキャッシュとコネクションの事前確立のテスト。
+
+このモジュールには、DnsCacheのTTLに従ったキャッシュ、同時の名前解決の集約、解決に失敗した場合の期限切れのアドレスの使用、
+代替サーバーに対するDNSキャッシュを経由した接続と接続できないアドレスの読み飛ばし、プロキシを経由した接続、
+warmupによるコネクションの事前確立と再利用・接続エラーと5xxの記録、イベントループをまたいだHttpClientの使用のテストケースが含まれています。
+"""
+
+import asyncio
+
+import pytest
+from pytest_httpx import HTTPXMock
+
+from simplise_api_client.testing import StandInServer
+from simplise_client import DnsCache, HttpClient, PooledTransport, SimpliseClient
+
+HOST = "simplise.test"
+RULE = {"decimal.add": ["1", "2"]}
+
+
+class FakeResolver:
+    """呼び出し回数を記録し、決まったアドレスとTTLを返すリゾルバー。"""
+
+    def __init__(self, addresses: list[str], ttl: float | None = None, delay: float = 0.0) -> None:
+        self.addresses = addresses
+        self.ttl = ttl
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+
+    async def __call__(self, host: str, port: int) -> tuple[list[str], float | None]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            msg = f"cannot resolve {host}:{port}"
+            raise OSError(msg)
+        return self.addresses, self.ttl
+
+
+def _client(url: str, resolver: FakeResolver) -> HttpClient:
+    """名前解決にリゾルバーを使用するHttpClientを返す。"""
+    return HttpClient(
+        {"api_key": "test", "base_url": url, "timeout": 5, "retry_config": None},
+        dns_cache=DnsCache(resolver=resolver),
+    )
+
+
+class TestDnsCache:
+    """DnsCacheのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_caches_for_ttl(self) -> None:
+        """リゾルバーが返したTTLの間はキャッシュし、期限が過ぎると再び解決することをテスト。"""
+        resolver = FakeResolver(["10.0.0.1"], ttl=0.05)
+        cache = DnsCache(resolver=resolver, min_ttl=0.01)
+
+        assert await cache.resolve(HOST, 443) == ["10.0.0.1"]
+        assert await cache.resolve(HOST, 443) == ["10.0.0.1"]
+        assert resolver.calls == 1
+        await asyncio.sleep(0.06)
+        await cache.resolve(HOST, 443)
+        assert resolver.calls == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_ttl_bounds(self) -> None:
+        """TTLを報告しないリゾルバーには既定のTTLを、報告されたTTLには下限を適用することをテスト。"""
+        resolver = FakeResolver(["10.0.0.1"], ttl=0)
+        cache = DnsCache(resolver=resolver, min_ttl=60)
+
+        await cache.resolve(HOST, 443)
+        await cache.resolve(HOST, 443)
+        assert resolver.calls == 1
+
+        resolver = FakeResolver(["10.0.0.1"])
+        cache = DnsCache(0, resolver=resolver)
+        await cache.resolve(HOST, 443)
+        await cache.resolve(HOST, 443)
+        assert resolver.calls == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_share_resolution(self) -> None:
+        """同じホスト名の同時の名前解決が1回にまとめられることをテスト。"""
+        resolver = FakeResolver(["10.0.0.1"], delay=0.05)
+        cache = DnsCache(resolver=resolver)
+
+        results = await asyncio.gather(*(cache.resolve(HOST, 443) for _ in range(10)))
+
+        assert results == [["10.0.0.1"]] * 10
+        assert resolver.calls == 1
+        assert cache.resolutions == 1
+
+    @pytest.mark.asyncio
+    async def test_serves_stale_on_failure(self) -> None:
+        """期限切れの後に名前解決が失敗した場合は、期限切れのアドレスを使用することをテスト。"""
+        resolver = FakeResolver(["10.0.0.1"])
+        cache = DnsCache(0, resolver=resolver)
+        await cache.resolve(HOST, 443)
+
+        resolver.fail = True
+        assert await cache.resolve(HOST, 443) == ["10.0.0.1"]
+
+        cache.invalidate()
+        with pytest.raises(OSError, match="cannot resolve"):
+            await cache.resolve(HOST, 443)
+
+
+class TestPooledTransport:
+    """HttpClientのコネクションプールとDNSキャッシュのテストケース。"""
+
+    @pytest.mark.asyncio
+    async def test_connects_through_dns_cache(self) -> None:
+        """ホスト名をDNSキャッシュで解決し、接続できないアドレスは読み飛ばすことをテスト。"""
+        resolver = FakeResolver(["127.0.0.2", "127.0.0.1"])
+        with StandInServer() as server:
+            port = server.url.rsplit(":", 1)[1]
+            async with _client(f"http://{HOST}:{port}", resolver) as client:
+                responses = await asyncio.gather(*(client.post("/action-logic", RULE) for _ in range(5)))
+
+        assert all(response["data"] == 3 for response in responses)  # noqa: PLR2004
+        assert resolver.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_connects_through_proxy(self) -> None:
+        """DNSキャッシュを使用する場合もプロキシを経由し、プロキシのホスト名をDNSキャッシュで解決することをテスト。"""
+        resolver = FakeResolver(["127.0.0.1"])
+        with StandInServer() as server:
+            port = server.url.rsplit(":", 1)[1]
+            client = HttpClient(
+                {"api_key": "test", "base_url": "http://api.invalid", "timeout": 5, "retry_config": None},
+                dns_cache=DnsCache(resolver=resolver),
+                proxy=f"http://{HOST}:{port}",
+            )
+            async with client:
+                response = await client.post("/action-logic", RULE)
+
+        assert response["data"] == 3  # noqa: PLR2004
+        assert resolver.calls == 1
+
+    def test_rejects_socks_proxy(self) -> None:
+        """DNSキャッシュとSOCKSプロキシの組み合わせを拒否することをテスト。"""
+        with pytest.raises(ValueError, match="HTTP and HTTPS proxies"):
+            PooledTransport(DnsCache(), proxy="socks5://proxy.invalid:1080")
+
+    @pytest.mark.asyncio
+    async def test_warmup_opens_reused_connections(self) -> None:
+        """warmupで開いたコネクションを、その後の同時のリクエストが接続せずに使用することをテスト。"""
+        resolver = FakeResolver(["127.0.0.1"])
+        with StandInServer(latency=0.05) as server:
+            port = server.url.rsplit(":", 1)[1]
+            async with _client(f"http://{HOST}:{port}", resolver) as client:
+                warmed = await client.warmup(4)
+                assert client.transport is not None
+                idle = client.transport.idle_connections
+
+                responses = await asyncio.gather(*(client.post("/action-logic", RULE) for _ in range(4)))
+
+        assert (warmed, idle) == (4, 4)
+        assert all(response["timings"].connect is None for response in responses)
+        assert resolver.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_warmup_marks_unreachable_base_url(self) -> None:
+        """接続できないベースURLへのwarmupが失敗として記録されることをテスト。"""
+        with StandInServer() as server:
+            client = SimpliseClient(api_key="test", base_url=["http://127.0.0.2:1", server.url])
+
+            warmed = await client.http_client.warmup(2)
+            await client.http_client.aclose()
+
+        assert warmed == 2  # noqa: PLR2004
+        assert client.http_client.load_balancer.backends[0].consecutive_failures == 2  # noqa: PLR2004
+
+    @pytest.mark.asyncio
+    async def test_warmup_marks_server_error(self, httpx_mock: HTTPXMock) -> None:
+        """5xxを返したベースURLへのwarmupが失敗として記録されることをテスト。"""
+        httpx_mock.add_response(url="https://tokyo.example.com/", status_code=503)
+        httpx_mock.add_response(url="https://osaka.example.com/")
+        client = SimpliseClient(api_key="test", base_url=["https://tokyo.example.com", "https://osaka.example.com"])
+
+        await client.warmup()
+
+        failing, healthy = client.http_client.load_balancer.backends
+        assert (failing.consecutive_failures, healthy.consecutive_failures) == (1, 0)
+
+    def test_reused_across_event_loops(self) -> None:
+        """別のイベントループで使用した場合に、新しいコネクションプールを作成することをテスト。"""
+        with StandInServer() as server:
+            client = HttpClient({"api_key": "test", "base_url": server.url, "timeout": 5, "retry_config": None})
+
+            first = asyncio.run(client.post("/action-logic", RULE))
+            second = asyncio.run(client.post("/action-logic", RULE))
+
+        assert first["data"] == second["data"] == 3  # noqa: PLR2004